@@ -0,0 +1,64 @@
+"""
+Alembic-Umgebung: Migrationen werden aus database/models.py erzeugt.
+
+Aufrufe aus dem Bot (Database.migrate) übergeben ihre Verbindung über
+config.attributes['connection']; auf der Kommandozeile wird DATABASE_URL
+aus der .env verwendet.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from database.models import Base
+
+alembic_config = context.config
+target_metadata = Base.metadata
+
+
+def _database_url() -> str:
+    from config import config
+    return config.DATABASE_URL
+
+
+def _configure(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        compare_type=True,
+        # SQLite kann kein ALTER COLUMN - Änderungen per Tabellen-Kopie
+        render_as_batch=connection.dialect.name == 'sqlite'
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_offline():
+    """SQL-Skript statt direkter Ausführung (alembic upgrade head --sql)."""
+    context.configure(
+        url=_database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={'paramstyle': 'named'},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = alembic_config.attributes.get('connection')
+    if connection is not None:
+        _configure(connection)
+        return
+
+    if alembic_config.config_file_name is not None:
+        fileConfig(alembic_config.config_file_name)
+    engine = create_engine(_database_url(), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        _configure(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
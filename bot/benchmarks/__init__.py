@@ -0,0 +1 @@
+# Benchmarks für Halloween Party Bot
@@ -0,0 +1,79 @@
+"""
+Pytest-Benchmark Konfiguration und Fixtures mit synthetischen Datenbanken.
+
+Baselines liegen in benchmarks/baselines (je Maschine ein Unterordner).
+Ohne --benchmark-save wird gegen die neueste Baseline verglichen und bei
+einer Regression über REGRESSION_THRESHOLD (Median fast doppelt so langsam) abgebrochen.
+"""
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+# Bot module zum Python path hinzufügen
+bot_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(bot_dir))
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', '123456:BENCHMARK')
+
+BASELINE_DIR = Path(__file__).parent / 'baselines'
+# Großzügig: Sub-Millisekunden-Benchmarks schwanken auf geteilten Maschinen um ±50 %;
+# gesucht sind Ausreißer wie ein neuer Tabellen-Scan (strenger: --benchmark-compare-fail)
+REGRESSION_THRESHOLD = 'median:90%'
+
+# Anzahl synthetischer Spieler je Datenbank
+DATA_SIZES = [100, 1_000, 10_000]
+
+
+def pytest_configure(config):
+    """Baselines im Repo ablegen und standardmäßig gegen die letzte vergleichen"""
+    if not config.pluginmanager.hasplugin('benchmark'):
+        return
+    from pytest_benchmark.utils import parse_compare_fail
+    
+    if config.option.benchmark_storage == 'file://./.benchmarks':
+        config.option.benchmark_storage = f"file://{BASELINE_DIR}"
+    if config.option.benchmark_group_by == 'group':
+        config.option.benchmark_group_by = 'func'
+    
+    saving = config.option.benchmark_save or config.option.benchmark_autosave
+    if saving or config.option.benchmark_compare or not any(BASELINE_DIR.rglob('*.json')):
+        return
+    config.option.benchmark_compare = True
+    if not config.option.benchmark_compare_fail:
+        config.option.benchmark_compare_fail = [parse_compare_fail(REGRESSION_THRESHOLD)]
+
+
+@pytest.fixture(scope="session", params=DATA_SIZES, ids=lambda size: f"{size}u")
+def bench_database(request, tmp_path_factory):
+    """SQLite-Datei wie im Betrieb (WAL, Pragmas) mit Teams und synthetischen Spielern"""
+    from database import crud
+    from database.db import Database
+    from tools.generate_load_data import generate_load_data
+    from utils.yaml_loader import UniverseLoader
+    
+    path = tmp_path_factory.mktemp('bench') / f"bench_{request.param}.db"
+    database = Database(f"sqlite:///{path}")
+    database.create_tables()
+    with database.get_session() as session:
+        crud.upsert_teams(session, UniverseLoader().get_teams())
+        generate_load_data(session, request.param)
+    yield database
+    database.engine.dispose()
+
+
+@pytest.fixture
+def scratch_database(bench_database, tmp_path):
+    """Kopie von bench_database für schreibende Benchmarks (jede Runde fügt Zeilen hinzu)"""
+    from database.db import Database
+    
+    path = tmp_path / 'scratch.db'
+    source = sqlite3.connect(bench_database.engine.url.database)
+    target = sqlite3.connect(path)
+    source.backup(target)
+    source.close()
+    target.close()
+    database = Database(f"sqlite:///{path}")
+    yield database
+    database.engine.dispose()
@@ -0,0 +1,108 @@
+"""
+Benchmarks für die CRUD-Hot-Paths (je Datenbankgröße aus DATA_SIZES).
+
+Jede Runde öffnet eine eigene Session - wie ein Handler pro Update. Schreibende
+Benchmarks laufen auf einer Kopie, damit die Lese-Benchmarks immer dieselbe
+Datenmenge sehen.
+"""
+import itertools
+
+import pytest
+
+from database import crud
+from database.models import SubmissionType, User
+from tools.generate_load_data import SYNTHETIC_TELEGRAM_ID_START
+
+# Neue Spieler oberhalb der synthetischen Daten (bis 10 Mio. Testspieler frei)
+NEW_TELEGRAM_IDS = itertools.count(SYNTHETIC_TELEGRAM_ID_START + 10_000_000)
+
+
+@pytest.fixture(scope="module")
+def sample_user(bench_database):
+    """Ein synthetischer Spieler aus der Mitte der Rangliste: (id, telegram_id, username)"""
+    with bench_database.get_session() as session:
+        count = session.query(User).count()
+        user = session.query(User).order_by(User.total_points.desc()).offset(count // 2).first()
+        return user.id, user.telegram_id, user.username
+
+
+class TestUserBenchmarks:
+    """Benchmarks: Spieler anlegen, laden und suchen"""
+    
+    def test_get_or_create_user_known(self, benchmark, bench_database, sample_user):
+        """Benchmark: Bekannter Spieler (Weg jedes Handlers)"""
+        _, telegram_id, username = sample_user
+        
+        def run():
+            with bench_database.get_session() as session:
+                return crud.get_or_create_user(session, telegram_id, username, username.replace('_', ' '))
+        
+        assert benchmark(run) is not None
+    
+    def test_get_or_create_user_new(self, benchmark, scratch_database):
+        """Benchmark: Neuer Spieler (/start)"""
+        def run():
+            with scratch_database.get_session() as session:
+                return crud.get_or_create_user(session, next(NEW_TELEGRAM_IDS), 'bench', 'Bench')
+        
+        assert benchmark(run) is not None
+    
+    @pytest.mark.parametrize('kind', ['telegram_id', 'username', 'miss'])
+    def test_find_user_by_identifier(self, benchmark, bench_database, sample_user, kind):
+        """Benchmark: Admin-Suche per ID, Username und ohne Treffer (voller Scan)"""
+        _, telegram_id, username = sample_user
+        identifier = {'telegram_id': str(telegram_id), 'username': f"@{username}", 'miss': 'Niemand Bekanntes'}[kind]
+        
+        def run():
+            with bench_database.get_session() as session:
+                return crud.find_user_by_identifier(session, identifier)
+        
+        result = benchmark(run)
+        assert (result is None) == (kind == 'miss')
+
+
+class TestSubmissionBenchmarks:
+    """Benchmarks: Submissions samt Ledger-Buchung"""
+    
+    def test_create_submission(self, benchmark, scratch_database, sample_user):
+        """Benchmark: Genehmigtes Partyfoto mit Punkten"""
+        user_id = sample_user[0]
+        
+        def run():
+            with scratch_database.get_session() as session:
+                return crud.create_submission(
+                    session, user_id, SubmissionType.PARTY_PHOTO,
+                    photo_file_id='bench', points_awarded=1
+                ).id
+        
+        assert benchmark(run)
+
+
+class TestLeaderboardBenchmarks:
+    """Benchmarks: Statistiken und Ranglisten (/points, /leaderboard)"""
+    
+    def test_get_user_stats(self, benchmark, bench_database, sample_user):
+        """Benchmark: Statistik eines Spielers inkl. Ranking"""
+        user_id = sample_user[0]
+        
+        def run():
+            with bench_database.get_session() as session:
+                return crud.get_user_stats(session, user_id)
+        
+        assert benchmark(run)['total_users'] > 0
+    
+    def test_get_top_players(self, benchmark, bench_database):
+        """Benchmark: Top-10-Spieler"""
+        def run():
+            with bench_database.get_session() as session:
+                return crud.get_top_players(session, limit=10)
+        
+        assert len(benchmark(run)) == 10
+    
+    def test_get_top_teams(self, benchmark, bench_database):
+        """Benchmark: Top-10-Teams aus team_scores"""
+        def run():
+            with bench_database.get_session() as session:
+                return crud.get_top_teams(session, limit=10)
+        
+        assert benchmark(run)
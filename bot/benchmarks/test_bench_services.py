@@ -0,0 +1,58 @@
+"""
+Benchmarks für Foto-Speicherung und Template-Rendering.
+"""
+import io
+
+import pytest
+from PIL import Image
+
+from services.photo_manager import PhotoManager
+from services.template_manager import TemplateManager
+
+# Kamera-Auflösungen: Telegram-komprimiert, groß, Handy-Original
+PHOTO_SIZES = {'1280x960': (1280, 960), '2560x1920': (2560, 1920), '4032x3024': (4032, 3024)}
+
+
+def _jpeg(width: int, height: int) -> bytes:
+    """Foto mit Verlauf (komprimiert realistischer als eine Einfarbfläche)"""
+    gradient = Image.linear_gradient('L').resize((width, height))
+    image = Image.merge('RGB', (gradient, gradient.rotate(90), gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+class TestPhotoManagerBenchmarks:
+    """Benchmarks: Foto speichern inkl. Thumbnail"""
+    
+    @pytest.mark.parametrize('size', list(PHOTO_SIZES))
+    def test_save_photo(self, benchmark, tmp_path, size):
+        """Benchmark: save_photo je Auflösung"""
+        manager = PhotoManager()
+        manager.photos_base = tmp_path
+        manager._ensure_directories()
+        photo = _jpeg(*PHOTO_SIZES[size])
+        
+        photo_path, thumbnail_path = benchmark(manager.save_photo, photo, 123456789, 1, 'party', None, 'Bench')
+        assert photo_path and thumbnail_path
+
+
+class TestTemplateBenchmarks:
+    """Benchmarks: Punkte-Übersicht rendern"""
+    
+    @pytest.mark.parametrize('films', [0, 10, 50])
+    def test_render_points(self, benchmark, films):
+        """Benchmark: render_points mit wachsender Liste erkannter Filme"""
+        manager = TemplateManager(auto_reload=False)
+        top_players = [{'name': f"Spieler {i}", 'points': 100 - i, 'team': 'Matrix'} for i in range(10)]
+        top_teams = [{'team_name': f"Team {i}", 'total_points': 500 - i, 'member_count': 4} for i in range(10)]
+        
+        text = benchmark(
+            manager.render_points,
+            first_name='Bench', total_points=42, party_photos_count=12, party_points=12,
+            film_count=films, film_points=films * 3, team_points=5, puzzle_points=10,
+            team_name='Matrix', recognized_films=[f"Film {i}" for i in range(films)],
+            ranking=7, total_users=200, film_submitted=films + 2, film_approved=films,
+            top_players=top_players, top_teams=top_teams
+        )
+        assert 'Bench' in text
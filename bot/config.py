@@ -22,11 +22,27 @@ class Config:
         if not self.TELEGRAM_BOT_TOKEN:
             raise ValueError("TELEGRAM_BOT_TOKEN nicht in .env gefunden!")
         
+        # Bot-API-Endpunkte (für einen lokalen Bot-API-Server oder Tests)
+        self.TELEGRAM_BASE_URL = os.getenv('TELEGRAM_BASE_URL', 'https://api.telegram.org/bot')
+        self.TELEGRAM_BASE_FILE_URL = os.getenv('TELEGRAM_BASE_FILE_URL', 'https://api.telegram.org/file/bot')
+        
         # OpenAI API
         self.OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
         
         # Database
         self.DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///bot.db')
+        # PostgreSQL: Connection-Pool und Timeouts (für SQLite ohne Wirkung)
+        self.DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+        self.DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+        self.DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+        self.DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+        self.DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '5000'))
+        # Schema beim Start per Alembic aktualisieren (PostgreSQL)
+        self.DB_AUTO_MIGRATE = os.getenv('DB_AUTO_MIGRATE', 'true').lower() in ('1', 'true', 'yes')
+        
+        # User-Cache vor get_or_create_user (telegram_id → Primärschlüssel + Name)
+        self.USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+        self.USER_CACHE_TTL_SECONDS = float(os.getenv('USER_CACHE_TTL_SECONDS', '300'))
         
         # Admin User IDs
         admin_ids_str = os.getenv('ADMIN_USER_IDS', '')
@@ -44,6 +60,11 @@ class Config:
         # Environment
         self.ENVIRONMENT = os.getenv('ENVIRONMENT', 'development')
         self.LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+        # Max. Anzahl wartender Log-Einträge (Writer-Thread), danach wird verworfen
+        self.LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+        # KI-Event-Log (ai_events.jsonl): Rotation nach Größe (MB) oder Alter (Minuten)
+        self.AI_EVENTS_MAX_MB = float(os.getenv('AI_EVENTS_MAX_MB', '5'))
+        self.AI_EVENTS_ROTATE_MINUTES = float(os.getenv('AI_EVENTS_ROTATE_MINUTES', '60'))
         
         # File Storage - alle Daten im data/ Verzeichnis
         script_dir = Path(__file__).parent
@@ -52,6 +73,11 @@ class Config:
         
         self.PHOTOS_BASE_PATH = data_path / 'photos'
         self.LOGS_BASE_PATH = data_path / 'logs'
+        self.REFERENCE_INDEX_PATH = data_path / 'reference_index'
+        self.TEMPLATE_CACHE_PATH = data_path / 'template_cache'
+        self.ANALYTICS_DB_PATH = data_path / 'analytics' / 'ai_events.sqlite'
+        self.RATE_LIMIT_DB_PATH = data_path / 'rate_limits.sqlite'
+        self.SNAPSHOT_PATH = data_path / 'snapshots'
         
         # AI Settings
         self.AI_CONFIDENCE_THRESHOLD = int(
@@ -60,6 +86,102 @@ class Config:
         self.AI_TIMEOUT_SECONDS = int(
             os.getenv('AI_TIMEOUT_SECONDS', '15')
         )
+        # Max. Anzahl gecachter KI-Bewertungen (gleiches Bild + gleicher Prompt)
+        self.AI_VERDICT_CACHE_SIZE = int(
+            os.getenv('AI_VERDICT_CACHE_SIZE', '256')
+        )
+        # Ab dieser Ähnlichkeit (0-100) zu den Referenzbildern des genannten
+        # Films gilt das Foto als Referenz-Treffer
+        self.REFERENCE_MATCH_THRESHOLD = int(
+            os.getenv('REFERENCE_MATCH_THRESHOLD', '80')
+        )
+        # Referenz-Treffer: Hinweis an den User und niedrige Bildauflösung für die KI.
+        # Das Embedding vergleicht nur Farb-Layout/Histogramm (keine Film-Identität) -
+        # daher standardmäßig aus, das Ranking wird dann nur geloggt
+        self.REFERENCE_MATCH_SHORTCUT = os.getenv(
+            'REFERENCE_MATCH_SHORTCUT', 'false'
+        ).lower() in ('1', 'true', 'yes')
+        
+        # Templates: In Production kein Stat-Check pro Render (Änderungen erst nach Neustart)
+        self.TEMPLATE_AUTO_RELOAD = os.getenv(
+            'TEMPLATE_AUTO_RELOAD',
+            'false' if self.ENVIRONMENT.lower() == 'production' else 'true'
+        ).lower() in ('1', 'true', 'yes')
+        # Max. Anzahl gecachter Renders für Templates mit wenigen Varianten (help/welcome)
+        self.TEMPLATE_RENDER_CACHE_SIZE = int(
+            os.getenv('TEMPLATE_RENDER_CACHE_SIZE', '512')
+        )
+        
+        # Hot-Reload von universen.yaml: Prüfintervall in Sekunden (0 = aus)
+        self.UNIVERSE_RELOAD_INTERVAL = float(
+            os.getenv('UNIVERSE_RELOAD_INTERVAL', '5')
+        )
+        
+        # Punkte pro Einreichungs-Typ. Nach einer Änderung gleicht
+        # `python -m tools.replay_points --apply` bestehende Einreichungen an.
+        self.POINTS_PARTY_PHOTO = int(os.getenv('POINTS_PARTY_PHOTO', '1'))
+        self.POINTS_FILM_REFERENCE = int(os.getenv('POINTS_FILM_REFERENCE', '20'))
+        self.POINTS_TEAM_JOIN = int(os.getenv('POINTS_TEAM_JOIN', '25'))
+        self.POINTS_PUZZLE = int(os.getenv('POINTS_PUZZLE', '25'))
+        
+        # Rate-Limits für Foto-Einreichungen pro User ("Anzahl/Sekunden", 0 = unbegrenzt).
+        # Die Anzahl ist zugleich der erlaubte Burst.
+        self.RATE_LIMIT_PARTY_PHOTO = os.getenv('RATE_LIMIT_PARTY_PHOTO', '20/60')
+        self.RATE_LIMIT_FILM_REFERENCE = os.getenv('RATE_LIMIT_FILM_REFERENCE', '5/60')
+        self.RATE_LIMIT_PUZZLE = os.getenv('RATE_LIMIT_PUZZLE', '3/60')
+        # Buckets in SQLite sichern (überleben Neustarts), Sicherungsintervall in Sekunden
+        self.RATE_LIMIT_PERSIST = os.getenv('RATE_LIMIT_PERSIST', 'false').lower() in ('1', 'true', 'yes')
+        self.RATE_LIMIT_FLUSH_INTERVAL = float(os.getenv('RATE_LIMIT_FLUSH_INTERVAL', '30'))
+        
+        # Max. Anzahl parallel verarbeiteter Updates (1 = alles nacheinander).
+        # Updates desselben Chats laufen immer in Eingangsreihenfolge.
+        self.CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', '16'))
+        
+        # Foto-Submissions in einer Hintergrund-Pipeline verarbeiten (false = inline im Handler).
+        # Worker pro Stufe ("stufe=anzahl,...", nicht genannte Stufen: 1) und max. wartende
+        # Jobs pro Stufe - ist eine Queue voll, wartet die vorherige Stufe bzw. der Handler
+        self.SUBMISSION_PIPELINE = os.getenv('SUBMISSION_PIPELINE', 'true').lower() in ('1', 'true', 'yes')
+        self.PIPELINE_WORKERS = os.getenv(
+            'PIPELINE_WORKERS', 'download=8,persist=2,thumbnail=2,evaluate=8,notify=4'
+        )
+        self.PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '64'))
+        
+        # Update-Empfang: 'polling' (default) oder 'webhook'. Im Webhook-Modus
+        # lauscht der Bot lokal, der Reverse-Proxy leitet WEBHOOK_URL dorthin weiter.
+        self.BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+        if self.BOT_MODE not in ('polling', 'webhook'):
+            raise ValueError(f"Ungültiger BOT_MODE: {self.BOT_MODE} (erlaubt: polling, webhook)")
+        self.WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+        self.WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '127.0.0.1')
+        self.WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+        self.WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram').strip('/')
+        self.WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN') or None
+        if self.BOT_MODE == 'webhook' and not self.WEBHOOK_URL:
+            raise ValueError("BOT_MODE=webhook benötigt WEBHOOK_URL (öffentliche URL des Reverse-Proxys)")
+        
+        # Lokaler Prometheus-Endpoint (/metrics), 0 = aus (default - 9100 belegt oft node_exporter)
+        self.METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+        self.METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+        
+        # Konsistente Kopien der SQLite-Datenbank (Online-Backup-API) für Auswertungen.
+        # Intervall in Minuten (0 = nur manuell per /snapshot), Aufbewahrung:
+        # die letzten N Snapshots plus der jeweils neueste der letzten N Tage
+        self.SNAPSHOT_INTERVAL_MINUTES = float(os.getenv('SNAPSHOT_INTERVAL_MINUTES', '60'))
+        self.SNAPSHOT_KEEP_LAST = int(os.getenv('SNAPSHOT_KEEP_LAST', '24'))
+        self.SNAPSHOT_KEEP_DAILY = int(os.getenv('SNAPSHOT_KEEP_DAILY', '7'))
+        
+        # Live-Rangliste für Displays (HTML + Server-Sent Events), 0 = aus.
+        # Max. ein Push pro LEADERBOARD_PUSH_INTERVAL Sekunden, egal wie viele Punkte fallen.
+        self.LEADERBOARD_HOST = os.getenv('LEADERBOARD_HOST', '0.0.0.0')
+        self.LEADERBOARD_PORT = int(os.getenv('LEADERBOARD_PORT', '0'))
+        self.LEADERBOARD_PUSH_INTERVAL = float(os.getenv('LEADERBOARD_PUSH_INTERVAL', '0.5'))
+        self.LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', '10'))
+        
+        # Speicher-Bericht ins Log alle N Minuten (0 = aus), Warnung ab RSS in MB (0 = nie).
+        # tracemalloc mit N Frames pro Allokation (0 = aus, kostet CPU; per /memory start zuschaltbar)
+        self.MEMORY_REPORT_INTERVAL_MINUTES = float(os.getenv('MEMORY_REPORT_INTERVAL_MINUTES', '15'))
+        self.MEMORY_RSS_WARN_MB = int(os.getenv('MEMORY_RSS_WARN_MB', '0'))
+        self.MEMORY_TRACE_FRAMES = int(os.getenv('MEMORY_TRACE_FRAMES', '0'))
         
         # Pfade sicherstellen
         self._ensure_paths()
@@ -75,6 +197,15 @@ class Config:
         # Log-Verzeichnis
         self.LOGS_BASE_PATH.mkdir(parents=True, exist_ok=True)
     
+    def point_rules(self) -> dict:
+        """Punkte pro Submission-Typ (Schlüssel = SubmissionType.value)."""
+        return {
+            'party_photo': self.POINTS_PARTY_PHOTO,
+            'film_reference': self.POINTS_FILM_REFERENCE,
+            'team_join': self.POINTS_TEAM_JOIN,
+            'puzzle': self.POINTS_PUZZLE,
+        }
+    
     def is_admin(self, user_id: int) -> bool:
         """
         Prüft, ob ein User Admin-Rechte hat.
@@ -91,6 +222,10 @@ class Config:
         """Prüft, ob Bot im Production-Modus läuft."""
         return self.ENVIRONMENT.lower() == 'production'
     
+    def webhook_endpoint(self) -> str:
+        """Vollständige öffentliche Webhook-URL (WEBHOOK_URL + WEBHOOK_PATH)."""
+        return f"{self.WEBHOOK_URL.rstrip('/')}/{self.WEBHOOK_PATH}"
+    
     def is_development(self) -> bool:
         """Prüft, ob Bot im Development-Modus läuft."""
         return self.ENVIRONMENT.lower() == 'development'
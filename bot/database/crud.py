@@ -2,15 +2,20 @@
 CRUD-Operationen für die Datenbank.
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Optional, List
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import Any, Callable, Dict, Mapping, Optional, List
 import logging
 
 from database.models import (
-    User, Team, Submission, EasterEgg, AdminLog,
+    User, Team, Submission, EasterEgg, AdminLog, PointEvent, UserScore, TeamScore,
     SubmissionType, SubmissionStatus
 )
+from database.user_cache import CachedUser, user_cache
+from config import config
 
 logger = logging.getLogger('bot.database.crud')
 
@@ -29,6 +34,10 @@ def get_or_create_user(
     """
     Holt User aus DB oder erstellt neuen User.
     
+    Bekannte User kommen aus dem User-Cache und werden ohne SELECT an die
+    Session gehängt; Punkte/Team werden erst beim Zugriff per Primärschlüssel
+    geladen. Geänderte Namen werden in DB und Cache übernommen.
+    
     Args:
         session: DB-Session
         telegram_id: Telegram User-ID
@@ -39,36 +48,98 @@ def get_or_create_user(
     Returns:
         User: User-Objekt
     """
-    user = session.query(User).filter(User.telegram_id == telegram_id).first()
+    engine = session.get_bind()
+    user = _attach_cached_user(session, engine, telegram_id)
+    from_cache = user is not None
     
-    if not user:
-        user = User(
-            telegram_id=telegram_id,
-            username=username,
-            first_name=first_name,
-            last_name=last_name
-        )
-        session.add(user)
-        session.commit()
-        logger.info(f"New user created: {telegram_id} ({first_name})")
+    if not from_cache:
+        user = session.query(User).filter(User.telegram_id == telegram_id).first()
+        
+        if not user:
+            user = User(
+                telegram_id=telegram_id,
+                username=username,
+                first_name=first_name,
+                last_name=last_name
+            )
+            session.add(user)
+            session.flush()
+            _commit_and_cache(session, engine, user)
+            logger.info(f"New user created: {telegram_id} ({first_name})")
+            return user
+    
+    if _update_profile(user, username, first_name, last_name):
+        session.flush()
+        _commit_and_cache(session, engine, user)
+        logger.info(f"User profile updated: {telegram_id} ({first_name})")
+    elif not from_cache:
+        user_cache.put(engine, user)
+    
+    return user
+
+
+def _commit_and_cache(session: Session, engine, user: User):
+    """
+    Committet und übernimmt den User erst danach in den Cache.
     
+    Schlägt der Commit fehl, darf kein Primärschlüssel einer nie geschriebenen
+    Zeile im Cache landen - SQLite vergibt die ID sonst an den nächsten User.
+    """
+    # Felder vor dem Commit kopieren - danach sind sie expired (neuer SELECT)
+    cached = CachedUser.from_user(user)
+    session.commit()
+    user_cache.put(engine, cached)
+
+
+def _attach_cached_user(session: Session, engine, telegram_id: int) -> Optional[User]:
+    """Hängt einen gecachten User ohne SELECT an die Session (None = nicht im Cache)."""
+    cached = user_cache.get(engine, telegram_id)
+    if cached is None:
+        return None
+    
+    # Schon in dieser Session geladen → dasselbe Objekt verwenden
+    user = session.identity_map.get(identity_key(User, cached.id))
+    if user is not None:
+        return user
+    
+    user = User(
+        id=cached.id,
+        telegram_id=cached.telegram_id,
+        username=cached.username,
+        first_name=cached.first_name,
+        last_name=cached.last_name
+    )
+    # Als "aus der DB geladen" markieren: fehlende Felder (Punkte, Team, ...)
+    # gelten als expired und werden beim ersten Zugriff per PK nachgeladen
+    make_transient_to_detached(user)
+    session.add(user)
     return user
 
 
+def _update_profile(user: User, username: str, first_name: str, last_name: str) -> bool:
+    """
+    Übernimmt geänderte Telegram-Namen (nur wenn ein Profil übergeben wurde).
+    
+    Returns:
+        bool: True wenn sich etwas geändert hat
+    """
+    if first_name is None:
+        return False
+    
+    changed = False
+    # Leere Strings und None gelten als gleich (Handler übergeben teils "")
+    for column, value in (('username', username), ('first_name', first_name), ('last_name', last_name)):
+        if (getattr(user, column) or None) != (value or None):
+            setattr(user, column, value)
+            changed = True
+    return changed
+
+
 def get_user_by_telegram_id(session: Session, telegram_id: int) -> Optional[User]:
     """Holt User anhand Telegram-ID."""
     return session.query(User).filter(User.telegram_id == telegram_id).first()
 
 
-def update_user_points(session: Session, user_id: int, points: int):
-    """Aktualisiert User-Punkte."""
-    user = session.query(User).filter(User.id == user_id).first()
-    if user:
-        user.total_points += points
-        session.commit()
-        logger.info(f"User {user_id} points updated: +{points} (total: {user.total_points})")
-
-
 def get_user_ranking(session: Session, user_id: int) -> tuple[int, int]:
     """
     Gibt Ranking des Users zurück.
@@ -146,16 +217,415 @@ def find_user_by_identifier(session: Session, identifier: str) -> Optional[User]
     if user:
         return user
     
-    # Suche nach vollständigem Namen (Vorname + Nachname)
-    users = session.query(User).all()
-    for user in users:
-        full_name = f"{user.first_name or ''} {user.last_name or ''}".strip().lower()
+    # Suche nach vollständigem Namen (Vorname + Nachname) - nur die Namensspalten
+    # laden, nicht alle User-Objekte in die Identity-Map der Session
+    names = session.query(User.id, User.first_name, User.last_name)
+    for user_id, first_name, last_name in names:
+        full_name = f"{first_name or ''} {last_name or ''}".strip().lower()
         if full_name == clean_identifier:
-            return user
+            return session.get(User, user_id)
     
     return None
 
 
+# ============================================================================
+# POINT LEDGER
+# ============================================================================
+
+# Kategorie ohne eigenen Aggregat-Eintrag: ein Reset leert die Aggregate des Users
+RESET_REASON = 'reset'
+
+# Callbacks nach jedem Commit, der Punkte oder Team-Zuordnungen geändert hat
+_points_listeners: List[Callable[[], None]] = []
+
+
+def add_points_listener(listener: Callable[[], None]):
+    """
+    Registriert einen Callback für Punkteänderungen (z.B. Live-Rangliste).
+    
+    Wird nach dem Commit im Thread des Aufrufers ausgeführt - muss also
+    schnell und thread-safe sein.
+    """
+    _points_listeners.append(listener)
+
+
+def _mark_points_changed(session: Session):
+    session.info['points_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_points_listeners(session: Session):
+    if not session.info.pop('points_changed', False):
+        return
+    for listener in _points_listeners:
+        try:
+            listener()
+        except Exception as e:
+            logger.error(f"Points listener failed: {e}", exc_info=True)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_points_changed(session: Session):
+    session.info.pop('points_changed', None)
+
+
+def _insert(session: Session):
+    """Dialekt-spezifisches INSERT (für ON CONFLICT DO UPDATE)."""
+    return postgresql.insert if session.get_bind().dialect.name == 'postgresql' else sqlite.insert
+
+
+def _increment_score(session: Session, user_id: int, category: str, delta: int):
+    """Erhöht user_scores(user_id, category) per Upsert (ein Statement, keine Lese-Runde)."""
+    statement = _insert(session)(UserScore).values(user_id=user_id, category=category, points=delta, events=1)
+    session.execute(statement.on_conflict_do_update(
+        index_elements=[UserScore.user_id, UserScore.category],
+        set_={
+            'points': UserScore.points + statement.excluded.points,
+            'events': UserScore.events + 1,
+        }
+    ))
+
+
+def _increment_team_score(session: Session, team_id: str, points, members: int = 0):
+    """Erhöht team_scores(team_id) per Upsert; points darf ein SQL-Ausdruck sein."""
+    statement = _insert(session)(TeamScore).values(team_id=str(team_id), points=points, member_count=members)
+    session.execute(statement.on_conflict_do_update(
+        index_elements=[TeamScore.team_id],
+        set_={
+            'points': TeamScore.points + statement.excluded.points,
+            'member_count': TeamScore.member_count + statement.excluded.member_count,
+        }
+    ))
+
+
+def award_points(
+    session: Session,
+    user_id: int,
+    delta: int,
+    reason: str,
+    submission_id: int = None,
+    admin_telegram_id: int = None,
+    note: str = None,
+    category: str = None
+) -> Optional[int]:
+    """
+    Ändert Punkte atomar und schreibt einen Ledger-Eintrag (ohne Commit).
+    
+    Ein einzelnes UPDATE ... SET total_points = total_points + :delta statt
+    Lesen-Ändern-Schreiben: parallele Vergaben gehen nicht verloren. UPDATE,
+    Ledger-Eintrag und die Aggregate user_scores/team_scores laufen in einem
+    Savepoint - SQLite committet im Autocommit-Modus sonst jedes Statement
+    einzeln, und ein Fehler dazwischen ließe total_points und Ledger auseinanderlaufen.
+    
+    Args:
+        session: DB-Session
+        user_id: User-ID (PK)
+        delta: Punkte (negativ = Abzug)
+        reason: submission, admin, reset, rule_change, ...
+        submission_id: Auslösende Submission (optional)
+        admin_telegram_id: Admin bei manuellen Anpassungen (optional)
+        note: Freitext, z.B. Begründung des Admins
+        category: Kategorie für die Aufschlüsselung (default: reason)
+    
+    Returns:
+        Optional[int]: Neuer Punktestand oder None (User existiert nicht)
+    """
+    # SAVEPOINT öffnet bei SQLite (Autocommit) eine Transaktion, RELEASE committet sie;
+    # bei PostgreSQL ein Savepoint in der laufenden Transaktion
+    with session.begin_nested():
+        row = session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(total_points=User.total_points + delta)
+            .returning(User.total_points, User.team_id),
+            execution_options={'synchronize_session': False}
+        ).one_or_none()
+        
+        if row is None:
+            logger.warning(f"Points for unknown user {user_id} ignored ({delta:+d}, {reason})")
+            return None
+        new_total, team_id = row
+        
+        category = category or reason
+        session.add(PointEvent(
+            user_id=user_id,
+            delta=delta,
+            reason=reason,
+            category=category,
+            submission_id=submission_id,
+            admin_telegram_id=admin_telegram_id,
+            note=note
+        ))
+        
+        if reason == RESET_REASON:
+            session.query(UserScore).filter(UserScore.user_id == user_id).delete(synchronize_session=False)
+        else:
+            _increment_score(session, user_id, category, delta)
+        if team_id is not None:
+            _increment_team_score(session, team_id, delta)
+    _mark_points_changed(session)
+    
+    # Bereits geladenes User-Objekt auf den neuen Stand bringen (ohne SELECT)
+    user = session.identity_map.get(identity_key(User, user_id))
+    if user is not None:
+        set_committed_value(user, 'total_points', new_total)
+    
+    return new_total
+
+
+def update_user_points(
+    session: Session,
+    user_id: int,
+    points: int,
+    submission_id: int = None,
+    category: str = None,
+    commit: bool = True
+):
+    """Vergibt Punkte für eine Submission (atomar, mit Ledger-Eintrag; commit=False: ohne Commit)."""
+    new_total = award_points(
+        session, user_id, points,
+        reason='submission', submission_id=submission_id, category=category
+    )
+    if new_total is not None:
+        if commit:
+            session.commit()
+        logger.info(f"User {user_id} points updated: +{points} (total: {new_total})")
+
+
+def get_user_scores(session: Session, user_id: int) -> Dict[str, int]:
+    """
+    Punkte eines Users pro Kategorie (seit dem letzten Reset).
+    
+    Returns:
+        Dict[str, int]: Kategorie (z.B. film_reference, admin) → Punkte
+    """
+    rows = session.query(UserScore.category, UserScore.points).filter(UserScore.user_id == user_id).all()
+    return {category: points for category, points in rows}
+
+
+def get_point_history(session: Session, user_id: int, limit: int = 20) -> List[PointEvent]:
+    """Letzte Buchungen eines Users (neueste zuerst)."""
+    return (
+        session.query(PointEvent)
+        .filter(PointEvent.user_id == user_id)
+        .order_by(PointEvent.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def _events_since_reset(session: Session):
+    """Query auf alle Ledger-Einträge nach dem jeweils letzten Reset eines Users."""
+    last_reset = (
+        session.query(PointEvent.user_id, func.max(PointEvent.id).label('event_id'))
+        .filter(PointEvent.reason == RESET_REASON)
+        .group_by(PointEvent.user_id)
+        .subquery()
+    )
+    return (
+        session.query(PointEvent)
+        .outerjoin(last_reset, last_reset.c.user_id == PointEvent.user_id)
+        .filter(PointEvent.id > func.coalesce(last_reset.c.event_id, 0))
+    )
+
+
+def get_point_discrepancies(session: Session) -> List[dict]:
+    """
+    Vergleicht users.total_points mit der Summe des Ledgers.
+    
+    Returns:
+        List[dict]: user_id, telegram_id, total_points, ledger_points (nur Abweichungen)
+    """
+    ledger = (
+        session.query(PointEvent.user_id, func.sum(PointEvent.delta).label('points'))
+        .group_by(PointEvent.user_id)
+        .subquery()
+    )
+    rows = (
+        session.query(User.id, User.telegram_id, User.total_points, func.coalesce(ledger.c.points, 0))
+        .outerjoin(ledger, ledger.c.user_id == User.id)
+        .filter(User.total_points != func.coalesce(ledger.c.points, 0))
+        .all()
+    )
+    return [
+        {'user_id': user_id, 'telegram_id': telegram_id, 'total_points': total, 'ledger_points': ledger_points}
+        for user_id, telegram_id, total, ledger_points in rows
+    ]
+
+
+def recompute_user_points(session: Session) -> int:
+    """
+    Setzt users.total_points auf die Ledger-Summe (Reparatur nach Audit).
+    
+    Returns:
+        int: Anzahl korrigierter User
+    """
+    discrepancies = get_point_discrepancies(session)
+    for row in discrepancies:
+        session.execute(
+            update(User).where(User.id == row['user_id']).values(total_points=row['ledger_points']),
+            execution_options={'synchronize_session': False}
+        )
+    if discrepancies:
+        _mark_points_changed(session)
+    session.commit()
+    session.expire_all()
+    if discrepancies:
+        logger.warning(f"Recomputed points for {len(discrepancies)} users from ledger")
+        rebuild_team_scores(session)
+    return len(discrepancies)
+
+
+def rebuild_team_scores(session: Session) -> int:
+    """
+    Baut team_scores aus users.total_points neu auf.
+    
+    Returns:
+        int: Anzahl Teams mit Mitgliedern
+    """
+    rows = session.query(
+        User.team_id, func.sum(User.total_points), func.count(User.id)
+    ).filter(User.team_id.isnot(None)).group_by(User.team_id).all()
+    session.query(TeamScore).delete(synchronize_session=False)
+    if rows:
+        session.execute(insert(TeamScore.__table__), [
+            {'team_id': str(team_id), 'points': int(points or 0), 'member_count': members}
+            for team_id, points, members in rows
+        ])
+    _mark_points_changed(session)
+    session.commit()
+    return len(rows)
+
+
+def rebuild_score_aggregates(session: Session) -> int:
+    """
+    Baut user_scores komplett aus dem Ledger neu auf und gleicht total_points ab.
+    
+    Returns:
+        int: Anzahl Aggregat-Zeilen
+    """
+    rows = (
+        _events_since_reset(session)
+        .with_entities(
+            PointEvent.user_id, PointEvent.category,
+            func.sum(PointEvent.delta), func.count(PointEvent.id)
+        )
+        .group_by(PointEvent.user_id, PointEvent.category)
+        .all()
+    )
+    session.query(UserScore).delete(synchronize_session=False)
+    if rows:
+        session.execute(insert(UserScore.__table__), [
+            {'user_id': user_id, 'category': category, 'points': points, 'events': events}
+            for user_id, category, points, events in rows
+        ])
+    session.commit()
+    recompute_user_points(session)
+    rebuild_team_scores(session)
+    logger.info(f"Score aggregates rebuilt from ledger ({len(rows)} rows)")
+    return len(rows)
+
+
+def replay_submission_points(session: Session, rules: Dict[str, int] = None, apply: bool = False) -> List[dict]:
+    """
+    Spielt genehmigte Submissions gegen (neue) Punkte-Regeln durch.
+    
+    Das Ledger bleibt unverändert - Differenzen werden als Korrekturbuchung
+    (reason 'rule_change') angehängt, Aggregate und Punktestände ziehen mit.
+    
+    Args:
+        session: DB-Session
+        rules: Punkte pro SubmissionType.value (default: config.point_rules())
+        apply: False = nur berechnen (Dry-Run)
+    
+    Returns:
+        List[dict]: submission_id, user_id, category, booked, expected
+    """
+    rules = rules if rules is not None else config.point_rules()
+    booked = dict(
+        _events_since_reset(session)
+        .filter(PointEvent.submission_id.isnot(None))
+        .with_entities(PointEvent.submission_id, func.sum(PointEvent.delta))
+        .group_by(PointEvent.submission_id)
+        .all()
+    )
+    
+    adjustments = []
+    for submission in session.query(Submission).filter(Submission.status == SubmissionStatus.APPROVED):
+        category = submission.submission_type.value
+        expected = rules.get(category)
+        current = booked.get(submission.id, 0)
+        if expected is None or expected == current:
+            continue
+        adjustments.append({
+            'submission_id': submission.id,
+            'user_id': submission.user_id,
+            'category': category,
+            'booked': current,
+            'expected': expected,
+        })
+        if apply:
+            award_points(
+                session, submission.user_id, expected - current,
+                reason='rule_change', submission_id=submission.id, category=category,
+                note=f"{current} → {expected}"
+            )
+            submission.points_awarded = expected
+    
+    if apply:
+        session.commit()
+        if adjustments:
+            logger.warning(f"Replayed point rules: {len(adjustments)} submissions adjusted")
+    return adjustments
+
+
+def backfill_point_ledger(session: Session) -> int:
+    """
+    Überführt Bestands-Punkte ins Ledger (nur solange es leer ist).
+    
+    Genehmigte Submissions werden mit ihrer Kategorie gebucht, der Rest des
+    Punktestands (z.B. alte Admin-Anpassungen) als Eröffnungsbuchung.
+    
+    Returns:
+        int: Anzahl angelegter Einträge
+    """
+    if session.query(PointEvent.id).first() is not None:
+        # Ledger vorhanden, Aggregat fehlt (z.B. neue Tabelle) → aus dem Ledger aufbauen
+        if session.query(UserScore.user_id).first() is None:
+            rebuild_score_aggregates(session)
+        elif session.query(TeamScore.team_id).first() is None:
+            rebuild_team_scores(session)
+        return 0
+    
+    events = []
+    booked: Dict[int, int] = {}
+    submissions = session.query(Submission).filter(
+        Submission.status == SubmissionStatus.APPROVED,
+        Submission.points_awarded != 0
+    ).order_by(Submission.id)
+    for submission in submissions:
+        events.append(PointEvent(
+            user_id=submission.user_id,
+            delta=submission.points_awarded,
+            reason='submission',
+            category=submission.submission_type.value,
+            submission_id=submission.id
+        ))
+        booked[submission.user_id] = booked.get(submission.user_id, 0) + submission.points_awarded
+    
+    for user_id, total in session.query(User.id, User.total_points):
+        rest = total - booked.get(user_id, 0)
+        if rest:
+            events.append(PointEvent(user_id=user_id, delta=rest, reason='opening_balance', category='opening_balance'))
+    
+    session.add_all(events)
+    session.commit()
+    if events:
+        logger.info(f"Point ledger initialized with {len(events)} events from existing data")
+        rebuild_score_aggregates(session)
+    return len(events)
+
+
 # ============================================================================
 # TEAM OPERATIONS
 # ============================================================================
@@ -186,6 +656,58 @@ def create_team(
     return team
 
 
+# Team-Felder, die aus universen.yaml in die DB übernommen werden
+TEAM_SYNC_FIELDS = (
+    'film_title', 'character_1', 'character_2',
+    'character_1_id', 'character_2_id', 'puzzle_link'
+)
+
+
+def upsert_teams(session: Session, teams_data: List[Mapping[str, Any]]) -> Dict[str, int]:
+    """
+    Gleicht Teams (z.B. aus UniverseLoader.get_teams()) in einer Transaktion ab.
+    
+    Bestehende Teams werden mit einer Abfrage geladen und verglichen; neue Teams
+    per executemany eingefügt, geänderte per Bulk-UPDATE über den Primärschlüssel.
+    Unveränderte Teams kosten keinen Schreibzugriff - erneutes Seeden ist idempotent.
+    
+    Returns:
+        Dict[str, int]: created, updated, unchanged
+    """
+    existing = {
+        row.team_id: row
+        for row in session.execute(select(Team.id, Team.team_id, *(getattr(Team, f) for f in TEAM_SYNC_FIELDS)))
+    }
+    
+    new_rows, changed_rows, seen = [], [], set()
+    for team_data in teams_data:
+        team_id = str(team_data['team_id'])
+        if team_id in seen:
+            continue
+        seen.add(team_id)
+        values = {field: team_data[field] for field in TEAM_SYNC_FIELDS}
+        current = existing.get(team_id)
+        if current is None:
+            new_rows.append({'team_id': team_id, **values})
+        elif any(getattr(current, field) != value for field, value in values.items()):
+            changed_rows.append({'id': current.id, **values})
+    
+    if new_rows:
+        session.execute(insert(Team), new_rows)
+    if changed_rows:
+        session.execute(update(Team), changed_rows)
+    session.commit()
+    
+    result = {
+        'created': len(new_rows),
+        'updated': len(changed_rows),
+        'unchanged': len(seen) - len(new_rows) - len(changed_rows),
+    }
+    if new_rows or changed_rows:
+        logger.info(f"Teams upserted: {result['created']} created, {result['updated']} updated")
+    return result
+
+
 def get_team_by_id(session: Session, team_id: str) -> Optional[Team]:
     """Holt Team anhand Team-ID."""
     return session.query(Team).filter(Team.team_id == team_id).first()
@@ -208,6 +730,14 @@ def join_team(session: Session, user_id: int, team_id: str) -> bool:
         return False
     
     user.team_id = team_id
+    session.flush()
+    # Bisherige Punkte des Users zählen ab jetzt für das Team (Wert aus der DB, nicht aus dem Objekt)
+    _increment_team_score(
+        session, team_id,
+        select(User.total_points).where(User.id == user_id).scalar_subquery(),
+        members=1
+    )
+    _mark_points_changed(session)
     session.commit()
     logger.info(f"User {user_id} joined team {team_id}")
     return True
@@ -227,7 +757,10 @@ def create_submission(
     caption: str = None,
     film_title: str = None,
     points_awarded: int = 0,
-    status: SubmissionStatus = SubmissionStatus.APPROVED
+    status: SubmissionStatus = SubmissionStatus.APPROVED,
+    media_type: str = None,
+    chat_id: int = None,
+    pipeline_stage: str = None
 ) -> Submission:
     """Erstellt eine neue Submission."""
     submission = Submission(
@@ -239,14 +772,20 @@ def create_submission(
         caption=caption,
         film_title=film_title,
         points_awarded=points_awarded,
-        status=status
+        status=status,
+        media_type=media_type,
+        chat_id=chat_id,
+        pipeline_stage=pipeline_stage
     )
     session.add(submission)
     session.flush()  # Flush um ID zu bekommen, aber noch nicht committen
     
     # Punkte zum User hinzufügen (nur wenn status APPROVED ist)
     if points_awarded > 0 and status == SubmissionStatus.APPROVED:
-        update_user_points(session, user_id, points_awarded)
+        update_user_points(
+            session, user_id, points_awarded,
+            submission_id=submission.id, category=submission_type.value
+        )
     
     session.commit()
     
@@ -285,7 +824,8 @@ def update_submission_status(
     submission_id: int,
     status: SubmissionStatus,
     points_awarded: int = None,
-    ai_evaluation: str = None
+    ai_evaluation: str = None,
+    commit: bool = True
 ):
     """
     Aktualisiert den Status einer Submission und vergibt Punkte.
@@ -296,6 +836,7 @@ def update_submission_status(
         status: Neuer Status
         points_awarded: Zu vergebende Punkte (optional)
         ai_evaluation: AI Evaluation JSON (optional)
+        commit: False = Commit dem Aufrufer überlassen (mehrere Writes als eine Einheit)
     """
     submission = session.query(Submission).filter(Submission.id == submission_id).first()
     
@@ -317,10 +858,14 @@ def update_submission_status(
         # Nur Differenz zu den bereits vergebenen Punkten hinzufügen
         points_diff = points_awarded - old_points
         if points_diff > 0:
-            update_user_points(session, submission.user_id, points_diff)
+            update_user_points(
+                session, submission.user_id, points_diff,
+                submission_id=submission_id, category=submission.submission_type.value, commit=commit
+            )
             logger.info(f"Submission {submission_id}: Added {points_diff} points (was {old_points}, now {points_awarded})")
     
-    session.commit()
+    if commit:
+        session.commit()
     logger.info(f"Submission {submission_id} status updated: {old_status.value} -> {status.value}")
 
 
@@ -345,14 +890,15 @@ def has_recognized_film(session: Session, user_id: int, film_title: str) -> bool
     ).count() > 0
 
 
-def add_easter_egg(session: Session, user_id: int, film_title: str) -> EasterEgg:
-    """Fügt erkannten Film hinzu."""
+def add_easter_egg(session: Session, user_id: int, film_title: str, commit: bool = True) -> EasterEgg:
+    """Fügt erkannten Film hinzu (commit=False: Commit macht der Aufrufer)."""
     easter_egg = EasterEgg(
         user_id=user_id,
         film_title=film_title
     )
     session.add(easter_egg)
-    session.commit()
+    if commit:
+        session.commit()
     logger.info(f"Easter egg added: User {user_id} recognized {film_title}")
     return easter_egg
 
@@ -372,13 +918,14 @@ def get_top_players(session: Session, limit: int = 3) -> List[dict]:
         limit: Anzahl der Spieler
     
     Returns:
-        List[dict]: Liste mit {name, points, team}
+        List[dict]: Liste mit {user_id, name, points, team}
     """
     users = session.query(User).order_by(User.total_points.desc()).limit(limit).all()
     
     result = []
     for user in users:
         result.append({
+            'user_id': user.id,
             'name': user.first_name or user.username or f"User {user.telegram_id}",
             'points': user.total_points,
             'team': user.team.film_title if user.team else None
@@ -391,37 +938,30 @@ def get_top_teams(session: Session, limit: int = 3) -> List[dict]:
     """
     Holt die Top-Teams nach Gesamtpunkten der Mitglieder.
     
+    Liest das Aggregat team_scores (eine Abfrage über den Punkte-Index)
+    statt alle User zu gruppieren.
+    
     Args:
         session: DB-Session
         limit: Anzahl der Teams
     
     Returns:
-        List[dict]: Liste mit {team_name, total_points, member_count}
+        List[dict]: Liste mit {team_id, team_name, total_points, member_count}
     """
-    # Gruppiere User nach Team und summiere Punkte
     results = session.query(
-        User.team_id,
-        func.sum(User.total_points).label('total_points'),
-        func.count(User.id).label('member_count')
+        TeamScore.team_id, Team.film_title, TeamScore.points, TeamScore.member_count
+    ).join(
+        Team, Team.team_id == TeamScore.team_id
     ).filter(
-        User.team_id.isnot(None)
-    ).group_by(
-        User.team_id
+        TeamScore.member_count > 0
     ).order_by(
-        func.sum(User.total_points).desc()
+        TeamScore.points.desc()
     ).limit(limit).all()
     
-    team_list = []
-    for team_id, total_points, member_count in results:
-        team = get_team_by_id(session, team_id)
-        if team:
-            team_list.append({
-                'team_name': team.film_title,
-                'total_points': int(total_points) if total_points else 0,
-                'member_count': member_count
-            })
-    
-    return team_list
+    return [
+        {'team_id': team_id, 'team_name': film_title, 'total_points': points, 'member_count': member_count}
+        for team_id, film_title, points, member_count in results
+    ]
 
 
 # ============================================================================
@@ -455,9 +995,8 @@ def get_user_stats(session: Session, user_id: int) -> dict:
         Submission.status == SubmissionStatus.APPROVED
     ).count()
     
-    # Puzzle und Team
-    has_team = user.team_id is not None
-    solved_puzzle = has_solved_puzzle(session, user_id)
+    # Punkte pro Kategorie aus dem Ledger-Aggregat
+    scores = get_user_scores(session, user_id)
     
     # Erkannte Filme (nur genehmigte)
     recognized_films = get_user_easter_eggs(session, user_id)
@@ -468,13 +1007,13 @@ def get_user_stats(session: Session, user_id: int) -> dict:
     return {
         'total_points': user.total_points,
         'party_photos_count': party_count,
-        'party_points': party_count * 1,
+        'party_points': scores.get(SubmissionType.PARTY_PHOTO.value, 0),
         'film_submitted': film_submitted,
         'film_approved': film_approved,
         'film_count': film_approved,  # Backward compatibility
-        'film_points': film_approved * 20,
-        'team_points': 25 if has_team else 0,
-        'puzzle_points': 25 if solved_puzzle else 0,
+        'film_points': scores.get(SubmissionType.FILM_REFERENCE.value, 0),
+        'team_points': scores.get(SubmissionType.TEAM_JOIN.value, 0),
+        'puzzle_points': scores.get(SubmissionType.PUZZLE.value, 0),
         'team_name': user.team.film_title if user.team else None,
         'recognized_films': recognized_films,
         'ranking': ranking,
@@ -2,19 +2,47 @@
 Datenbank-Setup und Session-Management.
 """
 
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool, StaticPool
 from contextlib import contextmanager
+from pathlib import Path
 import logging
 import time
 from functools import wraps
 
 from database.models import Base
 from config import config
+from utils.service_container import container
 
 logger = logging.getLogger('bot.database')
 
+ALEMBIC_INI_PATH = Path(__file__).parent.parent / 'alembic.ini'
+
+# Fehler, bei denen ein erneuter Versuch sinnvoll ist (SQLite-Lock, PostgreSQL-Deadlock/Serialisierung)
+RETRYABLE_ERRORS = ('locked', 'deadlock detected', 'could not serialize access')
+
+
+def _is_retryable(error: Exception) -> bool:
+    error_msg = str(error).lower()
+    return any(marker in error_msg for marker in RETRYABLE_ERRORS)
+
+
+class LockStats:
+    """Zähler für Lock-/Deadlock-Fehler und Retries (für /perf und Lasttests)."""
+    
+    def __init__(self):
+        self.errors = 0
+        self.retries = 0
+    
+    def reset(self):
+        self.errors = 0
+        self.retries = 0
+
+
+lock_stats = LockStats()
+
 
 def retry_on_db_lock(max_retries=3, delay=0.5):
     """
@@ -31,10 +59,10 @@ def retry_on_db_lock(max_retries=3, delay=0.5):
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
-                    error_msg = str(e).lower()
-                    if 'database is locked' in error_msg or 'locked' in error_msg:
+                    if _is_retryable(e):
                         if attempt < max_retries - 1:
                             wait_time = delay * (2 ** attempt)  # Exponential backoff
+                            lock_stats.retries += 1
                             logger.warning(f"Database locked, retry {attempt + 1}/{max_retries} in {wait_time}s")
                             time.sleep(wait_time)
                             continue
@@ -56,8 +84,9 @@ class Database:
         """
         self.database_url = database_url or config.DATABASE_URL
         
-        # Prüfen ob SQLite
-        is_sqlite = self.database_url.startswith('sqlite')
+        # Backend bestimmen (sqlite, postgresql)
+        self.dialect = make_url(self.database_url).get_backend_name()
+        is_sqlite = self.dialect == 'sqlite'
         
         # Engine-Konfiguration
         engine_kwargs = {
@@ -77,6 +106,24 @@ class Database:
             })
             logger.info("Using SQLite with optimized settings for concurrency")
         
+        # PostgreSQL: echter Connection-Pool, parallele Writer, Statement-Timeout
+        elif self.dialect == 'postgresql':
+            engine_kwargs.update({
+                'poolclass': QueuePool,
+                'pool_size': config.DB_POOL_SIZE,
+                'max_overflow': config.DB_MAX_OVERFLOW,
+                'pool_timeout': config.DB_POOL_TIMEOUT,
+                'pool_recycle': config.DB_POOL_RECYCLE,
+                'connect_args': {
+                    'application_name': 'halloween-bot',
+                    'options': f"-c statement_timeout={config.DB_STATEMENT_TIMEOUT_MS}",
+                },
+            })
+            logger.info(
+                f"Using PostgreSQL (pool {config.DB_POOL_SIZE}+{config.DB_MAX_OVERFLOW}, "
+                f"statement_timeout {config.DB_STATEMENT_TIMEOUT_MS} ms)"
+            )
+        
         # Engine erstellen
         self.engine = create_engine(self.database_url, **engine_kwargs)
         
@@ -91,6 +138,12 @@ class Database:
                 cursor.close()
             logger.info("SQLite WAL mode enabled for better concurrency")
         
+        # Lock-/Deadlock-Fehler zählen (auch ohne Retry, z.B. busy_timeout abgelaufen)
+        @event.listens_for(self.engine, "handle_error")
+        def count_lock_errors(context):
+            if _is_retryable(context.original_exception):
+                lock_stats.errors += 1
+        
         # Session Factory
         self.SessionLocal = sessionmaker(
             autocommit=False,
@@ -98,14 +151,56 @@ class Database:
             bind=self.engine
         )
         
-        logger.info(f"Database initialized: {self.database_url}")
+        logger.info(f"Database initialized: {self.engine.url.render_as_string(hide_password=True)}")
     
     def create_tables(self):
-        """Erstellt alle Tabellen in der Datenbank."""
+        """
+        Erstellt alle Tabellen in der Datenbank.
+        
+        PostgreSQL wird per Alembic auf den neuesten Stand migriert
+        (DB_AUTO_MIGRATE), SQLite weiterhin direkt aus den Models angelegt.
+        """
+        if self.dialect == 'postgresql' and config.DB_AUTO_MIGRATE:
+            self.migrate()
+            return
         logger.info("Creating database tables...")
         Base.metadata.create_all(bind=self.engine)
+        if self.dialect == 'sqlite':
+            self._add_missing_columns()
         logger.info("Database tables created successfully")
     
+    def _add_missing_columns(self):
+        """
+        Ergänzt neue, nullable Spalten in bestehenden SQLite-Tabellen.
+        
+        create_all legt nur fehlende Tabellen an - eine bot.db aus einer
+        älteren Version bekommt neue Spalten (samt Index) hier per ADD COLUMN.
+        """
+        inspector = inspect(self.engine)
+        with self.engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                existing = {column['name'] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing or not column.nullable:
+                        continue
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                    for index in table.indexes:
+                        if column.name in index.columns:
+                            index.create(connection, checkfirst=True)
+                    logger.info(f"Column added: {table.name}.{column.name}")
+    
+    def migrate(self, revision: str = 'head'):
+        """Führt Alembic-Migrationen bis `revision` aus (über die eigene Engine)."""
+        from alembic import command
+        from alembic.config import Config as AlembicConfig
+        
+        alembic_config = AlembicConfig(str(ALEMBIC_INI_PATH))
+        with self.engine.begin() as connection:
+            alembic_config.attributes['connection'] = connection
+            command.upgrade(alembic_config, revision)
+        logger.info(f"Database migrated to {revision}")
+    
     def drop_tables(self):
         """Löscht alle Tabellen (nur für Development!)."""
         logger.warning("Dropping all database tables...")
@@ -132,11 +227,11 @@ class Database:
                 break  # Erfolg, kein Retry nötig
             except Exception as e:
                 session.rollback()
-                error_msg = str(e).lower()
                 
-                # Prüfen ob Database Lock Error
-                if ('database is locked' in error_msg or 'locked' in error_msg) and attempt < max_retries - 1:
+                # Prüfen ob Lock-/Deadlock-Fehler
+                if _is_retryable(e) and attempt < max_retries - 1:
                     wait_time = retry_delay * (2 ** attempt)  # Exponential backoff
+                    lock_stats.retries += 1
                     logger.warning(
                         f"Database locked on attempt {attempt + 1}/{max_retries}, "
                         f"retrying in {wait_time}s... Error: {e}"
@@ -152,5 +247,5 @@ class Database:
                     session.close()
 
 
-# Globale Datenbank-Instanz
-db = Database()
+# Globale Datenbank-Instanz (wird beim ersten Zugriff erzeugt)
+db = container.register('db', Database)
@@ -89,6 +89,13 @@ class Submission(Base):
     status = Column(SQLEnum(SubmissionStatus), default=SubmissionStatus.PENDING, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
+    # Hintergrund-Pipeline: nächste Stufe (NULL = fertig bzw. inline verarbeitet),
+    # Chat und Status-Nachricht für die Antwort - überlebt einen Neustart
+    pipeline_stage = Column(String(20), nullable=True, index=True)
+    media_type = Column(String(10), nullable=True)  # 'photo' oder 'video'
+    chat_id = Column(BigInteger, nullable=True)
+    status_message_id = Column(BigInteger, nullable=True)
+    
     # Relationships
     user = relationship("User", back_populates="submissions")
     
@@ -112,14 +119,67 @@ class EasterEgg(Base):
         return f"<EasterEgg(user_id={self.user_id}, film={self.film_title})>"
 
 
+class PointEvent(Base):
+    """
+    Punkte-Ledger: jede Punkteänderung als unveränderlicher Eintrag.
+    users.total_points ist die Summe aller Einträge eines Users.
+    """
+    __tablename__ = "point_events"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    delta = Column(Integer, nullable=False)
+    reason = Column(String(50), nullable=False)  # submission, admin, reset, rule_change, opening_balance
+    category = Column(String(30), nullable=False)  # SubmissionType.value oder reason (admin, ...)
+    submission_id = Column(Integer, nullable=True)  # Kein FK: Ledger überlebt gelöschte Submissions (/reset)
+    admin_telegram_id = Column(BigInteger, nullable=True)  # Bei manuellen Anpassungen
+    note = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<PointEvent(user_id={self.user_id}, delta={self.delta:+d}, reason={self.reason})>"
+
+
+class UserScore(Base):
+    """
+    Aggregat über point_events: Punkte pro User und Kategorie seit dem letzten
+    Reset. Wird bei jeder Buchung mitgeführt und lässt sich jederzeit aus dem
+    Ledger neu aufbauen.
+    """
+    __tablename__ = "user_scores"
+    
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    category = Column(String(30), primary_key=True)
+    points = Column(Integer, default=0, nullable=False)
+    events = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<UserScore(user_id={self.user_id}, category={self.category}, points={self.points})>"
+
+
+class TeamScore(Base):
+    """
+    Aggregat für die Team-Rangliste: Summe der Punkte aller Mitglieder.
+    Wird bei Punktebuchungen und Team-Beitritten mitgeführt.
+    """
+    __tablename__ = "team_scores"
+    
+    team_id = Column(String(6), ForeignKey('teams.team_id'), primary_key=True)
+    points = Column(Integer, default=0, nullable=False, index=True)
+    member_count = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<TeamScore(team_id={self.team_id}, points={self.points}, members={self.member_count})>"
+
+
 class AdminLog(Base):
     """Logs für Admin-Aktionen."""
     __tablename__ = "admin_logs"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    admin_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    admin_id = Column(BigInteger, nullable=False)  # Telegram-ID des Admins
     action = Column(String(255), nullable=False)
-    target_user_id = Column(Integer, nullable=True)
+    target_user_id = Column(BigInteger, nullable=True)  # Telegram-ID des Spielers
     details = Column(Text, nullable=True)  # JSON
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
@@ -0,0 +1,121 @@
+"""
+In-Process-Cache für User-Lookups (telegram_id → Primärschlüssel + Profil).
+Spart den SELECT in get_or_create_user, der bei jedem Command und jedem
+Foto-Upload läuft. Punkte und Team werden bewusst NICHT gecacht - sie ändern
+sich ständig und werden bei Bedarf per Primärschlüssel nachgeladen.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+from weakref import WeakKeyDictionary
+
+from config import config
+
+logger = logging.getLogger('bot.database.user_cache')
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Unveränderliche Kopie der selten geänderten User-Felder."""
+    id: int
+    telegram_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+
+    @classmethod
+    def from_user(cls, user) -> 'CachedUser':
+        """Kopie der Profil-Felder eines (geladenen) User-Objekts."""
+        return cls(
+            id=user.id,
+            telegram_id=user.telegram_id,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name
+        )
+
+
+class UserCache:
+    """
+    LRU-Cache mit TTL, getrennt pro Datenbank-Engine.
+
+    Pro Engine ein eigener Bereich - verschiedene Datenbanken (z.B. Tests mit
+    In-Memory-SQLite) teilen sich so keine Primärschlüssel.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 300):
+        """
+        Args:
+            max_size: Max. Anzahl User pro Engine (0 = Cache aus)
+            ttl_seconds: Lebensdauer eines Eintrags
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'WeakKeyDictionary[object, OrderedDict]' = WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, engine, telegram_id: int) -> Optional[CachedUser]:
+        """Gültiger Eintrag oder None (zählt Treffer/Fehlschläge)."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entries = self._entries.get(engine)
+            entry = entries.get(telegram_id) if entries is not None else None
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del entries[telegram_id]
+                self.misses += 1
+                return None
+            entries.move_to_end(telegram_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, engine, user) -> Optional[CachedUser]:
+        """Übernimmt die Profil-Felder eines (geladenen) User-Objekts bzw. einen CachedUser."""
+        if not self.enabled:
+            return None
+        cached = user if isinstance(user, CachedUser) else CachedUser.from_user(user)
+        with self._lock:
+            entries = self._entries.get(engine)
+            if entries is None:
+                entries = self._entries[engine] = OrderedDict()
+            entries[cached.telegram_id] = (time.monotonic() + self.ttl_seconds, cached)
+            entries.move_to_end(cached.telegram_id)
+            while len(entries) > self.max_size:
+                entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, telegram_id: int):
+        """Entfernt einen User aus allen Engines."""
+        with self._lock:
+            for entries in self._entries.values():
+                entries.pop(telegram_id, None)
+
+    def clear(self):
+        """Leert den Cache komplett (z.B. nach /reset)."""
+        with self._lock:
+            self._entries.clear()
+        logger.info("User-Cache geleert")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Treffer, Fehlschläge und aktuelle Größe."""
+        with self._lock:
+            size = sum(len(entries) for entries in self._entries.values())
+        return {'hits': self.hits, 'misses': self.misses, 'size': size}
+
+
+# Globale Instanz
+user_cache = UserCache(
+    max_size=config.USER_CACHE_SIZE,
+    ttl_seconds=config.USER_CACHE_TTL_SECONDS
+)
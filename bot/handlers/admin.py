@@ -3,14 +3,24 @@ Admin Commands für den Halloween Bot
 """
 from telegram import Update
 from telegram.ext import ContextTypes
+import asyncio
 import logging
 import json
+import sqlite3
 
-from database.db import Database
+from database.db import Database, lock_stats
 from database import crud
+from database.user_cache import user_cache
+from services.rate_limiter import rate_limiter
+from services.leaderboard_stream import leaderboard
+from services.db_snapshot import snapshot_manager
+from services.memory_profiler import memory_profiler, format_mb
+from services.submission_pipeline import submission_pipeline, STAGES
 from database.models import SubmissionType, SubmissionStatus, User, Submission, EasterEgg
 from config import config
 from services.ai_evaluator import ai_evaluator
+from services.metrics import metrics, PHASES
+from services.logger import get_logging_stats
 
 logger = logging.getLogger('bot.handlers.admin')
 
@@ -51,8 +61,11 @@ Statistiken:
 • /stats - Party-Statistiken (Spieler, Submissions, Top 3)
 • /eastereggs (oder /films) - Alle erkannten Filme
 • /apiusage - OpenAI API Nutzung und Kosten
+• /perf [reset] - Handler-Latenzen (DB/Telegram/KI/Disk)
+• /memory [start|stop] - Speicher, Cache-Füllstände, größte Allokationen
 
 System:
+• /snapshot - Konsistente Kopie der Datenbank für Auswertungen
 • /reset CONFIRM - Spiel zurücksetzen (ACHTUNG: Löscht alle Daten!)
 
 Beispiele:
@@ -110,8 +123,10 @@ Team & Stats:
 /stats - Party-Statistiken
 /eastereggs (oder /films) - Erkannte Filme
 /apiusage - OpenAI API Nutzung
+/perf - Handler-Latenzen
 
 System:
+/snapshot - Datenbank-Snapshot erstellen
 /reset CONFIRM - Spiel zurücksetzen (⚠️ VORSICHT!)
 
 ────────────────────────
@@ -214,6 +229,16 @@ async def admin_player_command(update: Update, context: ContextTypes.DEFAULT_TYP
         easter_eggs = session.query(crud.EasterEgg).filter_by(user_id=player.id).all()
         films_list = ", ".join([e.film_title for e in easter_eggs]) if easter_eggs else "Keine"
         
+        # Punkte-Aufschlüsselung und letzte Buchungen aus dem Ledger
+        scores = crud.get_user_scores(session, player.id)
+        scores_text = ", ".join(f"{category} {points:+d}" for category, points in sorted(scores.items())) or "-"
+        history = crud.get_point_history(session, player.id, limit=5)
+        history_text = "\n".join(
+            f"{event.created_at.strftime('%d.%m. %H:%M')} {event.delta:+d} {event.category}"
+            + (f" ({event.note})" if event.note else "")
+            for event in history
+        ) or "Keine"
+        
         message = f"""👤 SPIELER-DETAILS
 
 Name: {player.first_name} {player.last_name or ''}
@@ -223,6 +248,7 @@ DB-ID: {player.id}
 
 📊 STATISTIKEN:
 Gesamt-Punkte: {player.total_points}
+Aufschlüsselung: {scores_text}
 Party-Fotos: {party_photos}
 Film-Referenzen: {films}
 Team: {team_info}
@@ -230,6 +256,9 @@ Team: {team_info}
 🎬 Erkannte Filme:
 {films_list}
 
+🧾 Letzte Buchungen:
+{history_text}
+
 📅 Registriert: {player.created_at.strftime('%d.%m.%Y %H:%M')}"""
         
         await update.message.reply_text(message)
@@ -378,16 +407,19 @@ async def admin_points_command(update: Update, context: ContextTypes.DEFAULT_TYP
             await context.bot.send_message(chat_id=chat_id, text=f"❌ Spieler mit ID {telegram_id} nicht gefunden.")
             return
         
-        # Punkte vergeben
-        old_points = player.total_points
-        player.total_points += points
+        # Punkte vergeben (atomar, mit Ledger-Eintrag)
+        new_points = crud.award_points(
+            session, player.id, points,
+            reason='admin', admin_telegram_id=user.id, note=reason
+        )
+        old_points = new_points - points
         
         # Admin-Log erstellen (details als JSON-String)
         details_dict = {
             "points": points, 
             "reason": reason, 
             "old_total": old_points, 
-            "new_total": player.total_points
+            "new_total": new_points
         }
         
         admin_log = crud.AdminLog(
@@ -404,7 +436,7 @@ async def admin_points_command(update: Update, context: ContextTypes.DEFAULT_TYP
 Spieler: {player.first_name}
 Alte Punkte: {old_points}
 Anpassung: {points:+d}
-Neue Punkte: {player.total_points}
+Neue Punkte: {new_points}
 
 Grund: {reason}"""
         
@@ -497,12 +529,19 @@ async def admin_reset_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         # 2. Alle Easter Eggs löschen
         session.query(EasterEgg).delete()
         
-        # 3. Alle User-Punkte auf 0 setzen UND Team-Zuordnung entfernen
+        # 3. Alle User-Punkte auf 0 setzen (Gegenbuchung im Ledger) UND Team-Zuordnung entfernen
         for user_obj in session.query(User).all():
-            user_obj.total_points = 0
+            if user_obj.total_points:
+                crud.award_points(
+                    session, user_obj.id, -user_obj.total_points,
+                    reason='reset', admin_telegram_id=user.id
+                )
             user_obj.team_id = None  # Team-Zuordnung entfernen
         
         session.commit()
+        crud.rebuild_team_scores(session)  # Keine Teams mehr → Team-Rangliste leeren
+        user_cache.clear()
+        rate_limiter.reset()
         
         message = f"""✅ GAME RESET ERFOLGREICH
 
@@ -548,6 +587,11 @@ async def admin_apiusage_command(update: Update, context: ContextTypes.DEFAULT_T
 🎯 Token-Verbrauch:
 • Total Tokens: {stats['total_tokens_used']:,}
 
+♻️ Verdict-Cache:
+• Treffer: {stats['verdict_cache_hits']} (gesparte Requests)
+• Einträge: {stats['verdict_cache_size']}
+• Prompt-Version: {stats['prompt_version']}
+
 💰 Kosten (geschätzt):
 • Total: ${stats['total_cost_usd']:.4f} USD
 
@@ -563,6 +607,187 @@ https://platform.openai.com/usage"""
     logger.info(f"Admin {user.id} viewed API usage stats")
 
 
+async def admin_perf_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Zeigt Latenz und Durchsatz pro Handler (aufgeschlüsselt nach Phasen).
+    
+    Usage: /perf [reset]
+    """
+    user = update.effective_user
+    chat_id = update.effective_chat.id
+    
+    if not config.is_admin(user.id):
+        await context.bot.send_message(chat_id=chat_id, text="❌ Dieser Command ist nur für Admins verfügbar.")
+        return
+    
+    if context.args and context.args[0].lower() == 'reset':
+        metrics.reset()
+        await context.bot.send_message(chat_id=chat_id, text="✅ Handler-Metriken zurückgesetzt.")
+        logger.info(f"Admin {user.id} reset handler metrics")
+        return
+    
+    rows = metrics.snapshot()
+    if not rows:
+        await context.bot.send_message(chat_id=chat_id, text="📊 Noch keine Handler-Aufrufe gemessen.")
+        return
+    
+    message = "⏱️ HANDLER-PERFORMANCE\n"
+    for row in rows[:15]:
+        phases = " | ".join(
+            f"{phase} {row['phases'][phase]:.0f}" for phase in PHASES if row['phases'].get(phase)
+        )
+        message += (
+            f"\n{row['handler']}\n"
+            f"• {row['count']}x ({row['rate_per_min']}/min), Fehler: {row['errors']}\n"
+            f"• p50 {row['p50_ms']:.0f} ms | p95 {row['p95_ms']:.0f} ms | p99 {row['p99_ms']:.0f} ms | max {row['max_ms']:.0f} ms\n"
+        )
+        if phases:
+            message += f"• Ø ms: {phases}\n"
+    
+    limit_stats = rate_limiter.get_stats()
+    if limit_stats['throttled']:
+        throttled = ", ".join(f"{kind} {count}" for kind, count in sorted(limit_stats['throttled'].items()))
+        top = ", ".join(f"{telegram_id} ({count}x)" for telegram_id, count in limit_stats['top_users'])
+        message += f"\n🚦 Gedrosselt: {throttled}\n• Top: {top}\n"
+    
+    cache_stats = user_cache.get_stats()
+    lookups = cache_stats['hits'] + cache_stats['misses']
+    if lookups:
+        message += (
+            f"\n👤 User-Cache: {cache_stats['hits'] / lookups:.0%} Treffer "
+            f"({cache_stats['hits']}/{lookups}), {cache_stats['size']} User"
+        )
+    
+    pipeline_stats = submission_pipeline.get_stats()
+    if pipeline_stats['running']:
+        stages = " | ".join(
+            f"{stage} {pipeline_stats['queued'][stage]}+{pipeline_stats['busy'][stage]}/{pipeline_stats['workers'][stage]}"
+            for stage in STAGES
+        )
+        message += (
+            f"\n📬 Pipeline (wartend+aktiv/Worker): {stages}\n"
+            f"• {pipeline_stats['submitted']} eingereiht, {pipeline_stats['completed']} fertig, "
+            f"{pipeline_stats['failed']} Fehler, {pipeline_stats['resumed']} nach Neustart"
+        )
+    
+    if lock_stats.errors or lock_stats.retries:
+        message += f"\n🔒 DB-Locks: {lock_stats.errors} Fehler, {lock_stats.retries} Retries"
+    
+    if config.LEADERBOARD_PORT > 0:
+        board_stats = leaderboard.get_stats()
+        message += (
+            f"\n📺 Rangliste: {board_stats['subscribers']} Displays, "
+            f"{board_stats['version']} Pushes für {board_stats['notifications']} Änderungen"
+        )
+    
+    log_stats = get_logging_stats()
+    if log_stats:
+        message += (
+            f"\n📝 Log-Queue: {log_stats['queued']}/{log_stats['capacity']} wartend, "
+            f"{log_stats['dropped_total']} verworfen"
+        )
+    
+    await context.bot.send_message(chat_id=chat_id, text=message)
+    logger.info(f"Admin {user.id} viewed handler performance")
+
+
+async def admin_memory_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Zeigt RSS, Cache-Füllstände und (mit tracemalloc) die größten Allokationen.
+    
+    Usage: /memory [start [frames]|stop]
+    """
+    user = update.effective_user
+    chat_id = update.effective_chat.id
+    
+    if not config.is_admin(user.id):
+        await context.bot.send_message(chat_id=chat_id, text="❌ Dieser Command ist nur für Admins verfügbar.")
+        return
+    
+    action = context.args[0].lower() if context.args else None
+    if action == 'start':
+        frames = int(context.args[1]) if len(context.args) > 1 and context.args[1].isdigit() else None
+        started = memory_profiler.start(frames)
+        text = (
+            "✅ tracemalloc gestartet - der nächste /memory-Bericht ist die Basis für das Wachstum."
+            if started else "ℹ️ tracemalloc läuft bereits."
+        )
+        await context.bot.send_message(chat_id=chat_id, text=text)
+        logger.info(f"Admin {user.id} started tracemalloc")
+        return
+    if action == 'stop':
+        memory_profiler.stop()
+        await context.bot.send_message(chat_id=chat_id, text="✅ tracemalloc gestoppt, Traces freigegeben.")
+        logger.info(f"Admin {user.id} stopped tracemalloc")
+        return
+    
+    report = await asyncio.to_thread(memory_profiler.report, 8)
+    
+    message = (
+        "🧠 SPEICHER\n\n"
+        f"💾 RSS: {format_mb(report['rss_bytes'])} (Peak {format_mb(report['peak_rss_bytes'])})\n"
+        f"🐍 Python-Objekte: {report['objects']}\n"
+    )
+    if report['caches']:
+        message += "\n📦 Caches (Einträge/Limit):\n"
+        for row in report['caches']:
+            message += f"• {row['name']}: {row['size']}" + (f"/{row['limit']}" if row['limit'] else "") + "\n"
+    
+    if not report['tracing']:
+        message += "\n🔬 tracemalloc aus - /memory start für Top-Allokationen"
+    else:
+        message += (
+            f"\n🔬 tracemalloc: {format_mb(report['traced_bytes'])} verfolgt "
+            f"(Peak {format_mb(report['traced_peak_bytes'])})\n"
+            "\nGrößte Allokationen:\n"
+        )
+        for row in report['top']:
+            message += f"• {row['location']}: {row['size_bytes'] / 1024:.0f} KB ({row['count']}x)\n"
+        if report['growth']:
+            message += "\nWachstum seit letztem Bericht:\n"
+            for row in report['growth']:
+                message += f"• {row['location']}: +{row['size_bytes'] / 1024:.0f} KB ({row['count']:+d})\n"
+    
+    await context.bot.send_message(chat_id=chat_id, text=message)
+    logger.info(f"Admin {user.id} viewed memory report")
+
+
+async def admin_snapshot_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Erstellt sofort einen Snapshot der Datenbank (SQLite-Online-Backup).
+    
+    Usage: /snapshot
+    """
+    user = update.effective_user
+    chat_id = update.effective_chat.id
+    
+    if not config.is_admin(user.id):
+        await context.bot.send_message(chat_id=chat_id, text="❌ Dieser Command ist nur für Admins verfügbar.")
+        return
+    
+    if not snapshot_manager.enabled:
+        await context.bot.send_message(chat_id=chat_id, text="❌ Snapshots gibt es nur für SQLite-Datenbanken.")
+        return
+    
+    try:
+        result = await asyncio.to_thread(snapshot_manager.take_and_prune)
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"Snapshot failed: {e}", exc_info=True)
+        await context.bot.send_message(chat_id=chat_id, text=f"❌ Snapshot fehlgeschlagen: {e}")
+        return
+    
+    snapshots = snapshot_manager.list_snapshots()
+    message = f"""{'✅' if result.integrity_ok else '⚠️'} SNAPSHOT ERSTELLT
+
+📁 {result.path.name}
+💾 {result.size_bytes / 1024:.0f} KB in {result.seconds * 1000:.0f} ms
+🔍 Integritätsprüfung: {'ok' if result.integrity_ok else 'FEHLGESCHLAGEN'}
+🗂️ {len(snapshots)} Snapshots in {snapshot_manager.target_dir}"""
+    
+    await context.bot.send_message(chat_id=chat_id, text=message)
+    logger.info(f"Admin {user.id} created snapshot {result.path.name}")
+
+
 async def admin_broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Sendet eine Nachricht an alle Spieler.
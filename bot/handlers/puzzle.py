@@ -7,15 +7,20 @@ from telegram import Update
 from telegram.ext import ContextTypes
 import logging
 
-from database.db import db
-from database.crud import (
-    get_or_create_user, 
-    create_submission, 
-    has_solved_puzzle
+from database.models import SubmissionType
+from services.submission_phases import (
+    record_submission,
+    download_media,
+    store_media,
+    finalize_submission,
+    abandon_submission,
+    REFUSAL_NO_TEAM,
+    REFUSAL_TEAM_NOT_FOUND,
+    REFUSAL_PUZZLE_SOLVED,
+    RESET_TEXT
 )
-from database.models import SubmissionType, SubmissionStatus
-from services.photo_manager import photo_manager
 from services.template_manager import template_manager
+from config import config
 
 logger = logging.getLogger('bot.handlers.puzzle')
 
@@ -47,83 +52,74 @@ async def puzzle_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     logger.info(f"User {user.id} submitted puzzle screenshot")
     
-    with db.get_session() as session:
-        # User registrieren/holen
-        db_user = get_or_create_user(
-            session,
-            telegram_id=user.id,
-            username=user.username,
-            first_name=user.first_name,
-            last_name=user.last_name
+    photo = update.message.photo[-1]  # Größtes Foto
+    
+    # Record-Phase: User holen, Team/Duplikat prüfen, Submission anlegen (PENDING)
+    recorded = record_submission(user, SubmissionType.PUZZLE, photo.file_id)
+    
+    if recorded.refusal == REFUSAL_NO_TEAM:
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text="❌ Du musst zuerst einem Team beitreten!\n\n"
+                 "👥 Nutze: /team <Team-ID>\n\n"
+                 "💡 Addiere deine Charakter-ID mit der deines Partners.\n"
+                 "Beispiel: /team 358023"
+        )
+        logger.info(f"User {user.id} tried to submit puzzle without being in a team")
+        return
+    
+    if recorded.refusal == REFUSAL_PUZZLE_SOLVED:
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text="❌ Du hast das Puzzle bereits gelöst!\n\n"
+                 "Du kannst nur einmal Punkte für das Puzzle erhalten."
         )
+        logger.info(f"User {user.id} tried to submit duplicate puzzle")
+        return
+    
+    if recorded.refusal == REFUSAL_TEAM_NOT_FOUND:
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text="❌ Fehler: Team nicht gefunden!"
+        )
+        return
+    
+    try:
+        # Download-Phase: Screenshot holen und lokal speichern
+        photo_bytes = await download_media(context.bot, photo.file_id)
+        await store_media(recorded.submission_id, user.id, user.first_name, photo_bytes, 'photo', category='puzzles')
         
-        # Prüfen ob User in einem Team ist
-        if not db_user.team_id:
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text="❌ Du musst zuerst einem Team beitreten!\n\n"
-                     "👥 Nutze: /team <Team-ID>\n\n"
-                     "💡 Addiere deine Charakter-ID mit der deines Partners.\n"
-                     "Beispiel: /team 358023"
-            )
-            logger.info(f"User {user.id} tried to submit puzzle without being in a team")
+        # Finalize-Phase: /puzzle wird ohne KI-Prüfung gutgeschrieben
+        finalized = finalize_submission(recorded.submission_id, approved=True, points=config.POINTS_PUZZLE)
+        
+        if finalized is None:
+            # Zwischenzeitlich per /reset gelöscht
+            await context.bot.send_message(chat_id=chat_id, text=RESET_TEXT)
             return
         
-        # Prüfen ob User Puzzle bereits gelöst hat
-        if has_solved_puzzle(session, db_user.id):
+        if finalized.duplicate:
             await context.bot.send_message(
                 chat_id=chat_id,
                 text="❌ Du hast das Puzzle bereits gelöst!\n\n"
                      "Du kannst nur einmal Punkte für das Puzzle erhalten."
             )
-            logger.info(f"User {user.id} tried to submit duplicate puzzle")
             return
         
-        try:
-            # Foto herunterladen
-            photo = update.message.photo[-1]  # Größtes Foto
-            file = await context.bot.get_file(photo.file_id)
-            photo_bytes = await file.download_as_bytearray()
-            
-            # Submission erstellen (automatisch approved)
-            submission = create_submission(
-                session=session,
-                user_id=db_user.id,
-                submission_type=SubmissionType.PUZZLE,
-                photo_file_id=photo.file_id,
-                points_awarded=25,
-                status=SubmissionStatus.APPROVED,
-                caption=f"Team: {db_user.team_id}"
-            )
-            
-            # Foto lokal speichern
-            photo_path, thumbnail_path = photo_manager.save_photo(
-                photo_bytes=bytes(photo_bytes),
-                user_id=user.id,
-                submission_id=submission.id,
-                category='puzzles',
-                user_name=user.first_name
-            )
-            
-            # Pfade in Submission aktualisieren
-            submission.photo_path = photo_path
-            submission.thumbnail_path = thumbnail_path
-            session.commit()
-            
-            # Bestätigung senden
-            response = template_manager.render_puzzle_completed(
-                first_name=user.first_name or "Reisender",
-                points=25,
-                total_points=db_user.total_points
-            )
-            
-            await context.bot.send_message(chat_id=chat_id, text=response)
-            
-            logger.info(f"Puzzle completed by user {user.id}: +25 points")
-            
-        except Exception as e:
-            logger.error(f"Error processing puzzle screenshot: {e}", exc_info=True)
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text="❌ Fehler beim Verarbeiten des Screenshots. Bitte versuche es erneut."
-            )
+        # Bestätigung senden
+        response = template_manager.render_puzzle_completed(
+            first_name=user.first_name or "Reisender",
+            points=config.POINTS_PUZZLE,
+            total_points=finalized.total_points
+        )
+        
+        await context.bot.send_message(chat_id=chat_id, text=response)
+        
+        logger.info(f"Puzzle completed by user {user.id}: +{config.POINTS_PUZZLE} points")
+        
+    except Exception as e:
+        logger.error(f"Error processing puzzle screenshot: {e}", exc_info=True)
+        abandon_submission(recorded.submission_id, e)
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text="❌ Fehler beim Verarbeiten des Screenshots. Bitte versuche es erneut."
+        )
@@ -10,6 +10,7 @@ from database.db import Database
 from database import crud
 from database.models import SubmissionType
 from services.template_manager import template_manager
+from config import config
 
 logger = logging.getLogger('bot.handlers.team')
 
@@ -103,20 +104,20 @@ async def team_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     session,
                     user_id=db_user.id,
                     submission_type=SubmissionType.TEAM_JOIN,
-                    points_awarded=25
+                    points_awarded=config.POINTS_TEAM_JOIN
                 )
                 
                 # Erfolgs-Nachricht mit Template
                 message = template_manager.render_team_joined(
                     first_name=user.first_name or "User",
                     team_name=team.film_title,
-                    points=25,
+                    points=config.POINTS_TEAM_JOIN,
                     puzzle_link=team.puzzle_link if team.puzzle_link else "Kein Puzzle verfügbar"
                 )
                 
                 await update.message.reply_text(message, parse_mode='Markdown')
                 
-                logger.info(f"User {user.id} joined team {team_id} ({team.film_title}). Points: 25")
+                logger.info(f"User {user.id} joined team {team_id} ({team.film_title}). Points: {config.POINTS_TEAM_JOIN}")
             else:
                 await update.message.reply_text(
                     "❌ Fehler beim Team-Beitritt. Bitte versuche es später erneut."
@@ -12,6 +12,7 @@ from database.db import db
 from database.crud import get_or_create_user, create_submission, get_team_by_id, join_team
 from database.models import SubmissionType, SubmissionStatus
 from services.template_manager import template_manager
+from config import config
 
 logger = logging.getLogger('bot.handlers.text')
 
@@ -107,7 +108,7 @@ async def handle_team_join(
             session=session,
             user_id=db_user.id,
             submission_type=SubmissionType.TEAM_JOIN,
-            points_awarded=25,
+            points_awarded=config.POINTS_TEAM_JOIN,
             status=SubmissionStatus.APPROVED,
             caption=f"Team: {team_id}"
         )
@@ -116,10 +117,10 @@ async def handle_team_join(
         response = template_manager.render_team_joined(
             first_name=user.first_name or "Reisender",
             team_name=team.film_title,
-            points=25,
+            points=config.POINTS_TEAM_JOIN,
             puzzle_link=team.puzzle_link
         )
         
         await context.bot.send_message(chat_id=chat_id, text=response)
         
-        logger.info(f"User {user.id} joined team {team_id} ({team.film_title}): +25 points")
+        logger.info(f"User {user.id} joined team {team_id} ({team.film_title}): +{config.POINTS_TEAM_JOIN} points")
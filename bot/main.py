@@ -4,9 +4,9 @@ Rebellion gegen die KI - Halloween Party 2025
 """
 
 import asyncio
+import json
 import sys
 import logging
-from telegram import Update
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -19,8 +19,32 @@ from telegram.ext import (
 from config import config
 from services.logger import BotLogger, log_user_action, log_error
 from database.db import db
-from database.crud import create_team, get_team_by_id
+from database.crud import upsert_teams, backfill_point_ledger, add_points_listener
 from utils.yaml_loader import universe_loader
+from utils.service_container import container
+from services.http_server import HTTPServer, Response, StreamResponse
+from services.leaderboard_stream import leaderboard, PAGE_PATH as LEADERBOARD_PAGE
+from services.db_snapshot import snapshot_manager
+from services.memory_profiler import memory_profiler
+from services.template_manager import template_manager
+from services.metrics import metrics, instrument_application, instrument_engine, InstrumentedRequest
+from services.update_processor import PerChatUpdateProcessor
+from services.update_types import derive_allowed_updates
+from services.rate_limiter import rate_limiter
+from services.submission_pipeline import submission_pipeline
+
+
+def sync_teams():
+    """Gleicht die Teams aus dem aktuellen YAML-Snapshot mit der DB ab."""
+    logger = logging.getLogger('bot.main')
+    
+    with db.get_session() as session:
+        result = upsert_teams(session, universe_loader.get_teams())
+    
+    if result['created'] > 0:
+        logger.info(f"Loaded {result['created']} new teams from YAML")
+    if result['updated'] > 0:
+        logger.info(f"Updated {result['updated']} teams from YAML")
 
 
 def init_database():
@@ -31,30 +55,117 @@ def init_database():
     db.create_tables()
     logger.info("Database tables initialized")
     
-    # Teams aus YAML laden
-    teams_data = universe_loader.get_teams()
-    
+    # Punkte-Ledger für Bestandsdaten anlegen (nur beim ersten Start mit Ledger)
     with db.get_session() as session:
-        loaded_count = 0
-        for team_data in teams_data:
-            # Prüfen ob Team bereits existiert
-            existing = get_team_by_id(session, team_data['team_id'])
-            
-            if not existing:
-                create_team(
-                    session=session,
-                    team_id=team_data['team_id'],
-                    film_title=team_data['film_title'],
-                    character_1=team_data['character_1'],
-                    character_2=team_data['character_2'],
-                    character_1_id=team_data['character_1_id'],
-                    character_2_id=team_data['character_2_id'],
-                    puzzle_link=team_data['puzzle_link']
-                )
-                loaded_count += 1
+        backfill_point_ledger(session)
+    
+    # Teams aus YAML laden - und nach jedem YAML-Reload erneut abgleichen
+    sync_teams()
+    universe_loader.add_reload_listener(sync_teams)
+
+
+async def start_background_services(application: Application) -> None:
+    """Startet Hintergrund-Dienste im Event-Loop (YAML-Hot-Reload, Metrics-Endpoint)."""
+    logger = logging.getLogger('bot.main')
+    
+    # Restliche Dienste (KI-Client, Referenz-Index, ...) parallel im Hintergrund
+    # erzeugen - das Polling startet sofort, der erste Zugriff wartet ggf. kurz
+    application.bot_data['service_warmup'] = asyncio.create_task(
+        asyncio.to_thread(container.warm_up)
+    )
+    
+    # Rate-Limit-Buckets regelmäßig sichern bzw. aufräumen
+    application.bot_data['rate_limit_flusher'] = asyncio.create_task(
+        rate_limiter.run_flusher(config.RATE_LIMIT_FLUSH_INTERVAL)
+    )
+    
+    # Foto-Submissions im Hintergrund (nimmt unfertige Submissions wieder auf)
+    if config.SUBMISSION_PIPELINE:
+        await submission_pipeline.start(application.bot)
+    
+    # Regelmäßige DB-Snapshots für Auswertungen (nur SQLite)
+    if config.SNAPSHOT_INTERVAL_MINUTES > 0 and snapshot_manager.enabled:
+        application.bot_data['db_snapshots'] = asyncio.create_task(
+            snapshot_manager.run_scheduler(config.SNAPSHOT_INTERVAL_MINUTES * 60)
+        )
+    
+    # Speicher-Bericht (RSS, Cache-Füllstände, ggf. tracemalloc) ins Log
+    if config.MEMORY_REPORT_INTERVAL_MINUTES > 0:
+        application.bot_data['memory_reporter'] = asyncio.create_task(
+            memory_profiler.run_reporter(config.MEMORY_REPORT_INTERVAL_MINUTES * 60)
+        )
+    
+    if config.UNIVERSE_RELOAD_INTERVAL > 0:
+        application.bot_data['yaml_watcher'] = asyncio.create_task(
+            universe_loader.watch(config.UNIVERSE_RELOAD_INTERVAL)
+        )
+    
+    if config.METRICS_PORT > 0:
+        server = HTTPServer(config.METRICS_HOST, config.METRICS_PORT)
+        
+        async def prometheus_metrics(request):
+            return Response(metrics.render_prometheus(), content_type='text/plain; version=0.0.4')
         
-        if loaded_count > 0:
-            logger.info(f"Loaded {loaded_count} new teams from YAML")
+        server.route('/metrics', prometheus_metrics)
+        try:
+            await server.start()
+            application.bot_data['http_server'] = server
+        except OSError as e:
+            logger.error(f"Metrics-Endpoint konnte nicht gestartet werden: {e}")
+    
+    if config.LEADERBOARD_PORT > 0:
+        await start_leaderboard(application)
+
+
+async def start_leaderboard(application: Application) -> None:
+    """Startet die Live-Rangliste (HTML-Seite + SSE-Stream) für die Displays."""
+    logger = logging.getLogger('bot.main')
+    server = HTTPServer(config.LEADERBOARD_HOST, config.LEADERBOARD_PORT)
+    page = LEADERBOARD_PAGE.read_text(encoding='utf-8')
+    
+    async def leaderboard_page(request):
+        return Response(page, content_type='text/html; charset=utf-8')
+    
+    async def leaderboard_stream(request):
+        return StreamResponse(leaderboard.stream())
+    
+    async def leaderboard_json(request):
+        return Response(json.dumps(leaderboard.snapshot or {}, ensure_ascii=False), content_type='application/json')
+    
+    server.route('/leaderboard', leaderboard_page)
+    server.route('/leaderboard/stream', leaderboard_stream)
+    server.route('/leaderboard.json', leaderboard_json)
+    try:
+        await server.start()
+    except OSError as e:
+        logger.error(f"Live-Rangliste konnte nicht gestartet werden: {e}")
+        return
+    
+    add_points_listener(leaderboard.notify)
+    application.bot_data['leaderboard_server'] = server
+    application.bot_data['leaderboard_broadcaster'] = asyncio.create_task(leaderboard.run())
+
+
+async def stop_background_services(application: Application) -> None:
+    """Beendet die Hintergrund-Dienste."""
+    # Laufende Jobs bleiben mit ihrer Stufe in der DB und laufen nach dem Neustart weiter
+    await submission_pipeline.stop()
+    
+    for name in ('yaml_watcher', 'service_warmup', 'leaderboard_broadcaster', 'db_snapshots', 'memory_reporter'):
+        task = application.bot_data.pop(name, None)
+        if task:
+            task.cancel()
+    
+    # Flusher schreibt beim Abbruch ein letztes Mal - darauf warten
+    task = application.bot_data.pop('rate_limit_flusher', None)
+    if task:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    
+    for name in ('http_server', 'leaderboard_server'):
+        server = application.bot_data.pop(name, None)
+        if server:
+            await server.stop()
 
 
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -90,108 +201,169 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
         logger.error(f"Error while sending error message to user: {e}")
 
 
+def register_handlers(application: Application) -> None:
+    """Registriert alle Handler inkl. Zeitmessung und Error-Handler (auch für tools.load_test)."""
+    from handlers.start import start_command
+    from handlers.help import help_command
+    from handlers.points import points_command
+    from handlers.photo import photo_handler
+    from handlers.text import text_handler
+    from handlers.team import team_command
+    from handlers.keyboard import keyboard_handler
+    from handlers.guide import guide_command
+    from handlers.admin import (
+        admin_help_command,
+        admin_command,
+        admin_players_command,
+        admin_player_command,
+        admin_teams_command,
+        admin_stats_command,
+        admin_points_command,
+        admin_eastereggs_command,
+        admin_reset_command,
+        admin_apiusage_command,
+        admin_broadcast_command,
+        admin_message_command,
+        admin_team_message_command,
+        admin_perf_command,
+        admin_memory_command,
+        admin_snapshot_command
+    )
+    
+    # User Commands
+    application.add_handler(CommandHandler("start", start_command))
+    application.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("punkte", points_command))
+    application.add_handler(CommandHandler("team", team_command))
+    application.add_handler(CommandHandler("anleitung", guide_command))
+    
+    # Admin Commands (mit kurzen Aliasen)
+    application.add_handler(CommandHandler("admin", admin_command))
+    application.add_handler(CommandHandler(["help_admin", "adminhelp"], admin_help_command))
+    
+    # Admin: Spieler-Verwaltung
+    application.add_handler(CommandHandler(["players", "admin_players"], admin_players_command))
+    application.add_handler(CommandHandler(["player", "admin_player"], admin_player_command))
+    application.add_handler(CommandHandler(["points", "admin_points"], admin_points_command))
+    
+    # Admin: Teams & Statistiken
+    application.add_handler(CommandHandler(["teams", "admin_teams"], admin_teams_command))
+    application.add_handler(CommandHandler(["stats", "admin_stats"], admin_stats_command))
+    application.add_handler(CommandHandler(["eastereggs", "films", "admin_eastereggs"], admin_eastereggs_command))
+    
+    # Admin: Nachrichten
+    application.add_handler(CommandHandler(["broadcast", "admin_broadcast"], admin_broadcast_command))
+    application.add_handler(CommandHandler(["message", "admin_message"], admin_message_command))
+    application.add_handler(CommandHandler(["teammessage", "admin_teammessage"], admin_team_message_command))
+    
+    # Admin: System
+    application.add_handler(CommandHandler(["apiusage", "admin_apiusage"], admin_apiusage_command))
+    application.add_handler(CommandHandler(["reset", "admin_reset"], admin_reset_command))
+    application.add_handler(CommandHandler(["perf", "admin_perf"], admin_perf_command))
+    application.add_handler(CommandHandler(["memory", "admin_memory"], admin_memory_command))
+    application.add_handler(CommandHandler(["snapshot", "admin_snapshot"], admin_snapshot_command))
+    
+    # Keyboard-Button Handler (VOR text_handler!)
+    application.add_handler(MessageHandler(
+        filters.TEXT & ~filters.COMMAND & 
+        filters.Regex(r'^(🏆 Meine Punkte|❓ Hilfe|ℹ️ Anleitung)$'),
+        keyboard_handler
+    ))
+    
+    # Foto-Handler (ohne Command)
+    application.add_handler(MessageHandler(filters.PHOTO, photo_handler))
+    
+    # Video-Handler (ohne Command) - für Party-Fotos und Film-Referenzen
+    application.add_handler(MessageHandler(filters.VIDEO, photo_handler))
+    
+    # Text-Handler für Team-Beitritt (ohne Command - DEPRECATED, nutze /team)
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_handler))
+    
+    # Alle Handler mit Zeitmessung versehen (DB-Zeit über Engine-Events)
+    instrument_application(application)
+    instrument_engine(db.engine)
+    
+    # Globalen Error Handler registrieren
+    application.add_error_handler(error_handler)
+
+
 def main():
     """Hauptfunktion - Startet den Bot."""
     
     # Logging initialisieren
     bot_logger = BotLogger(
         logs_base_path=str(config.LOGS_BASE_PATH),
-        log_level=config.LOG_LEVEL
+        log_level=config.LOG_LEVEL,
+        queue_size=config.LOG_QUEUE_SIZE,
+        events_max_bytes=int(config.AI_EVENTS_MAX_MB * 1024 * 1024),
+        events_max_age_seconds=config.AI_EVENTS_ROTATE_MINUTES * 60
     )
     logger = bot_logger.get_logger('bot.main')
     
+    # tracemalloc möglichst früh starten, damit auch Start-Allokationen erfasst werden
+    if config.MEMORY_TRACE_FRAMES > 0:
+        memory_profiler.start()
+    
     logger.info("=" * 60)
     logger.info("Halloween Bot startet...")
     logger.info(f"Konfiguration: {config}")
     logger.info("=" * 60)
     
+    # Für den Start benötigte Dienste parallel erzeugen (DB-Engine, YAML, Templates)
+    container.warm_up(('db', 'universe_loader', 'template_manager'))
+    
     # Datenbank initialisieren
     init_database()
     
+    # Templates einmalig kompilieren (bzw. aus dem Bytecode-Cache laden)
+    template_manager.precompile()
+    
     try:
         # Bot-Application erstellen
-        application = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
-        
-        # Command-Handler registrieren
-        from handlers.start import start_command
-        from handlers.help import help_command
-        from handlers.points import points_command
-        from handlers.photo import photo_handler
-        from handlers.text import text_handler
-        from handlers.team import team_command
-        from handlers.keyboard import keyboard_handler
-        from handlers.guide import guide_command
-        from handlers.admin import (
-            admin_help_command,
-            admin_command,
-            admin_players_command,
-            admin_player_command,
-            admin_teams_command,
-            admin_stats_command,
-            admin_points_command,
-            admin_eastereggs_command,
-            admin_reset_command,
-            admin_apiusage_command,
-            admin_broadcast_command,
-            admin_message_command,
-            admin_team_message_command
+        builder = (
+            Application.builder()
+            .token(config.TELEGRAM_BOT_TOKEN)
+            .base_url(config.TELEGRAM_BASE_URL)
+            .base_file_url(config.TELEGRAM_BASE_FILE_URL)
+            .request(InstrumentedRequest(connection_pool_size=256))
+            .post_init(start_background_services)
+            .post_stop(stop_background_services)
         )
         
-        # User Commands
-        application.add_handler(CommandHandler("start", start_command))
-        application.add_handler(CommandHandler("help", help_command))
-        application.add_handler(CommandHandler("punkte", points_command))
-        application.add_handler(CommandHandler("team", team_command))
-        application.add_handler(CommandHandler("anleitung", guide_command))
-        
-        # Admin Commands (mit kurzen Aliasen)
-        application.add_handler(CommandHandler("admin", admin_command))
-        application.add_handler(CommandHandler(["help_admin", "adminhelp"], admin_help_command))
-        
-        # Admin: Spieler-Verwaltung
-        application.add_handler(CommandHandler(["players", "admin_players"], admin_players_command))
-        application.add_handler(CommandHandler(["player", "admin_player"], admin_player_command))
-        application.add_handler(CommandHandler(["points", "admin_points"], admin_points_command))
-        
-        # Admin: Teams & Statistiken
-        application.add_handler(CommandHandler(["teams", "admin_teams"], admin_teams_command))
-        application.add_handler(CommandHandler(["stats", "admin_stats"], admin_stats_command))
-        application.add_handler(CommandHandler(["eastereggs", "films", "admin_eastereggs"], admin_eastereggs_command))
+        # Updates verschiedener Chats parallel verarbeiten (pro Chat seriell)
+        if config.CONCURRENT_UPDATES > 1:
+            builder.concurrent_updates(PerChatUpdateProcessor(config.CONCURRENT_UPDATES))
         
-        # Admin: Nachrichten
-        application.add_handler(CommandHandler(["broadcast", "admin_broadcast"], admin_broadcast_command))
-        application.add_handler(CommandHandler(["message", "admin_message"], admin_message_command))
-        application.add_handler(CommandHandler(["teammessage", "admin_teammessage"], admin_team_message_command))
+        application = builder.build()
         
-        # Admin: System
-        application.add_handler(CommandHandler(["apiusage", "admin_apiusage"], admin_apiusage_command))
-        application.add_handler(CommandHandler(["reset", "admin_reset"], admin_reset_command))
-        
-        # Keyboard-Button Handler (VOR text_handler!)
-        application.add_handler(MessageHandler(
-            filters.TEXT & ~filters.COMMAND & 
-            filters.Regex(r'^(🏆 Meine Punkte|❓ Hilfe|ℹ️ Anleitung)$'),
-            keyboard_handler
-        ))
-        
-        # Foto-Handler (ohne Command)
-        application.add_handler(MessageHandler(filters.PHOTO, photo_handler))
-        
-        # Video-Handler (ohne Command) - für Party-Fotos und Film-Referenzen
-        application.add_handler(MessageHandler(filters.VIDEO, photo_handler))
-        
-        # Text-Handler für Team-Beitritt (ohne Command - DEPRECATED, nutze /team)
-        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_handler))
-        
-        # Globalen Error Handler registrieren
-        application.add_error_handler(error_handler)
+        # Command-Handler registrieren
+        register_handlers(application)
         
         logger.info("Bot-Handler registriert")
         logger.info(f"Admin-User-IDs: {config.ADMIN_USER_IDS}")
         
+        # Nur Update-Typen anfordern, für die Handler registriert sind
+        allowed_updates = derive_allowed_updates(application)
+        
         # Bot starten
         logger.info("Bot läuft... (Strg+C zum Beenden)")
-        application.run_polling(allowed_updates=Update.ALL_TYPES)
+        if config.BOT_MODE == 'webhook':
+            logger.info(
+                f"Webhook-Modus: {config.webhook_endpoint()} → "
+                f"http://{config.WEBHOOK_LISTEN}:{config.WEBHOOK_PORT}/{config.WEBHOOK_PATH}"
+            )
+            if not config.WEBHOOK_SECRET_TOKEN:
+                logger.warning("WEBHOOK_SECRET_TOKEN nicht gesetzt - Webhook-Requests werden nicht authentifiziert")
+            application.run_webhook(
+                listen=config.WEBHOOK_LISTEN,
+                port=config.WEBHOOK_PORT,
+                url_path=config.WEBHOOK_PATH,
+                webhook_url=config.webhook_endpoint(),
+                secret_token=config.WEBHOOK_SECRET_TOKEN,
+                allowed_updates=allowed_updates
+            )
+        else:
+            application.run_polling(allowed_updates=allowed_updates)
         
     except KeyboardInterrupt:
         logger.info("Bot wird beendet (KeyboardInterrupt)...")
@@ -4,6 +4,12 @@ OpenAI Vision API Integration für Film-Referenz und Puzzle-Bewertung.
 import json
 import logging
 import asyncio
+import hashlib
+import inspect
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from functools import wraps
 from typing import Dict, Optional, Tuple
 from pathlib import Path
 import base64
@@ -12,10 +18,85 @@ from openai import AsyncOpenAI, OpenAI
 from openai import APIError, APITimeoutError, RateLimitError
 
 from config import config
+from services.prompt_registry import prompt_registry
+from services.ai_event_log import log_ai_event
+from services.metrics import timed
+from utils.service_container import container
 
 
 logger = logging.getLogger('bot.services.ai_evaluator')
 
+# Kennzahlen des laufenden Bewertungs-Aufrufs (Tokens, Cache-Status) für den Event-Log
+_call_stats: ContextVar[Optional[dict]] = ContextVar('ai_call_stats', default=None)
+
+
+def _note(**fields):
+    """Ergänzt die Kennzahlen des laufenden Bewertungs-Aufrufs."""
+    stats = _call_stats.get()
+    if stats is not None:
+        stats.update(fields)
+
+
+def _emit_event(kind: str, bound: inspect.BoundArguments, submission_id, started: float, stats: dict, verdict):
+    """Schreibt das strukturierte Event einer Bewertung."""
+    is_approved, confidence, reasoning, result = verdict
+    status = stats.pop('status', None) or ('ok' if result else 'error')
+    log_ai_event(
+        kind=kind,
+        submission_id=submission_id,
+        film_title=bound.arguments.get('film_title'),
+        status=status,
+        approved=is_approved,
+        confidence=confidence,
+        cache='hit' if status == 'cached' else 'miss',
+        latency_ms=round((time.perf_counter() - started) * 1000, 1),
+        image_detail=bound.arguments.get('image_detail'),
+        prompt_version=prompt_registry.version,
+        error=reasoning if status == 'error' else None,
+        **stats
+    )
+
+
+def ai_event(kind: str):
+    """
+    Decorator: Schreibt pro Bewertung ein Event (ai_events.jsonl).
+    
+    Die dekorierte Methode akzeptiert zusätzlich submission_id=... (nur für
+    den Event-Log). Funktioniert für sync und async Methoden.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, submission_id: int = None, **kwargs):
+                stats = {}
+                token = _call_stats.set(stats)
+                started = time.perf_counter()
+                try:
+                    with timed('ai'):
+                        verdict = await func(*args, **kwargs)
+                finally:
+                    _call_stats.reset(token)
+                _emit_event(kind, signature.bind(*args, **kwargs), submission_id, started, stats, verdict)
+                return verdict
+            return async_wrapper
+        
+        @wraps(func)
+        def wrapper(*args, submission_id: int = None, **kwargs):
+            stats = {}
+            token = _call_stats.set(stats)
+            started = time.perf_counter()
+            try:
+                with timed('ai'):
+                    verdict = func(*args, **kwargs)
+            finally:
+                _call_stats.reset(token)
+            _emit_event(kind, signature.bind(*args, **kwargs), submission_id, started, stats, verdict)
+            return verdict
+        return wrapper
+    return decorator
+
 
 class AIEvaluator:
     """
@@ -29,6 +110,12 @@ class AIEvaluator:
         self.total_requests = 0
         self.total_cost_usd = 0.0
         
+        # Verdict-Cache: gleiche Prompt-Version + gleiches Bild → gleiche Bewertung
+        self.verdict_cache_size = config.AI_VERDICT_CACHE_SIZE
+        self._verdict_cache: OrderedDict = OrderedDict()
+        self.verdict_cache_hits = 0
+        prompt_registry.add_invalidation_listener(self.clear_verdict_cache)
+        
         if not config.OPENAI_API_KEY:
             logger.warning("OPENAI_API_KEY nicht gesetzt - KI-Bewertung deaktiviert")
             self.client = None
@@ -56,9 +143,64 @@ class AIEvaluator:
             'total_requests': self.total_requests,
             'total_tokens_used': self.total_tokens_used,
             'total_cost_usd': round(self.total_cost_usd, 4),
-            'avg_tokens_per_request': round(self.total_tokens_used / max(self.total_requests, 1), 2)
+            'avg_tokens_per_request': round(self.total_tokens_used / max(self.total_requests, 1), 2),
+            'verdict_cache_hits': self.verdict_cache_hits,
+            'verdict_cache_size': len(self._verdict_cache),
+            'prompt_version': prompt_registry.version
         }
     
+    def _track_usage(self, response, label: str):
+        """Token-Nutzung und Kosten eines API-Calls erfassen."""
+        if not hasattr(response, 'usage'):
+            return
+        
+        tokens_used = response.usage.total_tokens
+        self.total_tokens_used += tokens_used
+        self.total_requests += 1
+        # Kosten berechnen (GPT-4o: ~$0.005 per 1K tokens input, ~$0.015 per 1K tokens output)
+        prompt_tokens = response.usage.prompt_tokens
+        completion_tokens = response.usage.completion_tokens
+        cost = (prompt_tokens * 0.005 / 1000) + (completion_tokens * 0.015 / 1000)
+        self.total_cost_usd += cost
+        logger.debug(f"{label}: {tokens_used} tokens | Cost: ${cost:.4f}")
+        
+        _note(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=tokens_used,
+            cost_usd=round(cost, 6)
+        )
+    
+    def _read_image(self, image_path: str) -> bytes:
+        """Liest Bilddaten (für Base64 und Verdict-Cache-Key)."""
+        with open(image_path, "rb") as image_file:
+            return image_file.read()
+    
+    @staticmethod
+    def _verdict_key(kind: str, prompt_fingerprint: str, image_bytes: bytes, image_detail: str = "auto") -> tuple:
+        """Cache-Key aus Prompt-Fingerprint (inkl. Version) und Bild-Hash."""
+        return (kind, prompt_fingerprint, image_detail, hashlib.sha256(image_bytes).hexdigest())
+    
+    def _get_cached_verdict(self, key: tuple) -> Optional[Tuple[bool, int, str, Dict]]:
+        """Holt gecachte Bewertung (LRU)."""
+        verdict = self._verdict_cache.get(key)
+        if verdict is not None:
+            self._verdict_cache.move_to_end(key)
+            self.verdict_cache_hits += 1
+        return verdict
+    
+    def _store_verdict(self, key: tuple, verdict: Tuple[bool, int, str, Dict]):
+        """Speichert Bewertung im Cache (nur erfolgreich geparste Antworten)."""
+        self._verdict_cache[key] = verdict
+        self._verdict_cache.move_to_end(key)
+        while len(self._verdict_cache) > self.verdict_cache_size:
+            self._verdict_cache.popitem(last=False)
+    
+    def clear_verdict_cache(self):
+        """Leert den Verdict-Cache (z.B. nach Prompt-Änderung)."""
+        self._verdict_cache.clear()
+        logger.info("Verdict-Cache geleert (Prompt-Registry invalidiert)")
+    
     def _encode_image(self, image_path: str) -> str:
         """
         Kodiert Bild zu Base64.
@@ -74,113 +216,37 @@ class AIEvaluator:
     
     def _create_prompt(self, film_title: str, easter_egg_description: str = None) -> str:
         """
-        Erstellt Prompt für Film-Bewertung.
+        Erstellt Prompt für Film-Bewertung (vorkompiliert aus der Prompt-Registry).
         
         Args:
             film_title: Name des Films
-            easter_egg_description: Beschreibung des Easter Eggs (optional)
+            easter_egg_description: Beschreibung des Easter Eggs (optional, default: aus YAML)
             
         Returns:
             Formatierter Prompt
         """
-        easter_egg_hint = ""
-        if easter_egg_description:
-            easter_egg_hint = f"\n\nBESONDERS WICHTIG: Für diesen Film gibt es ein spezifisches Easter Egg:\n{easter_egg_description}\n"
-        
-        prompt = f"""Du bist ein Experte für Sci-Fi-Filme und analysierst ein Foto von einer Halloween-Party.
-
-Die Person behauptet, dass dieses Foto eine Referenz zum Film "{film_title}" zeigt.
-{easter_egg_hint}
-Prüfe das Foto auf:
-1. **Easter Eggs** - Spezifische Gegenstände oder Symbole aus dem Film (siehe Beschreibung oben)
-2. **Nachgestellte Szenen** - Person(en) stellen ikonische Filmszene nach
-3. **Filmszene vom Bildschirm** - Foto eines laufenden Films/Szene auf TV/Monitor
-4. **Film-Plakat** - Offizielles oder nachgebautes Filmplakat
-5. **Kostüme/Charaktere** - Verkleidung als Film-Charakter
-6. **Requisiten/Props** - Ikonische Gegenstände aus dem Film
-
-WICHTIG: Es muss eine ERKENNBARE und EINDEUTIGE Referenz zum Film "{film_title}" sein!
-Einfache Ähnlichkeiten oder vage Assoziationen zählen NICHT.
-
-Antworte NUR mit einem JSON-Objekt in folgendem Format (keine zusätzlichen Texte):
-{{
-  "is_reference": true oder false,
-  "confidence": 0-100 (Wie sicher bist du?),
-  "reasoning": "Detaillierte Erklärung was du siehst und warum es eine Referenz ist/nicht ist",
-  "detected_elements": ["Element 1", "Element 2", ...],
-  "reference_type": "easter_egg" oder "scene" oder "screen_capture" oder "poster" oder "costume" oder "prop" oder "other"
-}}
-
-Beispiele für GUTE Referenzen:
-- Matrix: Grüner Code, rote/blaue Pille, Agent Smith Sonnenbrille, "There is no spoon" Löffel
-- Terminator: Rote LED-Augen, Metallskelett, "I'll be back" Schild, Totenkopf mit roten LEDs
-- V wie Vendetta: Guy Fawkes Maske, Rose, "Remember Remember" Text
-
-Beispiele für KEINE Referenzen:
-- Nur schwarze Kleidung (zu allgemein)
-- Generische Sci-Fi Props ohne Film-Bezug
-- Normale Alltagsgegenstände
-"""
-        return prompt
+        return prompt_registry.film_prompt(film_title, easter_egg_description).text
     
     def _create_puzzle_prompt(self, film_title: str, poster_urls: list = None) -> str:
         """
-        Erstellt Prompt für Puzzle-Poster-Bewertung.
+        Erstellt Prompt für Puzzle-Poster-Bewertung (vorkompiliert aus der Prompt-Registry).
         
         Args:
             film_title: Name des Films
-            poster_urls: URLs zu offiziellen Postern (optional)
+            poster_urls: URLs zu offiziellen Postern (optional, default: aus YAML)
             
         Returns:
             Formatierter Prompt
         """
-        poster_hint = ""
-        if poster_urls:
-            poster_hint = f"\n\nHinweis: Offizielle Poster findest du hier:\n" + "\n".join(f"- {url}" for url in poster_urls[:2])
-        
-        prompt = f"""Du analysierst ein Puzzle-Screenshot von einer Halloween-Party.
-
-Die Person hat ein Puzzle gelöst und behauptet, es zeigt ein Filmplakat zu "{film_title}".
-{poster_hint}
-
-AUFGABE: Prüfe ob das Foto ein GELÖSTES PUZZLE zeigt, das ein FILMPLAKAT von "{film_title}" darstellt.
-
-Wichtige Prüfpunkte:
-1. Ist das Puzzle **vollständig gelöst** (keine fehlenden Teile)?
-2. Zeigt es ein **Filmplakat** (keine Szene, kein Screenshot)?
-3. Ist es eindeutig zum Film **"{film_title}"** (Titel, Logo, ikonische Charaktere)?
-
-WICHTIG: 
-- Puzzle muss GELÖST sein (alle Teile vorhanden)
-- Es muss ein PLAKAT sein, keine Filmszene
-- Film-Titel oder eindeutige visuelle Elemente müssen erkennbar sein
-
-Antworte NUR mit einem JSON-Objekt:
-{{
-  "is_valid": true oder false,
-  "confidence": 0-100,
-  "reasoning": "Was siehst du? Ist es ein gelöstes Puzzle mit dem richtigen Filmplakat?",
-  "detected_elements": ["Puzzle-Teile", "Film-Titel", "Charaktere", ...],
-  "issues": ["Problem 1", "Problem 2", ...] (leer wenn alles ok)
-}}
-
-Beispiele für GÜLTIG:
-- Vollständig gelöstes Puzzle mit Matrix-Plakat (Neo, grüner Code, Titel sichtbar)
-- Gelöstes Puzzle mit Terminator-Plakat (T-800, roter Hintergrund, Titel)
-
-Beispiele für UNGÜLTIG:
-- Unvollständiges Puzzle (fehlende Teile)
-- Foto einer Filmszene statt Plakat
-- Falscher Film
-- Kein Puzzle erkennbar
-"""
-        return prompt
+        return prompt_registry.puzzle_prompt(film_title, poster_urls).text
     
+    @ai_event('film')
     def evaluate_film_reference(
         self, 
         photo_path: str, 
         film_title: str,
-        easter_egg_description: str = None
+        easter_egg_description: str = None,
+        image_detail: str = "auto"
     ) -> Tuple[bool, int, str, Dict]:
         """
         Bewertet ob Foto eine Referenz zum Film zeigt.
@@ -189,6 +255,7 @@ Beispiele für UNGÜLTIG:
             photo_path: Pfad zum Foto
             film_title: Name des Films
             easter_egg_description: Beschreibung des Easter Eggs (optional)
+            image_detail: Bildauflösung für die API ("low" spart Tokens)
             
         Returns:
             Tuple[is_approved, confidence, reasoning, full_response]
@@ -200,12 +267,23 @@ Beispiele für UNGÜLTIG:
         # Fallback wenn KI deaktiviert
         if not self.client:
             logger.warning(f"KI deaktiviert - Auto-Approve für {film_title}")
+            _note(status="disabled")
             return True, 100, "KI-Bewertung deaktiviert (kein API-Key)", {}
         
         try:
             # Bild laden und kodieren
             logger.info(f"Bewerte Film-Referenz: {film_title} | Foto: {photo_path}")
-            base64_image = self._encode_image(photo_path)
+            image_bytes = self._read_image(photo_path)
+            prompt = prompt_registry.film_prompt(film_title, easter_egg_description)
+            cache_key = self._verdict_key('film', prompt.fingerprint, image_bytes, image_detail)
+            
+            cached = self._get_cached_verdict(cache_key)
+            if cached is not None:
+                logger.info(f"Verdict-Cache-Treffer (Film-Referenz): {film_title}")
+                _note(status="cached")
+                return cached
+            
+            base64_image = base64.b64encode(image_bytes).decode('utf-8')
             
             # API-Request
             response = self.client.chat.completions.create(
@@ -216,12 +294,13 @@ Beispiele für UNGÜLTIG:
                         "content": [
                             {
                                 "type": "text",
-                                "text": self._create_prompt(film_title, easter_egg_description)
+                                "text": prompt.text
                             },
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
+                                    "url": f"data:image/jpeg;base64,{base64_image}",
+                                    "detail": image_detail
                                 }
                             }
                         ]
@@ -232,16 +311,7 @@ Beispiele für UNGÜLTIG:
             )
             
             # Token-Nutzung tracken
-            if hasattr(response, 'usage'):
-                tokens_used = response.usage.total_tokens
-                self.total_tokens_used += tokens_used
-                self.total_requests += 1
-                # Kosten berechnen (GPT-4o: ~$0.005 per 1K tokens input, ~$0.015 per 1K tokens output)
-                prompt_tokens = response.usage.prompt_tokens
-                completion_tokens = response.usage.completion_tokens
-                cost = (prompt_tokens * 0.005 / 1000) + (completion_tokens * 0.015 / 1000)
-                self.total_cost_usd += cost
-                logger.debug(f"API-Call: {tokens_used} tokens | Cost: ${cost:.4f}")
+            self._track_usage(response, "API-Call")
             
             # Response parsen
             content = response.choices[0].message.content
@@ -275,7 +345,9 @@ Beispiele für UNGÜLTIG:
                 f"Type={reference_type} | Approved={is_approved} | Elements={detected_elements}"
             )
             
-            return is_approved, confidence, reasoning, result
+            verdict = (is_approved, confidence, reasoning, result)
+            self._store_verdict(cache_key, verdict)
+            return verdict
             
         except json.JSONDecodeError as e:
             logger.error(f"JSON-Parse-Fehler: {e} | Content: {content}")
@@ -299,6 +371,7 @@ Beispiele für UNGÜLTIG:
             logger.error(f"Unerwarteter Fehler bei KI-Bewertung: {e}", exc_info=True)
             return False, 0, "Technischer Fehler bei der Bewertung", {}
     
+    @ai_event('puzzle')
     def evaluate_puzzle_poster(
         self,
         photo_path: str,
@@ -319,12 +392,23 @@ Beispiele für UNGÜLTIG:
         # Fallback wenn KI deaktiviert
         if not self.client:
             logger.warning(f"KI deaktiviert - Auto-Approve für Puzzle {film_title}")
+            _note(status="disabled")
             return True, 100, "KI-Bewertung deaktiviert (kein API-Key)", {}
         
         try:
             # Bild laden und kodieren
             logger.info(f"Bewerte Puzzle-Poster: {film_title} | Foto: {photo_path}")
-            base64_image = self._encode_image(photo_path)
+            image_bytes = self._read_image(photo_path)
+            prompt = prompt_registry.puzzle_prompt(film_title, poster_urls)
+            cache_key = self._verdict_key('puzzle', prompt.fingerprint, image_bytes)
+            
+            cached = self._get_cached_verdict(cache_key)
+            if cached is not None:
+                logger.info(f"Verdict-Cache-Treffer (Puzzle-Poster): {film_title}")
+                _note(status="cached")
+                return cached
+            
+            base64_image = base64.b64encode(image_bytes).decode('utf-8')
             
             # API-Request
             response = self.client.chat.completions.create(
@@ -335,7 +419,7 @@ Beispiele für UNGÜLTIG:
                         "content": [
                             {
                                 "type": "text",
-                                "text": self._create_puzzle_prompt(film_title, poster_urls)
+                                "text": prompt.text
                             },
                             {
                                 "type": "image_url",
@@ -351,16 +435,7 @@ Beispiele für UNGÜLTIG:
             )
             
             # Token-Nutzung tracken
-            if hasattr(response, 'usage'):
-                tokens_used = response.usage.total_tokens
-                self.total_tokens_used += tokens_used
-                self.total_requests += 1
-                # Kosten berechnen (GPT-4o: ~$0.005 per 1K tokens input, ~$0.015 per 1K tokens output)
-                prompt_tokens = response.usage.prompt_tokens
-                completion_tokens = response.usage.completion_tokens
-                cost = (prompt_tokens * 0.005 / 1000) + (completion_tokens * 0.015 / 1000)
-                self.total_cost_usd += cost
-                logger.debug(f"API-Call (Puzzle): {tokens_used} tokens | Cost: ${cost:.4f}")
+            self._track_usage(response, "API-Call (Puzzle)")
             
             # Response parsen
             content = response.choices[0].message.content
@@ -393,7 +468,9 @@ Beispiele für UNGÜLTIG:
                 f"Approved={is_approved} | Issues={issues}"
             )
             
-            return is_approved, confidence, reasoning, result
+            verdict = (is_approved, confidence, reasoning, result)
+            self._store_verdict(cache_key, verdict)
+            return verdict
             
         except json.JSONDecodeError as e:
             logger.error(f"JSON-Parse-Fehler (Puzzle): {e} | Content: {content}")
@@ -428,26 +505,40 @@ Beispiele für UNGÜLTIG:
     # ASYNC METHODS - Für bessere Concurrency
     # ========================================================================
     
+    @ai_event('film')
     async def evaluate_film_reference_async(
         self, 
         photo_path: str, 
         film_title: str,
-        easter_egg_description: str = None
+        easter_egg_description: str = None,
+        image_detail: str = "auto"
     ) -> Tuple[bool, int, str, Dict]:
         """
         Async Version: Bewertet ob Foto eine Referenz zum Film zeigt.
         
         Für bessere Performance bei vielen gleichzeitigen Requests.
+        Mit image_detail="low" wird das Bild günstiger (weniger Tokens) bewertet.
         """
         # Fallback wenn KI deaktiviert
         if not self.async_client:
             logger.warning(f"KI deaktiviert - Auto-Approve für {film_title}")
+            _note(status="disabled")
             return True, 100, "KI-Bewertung deaktiviert (kein API-Key)", {}
         
         try:
             # Bild laden und kodieren
             logger.info(f"[ASYNC] Bewerte Film-Referenz: {film_title} | Foto: {photo_path}")
-            base64_image = self._encode_image(photo_path)
+            image_bytes = self._read_image(photo_path)
+            prompt = prompt_registry.film_prompt(film_title, easter_egg_description)
+            cache_key = self._verdict_key('film', prompt.fingerprint, image_bytes, image_detail)
+            
+            cached = self._get_cached_verdict(cache_key)
+            if cached is not None:
+                logger.info(f"[ASYNC] Verdict-Cache-Treffer (Film-Referenz): {film_title}")
+                _note(status="cached")
+                return cached
+            
+            base64_image = base64.b64encode(image_bytes).decode('utf-8')
             
             # Async API-Request
             response = await self.async_client.chat.completions.create(
@@ -458,12 +549,13 @@ Beispiele für UNGÜLTIG:
                         "content": [
                             {
                                 "type": "text",
-                                "text": self._create_prompt(film_title, easter_egg_description)
+                                "text": prompt.text
                             },
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
+                                    "url": f"data:image/jpeg;base64,{base64_image}",
+                                    "detail": image_detail
                                 }
                             }
                         ]
@@ -474,15 +566,7 @@ Beispiele für UNGÜLTIG:
             )
             
             # Token-Nutzung tracken
-            if hasattr(response, 'usage'):
-                tokens_used = response.usage.total_tokens
-                self.total_tokens_used += tokens_used
-                self.total_requests += 1
-                prompt_tokens = response.usage.prompt_tokens
-                completion_tokens = response.usage.completion_tokens
-                cost = (prompt_tokens * 0.005 / 1000) + (completion_tokens * 0.015 / 1000)
-                self.total_cost_usd += cost
-                logger.debug(f"[ASYNC] API-Call: {tokens_used} tokens | Cost: ${cost:.4f}")
+            self._track_usage(response, "[ASYNC] API-Call")
             
             # Response parsen (gleiche Logik wie sync Version)
             content = response.choices[0].message.content.strip()
@@ -510,7 +594,9 @@ Beispiele für UNGÜLTIG:
                 f"Type={reference_type} | Approved={is_approved}"
             )
             
-            return is_approved, confidence, reasoning, result
+            verdict = (is_approved, confidence, reasoning, result)
+            self._store_verdict(cache_key, verdict)
+            return verdict
             
         except json.JSONDecodeError as e:
             logger.error(f"[ASYNC] JSON-Parse-Fehler: {e}")
@@ -532,6 +618,7 @@ Beispiele für UNGÜLTIG:
             logger.error(f"[ASYNC] Unerwarteter Fehler: {e}", exc_info=True)
             return False, 0, "Technischer Fehler bei der Bewertung", {}
     
+    @ai_event('puzzle')
     async def evaluate_puzzle_poster_async(
         self,
         photo_path: str,
@@ -546,11 +633,22 @@ Beispiele für UNGÜLTIG:
         # Fallback wenn KI deaktiviert
         if not self.async_client:
             logger.warning(f"[ASYNC] KI deaktiviert - Auto-Approve für Puzzle {film_title}")
+            _note(status="disabled")
             return True, 100, "KI-Bewertung deaktiviert (kein API-Key)", {}
         
         try:
             logger.info(f"[ASYNC] Bewerte Puzzle-Poster: {film_title} | Foto: {photo_path}")
-            base64_image = self._encode_image(photo_path)
+            image_bytes = self._read_image(photo_path)
+            prompt = prompt_registry.puzzle_prompt(film_title, poster_urls)
+            cache_key = self._verdict_key('puzzle', prompt.fingerprint, image_bytes)
+            
+            cached = self._get_cached_verdict(cache_key)
+            if cached is not None:
+                logger.info(f"[ASYNC] Verdict-Cache-Treffer (Puzzle-Poster): {film_title}")
+                _note(status="cached")
+                return cached
+            
+            base64_image = base64.b64encode(image_bytes).decode('utf-8')
             
             # Async API-Request
             response = await self.async_client.chat.completions.create(
@@ -561,7 +659,7 @@ Beispiele für UNGÜLTIG:
                         "content": [
                             {
                                 "type": "text",
-                                "text": self._create_puzzle_prompt(film_title, poster_urls)
+                                "text": prompt.text
                             },
                             {
                                 "type": "image_url",
@@ -577,15 +675,7 @@ Beispiele für UNGÜLTIG:
             )
             
             # Token-Nutzung tracken
-            if hasattr(response, 'usage'):
-                tokens_used = response.usage.total_tokens
-                self.total_tokens_used += tokens_used
-                self.total_requests += 1
-                prompt_tokens = response.usage.prompt_tokens
-                completion_tokens = response.usage.completion_tokens
-                cost = (prompt_tokens * 0.005 / 1000) + (completion_tokens * 0.015 / 1000)
-                self.total_cost_usd += cost
-                logger.debug(f"[ASYNC] API-Call (Puzzle): {tokens_used} tokens | Cost: ${cost:.4f}")
+            self._track_usage(response, "[ASYNC] API-Call (Puzzle)")
             
             # Response parsen
             content = response.choices[0].message.content.strip()
@@ -610,7 +700,9 @@ Beispiele für UNGÜLTIG:
                 f"Valid={is_valid} | Confidence={confidence}% | Approved={is_approved}"
             )
             
-            return is_approved, confidence, reasoning, result
+            verdict = (is_approved, confidence, reasoning, result)
+            self._store_verdict(cache_key, verdict)
+            return verdict
             
         except json.JSONDecodeError as e:
             logger.error(f"[ASYNC] JSON-Parse-Fehler (Puzzle): {e}")
@@ -633,5 +725,5 @@ Beispiele für UNGÜLTIG:
             return False, 0, "Technischer Fehler bei der Bewertung", {}
 
 
-# Singleton-Instanz
-ai_evaluator = AIEvaluator()
+# Singleton-Instanz (wird beim ersten Zugriff erzeugt)
+ai_evaluator = container.register('ai_evaluator', AIEvaluator)
@@ -0,0 +1,241 @@
+"""
+Strukturierter Event-Log für KI-Bewertungen.
+Schreibt ein JSON-Objekt pro Zeile (ai_events.jsonl), rotiert nach Größe
+oder Alter und verdichtet rotierte Dateien in eine SQLite-Analysedatenbank.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Logger-Name für Events (wird im BotLogger auf ai_events.jsonl geroutet)
+EVENT_LOGGER_NAME = 'bot.events.ai'
+
+EVENTS_FILENAME = 'ai_events.jsonl'
+# Rotierte Dateien: ai_events.20251031-213000.jsonl
+ROTATED_GLOB = 'ai_events.*.jsonl'
+
+# Spalten der Analysetabelle (Reihenfolge = Insert-Reihenfolge)
+EVENT_COLUMNS = (
+    'ts', 'kind', 'submission_id', 'film_title', 'status', 'approved',
+    'confidence', 'cache', 'prompt_tokens', 'completion_tokens',
+    'total_tokens', 'cost_usd', 'latency_ms', 'image_detail',
+    'prompt_version', 'error'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_events (
+    ts TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    submission_id INTEGER,
+    film_title TEXT,
+    status TEXT,
+    approved INTEGER,
+    confidence INTEGER,
+    cache TEXT,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    total_tokens INTEGER,
+    cost_usd REAL,
+    latency_ms REAL,
+    image_detail TEXT,
+    prompt_version TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_ai_events_ts ON ai_events (ts);
+CREATE INDEX IF NOT EXISTS idx_ai_events_film ON ai_events (film_title, kind);
+CREATE TABLE IF NOT EXISTS compacted_files (
+    name TEXT PRIMARY KEY,
+    events INTEGER NOT NULL,
+    compacted_at TEXT NOT NULL
+);
+"""
+
+logger = logging.getLogger('bot.services.ai_event_log')
+event_logger = logging.getLogger(EVENT_LOGGER_NAME)
+
+
+def log_ai_event(**fields: Any):
+    """
+    Schreibt ein KI-Bewertungs-Event als JSON-Zeile.
+
+    Args:
+        **fields: Event-Felder (siehe EVENT_COLUMNS), None-Werte werden weggelassen
+    """
+    event = {'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds')}
+    event.update({key: value for key, value in fields.items() if value is not None})
+    event_logger.info(json.dumps(event, ensure_ascii=False, separators=(',', ':')))
+
+
+class SizeTimeRotatingFileHandler(logging.FileHandler):
+    """
+    FileHandler, der nach Größe ODER Alter rotiert.
+
+    Rotierte Dateien bekommen einen Zeitstempel im Namen und werden nicht
+    weiter verschoben - so kann die Verdichtung sie gefahrlos abholen.
+    """
+
+    def __init__(self, filename: str, max_bytes: int, max_age_seconds: float, encoding: str = 'utf-8'):
+        """
+        Args:
+            filename: Pfad zur aktiven Datei
+            max_bytes: Rotation ab dieser Dateigröße (0 = aus)
+            max_age_seconds: Rotation ab diesem Alter der Datei (0 = aus)
+        """
+        super().__init__(filename, mode='a', encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._opened_at = self._file_created_at()
+
+    def _file_created_at(self) -> float:
+        """Zeitpunkt des ersten Eintrags der aktiven Datei (mtime als Näherung)."""
+        try:
+            stat = os.stat(self.baseFilename)
+        except OSError:
+            return time.time()
+        return stat.st_mtime if stat.st_size else time.time()
+
+    def should_rollover(self, record: logging.LogRecord) -> bool:
+        """Prüft Größe und Alter der aktiven Datei."""
+        if self.max_age_seconds and time.time() - self._opened_at >= self.max_age_seconds:
+            return os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0
+        if self.max_bytes:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.seek(0, 2)
+            return self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes
+        return False
+
+    def do_rollover(self):
+        """Benennt die aktive Datei mit Zeitstempel um und beginnt eine neue."""
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        base = Path(self.baseFilename)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        target = base.with_name(f"{base.stem}.{stamp}{base.suffix}")
+        counter = 1
+        while target.exists():
+            target = base.with_name(f"{base.stem}.{stamp}-{counter}{base.suffix}")
+            counter += 1
+
+        if base.exists():
+            os.replace(base, target)
+        self._opened_at = time.time()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self.should_rollover(record):
+                self.do_rollover()
+            super().emit(record)
+        except Exception:
+            self.handleError(record)
+
+
+def _row(event: Dict[str, Any]) -> Tuple:
+    """Event-Dict → Tabellenzeile."""
+    row = [event.get(column) for column in EVENT_COLUMNS]
+    approved = event.get('approved')
+    row[EVENT_COLUMNS.index('approved')] = None if approved is None else int(bool(approved))
+    return tuple(row)
+
+
+def compact_event_files(logs_path: Path, db_path: Path, delete: bool = True) -> Tuple[int, int]:
+    """
+    Verdichtet rotierte Event-Dateien in die SQLite-Analysedatenbank.
+
+    Jede Datei wird in einer Transaktion übernommen und als verdichtet
+    markiert - ein Abbruch mittendrin führt nicht zu doppelten Zeilen.
+
+    Args:
+        logs_path: Verzeichnis mit den Event-Dateien
+        db_path: Ziel-Datenbank (wird angelegt)
+        delete: Verdichtete Dateien löschen
+
+    Returns:
+        Tuple[int, int]: (verdichtete Dateien, übernommene Events)
+    """
+    files = sorted(Path(logs_path).glob(ROTATED_GLOB))
+    if not files:
+        return 0, 0
+
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(db_path))
+    compacted_files = 0
+    compacted_events = 0
+
+    try:
+        connection.executescript(SCHEMA)
+        placeholders = ", ".join("?" for _ in EVENT_COLUMNS)
+        insert = f"INSERT INTO ai_events ({', '.join(EVENT_COLUMNS)}) VALUES ({placeholders})"
+
+        for path in files:
+            already = connection.execute(
+                "SELECT 1 FROM compacted_files WHERE name = ?", (path.name,)
+            ).fetchone()
+
+            if not already:
+                rows: List[Tuple] = []
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line_number, line in enumerate(f, 1):
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            rows.append(_row(json.loads(line)))
+                        except (json.JSONDecodeError, TypeError) as e:
+                            logger.warning(f"Ungültige Event-Zeile {path.name}:{line_number}: {e}")
+
+                with connection:
+                    connection.executemany(insert, rows)
+                    connection.execute(
+                        "INSERT INTO compacted_files (name, events, compacted_at) VALUES (?, ?, ?)",
+                        (path.name, len(rows), datetime.now(timezone.utc).isoformat())
+                    )
+                compacted_files += 1
+                compacted_events += len(rows)
+
+            if delete:
+                path.unlink()
+    finally:
+        connection.close()
+
+    logger.info(f"{compacted_files} Event-Dateien verdichtet ({compacted_events} Events) → {db_path}")
+    return compacted_files, compacted_events
+
+
+def summarize(db_path: Path) -> List[Dict[str, Any]]:
+    """
+    Auswertung pro Film und Bewertungsart.
+
+    Returns:
+        List[Dict]: film_title, kind, events, approved, avg_confidence,
+            cache_hits, errors, total_tokens, cost_usd, p50/max latency
+    """
+    connection = sqlite3.connect(str(db_path))
+    connection.row_factory = sqlite3.Row
+    try:
+        rows = connection.execute("""
+            SELECT film_title, kind,
+                   COUNT(*) AS events,
+                   SUM(approved) AS approved,
+                   ROUND(AVG(confidence), 1) AS avg_confidence,
+                   SUM(cache = 'hit') AS cache_hits,
+                   SUM(status = 'error') AS errors,
+                   SUM(COALESCE(total_tokens, 0)) AS total_tokens,
+                   ROUND(SUM(COALESCE(cost_usd, 0)), 4) AS cost_usd,
+                   ROUND(AVG(latency_ms), 0) AS avg_latency_ms,
+                   ROUND(MAX(latency_ms), 0) AS max_latency_ms
+            FROM ai_events
+            GROUP BY film_title, kind
+            ORDER BY events DESC
+        """).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        connection.close()
@@ -0,0 +1,178 @@
+"""
+Konsistente Snapshots der SQLite-Spieldatenbank für Offline-Auswertungen.
+Nutzt die Online-Backup-API von SQLite: im WAL-Modus liest das Backup aus
+einem konsistenten Lese-Snapshot, Schreibzugriffe des Bots laufen parallel
+weiter. Auswertungen arbeiten dann auf der Kopie statt auf der Live-Datenbank.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy.engine import make_url
+
+from config import config
+from utils.service_container import container
+
+logger = logging.getLogger('bot.services.db_snapshot')
+
+SNAPSHOT_PREFIX = 'bot-'
+SNAPSHOT_SUFFIX = '.db'
+TIMESTAMP_FORMAT = '%Y%m%d-%H%M%S-%f'
+
+
+class SnapshotResult(NamedTuple):
+    """Ergebnis eines Snapshots."""
+    path: Path
+    size_bytes: int
+    seconds: float
+    integrity_ok: bool
+
+
+def sqlite_path(database_url: str) -> Optional[Path]:
+    """Dateipfad einer SQLite-URL (None für andere Datenbanken oder In-Memory)."""
+    url = make_url(database_url)
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        return None
+    return Path(url.database)
+
+
+class SnapshotManager:
+    """Erstellt Snapshots und räumt alte nach Aufbewahrungsregeln auf."""
+
+    def __init__(
+        self,
+        database_url: str,
+        target_dir: Path,
+        keep_last: int = 24,
+        keep_daily: int = 7,
+        pages_per_step: int = -1
+    ):
+        """
+        Args:
+            database_url: SQLAlchemy-URL der Spieldatenbank
+            target_dir: Zielverzeichnis der Snapshots
+            keep_last: Anzahl der neuesten Snapshots, die immer bleiben
+            keep_daily: Zusätzlich der neueste Snapshot jedes Tages für so viele Tage
+            pages_per_step: Seiten pro Backup-Schritt (-1 = alles in einem Lese-Snapshot)
+        """
+        self.source_path = sqlite_path(database_url)
+        self.target_dir = Path(target_dir)
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        self.pages_per_step = pages_per_step
+        self._lock = threading.Lock()
+        self.last_result: Optional[SnapshotResult] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.source_path is not None
+
+    def list_snapshots(self) -> List[Path]:
+        """Vorhandene Snapshots, älteste zuerst."""
+        if not self.target_dir.exists():
+            return []
+        return sorted(self.target_dir.glob(f'{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}'))
+
+    def take(self) -> SnapshotResult:
+        """
+        Erstellt einen Snapshot (blockierend - im Event-Loop per asyncio.to_thread aufrufen).
+
+        Raises:
+            RuntimeError: Datenbank ist keine SQLite-Datei
+        """
+        if not self.enabled:
+            raise RuntimeError("Snapshots gibt es nur für SQLite-Datenbanken")
+
+        with self._lock:
+            started = time.perf_counter()
+            self.target_dir.mkdir(parents=True, exist_ok=True)
+            # Millisekunden im Namen: gleich lange, sortierbare Namen auch bei schnellen Folge-Snapshots
+            timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)[:-3]
+            name = f"{SNAPSHOT_PREFIX}{timestamp}{SNAPSHOT_SUFFIX}"
+            target = self.target_dir / name
+            partial = target.with_suffix('.partial')
+
+            source = sqlite3.connect(str(self.source_path), timeout=30)
+            destination = sqlite3.connect(str(partial))
+            try:
+                # Ein Schritt = eine Lese-Transaktion; im WAL-Modus blockiert sie keine Writer.
+                # Schrittweise Kopien würden bei jedem fremden Schreibzugriff neu starten.
+                source.backup(destination, pages=self.pages_per_step, sleep=0.005)
+                integrity_ok = destination.execute("PRAGMA quick_check").fetchone()[0] == 'ok'
+            finally:
+                destination.close()
+                source.close()
+            os.replace(partial, target)
+
+            result = SnapshotResult(
+                path=target,
+                size_bytes=target.stat().st_size,
+                seconds=time.perf_counter() - started,
+                integrity_ok=integrity_ok
+            )
+            self.last_result = result
+
+        level = logging.INFO if integrity_ok else logging.ERROR
+        logger.log(
+            level,
+            f"Snapshot {target.name}: {result.size_bytes / 1024:.0f} KB in {result.seconds * 1000:.0f} ms"
+            f"{'' if integrity_ok else ' - quick_check FEHLGESCHLAGEN'}"
+        )
+        return result
+
+    def apply_retention(self) -> List[Path]:
+        """
+        Löscht Snapshots außerhalb der Aufbewahrungsregeln.
+
+        Returns:
+            List[Path]: Gelöschte Dateien
+        """
+        snapshots = self.list_snapshots()
+        keep = set(snapshots[-self.keep_last:]) if self.keep_last > 0 else set()
+
+        # Neuester Snapshot pro Tag (Dateiname beginnt mit YYYYMMDD)
+        newest_per_day = {}
+        for path in snapshots:
+            newest_per_day[path.name[len(SNAPSHOT_PREFIX):len(SNAPSHOT_PREFIX) + 8]] = path
+        for day in sorted(newest_per_day)[-self.keep_daily:] if self.keep_daily > 0 else []:
+            keep.add(newest_per_day[day])
+
+        deleted = []
+        for path in snapshots:
+            if path not in keep:
+                path.unlink(missing_ok=True)
+                deleted.append(path)
+        if deleted:
+            logger.info(f"{len(deleted)} alte Snapshots gelöscht")
+        return deleted
+
+    def take_and_prune(self) -> SnapshotResult:
+        """Snapshot erstellen und danach aufräumen."""
+        result = self.take()
+        self.apply_retention()
+        return result
+
+    async def run_scheduler(self, interval: float):
+        """Hintergrund-Task: Snapshot alle `interval` Sekunden."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.take_and_prune)
+            except (sqlite3.Error, OSError) as e:
+                logger.error(f"Snapshot fehlgeschlagen: {e}")
+
+
+# Globale Instanz (wird beim ersten Zugriff erzeugt)
+snapshot_manager = container.register('snapshot_manager', lambda: SnapshotManager(
+    config.DATABASE_URL,
+    config.SNAPSHOT_PATH,
+    keep_last=config.SNAPSHOT_KEEP_LAST,
+    keep_daily=config.SNAPSHOT_KEEP_DAILY
+))
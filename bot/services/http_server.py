@@ -0,0 +1,184 @@
+"""
+Minimaler HTTP-Server auf asyncio-Basis für lokale Status-Endpunkte
+(z.B. /metrics für Prometheus) und Streams (Server-Sent Events). Läuft im
+Event-Loop des Bots, ohne zusätzliche Abhängigkeiten.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple, Union
+from urllib.parse import parse_qs, unquote, urlsplit
+
+logger = logging.getLogger('bot.services.http_server')
+
+# Max. Größe der Request-Zeile + Header (wir erwarten nur kurze Requests)
+MAX_HEADER_BYTES = 16 * 1024
+# Max. Größe eines Request-Bodys (POST)
+MAX_BODY_BYTES = 1024 * 1024
+
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+
+@dataclass
+class Request:
+    """Geparster HTTP-Request."""
+    method: str
+    path: str
+    query: Dict[str, list] = field(default_factory=dict)
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b''
+
+
+@dataclass
+class Response:
+    """HTTP-Antwort eines Routen-Handlers (Text oder Binärdaten)."""
+    body: Union[str, bytes] = ''
+    status: int = 200
+    content_type: str = 'text/plain; charset=utf-8'
+
+
+@dataclass
+class StreamResponse:
+    """Gestreamte Antwort (z.B. Server-Sent Events): sendet Chunks, bis der Iterator endet."""
+    chunks: AsyncIterator[str]
+    status: int = 200
+    content_type: str = 'text/event-stream; charset=utf-8'
+
+
+RouteHandler = Callable[[Request], Awaitable[Union[Response, StreamResponse]]]
+
+
+class HTTPServer:
+    """Kleiner Router für lokale Endpunkte (GET, optional POST)."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        """
+        Args:
+            host: Bind-Adresse (default: nur lokal)
+            port: TCP-Port (0 = beliebiger freier Port)
+        """
+        self.host = host
+        self.port = port
+        self._routes: Dict[str, Tuple[RouteHandler, Tuple[str, ...]]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._streams: Set[asyncio.Task] = set()
+
+    def route(self, path: str, handler: RouteHandler, methods: Tuple[str, ...] = ('GET',)):
+        """Registriert einen async Handler für einen Pfad und die erlaubten Methoden."""
+        self._routes[path] = (handler, tuple(method.upper() for method in methods))
+
+    async def start(self):
+        """Startet den Server (kehrt sofort zurück)."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"HTTP-Server läuft auf http://{self.host}:{self.port} ({', '.join(self._routes)})")
+
+    async def stop(self):
+        """Beendet den Server und offene Streams."""
+        if self._server is not None:
+            self._server.close()
+            for task in list(self._streams):
+                task.cancel()
+            await asyncio.gather(*self._streams, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        """Liest Request-Zeile, Header und ggf. Body (nur mit Content-Length)."""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return None
+        if len(head) > MAX_HEADER_BYTES:
+            return None
+
+        lines = head.decode('latin-1').split('\r\n')
+        parts = lines[0].split(' ')
+        if len(parts) != 3:
+            return None
+
+        method, target, _ = parts
+        url = urlsplit(target)
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+
+        body = b''
+        length = headers.get('content-length', '0')
+        if not length.isdigit() or int(length) > MAX_BODY_BYTES:
+            return None
+        if int(length):
+            try:
+                body = await reader.readexactly(int(length))
+            except asyncio.IncompleteReadError:
+                return None
+        return Request(method=method, path=unquote(url.path), query=parse_qs(url.query), headers=headers, body=body)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Beantwortet genau einen Request pro Verbindung."""
+        try:
+            request = await self._read_request(reader)
+            if request is None:
+                response = Response('bad request\n', status=400)
+            elif request.path not in self._routes:
+                response = Response('not found\n', status=404)
+            elif request.method not in self._routes[request.path][1]:
+                response = Response('method not allowed\n', status=405)
+            else:
+                try:
+                    response = await self._routes[request.path][0](request)
+                except Exception as e:
+                    logger.error(f"Fehler in HTTP-Route {request.path}: {e}", exc_info=True)
+                    response = Response('internal error\n', status=500)
+
+            if isinstance(response, StreamResponse):
+                await self._write_stream(writer, response)
+                return
+
+            body = response.body.encode('utf-8') if isinstance(response.body, str) else response.body
+            head = (
+                f"HTTP/1.1 {response.status} {STATUS_TEXT.get(response.status, '')}\r\n"
+                f"Content-Type: {response.content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n"
+            )
+            writer.write(head.encode('latin-1') + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _write_stream(self, writer: asyncio.StreamWriter, response: StreamResponse):
+        """Schreibt Header und Chunks ohne Content-Length (Ende = Verbindungsende)."""
+        task = asyncio.current_task()
+        self._streams.add(task)
+        try:
+            head = (
+                f"HTTP/1.1 {response.status} {STATUS_TEXT.get(response.status, '')}\r\n"
+                f"Content-Type: {response.content_type}\r\n"
+                f"Cache-Control: no-cache\r\n"
+                f"X-Accel-Buffering: no\r\n"
+                f"Connection: close\r\n\r\n"
+            )
+            writer.write(head.encode('latin-1'))
+            await writer.drain()
+            async for chunk in response.chunks:
+                writer.write(chunk.encode('utf-8'))
+                await writer.drain()
+        except asyncio.CancelledError:
+            pass  # Server wird beendet
+        finally:
+            self._streams.discard(task)
+            if hasattr(response.chunks, 'aclose'):
+                await response.chunks.aclose()
@@ -0,0 +1,206 @@
+"""
+Live-Rangliste für Displays (Tablets mit Fully Kiosk) per Server-Sent Events.
+Punkteänderungen melden sich über crud.add_points_listener; der Broadcaster
+fasst Bursts zusammen (max. ein Push pro Intervall), lädt die Top-Listen neu
+und schickt sie samt Änderungen an alle verbundenen Displays.
+"""
+
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set
+
+from config import config
+from database.crud import get_top_players, get_top_teams
+from database.db import db
+from utils.service_container import container
+
+logger = logging.getLogger('bot.services.leaderboard_stream')
+
+PAGE_PATH = Path(__file__).parent.parent / 'templates' / 'leaderboard.html'
+
+# Kommentarzeile, damit Proxies/WebViews die Verbindung nicht als tot betrachten
+HEARTBEAT_SECONDS = 15
+# Nachrichten pro Display im Puffer; langsame Clients bekommen nur die neuesten
+SUBSCRIBER_QUEUE_SIZE = 4
+
+
+def load_leaderboard(limit: int) -> dict:
+    """
+    Top-Spieler und Top-Teams aus der Datenbank.
+
+    Läuft bewusst im Event-Loop-Thread: SQLite nutzt einen StaticPool (eine
+    gemeinsame Verbindung, Autocommit) - ein Commit aus einem Worker-Thread
+    beendet sonst den Savepoint, in dem award_points gerade schreibt.
+    Die Abfragen sind klein und indiziert.
+    """
+    with db.get_session() as session:
+        players = get_top_players(session, limit=limit)
+        teams = get_top_teams(session, limit=limit)
+    # id = stabiler Schlüssel für diff_ranking (Anzeigenamen sind nicht eindeutig)
+    return {
+        'players': [
+            {'id': player['user_id'], 'name': player['name'], 'points': player['points'], 'team': player['team']}
+            for player in players
+        ],
+        'teams': [
+            {
+                'id': team['team_id'], 'name': team['team_name'],
+                'points': team['total_points'], 'members': team['member_count']
+            }
+            for team in teams
+        ],
+    }
+
+
+def diff_ranking(old: List[dict], new: List[dict]) -> List[dict]:
+    """
+    Einträge, die neu sind, Punkte bekommen oder den Platz gewechselt haben.
+
+    Einträge werden über 'id' (User-ID bzw. team_id) zugeordnet - zwei
+    Spieler namens "Max" bleiben so zwei Einträge; der Name ist nur Anzeige.
+
+    Returns:
+        List[dict]: id, name, rank, points, delta (Punkte), previous_rank (None = neu)
+    """
+    previous = {entry['id']: (rank, entry['points']) for rank, entry in enumerate(old, 1)}
+    changes = []
+    for rank, entry in enumerate(new, 1):
+        previous_rank, previous_points = previous.get(entry['id'], (None, 0))
+        if previous_rank == rank and previous_points == entry['points']:
+            continue
+        changes.append({
+            'id': entry['id'],
+            'name': entry['name'],
+            'rank': rank,
+            'points': entry['points'],
+            'delta': entry['points'] - previous_points if previous_rank else None,
+            'previous_rank': previous_rank,
+        })
+    return changes
+
+
+def format_event(name: str, data: dict) -> str:
+    """Eine SSE-Nachricht (event + data, abgeschlossen durch Leerzeile)."""
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+class LeaderboardBroadcaster:
+    """Verteilt Ranglisten-Updates an alle verbundenen Displays."""
+
+    def __init__(self, load_snapshot: Callable[[], dict], min_interval: float = 0.5):
+        """
+        Args:
+            load_snapshot: Liefert {'players': [...], 'teams': [...]} (läuft im Event-Loop)
+            min_interval: Mindestabstand zwischen zwei Pushes in Sekunden
+        """
+        self._load_snapshot = load_snapshot
+        self.min_interval = min_interval
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.snapshot: Optional[dict] = None
+        self.version = 0
+        self.notifications = 0
+        self.refreshes = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def notify(self):
+        """Meldet eine Punkteänderung (thread-safe, kehrt sofort zurück)."""
+        self.notifications += 1
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:
+            pass  # Event-Loop bereits beendet
+
+    async def run(self):
+        """Hintergrund-Task: wartet auf Änderungen und pusht höchstens alle min_interval Sekunden."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        try:
+            await self._refresh()
+            while True:
+                await self._wake.wait()
+                self._wake.clear()
+                try:
+                    await self._refresh()
+                except Exception as e:
+                    logger.error(f"Rangliste konnte nicht geladen werden: {e}", exc_info=True)
+                # Änderungen während der Pause landen gesammelt im nächsten Push
+                await asyncio.sleep(self.min_interval)
+        finally:
+            self._loop = None
+            self._publish(None)
+
+    async def _refresh(self):
+        """Lädt die Rangliste und pusht sie, falls sie sich geändert hat."""
+        self.refreshes += 1
+        snapshot = self._load_snapshot()
+        if snapshot == self.snapshot:
+            return
+
+        previous = self.snapshot or {'players': [], 'teams': []}
+        self.snapshot = snapshot
+        self.version += 1
+        self._publish(format_event('leaderboard', {
+            **snapshot,
+            'version': self.version,
+            'changes': {
+                'players': diff_ranking(previous['players'], snapshot['players']),
+                'teams': diff_ranking(previous['teams'], snapshot['teams']),
+            },
+        }))
+
+    def _publish(self, message: Optional[str]):
+        """Stellt eine Nachricht (None = Stream beenden) allen Displays zu."""
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()  # Ältestes Update verwerfen
+            queue.put_nowait(message)
+
+    async def stream(self) -> AsyncIterator[str]:
+        """SSE-Stream für ein Display: aktueller Stand, danach jede Änderung."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            yield "retry: 3000\n\n"
+            if self.snapshot is not None:
+                yield format_event('leaderboard', {
+                    **self.snapshot,
+                    'version': self.version,
+                    'changes': {'players': [], 'teams': []},
+                })
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self._subscribers.discard(queue)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Zähler für die Admin-Ansicht."""
+        return {
+            'subscribers': self.subscriber_count,
+            'notifications': self.notifications,
+            'refreshes': self.refreshes,
+            'version': self.version,
+        }
+
+
+# Globale Instanz (wird beim ersten Zugriff erzeugt)
+leaderboard = container.register('leaderboard', lambda: LeaderboardBroadcaster(
+    load_snapshot=lambda: load_leaderboard(config.LEADERBOARD_SIZE),
+    min_interval=config.LEADERBOARD_PUSH_INTERVAL
+))
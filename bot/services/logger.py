@@ -1,13 +1,26 @@
 """
 Logging-Konfiguration für den Halloween Bot.
 Erstellt strukturierte Logs mit verschiedenen Log-Levels und separaten Dateien.
+Dateien werden von einem Hintergrund-Thread geschrieben (QueueHandler/QueueListener).
 """
 
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, Optional
+
+from services.ai_event_log import EVENT_LOGGER_NAME, EVENTS_FILENAME, SizeTimeRotatingFileHandler
+
+# Standardgröße der Log-Queue (Einträge, die noch nicht geschrieben wurden)
+DEFAULT_QUEUE_SIZE = 10000
+
+# Zuletzt eingerichteter BotLogger (für Statistiken, z.B. Admin-Commands)
+_active_bot_logger: Optional['BotLogger'] = None
 
 
 # ANSI Color Codes für farbiges Logging
@@ -50,16 +63,68 @@ class ColoredFormatter(logging.Formatter):
         return f"{color}{log_message}{LogColors.RESET}"
 
 
+class ExcludeFilter(logging.Filter):
+    """Lässt alle Einträge durch, außer die des angegebenen Logger-Zweigs."""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not super().filter(record)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler mit begrenzter Queue.
+    
+    Blockiert nie: Ist die Queue voll (Writer-Thread kommt nicht hinterher),
+    wird der Eintrag verworfen und pro Log-Level gezählt.
+    """
+    
+    def __init__(self, log_queue: queue.Queue):
+        """
+        Args:
+            log_queue: Begrenzte Queue (maxsize > 0)
+        """
+        super().__init__(log_queue)
+        self.dropped: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def enqueue(self, record: logging.LogRecord):
+        """Legt den Eintrag ab oder zählt ihn als verworfen."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped[record.levelname] = self.dropped.get(record.levelname, 0) + 1
+    
+    @property
+    def dropped_total(self) -> int:
+        """Anzahl aller verworfenen Einträge."""
+        return sum(self.dropped.values())
+
+
 class BotLogger:
     """Zentrale Logging-Konfiguration für den Bot."""
     
-    def __init__(self, logs_base_path: str = "./logs", log_level: str = "INFO"):
+    def __init__(
+        self,
+        logs_base_path: str = "./logs",
+        log_level: str = "INFO",
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        events_max_bytes: int = 5 * 1024 * 1024,
+        events_max_age_seconds: float = 3600
+    ):
         """
         Initialisiert das Logging-System.
         
+        Handler schreiben nicht im Event-Loop: Der Root-Logger legt Einträge nur
+        in eine begrenzte Queue, ein Hintergrund-Thread (QueueListener) schreibt
+        sie in Konsole und Dateien.
+        
         Args:
             logs_base_path: Basis-Pfad für Log-Dateien
             log_level: Log-Level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+            queue_size: Max. Anzahl wartender Einträge (danach wird verworfen)
+            events_max_bytes: Rotation von ai_events.jsonl ab dieser Größe
+            events_max_age_seconds: Rotation von ai_events.jsonl ab diesem Alter
         """
         self.logs_path = Path(logs_base_path)
         self.logs_path.mkdir(parents=True, exist_ok=True)
@@ -79,11 +144,20 @@ class BotLogger:
             datefmt='%H:%M:%S'
         )
         
+        self.events_max_bytes = events_max_bytes
+        self.events_max_age_seconds = events_max_age_seconds
+        
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.queue_handler: Optional[DroppingQueueHandler] = None
+        self.listener: Optional[QueueListener] = None
+        
         # Logger konfigurieren
         self._setup_loggers()
     
     def _setup_loggers(self):
-        """Richtet alle Logger mit ihren Handlern ein."""
+        """Richtet Queue-Handler (Event-Loop) und Writer-Handler (Thread) ein."""
+        global _active_bot_logger
+        
         # Root Logger
         root_logger = logging.getLogger()
         root_logger.setLevel(self.log_level)
@@ -97,29 +171,82 @@ class BotLogger:
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(self.colored_format)
-        root_logger.addHandler(console_handler)
         
         # Bot-Log (alle Events)
         bot_handler = self._create_rotating_handler(
             filename="bot.log",
             level=self.log_level
         )
-        root_logger.addHandler(bot_handler)
         
         # Error-Log (nur Fehler)
         error_handler = self._create_rotating_handler(
             filename="errors.log",
             level=logging.ERROR
         )
-        root_logger.addHandler(error_handler)
         
         # AI-Evaluations-Log (speziell für KI-Bewertungen)
-        ai_logger = logging.getLogger('bot.services.ai')
         ai_handler = self._create_rotating_handler(
             filename="ai_evaluations.log",
             level=logging.DEBUG
         )
-        ai_logger.addHandler(ai_handler)
+        ai_handler.addFilter(logging.Filter('bot.services.ai'))
+        
+        # Strukturierte KI-Events (JSON-Lines) - nur in ai_events.jsonl
+        events_handler = SizeTimeRotatingFileHandler(
+            filename=str(self.logs_path / EVENTS_FILENAME),
+            max_bytes=self.events_max_bytes,
+            max_age_seconds=self.events_max_age_seconds
+        )
+        events_handler.setLevel(logging.INFO)
+        events_handler.setFormatter(logging.Formatter('%(message)s'))
+        events_handler.addFilter(logging.Filter(EVENT_LOGGER_NAME))
+        for handler in (console_handler, bot_handler, error_handler, ai_handler):
+            handler.addFilter(ExcludeFilter(EVENT_LOGGER_NAME))
+        
+        # Nur der Queue-Handler hängt am Root-Logger - alle Datei-Writes
+        # passieren im Listener-Thread (Routing über Level + Filter wie bisher)
+        self.queue_handler = DroppingQueueHandler(self.queue)
+        root_logger.addHandler(self.queue_handler)
+        
+        self.listener = QueueListener(
+            self.queue,
+            console_handler, bot_handler, error_handler, ai_handler, events_handler,
+            respect_handler_level=True
+        )
+        self.listener.start()
+        atexit.register(self.stop)
+        _active_bot_logger = self
+    
+    def stop(self):
+        """Schreibt ausstehende Einträge und beendet den Writer-Thread."""
+        if self.listener is None:
+            return
+        
+        dropped = self.queue_handler.dropped_total if self.queue_handler else 0
+        if dropped:
+            logging.getLogger('bot.logger').warning(
+                f"{dropped} Log-Einträge wegen voller Queue verworfen: {self.queue_handler.dropped}"
+            )
+        
+        listener, self.listener = self.listener, None
+        listener.stop()
+        logging.getLogger().removeHandler(self.queue_handler)
+        for handler in listener.handlers:
+            handler.close()
+    
+    def get_stats(self) -> dict:
+        """
+        Statistiken der Log-Queue.
+        
+        Returns:
+            dict: queued (wartend), capacity, dropped (pro Level), dropped_total
+        """
+        return {
+            'queued': self.queue.qsize(),
+            'capacity': self.queue.maxsize,
+            'dropped': dict(self.queue_handler.dropped) if self.queue_handler else {},
+            'dropped_total': self.queue_handler.dropped_total if self.queue_handler else 0
+        }
     
     def _create_rotating_handler(
         self, 
@@ -165,6 +292,13 @@ class BotLogger:
         return logging.getLogger(name)
 
 
+def get_logging_stats() -> dict:
+    """Statistiken der Log-Queue des aktiven BotLoggers (leer wenn nicht eingerichtet)."""
+    if _active_bot_logger is None:
+        return {}
+    return _active_bot_logger.get_stats()
+
+
 def log_user_action(logger: logging.Logger, user_id: int, action: str, details: str = ""):
     """
     Hilfsfunktion zum Loggen von User-Aktionen.
@@ -0,0 +1,210 @@
+"""
+Speicher-Profil des Bot-Prozesses für lange Partynächte.
+Berichtet RSS, Füllstand der In-Memory-Caches (gegen ihr Limit) und - wenn
+tracemalloc läuft - die größten Allokationen samt Wachstum seit dem letzten
+Bericht. tracemalloc kostet CPU und pro Allokation etwas Speicher und ist
+daher standardmäßig aus (MEMORY_TRACE_FRAMES oder /memory start).
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import sys
+import threading
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import config
+from database.user_cache import user_cache
+from utils.service_container import container
+
+logger = logging.getLogger('bot.services.memory')
+
+BOT_DIR = Path(__file__).parent.parent
+
+# Allokationen von tracemalloc selbst und vom Import-System ausblenden
+TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+# Caches mit hartem Limit: Name → (Dienst im Container oder None, Größe, Limit)
+CACHE_PROBES: Dict[str, tuple] = {
+    'User-Cache': (None, lambda _: user_cache.get_stats()['size'], lambda: config.USER_CACHE_SIZE),
+    'Template-Renders': (
+        'template_manager', lambda service: service.get_cache_stats()['renders'],
+        lambda: config.TEMPLATE_RENDER_CACHE_SIZE
+    ),
+    'KI-Bewertungen': (
+        'ai_evaluator', lambda service: service.get_usage_stats()['verdict_cache_size'],
+        lambda: config.AI_VERDICT_CACHE_SIZE
+    ),
+    'Rate-Limit-Buckets': ('rate_limiter', lambda service: service.get_stats()['active_buckets'], lambda: None),
+}
+
+
+def rss_bytes() -> Optional[int]:
+    """Aktueller Resident Set Size (nur Linux, sonst None)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Höchster RSS seit Prozessstart (None ohne resource-Modul)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS liefert Bytes, Linux Kilobytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def format_mb(size_bytes: Optional[int]) -> str:
+    """Bytes als "12.3 MB" (? wenn unbekannt)."""
+    return '?' if size_bytes is None else f"{size_bytes / 1024 / 1024:.1f} MB"
+
+
+def _location(frame: tracemalloc.Frame) -> str:
+    """Kurzer Ort einer Allokation: relativ zum Bot bzw. zu site-packages."""
+    path = Path(frame.filename)
+    try:
+        short = path.relative_to(BOT_DIR).as_posix()
+    except ValueError:
+        parts = path.parts
+        short = '/'.join(parts[parts.index('site-packages') + 1:]) if 'site-packages' in parts else path.name
+    return f"{short}:{frame.lineno}"
+
+
+class MemoryProfiler:
+    """Erstellt Speicher-Berichte und merkt sich den letzten Snapshot für Diffs."""
+
+    def __init__(self, trace_frames: int = 0, rss_warn_bytes: int = 0):
+        """
+        Args:
+            trace_frames: Frames pro Allokation für tracemalloc (0 = Tracing aus)
+            rss_warn_bytes: Ab diesem RSS warnt der periodische Bericht (0 = nie)
+        """
+        self.trace_frames = trace_frames
+        self.rss_warn_bytes = rss_warn_bytes
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = None) -> bool:
+        """
+        Startet tracemalloc (no-op wenn es schon läuft).
+
+        Returns:
+            bool: True wenn das Tracing neu gestartet wurde
+        """
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(max(1, frames or self.trace_frames or 1))
+        logger.info(f"tracemalloc gestartet ({tracemalloc.get_traceback_limit()} Frames)")
+        return True
+
+    def stop(self):
+        """Beendet tracemalloc und gibt die Traces samt letztem Snapshot frei."""
+        with self._lock:
+            self._last_snapshot = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("tracemalloc gestoppt")
+
+    def cache_sizes(self) -> List[dict]:
+        """
+        Füllstand der Caches (nur bereits erzeugte Dienste - ein Bericht erzeugt keine).
+
+        Returns:
+            List[dict]: name, size, limit (None = kein festes Limit)
+        """
+        rows = []
+        for name, (service_name, size, limit) in CACHE_PROBES.items():
+            if service_name is not None and not container.is_initialized(service_name):
+                continue
+            service = container.get(service_name) if service_name else None
+            rows.append({'name': name, 'size': size(service), 'limit': limit()})
+        return rows
+
+    def report(self, limit: int = 10) -> dict:
+        """
+        Speicher-Bericht (blockiert bei aktivem Tracing - im Worker-Thread aufrufen).
+
+        Returns:
+            dict: rss_bytes, peak_rss_bytes, objects, caches, tracing und bei
+            aktivem Tracing traced_bytes, traced_peak_bytes, top, growth
+        """
+        rss, peak = rss_bytes(), peak_rss_bytes()
+        result = {
+            'rss_bytes': rss,
+            # ru_maxrss hinkt dem aktuellen Wert leicht hinterher
+            'peak_rss_bytes': max(peak, rss) if peak is not None and rss is not None else peak,
+            'objects': len(gc.get_objects()),
+            'caches': self.cache_sizes(),
+            'tracing': self.tracing,
+        }
+        if not result['tracing']:
+            return result
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(TRACE_FILTERS)
+        result['traced_bytes'], result['traced_peak_bytes'] = tracemalloc.get_traced_memory()
+        result['top'] = [
+            {'location': _location(stat.traceback[0]), 'size_bytes': stat.size, 'count': stat.count}
+            for stat in snapshot.statistics('lineno')[:limit]
+        ]
+        with self._lock:
+            previous, self._last_snapshot = self._last_snapshot, snapshot
+        result['growth'] = [] if previous is None else [
+            {'location': _location(stat.traceback[0]), 'size_bytes': stat.size_diff, 'count': stat.count_diff}
+            for stat in snapshot.compare_to(previous, 'lineno')[:limit]
+            if stat.size_diff > 0
+        ]
+        return result
+
+    @staticmethod
+    def format_summary(report: dict) -> str:
+        """Einzeiler für das Log."""
+        caches = ", ".join(
+            f"{row['name']} {row['size']}" + (f"/{row['limit']}" if row['limit'] else "")
+            for row in report['caches']
+        )
+        summary = (
+            f"Speicher: RSS {format_mb(report['rss_bytes'])} (Peak {format_mb(report['peak_rss_bytes'])}), "
+            f"{report['objects']} Python-Objekte, Caches: {caches or '-'}"
+        )
+        if report['tracing']:
+            growth = ", ".join(
+                f"{row['location']} +{row['size_bytes'] / 1024:.0f} KB" for row in report['growth'][:5]
+            )
+            summary += f", tracemalloc {format_mb(report['traced_bytes'])}"
+            if growth:
+                summary += f", Wachstum: {growth}"
+        return summary
+
+    async def run_reporter(self, interval: float):
+        """Hintergrund-Task: Bericht alle `interval` Sekunden ins Log."""
+        while True:
+            await asyncio.sleep(interval)
+            report = await asyncio.to_thread(self.report, 5)
+            if self.rss_warn_bytes and (report['rss_bytes'] or 0) > self.rss_warn_bytes:
+                logger.warning(f"RSS über {format_mb(self.rss_warn_bytes)} - {self.format_summary(report)}")
+            else:
+                logger.info(self.format_summary(report))
+
+
+# Globale Instanz (wird beim ersten Zugriff erzeugt)
+memory_profiler = container.register('memory_profiler', lambda: MemoryProfiler(
+    trace_frames=config.MEMORY_TRACE_FRAMES,
+    rss_warn_bytes=config.MEMORY_RSS_WARN_MB * 1024 * 1024
+))
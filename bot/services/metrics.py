@@ -0,0 +1,333 @@
+"""
+Latenz- und Durchsatz-Metriken pro Handler.
+Misst jede Handler-Ausführung und schlüsselt sie in DB-, Telegram-, KI- und
+Disk-Zeit auf. Histogramme liegen im Speicher (HDR-artige Log-Linear-Buckets)
+und werden per /perf und als Prometheus-Text ausgegeben.
+"""
+
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+from telegram.request import HTTPXRequest
+
+logger = logging.getLogger('bot.services.metrics')
+
+# Phasen, in die eine Handler-Ausführung aufgeschlüsselt wird
+PHASES = ('db', 'telegram', 'ai', 'disk')
+
+# Histogramm: Werte in Mikrosekunden, SUB_BUCKETS Buckets pro Zweierpotenz
+# (max. relativer Fehler ~ 1/SUB_BUCKETS, wie bei HdrHistogram)
+SUB_BUCKETS = 8
+MAX_EXPONENT = 36  # 2^36 µs ≈ 19 Stunden
+
+# Bucket-Grenzen für den Prometheus-Export (Sekunden)
+PROMETHEUS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class LatencyHistogram:
+    """Log-lineares Latenz-Histogramm mit fester Speichergröße."""
+
+    def __init__(self):
+        self.counts = [0] * (MAX_EXPONENT * SUB_BUCKETS + SUB_BUCKETS)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    @staticmethod
+    def _index(micros: int) -> int:
+        """Bucket-Index für einen Wert in Mikrosekunden."""
+        if micros < SUB_BUCKETS:
+            return max(micros, 0)
+        exponent = micros.bit_length() - 1
+        mantissa = (micros >> (exponent - 3)) & (SUB_BUCKETS - 1)
+        index = (exponent - 2) * SUB_BUCKETS + mantissa
+        return min(index, MAX_EXPONENT * SUB_BUCKETS + SUB_BUCKETS - 1)
+
+    @staticmethod
+    def _upper_bound(index: int) -> int:
+        """Obere Grenze (µs) eines Buckets."""
+        if index < SUB_BUCKETS:
+            return index
+        exponent = index // SUB_BUCKETS + 2
+        mantissa = index % SUB_BUCKETS
+        return ((SUB_BUCKETS + mantissa + 1) << (exponent - 3)) - 1
+
+    def record(self, seconds: float):
+        """Erfasst eine Dauer in Sekunden."""
+        self.counts[self._index(int(seconds * 1_000_000))] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def percentile(self, percent: float) -> float:
+        """Perzentil in Sekunden (obere Bucket-Grenze)."""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(self._upper_bound(index) / 1_000_000, self.max_seconds)
+        return self.max_seconds
+
+    def cumulative(self, bounds: Tuple[float, ...]) -> List[int]:
+        """Anzahl Werte <= jeder Grenze (für Prometheus-Buckets)."""
+        result = []
+        for bound in bounds:
+            limit = int(bound * 1_000_000)
+            result.append(sum(
+                bucket_count for index, bucket_count in enumerate(self.counts)
+                if bucket_count and self._upper_bound(index) <= limit
+            ))
+        return result
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+
+class HandlerTiming:
+    """Sammelt die Phasen-Zeiten einer einzelnen Handler-Ausführung."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float):
+        # to_thread-Aufrufe teilen sich dasselbe Objekt → Lock
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+# Timing der aktuell laufenden Handler-Ausführung (None außerhalb von Handlern)
+current_timing: ContextVar[Optional[HandlerTiming]] = ContextVar('handler_timing', default=None)
+
+
+@contextmanager
+def timed(phase: str):
+    """
+    Misst einen Abschnitt und rechnet ihn der Phase des laufenden Handlers zu.
+
+    Usage:
+        with timed('disk'):
+            image.save(path)
+    """
+    timing = current_timing.get()
+    if timing is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(phase, time.perf_counter() - started)
+
+
+def timed_phase(phase: str):
+    """Decorator-Variante von timed() für sync Funktionen."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MetricsRegistry:
+    """Histogramme und Zähler aller Handler."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._invocations: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, handler: str, total_seconds: float, phases: Dict[str, float], failed: bool = False):
+        """Erfasst eine Handler-Ausführung inkl. Phasen."""
+        with self._lock:
+            self._invocations[handler] = self._invocations.get(handler, 0) + 1
+            if failed:
+                self._errors[handler] = self._errors.get(handler, 0) + 1
+            self._histogram(handler, 'total').record(total_seconds)
+            for phase, seconds in phases.items():
+                self._histogram(handler, phase).record(seconds)
+
+    def _histogram(self, handler: str, phase: str) -> LatencyHistogram:
+        key = (handler, phase)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = LatencyHistogram()
+        return histogram
+
+    def reset(self):
+        """Setzt alle Metriken zurück."""
+        with self._lock:
+            self._histograms.clear()
+            self._invocations.clear()
+            self._errors.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> List[dict]:
+        """
+        Kennzahlen pro Handler (absteigend nach Aufrufen).
+
+        Returns:
+            List[dict]: handler, count, errors, rate_per_min, p50/p95/p99/max (ms),
+                phases (Ø ms pro Phase)
+        """
+        uptime_minutes = max((time.time() - self.started_at) / 60, 1e-9)
+        with self._lock:
+            result = []
+            for handler, count in self._invocations.items():
+                total = self._histograms[(handler, 'total')]
+                result.append({
+                    'handler': handler,
+                    'count': count,
+                    'errors': self._errors.get(handler, 0),
+                    'rate_per_min': round(count / uptime_minutes, 2),
+                    'p50_ms': round(total.percentile(50) * 1000, 1),
+                    'p95_ms': round(total.percentile(95) * 1000, 1),
+                    'p99_ms': round(total.percentile(99) * 1000, 1),
+                    'max_ms': round(total.max_seconds * 1000, 1),
+                    'phases': {
+                        phase: round(self._histograms[(handler, phase)].mean_seconds * 1000, 1)
+                        for phase in PHASES if (handler, phase) in self._histograms
+                    }
+                })
+        return sorted(result, key=lambda row: row['count'], reverse=True)
+
+    def render_prometheus(self) -> str:
+        """Exportiert alle Metriken im Prometheus-Text-Format."""
+        lines = [
+            "# HELP bot_handler_invocations_total Handler-Aufrufe",
+            "# TYPE bot_handler_invocations_total counter",
+        ]
+        with self._lock:
+            for handler, count in sorted(self._invocations.items()):
+                lines.append(f'bot_handler_invocations_total{{handler="{handler}"}} {count}')
+
+            lines += [
+                "# HELP bot_handler_errors_total Handler-Aufrufe mit Exception",
+                "# TYPE bot_handler_errors_total counter",
+            ]
+            for handler in sorted(self._invocations):
+                lines.append(f'bot_handler_errors_total{{handler="{handler}"}} {self._errors.get(handler, 0)}')
+
+            lines += [
+                "# HELP bot_handler_duration_seconds Dauer pro Handler und Phase",
+                "# TYPE bot_handler_duration_seconds histogram",
+            ]
+            for (handler, phase), histogram in sorted(self._histograms.items()):
+                labels = f'handler="{handler}",phase="{phase}"'
+                for bound, count in zip(PROMETHEUS_BUCKETS, histogram.cumulative(PROMETHEUS_BUCKETS)):
+                    lines.append(f'bot_handler_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'bot_handler_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'bot_handler_duration_seconds_sum{{{labels}}} {histogram.total_seconds:.6f}')
+                lines.append(f'bot_handler_duration_seconds_count{{{labels}}} {histogram.count}')
+
+        lines += [
+            "# HELP bot_uptime_seconds Laufzeit seit Start bzw. Reset",
+            "# TYPE bot_uptime_seconds gauge",
+            f"bot_uptime_seconds {time.time() - self.started_at:.0f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def instrument(callback, name: str = None, registry: 'MetricsRegistry' = None):
+    """
+    Wrappt einen async Handler-Callback mit Zeitmessung.
+
+    Args:
+        callback: PTB-Handler-Callback (async)
+        name: Name in den Metriken (default: Funktionsname)
+        registry: Ziel-Registry (default: globale Instanz)
+    """
+    handler_name = name or getattr(callback, '__name__', 'handler')
+
+    @wraps(callback)
+    async def wrapper(update, context):
+        target = registry or metrics
+        timing = HandlerTiming()
+        token = current_timing.set(timing)
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await callback(update, context)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            current_timing.reset(token)
+            target.observe(handler_name, time.perf_counter() - started, timing.phases, failed)
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def instrument_application(application) -> int:
+    """
+    Instrumentiert alle registrierten Handler einer PTB-Application.
+
+    Returns:
+        int: Anzahl instrumentierter Handler
+    """
+    count = 0
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            if not getattr(handler.callback, '__instrumented__', False):
+                handler.callback = instrument(handler.callback)
+                count += 1
+    logger.info(f"{count} Handler instrumentiert")
+    return count
+
+
+# Startzeit am Execution-Context statt an der Verbindung: Mit StaticPool teilen
+# sich Event-Loop und Worker-Threads eine Verbindung, und nach einer Exception
+# im Statement bleibt nichts liegen
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_metrics_started', None)
+    timing = current_timing.get()
+    if started is not None and timing is not None:
+        timing.add('db', time.perf_counter() - started)
+
+
+def instrument_engine(engine):
+    """
+    Rechnet SQL-Ausführungszeit der Phase 'db' zu (SQLAlchemy-Events).
+
+    Mehrfache Aufrufe (register_handlers im Lasttest, Tests) registrieren
+    die Listener nur einmal - sonst zählte jedes Statement mehrfach.
+    """
+    from sqlalchemy import event
+
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest, der Telegram-API-Aufrufe der Phase 'telegram' zurechnet."""
+
+    async def do_request(self, *args, **kwargs):
+        with timed('telegram'):
+            return await super().do_request(*args, **kwargs)
+
+
+# Globale Instanz
+metrics = MetricsRegistry()
@@ -10,6 +10,8 @@ import logging
 import subprocess
 
 from config import config
+from services.metrics import timed_phase
+from utils.service_container import container
 
 logger = logging.getLogger('bot.services.photo')
 
@@ -32,6 +34,7 @@ class PhotoManager:
         (self.photos_base / 'puzzles').mkdir(parents=True, exist_ok=True)
         (self.photos_base / 'thumbnails').mkdir(parents=True, exist_ok=True)
     
+    @timed_phase('disk')
     def save_photo(
         self,
         photo_bytes: bytes,
@@ -39,7 +42,8 @@ class PhotoManager:
         submission_id: int,
         category: str = 'party',
         film_title: str = None,
-        user_name: str = None
+        user_name: str = None,
+        create_thumbnail: bool = True
     ) -> tuple[str, str]:
         """
         Speichert Foto lokal und erstellt Thumbnail.
@@ -51,6 +55,7 @@ class PhotoManager:
             category: 'party', 'films' oder 'puzzles'
             film_title: Film-Titel (für films-Kategorie)
             user_name: Name des Users (für Dateinamen)
+            create_thumbnail: False = Thumbnail später per create_thumbnail()
         
         Returns:
             tuple: (photo_path, thumbnail_path)
@@ -84,7 +89,8 @@ class PhotoManager:
             logger.info(f"Photo saved: {photo_path}")
             
             # Thumbnail erstellen
-            self._create_thumbnail(photo_path, thumbnail_path)
+            if create_thumbnail:
+                self._create_thumbnail(photo_path, thumbnail_path)
             
             return (str(photo_path), str(thumbnail_path))
             
@@ -92,6 +98,28 @@ class PhotoManager:
             logger.error(f"Error saving photo: {e}", exc_info=True)
             return (None, None)
     
+    def thumbnail_path_for(self, media_path: str) -> Path:
+        """Thumbnail-Pfad zu einem Foto/Video (gleicher Name, immer .jpg)."""
+        return self.photos_base / 'thumbnails' / (Path(media_path).stem + '.jpg')
+    
+    @timed_phase('disk')
+    def create_thumbnail(self, media_path: str) -> str:
+        """
+        Erstellt das Thumbnail zu einem bereits gespeicherten Foto oder Video.
+        
+        Args:
+            media_path: Pfad aus save_photo()/save_video() mit create_thumbnail=False
+        
+        Returns:
+            str: Pfad des Thumbnails
+        """
+        thumbnail_path = self.thumbnail_path_for(media_path)
+        if Path(media_path).suffix == '.mp4':
+            self._create_video_thumbnail(Path(media_path), thumbnail_path)
+        else:
+            self._create_thumbnail(Path(media_path), thumbnail_path)
+        return str(thumbnail_path)
+    
     def _create_thumbnail(self, photo_path: Path, thumbnail_path: Path):
         """
         Erstellt Thumbnail eines Fotos.
@@ -137,6 +165,7 @@ class PhotoManager:
         
         return filename
     
+    @timed_phase('disk')
     def save_video(
         self,
         video_bytes: bytes,
@@ -144,7 +173,8 @@ class PhotoManager:
         submission_id: int,
         category: str = 'party',
         film_title: str = None,
-        user_name: str = None
+        user_name: str = None,
+        create_thumbnail: bool = True
     ) -> tuple[str, str]:
         """
         Speichert Video lokal und erstellt Thumbnail vom ersten Frame.
@@ -156,6 +186,7 @@ class PhotoManager:
             category: 'party', 'films' oder 'puzzles'
             film_title: Film-Titel (für films-Kategorie)
             user_name: Name des Users (für Dateinamen)
+            create_thumbnail: False = Thumbnail später per create_thumbnail()
         
         Returns:
             tuple: (video_path, thumbnail_path)
@@ -190,7 +221,8 @@ class PhotoManager:
             logger.info(f"Video saved: {video_path}")
             
             # Thumbnail vom ersten Frame erstellen (mit ffmpeg)
-            self._create_video_thumbnail(video_path, thumbnail_path)
+            if create_thumbnail:
+                self._create_video_thumbnail(video_path, thumbnail_path)
             
             return (str(video_path), str(thumbnail_path))
             
@@ -255,5 +287,5 @@ class PhotoManager:
             logger.error(f"Error creating placeholder thumbnail: {e}", exc_info=True)
 
 
-# Globale Instanz
-photo_manager = PhotoManager()
+# Globale Instanz (wird beim ersten Zugriff erzeugt)
+photo_manager = container.register('photo_manager', PhotoManager)
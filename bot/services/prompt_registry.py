@@ -0,0 +1,240 @@
+"""
+Prompt-Registry für die KI-Bewertung.
+Hält die Prompt-Templates versioniert und kompiliert die Prompts pro Film
+einmalig aus universen.yaml vor.
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from utils.service_container import container
+from utils.yaml_loader import universe_loader, normalize_title
+
+logger = logging.getLogger('bot.services.prompt_registry')
+
+# Bei inhaltlichen Prompt-Änderungen hochzählen - macht gecachte Verdicts ungültig
+PROMPT_VERSION = 1
+
+
+FILM_PROMPT_TEMPLATE = """Du bist ein Experte für Sci-Fi-Filme und analysierst ein Foto von einer Halloween-Party.
+
+Die Person behauptet, dass dieses Foto eine Referenz zum Film "{film_title}" zeigt.
+{easter_egg_hint}
+Prüfe das Foto auf:
+1. **Easter Eggs** - Spezifische Gegenstände oder Symbole aus dem Film (siehe Beschreibung oben)
+2. **Nachgestellte Szenen** - Person(en) stellen ikonische Filmszene nach
+3. **Filmszene vom Bildschirm** - Foto eines laufenden Films/Szene auf TV/Monitor
+4. **Film-Plakat** - Offizielles oder nachgebautes Filmplakat
+5. **Kostüme/Charaktere** - Verkleidung als Film-Charakter
+6. **Requisiten/Props** - Ikonische Gegenstände aus dem Film
+
+WICHTIG: Es muss eine ERKENNBARE und EINDEUTIGE Referenz zum Film "{film_title}" sein!
+Einfache Ähnlichkeiten oder vage Assoziationen zählen NICHT.
+
+Antworte NUR mit einem JSON-Objekt in folgendem Format (keine zusätzlichen Texte):
+{{
+  "is_reference": true oder false,
+  "confidence": 0-100 (Wie sicher bist du?),
+  "reasoning": "Detaillierte Erklärung was du siehst und warum es eine Referenz ist/nicht ist",
+  "detected_elements": ["Element 1", "Element 2", ...],
+  "reference_type": "easter_egg" oder "scene" oder "screen_capture" oder "poster" oder "costume" oder "prop" oder "other"
+}}
+
+Beispiele für GUTE Referenzen:
+- Matrix: Grüner Code, rote/blaue Pille, Agent Smith Sonnenbrille, "There is no spoon" Löffel
+- Terminator: Rote LED-Augen, Metallskelett, "I'll be back" Schild, Totenkopf mit roten LEDs
+- V wie Vendetta: Guy Fawkes Maske, Rose, "Remember Remember" Text
+
+Beispiele für KEINE Referenzen:
+- Nur schwarze Kleidung (zu allgemein)
+- Generische Sci-Fi Props ohne Film-Bezug
+- Normale Alltagsgegenstände
+"""
+
+EASTER_EGG_HINT_TEMPLATE = "\n\nBESONDERS WICHTIG: Für diesen Film gibt es ein spezifisches Easter Egg:\n{description}\n"
+
+PUZZLE_PROMPT_TEMPLATE = """Du analysierst ein Puzzle-Screenshot von einer Halloween-Party.
+
+Die Person hat ein Puzzle gelöst und behauptet, es zeigt ein Filmplakat zu "{film_title}".
+{poster_hint}
+
+AUFGABE: Prüfe ob das Foto ein GELÖSTES PUZZLE zeigt, das ein FILMPLAKAT von "{film_title}" darstellt.
+
+Wichtige Prüfpunkte:
+1. Ist das Puzzle **vollständig gelöst** (keine fehlenden Teile)?
+2. Zeigt es ein **Filmplakat** (keine Szene, kein Screenshot)?
+3. Ist es eindeutig zum Film **"{film_title}"** (Titel, Logo, ikonische Charaktere)?
+
+WICHTIG:
+- Puzzle muss GELÖST sein (alle Teile vorhanden)
+- Es muss ein PLAKAT sein, keine Filmszene
+- Film-Titel oder eindeutige visuelle Elemente müssen erkennbar sein
+
+Antworte NUR mit einem JSON-Objekt:
+{{
+  "is_valid": true oder false,
+  "confidence": 0-100,
+  "reasoning": "Was siehst du? Ist es ein gelöstes Puzzle mit dem richtigen Filmplakat?",
+  "detected_elements": ["Puzzle-Teile", "Film-Titel", "Charaktere", ...],
+  "issues": ["Problem 1", "Problem 2", ...] (leer wenn alles ok)
+}}
+
+Beispiele für GÜLTIG:
+- Vollständig gelöstes Puzzle mit Matrix-Plakat (Neo, grüner Code, Titel sichtbar)
+- Gelöstes Puzzle mit Terminator-Plakat (T-800, roter Hintergrund, Titel)
+
+Beispiele für UNGÜLTIG:
+- Unvollständiges Puzzle (fehlende Teile)
+- Foto einer Filmszene statt Plakat
+- Falscher Film
+- Kein Puzzle erkennbar
+"""
+
+
+def _fingerprint(*parts: str) -> str:
+    """Kurzer, stabiler Hash über Prompt-Bestandteile."""
+    digest = hashlib.sha256("\x1f".join(parts).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+# Registry-Version: Versionsnummer + Hash der Templates selbst
+REGISTRY_VERSION = f"v{PROMPT_VERSION}-" + _fingerprint(
+    FILM_PROMPT_TEMPLATE, EASTER_EGG_HINT_TEMPLATE, PUZZLE_PROMPT_TEMPLATE
+)[:8]
+
+
+def format_easter_egg(easter_egg: dict) -> Optional[str]:
+    """Formatiert die Easter-Egg-Beschreibung aus der YAML für den Prompt."""
+    if not easter_egg:
+        return None
+    return (
+        f"Easter Egg: {easter_egg.get('name', '')}\n"
+        f"Beschreibung: {easter_egg.get('description', '')}"
+    )
+
+
+@lru_cache(maxsize=128)
+def render_film_prompt(film_title: str, easter_egg_description: str = None) -> str:
+    """Rendert den Film-Prompt (gecached für nicht vorkompilierte Titel)."""
+    easter_egg_hint = ""
+    if easter_egg_description:
+        easter_egg_hint = EASTER_EGG_HINT_TEMPLATE.format(description=easter_egg_description)
+    return FILM_PROMPT_TEMPLATE.format(film_title=film_title, easter_egg_hint=easter_egg_hint)
+
+
+@lru_cache(maxsize=128)
+def render_puzzle_prompt(film_title: str, poster_urls: Tuple[str, ...] = ()) -> str:
+    """Rendert den Puzzle-Prompt (gecached für nicht vorkompilierte Titel)."""
+    poster_hint = ""
+    if poster_urls:
+        poster_hint = "\n\nHinweis: Offizielle Poster findest du hier:\n" + "\n".join(f"- {url}" for url in poster_urls[:2])
+    return PUZZLE_PROMPT_TEMPLATE.format(film_title=film_title, poster_hint=poster_hint)
+
+
+@dataclass(frozen=True)
+class PromptPayload:
+    """Vorkompilierter Prompt inkl. Fingerprint für den Verdict-Cache."""
+    text: str
+    fingerprint: str
+
+
+@dataclass(frozen=True)
+class FilmPrompts:
+    """Vorkompilierte Prompts eines Films aus universen.yaml."""
+    film_title: str
+    easter_egg_description: Optional[str]
+    poster_urls: Tuple[str, ...]
+    film: PromptPayload
+    puzzle: PromptPayload
+
+
+class PromptRegistry:
+    """Versionierte Registry der vorkompilierten Prompts pro Film."""
+
+    def __init__(self, loader=None):
+        """
+        Initialisiert die Registry und kompiliert alle Film-Prompts vor.
+
+        Args:
+            loader: UniverseLoader (default: globale Instanz)
+        """
+        self.loader = loader or universe_loader
+        self.version = REGISTRY_VERSION
+        self._films: Dict[str, FilmPrompts] = {}
+        self._invalidation_listeners = []
+
+        self.rebuild()
+        # YAML-Reload → Prompts neu kompilieren
+        self.loader.add_reload_listener(self.invalidate)
+
+    def rebuild(self):
+        """Kompiliert die Prompts aller Filme aus der YAML."""
+        films = {}
+        for team in self.loader.get_teams():
+            film_title = team['film_title']
+            easter_egg_description = format_easter_egg(team.get('easter_egg'))
+            poster_urls = tuple(team.get('posters') or ())
+
+            film_text = render_film_prompt(film_title, easter_egg_description)
+            puzzle_text = render_puzzle_prompt(film_title, poster_urls)
+
+            films[normalize_title(film_title)] = FilmPrompts(
+                film_title=film_title,
+                easter_egg_description=easter_egg_description,
+                poster_urls=poster_urls,
+                film=PromptPayload(film_text, _fingerprint(self.version, 'film', film_text)),
+                puzzle=PromptPayload(puzzle_text, _fingerprint(self.version, 'puzzle', puzzle_text))
+            )
+
+        # Atomarer Austausch - laufende Requests sehen alte oder neue Prompts
+        self._films = films
+        logger.info(f"Prompt-Registry {self.version}: {len(films)} Filme vorkompiliert")
+
+    def invalidate(self, *_):
+        """Verwirft vorkompilierte Prompts und benachrichtigt Listener (z.B. Verdict-Cache)."""
+        render_film_prompt.cache_clear()
+        render_puzzle_prompt.cache_clear()
+        self.rebuild()
+        for listener in list(self._invalidation_listeners):
+            listener()
+
+    def add_invalidation_listener(self, callback):
+        """Registriert Callback, der bei Prompt-Änderungen aufgerufen wird."""
+        self._invalidation_listeners.append(callback)
+
+    def get(self, film_title: str) -> Optional[FilmPrompts]:
+        """Holt die vorkompilierten Prompts eines Films (normalisierter Titel)."""
+        return self._films.get(normalize_title(film_title))
+
+    def film_prompt(self, film_title: str, easter_egg_description: str = None) -> PromptPayload:
+        """
+        Liefert den Film-Prompt.
+
+        Ohne explizite Easter-Egg-Beschreibung wird die aus der YAML verwendet.
+        """
+        prompts = self.get(film_title)
+        if prompts and easter_egg_description in (None, prompts.easter_egg_description):
+            return prompts.film
+
+        text = render_film_prompt(film_title, easter_egg_description)
+        return PromptPayload(text, _fingerprint(self.version, 'film', text))
+
+    def puzzle_prompt(self, film_title: str, poster_urls: List[str] = None) -> PromptPayload:
+        """
+        Liefert den Puzzle-Prompt.
+
+        Ohne explizite Poster-URLs werden die aus der YAML verwendet.
+        """
+        prompts = self.get(film_title)
+        if prompts and (poster_urls is None or tuple(poster_urls) == prompts.poster_urls):
+            return prompts.puzzle
+
+        text = render_puzzle_prompt(film_title, tuple(poster_urls or ()))
+        return PromptPayload(text, _fingerprint(self.version, 'puzzle', text))
+
+
+# Globale Instanz (wird beim ersten Zugriff erzeugt)
+prompt_registry = container.register('prompt_registry', PromptRegistry)
@@ -0,0 +1,274 @@
+"""
+Rate-Limiter für Foto-Einreichungen (Token-Bucket pro User und Submission-Typ).
+Greift im photo_handler vor Download, Disk-Zugriff und KI-Aufruf. Buckets
+liegen im Speicher und können optional in SQLite gesichert werden, damit ein
+Neustart die Limits nicht zurücksetzt.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from config import config
+from database.models import SubmissionType
+from utils.service_container import container
+
+logger = logging.getLogger('bot.services.rate_limiter')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+    telegram_id INTEGER NOT NULL,
+    submission_type TEXT NOT NULL,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (telegram_id, submission_type)
+)
+"""
+
+# Max. Anzahl gedrosselter User in der Statistik; darüber bleiben die häufigsten
+# TRACKED_USERS_KEEP erhalten (begrenzt den Speicher über die ganze Nacht)
+MAX_TRACKED_USERS = 1000
+TRACKED_USERS_KEEP = 100
+
+
+def parse_limit(value: str) -> Optional[Tuple[int, float]]:
+    """
+    Parst ein Limit im Format "<Anzahl>/<Sekunden>" (z.B. "5/60").
+
+    Returns:
+        Optional[Tuple[int, float]]: (Burst-Kapazität, Zeitraum) oder None (= unbegrenzt)
+    """
+    value = (value or '').strip()
+    if not value or value == '0':
+        return None
+    try:
+        count, seconds = value.split('/', 1)
+        limit = (int(count), float(seconds))
+    except ValueError:
+        raise ValueError(f"Ungültiges Rate-Limit '{value}' (Format: Anzahl/Sekunden, z.B. 5/60)")
+    if limit[0] < 1 or limit[1] <= 0:
+        raise ValueError(f"Ungültiges Rate-Limit '{value}' (Anzahl und Sekunden müssen positiv sein)")
+    return limit
+
+
+class RateLimitDecision(NamedTuple):
+    """Ergebnis einer Prüfung."""
+    allowed: bool
+    retry_after: float = 0.0
+    # Erste Ablehnung seit dem letzten erlaubten Request → User einmal informieren
+    notify: bool = False
+
+
+class TokenBucket:
+    """Bucket mit `capacity` Tokens, der sich in `period` Sekunden komplett auffüllt."""
+    __slots__ = ('capacity', 'refill_per_second', 'tokens', 'updated_at', 'notified')
+
+    def __init__(self, capacity: int, period: float, tokens: float = None, updated_at: float = None):
+        self.capacity = capacity
+        self.refill_per_second = capacity / period
+        self.tokens = float(capacity) if tokens is None else tokens
+        self.updated_at = time.time() if updated_at is None else updated_at
+        self.notified = False
+
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def consume(self, now: float = None) -> float:
+        """
+        Nimmt ein Token.
+
+        Returns:
+            float: 0 wenn erlaubt, sonst Sekunden bis zum nächsten Token
+        """
+        self._refill(time.time() if now is None else now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.refill_per_second
+
+    def is_full(self, now: float) -> bool:
+        """Voller Bucket = Zustand eines unbekannten Users (muss nicht gespeichert werden)."""
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    """Token-Buckets pro (telegram_id, SubmissionType) mit Zählern für Admins."""
+
+    def __init__(self, limits: Dict[SubmissionType, Optional[Tuple[int, float]]], db_path: Path = None):
+        """
+        Args:
+            limits: Limit pro Typ als (Anzahl, Sekunden); fehlend/None = unbegrenzt
+            db_path: SQLite-Datei für die Buckets (None = nur im Speicher)
+        """
+        self.limits = {kind: limit for kind, limit in limits.items() if limit}
+        self.db_path = db_path
+        self._buckets: Dict[Tuple[int, SubmissionType], TokenBucket] = {}
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+        self.allowed: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self.throttled_users: Counter = Counter()
+        if db_path is not None:
+            self._load()
+
+    def check(self, telegram_id: int, submission_type: SubmissionType) -> RateLimitDecision:
+        """
+        Prüft und verbraucht ein Token.
+
+        Returns:
+            RateLimitDecision: erlaubt, Wartezeit in Sekunden, ob der User informiert werden soll
+        """
+        limit = self.limits.get(submission_type)
+        if limit is None:
+            return RateLimitDecision(True)
+
+        key = (telegram_id, submission_type)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(*limit)
+            retry_after = bucket.consume()
+            self._dirty.add(key)
+
+            if not retry_after:
+                bucket.notified = False
+                self.allowed[submission_type] += 1
+                return RateLimitDecision(True)
+
+            notify = not bucket.notified
+            bucket.notified = True
+            self.throttled[submission_type] += 1
+            self.throttled_users[telegram_id] += 1
+            if len(self.throttled_users) > MAX_TRACKED_USERS:
+                self.throttled_users = Counter(dict(self.throttled_users.most_common(TRACKED_USERS_KEEP)))
+            return RateLimitDecision(False, retry_after, notify)
+
+    def reset(self, telegram_id: int = None):
+        """Setzt Buckets zurück (alle oder die eines Users)."""
+        with self._lock:
+            for key in list(self._buckets):
+                if telegram_id is None or key[0] == telegram_id:
+                    del self._buckets[key]
+                    self._dirty.add(key)
+
+    def get_stats(self, top_users: int = 5) -> dict:
+        """
+        Zähler für die Admin-Ansicht.
+
+        Returns:
+            dict: allowed/throttled pro Typ, top_users [(telegram_id, throttled)], active_buckets
+        """
+        with self._lock:
+            return {
+                'allowed': {kind.value: count for kind, count in self.allowed.items()},
+                'throttled': {kind.value: count for kind, count in self.throttled.items()},
+                'top_users': self.throttled_users.most_common(top_users),
+                'active_buckets': len(self._buckets),
+            }
+
+    # ------------------------------------------------------------------
+    # Persistenz (optional)
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.db_path))
+        connection.execute(SCHEMA)
+        return connection
+
+    def _load(self):
+        """Lädt gespeicherte, noch nicht aufgefüllte Buckets."""
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT telegram_id, submission_type, tokens, updated_at FROM rate_limit_buckets"
+            ).fetchall()
+        finally:
+            connection.close()
+
+        now = time.time()
+        for telegram_id, type_value, tokens, updated_at in rows:
+            try:
+                submission_type = SubmissionType(type_value)
+            except ValueError:
+                continue
+            limit = self.limits.get(submission_type)
+            if limit is None:
+                continue
+            bucket = TokenBucket(*limit, tokens=min(tokens, limit[0]), updated_at=updated_at)
+            if not bucket.is_full(now):
+                self._buckets[(telegram_id, submission_type)] = bucket
+        logger.info(f"{len(self._buckets)} Rate-Limit-Buckets aus {self.db_path} geladen")
+
+    def flush(self) -> int:
+        """
+        Schreibt geänderte Buckets nach SQLite und entfernt volle Buckets.
+
+        Returns:
+            int: Anzahl geschriebener bzw. gelöschter Buckets
+        """
+        now = time.time()
+        with self._lock:
+            upserts: List[Tuple] = []
+            deletes: List[Tuple] = []
+            for key in self._dirty:
+                bucket = self._buckets.get(key)
+                if bucket is None or bucket.is_full(now):
+                    self._buckets.pop(key, None)
+                    deletes.append((key[0], key[1].value))
+                else:
+                    upserts.append((key[0], key[1].value, bucket.tokens, bucket.updated_at))
+            self._dirty.clear()
+
+            # Volle Buckets brauchen keinen Speicher
+            for key in [key for key, bucket in self._buckets.items() if bucket.is_full(now)]:
+                del self._buckets[key]
+                deletes.append((key[0], key[1].value))
+
+        if self.db_path is None or not (upserts or deletes):
+            return 0
+
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (telegram_id, submission_type, tokens, updated_at) "
+                    "VALUES (?, ?, ?, ?)", upserts
+                )
+                connection.executemany(
+                    "DELETE FROM rate_limit_buckets WHERE telegram_id = ? AND submission_type = ?", deletes
+                )
+        finally:
+            connection.close()
+        return len(upserts) + len(deletes)
+
+    async def run_flusher(self, interval: float):
+        """Hintergrund-Task: sichert Buckets alle `interval` Sekunden."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await asyncio.to_thread(self.flush)
+                except (sqlite3.Error, OSError) as e:
+                    logger.error(f"Rate-Limit-Buckets konnten nicht gesichert werden: {e}")
+        finally:
+            await asyncio.to_thread(self.flush)
+
+
+# Globale Instanz (wird beim ersten Zugriff erzeugt)
+rate_limiter = container.register('rate_limiter', lambda: RateLimiter(
+    limits={
+        SubmissionType.PARTY_PHOTO: parse_limit(config.RATE_LIMIT_PARTY_PHOTO),
+        SubmissionType.FILM_REFERENCE: parse_limit(config.RATE_LIMIT_FILM_REFERENCE),
+        SubmissionType.PUZZLE: parse_limit(config.RATE_LIMIT_PUZZLE),
+    },
+    db_path=config.RATE_LIMIT_DB_PATH if config.RATE_LIMIT_PERSIST else None
+))
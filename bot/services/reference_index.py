@@ -0,0 +1,256 @@
+"""
+Referenzbild-Index für die Film-Erkennung.
+Berechnet kompakte Embeddings der Beispielbilder und Poster aus universen.yaml
+und speichert sie als memory-mapped NumPy-Index.
+"""
+
+import io
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+from PIL import Image
+
+from config import config
+from utils.service_container import container
+
+logger = logging.getLogger('bot.services.reference_index')
+
+# Version des Embedding-Formats (bei Änderung muss der Index neu gebaut werden)
+EMBEDDING_VERSION = 1
+
+# Farblayout: Bild wird auf GRID_SIZE x GRID_SIZE Pixel reduziert
+GRID_SIZE = 8
+# Farbhistogramm: Bins pro HSV-Kanal
+HIST_BINS = 8
+
+EMBEDDINGS_FILE = 'embeddings.npy'
+METADATA_FILE = 'films.json'
+
+
+def compute_embedding(image: Image.Image) -> np.ndarray:
+    """
+    Berechnet ein kompaktes Embedding (Farblayout + HSV-Histogramm).
+
+    Args:
+        image: PIL-Bild
+
+    Returns:
+        np.ndarray: L2-normalisierter float32-Vektor
+    """
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    # Grobes Farblayout (wo im Bild welche Farbe liegt)
+    layout = np.asarray(
+        image.resize((GRID_SIZE, GRID_SIZE), Image.Resampling.BILINEAR),
+        dtype=np.float32
+    ).reshape(-1) / 255.0
+
+    # Farbverteilung unabhängig von der Position
+    hsv = np.asarray(image.resize((64, 64)).convert('HSV'), dtype=np.float32)
+    histogram = np.concatenate([
+        np.histogram(hsv[:, :, channel], bins=HIST_BINS, range=(0, 256))[0]
+        for channel in range(3)
+    ]).astype(np.float32)
+    histogram /= max(float(histogram.sum()), 1.0)
+
+    vector = np.concatenate([layout, histogram * 4.0])
+    vector -= vector.mean()
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+class ReferenceIndex:
+    """Nearest-Film-Suche über vorberechnete Referenzbild-Embeddings."""
+
+    def __init__(self, index_path: str = None):
+        """
+        Initialisiert den Index (Dateien werden erst bei Bedarf geladen).
+
+        Args:
+            index_path: Verzeichnis des Index (default: aus config)
+        """
+        self.index_path = Path(index_path) if index_path else config.REFERENCE_INDEX_PATH
+        self._embeddings: Optional[np.ndarray] = None
+        self._films: List[str] = []
+        self._load_attempted = False
+
+    # ------------------------------------------------------------------------
+    # Build
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def collect_sources(teams: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """
+        Sammelt alle Referenzbilder (Easter-Egg-Beispiel + Poster) pro Film.
+
+        Returns:
+            List[Tuple[film_title, source]]: Quelle ist URL oder lokaler Pfad
+        """
+        sources = []
+        for team in teams:
+            film_title = team.get('film_title')
+            easter_egg = team.get('easter_egg') or {}
+            candidates = [easter_egg.get('example_image')] + list(team.get('posters') or [])
+
+            seen = set()
+            for source in candidates:
+                if source and source not in seen:
+                    seen.add(source)
+                    sources.append((film_title, source))
+        return sources
+
+    def build(self, teams: List[Dict[str, Any]], base_dir: Path = None, timeout: float = 15.0) -> int:
+        """
+        Lädt alle Referenzbilder einmalig und schreibt den Index auf die Platte.
+
+        Args:
+            teams: Team-Daten aus UniverseLoader.get_teams()
+            base_dir: Basis für relative lokale Pfade
+            timeout: HTTP-Timeout pro Bild in Sekunden
+
+        Returns:
+            int: Anzahl indexierter Bilder
+        """
+        vectors = []
+        entries = []
+
+        with httpx.Client(timeout=timeout, follow_redirects=True) as client:
+            for film_title, source in self.collect_sources(teams):
+                try:
+                    image = self._open_source(client, source, base_dir)
+                    with image:
+                        vectors.append(compute_embedding(image))
+                    entries.append({'film_title': film_title, 'source': source})
+                except Exception as e:
+                    logger.warning(f"Referenzbild übersprungen ({film_title}): {source} | {e}")
+
+        self.index_path.mkdir(parents=True, exist_ok=True)
+
+        dimensions = GRID_SIZE * GRID_SIZE * 3 + HIST_BINS * 3
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, dimensions), dtype=np.float32)
+
+        # float16 reicht für Cosine-Ähnlichkeiten und halbiert die Dateigröße
+        np.save(self.index_path / EMBEDDINGS_FILE, matrix.astype(np.float16))
+        with open(self.index_path / METADATA_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'version': EMBEDDING_VERSION, 'entries': entries}, f, ensure_ascii=False, indent=2)
+
+        logger.info(f"Referenz-Index gebaut: {len(entries)} Bilder in {self.index_path}")
+
+        # Nächster Zugriff lädt den neuen Index
+        self._embeddings = None
+        self._films = []
+        self._load_attempted = False
+        return len(entries)
+
+    @staticmethod
+    def _open_source(client: httpx.Client, source: str, base_dir: Path = None) -> Image.Image:
+        """Öffnet ein Referenzbild von URL oder lokalem Pfad."""
+        if source.startswith(('http://', 'https://')):
+            response = client.get(source)
+            response.raise_for_status()
+            return Image.open(io.BytesIO(response.content))
+
+        path = Path(source)
+        if not path.is_absolute() and base_dir is not None:
+            path = base_dir / path
+        return Image.open(path)
+
+    # ------------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------------
+
+    def load(self) -> bool:
+        """
+        Lädt den Index memory-mapped.
+
+        Returns:
+            bool: True wenn ein gültiger Index vorhanden ist
+        """
+        self._load_attempted = True
+        embeddings_path = self.index_path / EMBEDDINGS_FILE
+        metadata_path = self.index_path / METADATA_FILE
+
+        if not embeddings_path.exists() or not metadata_path.exists():
+            logger.info(f"Kein Referenz-Index gefunden in {self.index_path}")
+            return False
+
+        try:
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+
+            if metadata.get('version') != EMBEDDING_VERSION:
+                logger.warning("Referenz-Index veraltet - bitte neu bauen (tools.build_reference_index)")
+                return False
+
+            self._embeddings = np.load(embeddings_path, mmap_mode='r')
+            self._films = [entry['film_title'] for entry in metadata.get('entries', [])]
+            logger.info(f"Referenz-Index geladen: {len(self._films)} Bilder")
+            return True
+        except Exception as e:
+            logger.error(f"Fehler beim Laden des Referenz-Index: {e}", exc_info=True)
+            self._embeddings = None
+            self._films = []
+            return False
+
+    def is_available(self) -> bool:
+        """Prüft ob der Index geladen ist (lädt beim ersten Aufruf)."""
+        if not self._load_attempted:
+            self.load()
+        return self._embeddings is not None and len(self._films) > 0
+
+    def rank_films(self, photo_path: str, top_k: int = 3) -> List[Tuple[str, int]]:
+        """
+        Sortiert Filme nach Ähnlichkeit des Fotos zu ihren Referenzbildern.
+
+        Args:
+            photo_path: Pfad zum eingereichten Foto
+            top_k: Anzahl der zurückgegebenen Filme
+
+        Returns:
+            List[Tuple[film_title, similarity]]: Ähnlichkeit 0-100, absteigend
+        """
+        if not self.is_available():
+            return []
+
+        try:
+            with Image.open(photo_path) as image:
+                query = compute_embedding(image)
+        except Exception as e:
+            logger.warning(f"Embedding für {photo_path} fehlgeschlagen: {e}")
+            return []
+
+        similarities = np.asarray(self._embeddings, dtype=np.float32) @ query
+
+        # Bestes Referenzbild pro Film zählt
+        best: Dict[str, float] = {}
+        for film_title, similarity in zip(self._films, similarities.tolist()):
+            if similarity > best.get(film_title, -1.0):
+                best[film_title] = similarity
+
+        ranking = sorted(best.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(film_title, max(0, round(similarity * 100))) for film_title, similarity in ranking]
+
+    def matches_film(self, ranking: List[Tuple[str, int]], film_title: str) -> bool:
+        """
+        Prüft ob der genannte Film der beste Treffer über dem Schwellwert ist.
+
+        Args:
+            ranking: Ergebnis von rank_films()
+            film_title: Vom User genannter Film
+        """
+        if not ranking:
+            return False
+        top_film, similarity = ranking[0]
+        return (
+            top_film.lower() == film_title.lower()
+            and similarity >= config.REFERENCE_MATCH_THRESHOLD
+        )
+
+
+# Globale Instanz (wird beim ersten Zugriff erzeugt)
+reference_index = container.register('reference_index', ReferenceIndex)
@@ -0,0 +1,314 @@
+"""
+Phasen der Submission-Verarbeitung: record → download → evaluate → finalize.
+
+Jede Phase mit Datenbankzugriff öffnet ihre eigene, kurze Transaktion.
+Telegram-Download und KI-Bewertung laufen ohne offene Session - so hält ein
+langsamer Netzwerk-Call weder eine Verbindung aus dem Pool noch den
+SQLite-Schreib-Lock. Zwischen den Phasen werden nur einfache Werte
+weitergereicht, keine ORM-Objekte (die sind nach dem Commit abgelaufen).
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from database.db import db
+from database.crud import (
+    get_or_create_user,
+    create_submission,
+    update_submission_status,
+    has_recognized_film,
+    add_easter_egg,
+    has_solved_puzzle,
+    get_team_by_id
+)
+from database.models import User, Submission, SubmissionType, SubmissionStatus
+from services.photo_manager import photo_manager
+
+logger = logging.getLogger('bot.services.submission_phases')
+
+# Gründe, aus denen die Record-Phase keine Submission anlegt
+REFUSAL_NO_TEAM = 'no_team'
+REFUSAL_TEAM_NOT_FOUND = 'team_not_found'
+REFUSAL_PUZZLE_SOLVED = 'puzzle_solved'
+REFUSAL_FILM_RECOGNIZED = 'film_recognized'
+
+# Antwort, wenn die Submission während der Verarbeitung gelöscht wurde (z.B. /reset)
+RESET_TEXT = "⚠️ Deine Einreichung wurde zwischenzeitlich zurückgesetzt und nicht gewertet."
+
+
+@dataclass(frozen=True)
+class RecordedSubmission:
+    """Ergebnis der Record-Phase (Werte statt ORM-Objekte)."""
+    user_id: int
+    total_points: int
+    team_id: Optional[str] = None
+    team_film_title: Optional[str] = None
+    submission_id: Optional[int] = None
+    # Gesetzt wenn eine Vorbedingung fehlt - dann gibt es keine Submission
+    refusal: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class FinalizedSubmission:
+    """Ergebnis der Finalize-Phase."""
+    approved: bool
+    total_points: int
+    # Parallel eingereichtes Duplikat hat den Film/das Puzzle schon bekommen
+    duplicate: bool = False
+
+
+def record_submission(
+    telegram_user,
+    submission_type: SubmissionType,
+    photo_file_id: str,
+    caption: str = None,
+    film_title: str = None,
+    media_type: str = 'photo',
+    chat_id: int = None,
+    pipeline_stage: str = None
+) -> RecordedSubmission:
+    """
+    Record-Phase: User holen, Vorbedingungen prüfen, PENDING-Submission anlegen.
+
+    Die Submission startet immer ohne Punkte - vergeben werden sie erst in
+    finalize_submission(), damit ein abgebrochener Download keine Punkte hinterlässt.
+    Läuft die Pipeline, wird ihre erste Stufe im selben Commit gesetzt - ein
+    Absturz vor dem Einreihen lässt die Submission so nicht als PENDING liegen,
+    sie wird beim nächsten Start wieder aufgenommen.
+
+    Args:
+        telegram_user: Telegram-User (id, username, first_name, last_name)
+        submission_type: Art der Submission
+        photo_file_id: Telegram File-ID des Mediums
+        caption: Caption für die Submission (Puzzle: None → "Team: <ID>")
+        film_title: Kanonischer Filmtitel (nur Film-Referenzen)
+        media_type: 'photo' oder 'video'
+        chat_id: Chat für die Antwort (Wiederaufnahme nach Neustart)
+        pipeline_stage: Erste Pipeline-Stufe (None = inline verarbeitet)
+
+    Returns:
+        RecordedSubmission: refusal gesetzt, wenn keine Submission angelegt wurde
+    """
+    with db.get_session() as session:
+        db_user = get_or_create_user(
+            session,
+            telegram_id=telegram_user.id,
+            username=telegram_user.username,
+            first_name=telegram_user.first_name,
+            last_name=telegram_user.last_name
+        )
+        user_id, team_id, total_points = db_user.id, db_user.team_id, db_user.total_points
+
+        def refuse(reason: str) -> RecordedSubmission:
+            return RecordedSubmission(
+                user_id=user_id, total_points=total_points, team_id=team_id, refusal=reason
+            )
+
+        team_film_title = None
+        if submission_type == SubmissionType.PUZZLE:
+            if not team_id:
+                return refuse(REFUSAL_NO_TEAM)
+            if has_solved_puzzle(session, user_id):
+                return refuse(REFUSAL_PUZZLE_SOLVED)
+            team = get_team_by_id(session, team_id)
+            if not team:
+                return refuse(REFUSAL_TEAM_NOT_FOUND)
+            team_film_title = team.film_title
+            if caption is None:
+                caption = f"Team: {team_id}"
+        elif submission_type == SubmissionType.FILM_REFERENCE:
+            if has_recognized_film(session, user_id, film_title):
+                return refuse(REFUSAL_FILM_RECOGNIZED)
+
+        submission = create_submission(
+            session=session,
+            user_id=user_id,
+            submission_type=submission_type,
+            photo_file_id=photo_file_id,
+            caption=caption,
+            film_title=film_title,
+            points_awarded=0,
+            status=SubmissionStatus.PENDING,
+            media_type=media_type,
+            chat_id=chat_id,
+            pipeline_stage=pipeline_stage
+        )
+        return RecordedSubmission(
+            user_id=user_id, total_points=total_points, team_id=team_id,
+            team_film_title=team_film_title, submission_id=submission.id
+        )
+
+
+async def download_media(bot, file_id: str) -> bytes:
+    """Download-Phase: Medium von Telegram holen (ohne Datenbank)."""
+    file = await bot.get_file(file_id)
+    return bytes(await file.download_as_bytearray())
+
+
+async def store_media(
+    submission_id: int,
+    telegram_id: int,
+    user_name: Optional[str],
+    media_bytes: bytes,
+    media_type: str,
+    category: str,
+    film_title: str = None,
+    create_thumbnail: bool = True,
+    pipeline_stage: str = None
+) -> Tuple[str, Optional[str]]:
+    """
+    Speichert das Medium (Worker-Thread) und trägt die Pfade ein.
+
+    Args:
+        create_thumbnail: False = Thumbnail später per attach_thumbnail()
+        pipeline_stage: Nächste Pipeline-Stufe, in derselben Transaktion gesetzt
+
+    Returns:
+        Tuple[str, Optional[str]]: (media_path, thumbnail_path bzw. None)
+    """
+    if media_type == 'video':
+        media_path, thumbnail_path = await asyncio.to_thread(
+            photo_manager.save_video,
+            video_bytes=media_bytes,
+            user_id=telegram_id,
+            submission_id=submission_id,
+            category=category,
+            user_name=user_name,
+            create_thumbnail=create_thumbnail
+        )
+    else:
+        media_path, thumbnail_path = await asyncio.to_thread(
+            photo_manager.save_photo,
+            photo_bytes=media_bytes,
+            user_id=telegram_id,
+            submission_id=submission_id,
+            category=category,
+            film_title=film_title,
+            user_name=user_name,
+            create_thumbnail=create_thumbnail
+        )
+    if media_path is None:
+        raise IOError(f"Medium für Submission {submission_id} konnte nicht gespeichert werden")
+    if not create_thumbnail:
+        thumbnail_path = None
+
+    values = {Submission.photo_path: media_path, Submission.thumbnail_path: thumbnail_path}
+    if pipeline_stage is not None:
+        values[Submission.pipeline_stage] = pipeline_stage
+    with db.get_session() as session:
+        session.query(Submission).filter(Submission.id == submission_id).update(
+            values, synchronize_session=False
+        )
+    return media_path, thumbnail_path
+
+
+async def attach_thumbnail(submission_id: int, media_path: str, pipeline_stage: str = None) -> str:
+    """Erstellt das Thumbnail zu einem gespeicherten Medium nach (Worker-Thread) und trägt es ein."""
+    thumbnail_path = await asyncio.to_thread(photo_manager.create_thumbnail, media_path)
+    set_pipeline_stage(submission_id, pipeline_stage, thumbnail_path=thumbnail_path)
+    return thumbnail_path
+
+
+def set_pipeline_stage(submission_id: int, pipeline_stage: Optional[str], **columns):
+    """Setzt die Pipeline-Stufe (None = fertig) und weitere Spalten in einer kurzen Transaktion."""
+    values = {getattr(Submission, name): value for name, value in columns.items()}
+    values[Submission.pipeline_stage] = pipeline_stage
+    with db.get_session() as session:
+        session.query(Submission).filter(Submission.id == submission_id).update(
+            values, synchronize_session=False
+        )
+
+
+def finalize_submission(
+    submission_id: int,
+    approved: bool,
+    points: int = 0,
+    ai_response: dict = None,
+    pipeline_stage: str = None
+) -> Optional[FinalizedSubmission]:
+    """
+    Finalize-Phase: Status setzen, Punkte vergeben, Film als erkannt eintragen.
+
+    Die Duplikat-Prüfung der Record-Phase wird hier wiederholt: zwei parallel
+    eingereichte Fotos zum selben Film/Puzzle bringen nur einmal Punkte.
+    Status, Punkte, Easter Egg und pipeline_stage (Pipeline: 'notify') werden
+    als eine Einheit geschrieben - auch bei SQLite im Autocommit-Modus.
+
+    Returns:
+        Optional[FinalizedSubmission]: approved, aktueller Punktestand, duplicate;
+        None wenn die Submission nicht mehr existiert (z.B. /reset)
+    """
+    ai_evaluation = str(ai_response) if ai_response is not None else None
+    with db.get_session() as session:
+        submission = session.get(Submission, submission_id)
+        if submission is None:
+            logger.info(f"Submission {submission_id} no longer exists, not finalized")
+            return None
+        user_id, film_title = submission.user_id, submission.film_title
+        submission_type = submission.submission_type
+
+        # SAVEPOINT: bei SQLite (Autocommit) eine Transaktion, Commit beim Verlassen
+        with session.begin_nested():
+            submission.pipeline_stage = pipeline_stage
+
+            duplicate = False
+            if approved and submission_type == SubmissionType.FILM_REFERENCE:
+                duplicate = has_recognized_film(session, user_id, film_title)
+            elif approved and submission_type == SubmissionType.PUZZLE:
+                duplicate = has_solved_puzzle(session, user_id)
+
+            if approved and not duplicate:
+                update_submission_status(
+                    session=session,
+                    submission_id=submission_id,
+                    status=SubmissionStatus.APPROVED,
+                    points_awarded=points,
+                    ai_evaluation=ai_evaluation,
+                    commit=False
+                )
+                if submission_type == SubmissionType.FILM_REFERENCE:
+                    add_easter_egg(session, user_id, film_title, commit=False)
+            else:
+                update_submission_status(
+                    session=session,
+                    submission_id=submission_id,
+                    status=SubmissionStatus.REJECTED,
+                    ai_evaluation=ai_evaluation,
+                    commit=False
+                )
+
+        total_points = session.query(User.total_points).filter(User.id == user_id).scalar()
+        return FinalizedSubmission(
+            approved=approved and not duplicate, total_points=total_points, duplicate=duplicate
+        )
+
+
+def abandon_submission(submission_id: Optional[int], error: Exception):
+    """
+    Markiert eine abgebrochene Submission als REJECTED (z.B. Download fehlgeschlagen).
+
+    Bereits finalisierte Submissions bleiben unverändert - der Aufruf ist daher
+    auch nach einem Fehler beim Senden der Antwort unbedenklich. Eine noch
+    gesetzte Pipeline-Stufe wird in jedem Fall gelöscht.
+    """
+    if submission_id is None:
+        return
+    try:
+        with db.get_session() as session:
+            submission = session.get(Submission, submission_id)
+            if submission is None:
+                return
+            submission.pipeline_stage = None
+            if submission.status != SubmissionStatus.PENDING:
+                return
+            update_submission_status(
+                session=session,
+                submission_id=submission_id,
+                status=SubmissionStatus.REJECTED,
+                ai_evaluation=json.dumps({'error': str(error)})
+            )
+    except Exception as e:
+        logger.error(f"Could not abandon submission {submission_id}: {e}", exc_info=True)
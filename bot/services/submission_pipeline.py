@@ -0,0 +1,498 @@
+"""
+Hintergrund-Pipeline für Foto-Submissions.
+
+download → persist → thumbnail → evaluate → notify: jede Stufe hat eine
+eigene asyncio-Queue und eine eigene Anzahl Worker. Der Handler legt die
+Submission an, bestätigt sofort und reiht den Job ein - die Antwort mit dem
+Ergebnis kommt aus der notify-Stufe. Die Queues sind begrenzt: ist eine
+Stufe voll, wartet die vorherige (und zuletzt der Handler) - Backpressure
+statt unbegrenzt wachsender Warteschlangen.
+
+Die jeweils nächste Stufe steht in submissions.pipeline_stage. Nach einem
+Neustart werden unfertige Submissions dort wieder aufgenommen (Downloads
+werden wiederholt, die Bytes liegen nur im Speicher). Ohne laufende Pipeline
+verarbeitet der Handler dieselben Stufen inline.
+"""
+
+import ast
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+from database.db import db
+from database.crud import get_team_by_id
+from database.models import User, Submission, SubmissionType, SubmissionStatus
+from services.ai_evaluator import ai_evaluator
+from services.metrics import HandlerTiming, current_timing, metrics
+from services.reference_index import reference_index
+from services.submission_phases import (
+    FinalizedSubmission,
+    download_media,
+    store_media,
+    attach_thumbnail,
+    finalize_submission,
+    abandon_submission,
+    set_pipeline_stage,
+    RESET_TEXT
+)
+from services.template_manager import template_manager
+from utils.service_container import container
+
+logger = logging.getLogger('bot.services.pipeline')
+
+STAGES = ('download', 'persist', 'thumbnail', 'evaluate', 'notify')
+
+CATEGORIES = {
+    SubmissionType.PARTY_PHOTO: 'party',
+    SubmissionType.FILM_REFERENCE: 'films',
+    SubmissionType.PUZZLE: 'puzzles',
+}
+
+POINTS = {
+    SubmissionType.PARTY_PHOTO: lambda: config.POINTS_PARTY_PHOTO,
+    SubmissionType.FILM_REFERENCE: lambda: config.POINTS_FILM_REFERENCE,
+    SubmissionType.PUZZLE: lambda: config.POINTS_PUZZLE,
+}
+
+ERROR_TEXTS = {
+    SubmissionType.PARTY_PHOTO: "❌ Fehler beim Verarbeiten. Bitte versuche es erneut.",
+    SubmissionType.FILM_REFERENCE: "❌ Fehler beim Verarbeiten der Film-Referenz. Bitte versuche es erneut.",
+    SubmissionType.PUZZLE: "❌ Fehler beim Verarbeiten des Screenshots. Bitte versuche es erneut.",
+}
+
+REFERENCE_TYPE_EMOJIS = {
+    'easter_egg': '🥚',
+    'scene': '🎬',
+    'screen_capture': '📺',
+    'poster': '🎭',
+    'costume': '👗',
+    'prop': '🔧',
+    'other': '✨'
+}
+
+
+def parse_workers(spec: str) -> Dict[str, int]:
+    """
+    Parst "download=8,evaluate=4" zu Workern pro Stufe (nicht genannte Stufen: 1).
+
+    Raises:
+        ValueError: Bei unbekannter Stufe oder ungültiger Anzahl
+    """
+    workers = {stage: 1 for stage in STAGES}
+    for part in filter(None, (part.strip() for part in spec.split(','))):
+        stage, _, count = part.partition('=')
+        stage = stage.strip()
+        if stage not in workers:
+            raise ValueError(f"Unbekannte Pipeline-Stufe: {stage} (erlaubt: {', '.join(STAGES)})")
+        workers[stage] = int(count)
+        if workers[stage] < 1:
+            raise ValueError(f"Pipeline-Stufe {stage} braucht mindestens einen Worker")
+    return workers
+
+
+@dataclass
+class SubmissionJob:
+    """Eine Submission auf dem Weg durch die Stufen (nur einfache Werte)."""
+    submission_id: int
+    submission_type: SubmissionType
+    file_id: str
+    media_type: str
+    chat_id: int
+    telegram_id: int
+    first_name: Optional[str]
+    # Film der Referenz bzw. des Team-Puzzles
+    film_title: Optional[str] = None
+    status_message_id: Optional[int] = None
+    # False = inline im Handler, Stufen werden nicht in der DB vermerkt
+    background: bool = False
+    media_bytes: Optional[bytes] = None
+    media_path: Optional[str] = None
+    # (is_approved, confidence, reasoning, ai_response) - None bei Partyfotos
+    verdict: Optional[tuple] = None
+    finalized: Optional[FinalizedSubmission] = None
+
+
+def acknowledgement_text(job: SubmissionJob) -> str:
+    """Sofortige Bestätigung, wird später durch das Ergebnis ersetzt."""
+    if job.submission_type == SubmissionType.FILM_REFERENCE:
+        return (
+            f"🤖 Analysiere deine Referenz zu \"{job.film_title}\"...\n\n"
+            f"Dies kann bis zu 10 Sekunden dauern."
+        )
+    if job.submission_type == SubmissionType.PUZZLE:
+        return (
+            f"🤖 Prüfe dein Puzzle zu \"{job.film_title}\"...\n\n"
+            f"Dies kann bis zu 10 Sekunden dauern."
+        )
+    media_label = "Video" if job.media_type == 'video' else "Foto"
+    return f"📥 {media_label} erhalten - wird gespeichert..."
+
+
+def result_text(job: SubmissionJob) -> str:
+    """Ergebnis-Nachricht nach der Finalize-Phase."""
+    if job.finalized is None:
+        return RESET_TEXT
+    first_name = job.first_name or "Reisender"
+    finalized = job.finalized
+    points = POINTS[job.submission_type]()
+    _, confidence, reasoning, ai_response = job.verdict or (True, 0, "", {})
+
+    if job.submission_type == SubmissionType.PARTY_PHOTO:
+        return template_manager.render_party_photo_thanks(
+            first_name=first_name,
+            points=points,
+            total_points=finalized.total_points
+        )
+
+    if job.submission_type == SubmissionType.PUZZLE:
+        if finalized.duplicate:
+            return "❌ Du hast das Puzzle bereits gelöst!"
+        if finalized.approved:
+            response = template_manager.render_puzzle_completed(
+                first_name=first_name,
+                points=points,
+                total_points=finalized.total_points
+            )
+            return response + f"\n\n🎯 Confidence: {confidence}%\n{reasoning}"
+        return (
+            f"❌ Puzzle konnte nicht verifiziert werden\n\n"
+            f"🤖 Confidence: {confidence}%\n\n"
+            f"{reasoning}\n\n"
+            f"💡 **Wichtig:**\n"
+            f"- Puzzle muss vollständig gelöst sein\n"
+            f"- Muss ein Filmplakat zu \"{job.film_title}\" zeigen\n"
+            f"- Film-Titel oder eindeutige Elemente müssen erkennbar sein"
+        )
+
+    if finalized.duplicate:
+        return template_manager.render_error(
+            'film_already_submitted',
+            f'Du hast "{job.film_title}" bereits erkannt!'
+        )
+    if finalized.approved:
+        reference_type = (ai_response or {}).get('reference_type', 'unknown')
+        type_emoji = REFERENCE_TYPE_EMOJIS.get(reference_type, '✨')
+        return template_manager.render_film_approved(
+            first_name=first_name,
+            film_title=job.film_title,
+            points=points,
+            total_points=finalized.total_points,
+            ai_reasoning=f"{type_emoji} Typ: {reference_type}\n🎯 Confidence: {confidence}%\n\n{reasoning}"
+        )
+    return template_manager.render_film_rejected(
+        first_name=first_name,
+        film_title=job.film_title,
+        reason=f"🤖 Confidence: {confidence}%\n\n{reasoning}\n\n"
+               f"💡 **Tipps für gültige Referenzen:**\n"
+               f"- 🥚 Easter Egg (spezifischer Gegenstand aus dem Film)\n"
+               f"- 🎬 Nachgestellte Szene\n"
+               f"- 📺 Foto vom laufenden Film\n"
+               f"- 🎭 Filmplakat\n"
+               f"- 👗 Kostüm/Verkleidung als Charakter\n"
+               f"- 🔧 Ikonische Requisite"
+    )
+
+
+def _verdict_from_evaluation(ai_evaluation: Optional[str], approved: bool) -> tuple:
+    """Rekonstruiert das KI-Ergebnis aus submissions.ai_evaluation (nach Neustart)."""
+    try:
+        ai_response = ast.literal_eval(ai_evaluation) if ai_evaluation else {}
+    except (ValueError, SyntaxError):
+        ai_response = {}
+    if not isinstance(ai_response, dict):
+        ai_response = {}
+    return approved, ai_response.get('confidence', 0), ai_response.get('reasoning', ''), ai_response
+
+
+class SubmissionPipeline:
+    """Begrenzte Queues und Worker pro Stufe."""
+
+    def __init__(self, workers: Dict[str, int], queue_size: int = 64):
+        """
+        Args:
+            workers: Worker pro Stufe (siehe parse_workers)
+            queue_size: Max. wartende Jobs pro Stufe (Backpressure)
+        """
+        self.workers = workers
+        self.queue_size = queue_size
+        self.bot = None
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._busy: Dict[str, int] = {stage: 0 for stage in STAGES}
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.resumed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def entry_stage(self) -> Optional[str]:
+        """Stufe, mit der record_submission neue Submissions anlegt (None = inline)."""
+        return STAGES[0] if self.running else None
+
+    async def start(self, bot):
+        """Startet die Worker und nimmt unfertige Submissions aus der DB wieder auf."""
+        if self.running:
+            return
+        self.bot = bot
+        # Vor dem ersten dispatch laden - sonst würde ein gerade eingereihter Job doppelt aufgenommen
+        try:
+            unfinished = self._load_unfinished()
+        except Exception as e:
+            logger.error(f"Unfertige Submissions konnten nicht geladen werden: {e}", exc_info=True)
+            unfinished = []
+        self._queues = {stage: asyncio.Queue(maxsize=self.queue_size) for stage in STAGES}
+        for stage in STAGES:
+            for number in range(self.workers[stage]):
+                self._tasks.append(asyncio.create_task(self._worker(stage), name=f"pipeline-{stage}-{number}"))
+        # Wiederaufnahme im Hintergrund - sie wartet ggf. selbst auf Platz in den Queues
+        self._tasks.append(asyncio.create_task(self._resume(unfinished), name="pipeline-resume"))
+        logger.info(
+            "Submission-Pipeline gestartet: "
+            + ", ".join(f"{stage} {count}" for stage, count in self.workers.items())
+            + f" Worker, max. {self.queue_size} pro Queue"
+        )
+
+    async def stop(self):
+        """Beendet die Worker; laufende Jobs setzen nach dem Neustart an ihrer Stufe fort."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if tasks:
+            pending = sum(queue.qsize() for queue in self._queues.values())
+            logger.info(f"Submission-Pipeline gestoppt ({pending} Jobs warten auf den Neustart)")
+
+    async def join(self):
+        """Wartet, bis alle eingereihten Jobs jede Stufe durchlaufen haben (Tests, Lasttest)."""
+        # Jobs wandern nur vorwärts - Stufe für Stufe leerlaufen lassen genügt
+        for stage in STAGES:
+            await self._queues[stage].join()
+
+    async def dispatch(self, bot, job: SubmissionJob):
+        """
+        Verarbeitet eine frisch angelegte Submission.
+
+        Läuft die Pipeline, bestätigt der Handler sofort und reiht den Job ein
+        (wartet nur, wenn die download-Queue voll ist). Sonst laufen die Stufen
+        inline im Handler.
+        """
+        job.background = self.running
+        if job.background or job.submission_type != SubmissionType.PARTY_PHOTO:
+            try:
+                message = await bot.send_message(chat_id=job.chat_id, text=acknowledgement_text(job))
+                job.status_message_id = message.message_id
+            except Exception as e:
+                # Ohne Bestätigung geht es trotzdem weiter - das Ergebnis kommt als neue Nachricht
+                logger.warning(f"Acknowledgement for submission {job.submission_id} failed: {e}")
+
+        if not job.background:
+            await self.process_inline(bot, job)
+            return
+
+        # Stufe, media_type und chat_id stehen seit record_submission in der DB;
+        # hier kommt nur die Bestätigung dazu (und die Stufe, falls die Pipeline erst danach startete)
+        set_pipeline_stage(job.submission_id, STAGES[0], status_message_id=job.status_message_id)
+        self.submitted += 1
+        await self._queues['download'].put(job)
+
+    async def process_inline(self, bot, job: SubmissionJob):
+        """Alle Stufen nacheinander im aufrufenden Handler."""
+        stage = 'download'
+        try:
+            for stage in STAGES:
+                await self._run_stage(stage, bot, job)
+        except Exception as e:
+            await self._fail(bot, job, stage, e)
+
+    def get_stats(self) -> dict:
+        """Queue-Längen, aktive Worker und Zähler (für /perf)."""
+        return {
+            'running': self.running,
+            'queued': {stage: queue.qsize() for stage, queue in self._queues.items()},
+            'busy': dict(self._busy),
+            'workers': dict(self.workers),
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'resumed': self.resumed,
+        }
+
+    async def _worker(self, stage: str):
+        queue = self._queues[stage]
+        next_stage = STAGES[STAGES.index(stage) + 1] if stage != STAGES[-1] else None
+        while True:
+            job = await queue.get()
+            self._busy[stage] += 1
+            timing = HandlerTiming()
+            token = current_timing.set(timing)
+            started = time.perf_counter()
+            failed = False
+            try:
+                await self._run_stage(stage, self.bot, job)
+            except Exception as e:
+                failed = True
+                await self._fail(self.bot, job, stage, e)
+            finally:
+                current_timing.reset(token)
+                metrics.observe(f"pipeline_{stage}", time.perf_counter() - started, timing.phases, failed)
+                self._busy[stage] -= 1
+                queue.task_done()
+
+            if failed:
+                continue
+            if next_stage:
+                # Backpressure: wartet, bis die nächste Stufe Platz hat
+                await self._queues[next_stage].put(job)
+            else:
+                self.completed += 1
+
+    async def _run_stage(self, stage: str, bot, job: SubmissionJob):
+        # Nur im Hintergrund wird die nächste Stufe für einen Neustart vermerkt
+        def next_stage(name: str) -> Optional[str]:
+            return name if job.background else None
+
+        if stage == 'download':
+            job.media_bytes = await download_media(bot, job.file_id)
+
+        elif stage == 'persist':
+            job.media_path, _ = await store_media(
+                job.submission_id, job.telegram_id, job.first_name, job.media_bytes, job.media_type,
+                category=CATEGORIES[job.submission_type],
+                film_title=job.film_title if job.submission_type == SubmissionType.FILM_REFERENCE else None,
+                # Inline gleich mit Thumbnail, im Hintergrund als eigene Stufe
+                create_thumbnail=not job.background,
+                pipeline_stage=next_stage('thumbnail')
+            )
+            job.media_bytes = None  # Bytes nicht länger als nötig im Speicher halten
+
+        elif stage == 'thumbnail':
+            if job.background:
+                await attach_thumbnail(job.submission_id, job.media_path, pipeline_stage='evaluate')
+
+        elif stage == 'evaluate':
+            if job.submission_type == SubmissionType.FILM_REFERENCE:
+                job.verdict = await self._evaluate_film(bot, job)
+            elif job.submission_type == SubmissionType.PUZZLE:
+                # Poster-URLs kommen aus der Prompt-Registry
+                job.verdict = await ai_evaluator.evaluate_puzzle_poster_async(
+                    photo_path=job.media_path,
+                    film_title=job.film_title,
+                    submission_id=job.submission_id
+                )
+            is_approved, _, _, ai_response = job.verdict or (True, 100, "", None)
+            job.finalized = finalize_submission(
+                job.submission_id, approved=is_approved, points=POINTS[job.submission_type](),
+                ai_response=ai_response, pipeline_stage=next_stage('notify')
+            )
+            if job.finalized is not None:
+                logger.info(
+                    f"Submission {job.submission_id} ({job.submission_type.value}) of user {job.telegram_id}: "
+                    f"{'APPROVED' if job.finalized.approved else 'REJECTED'}"
+                    + (" (duplicate)" if job.finalized.duplicate else "")
+                )
+
+        elif stage == 'notify':
+            await self._send(bot, job, result_text(job))
+            if job.background:
+                set_pipeline_stage(job.submission_id, None)
+
+    async def _evaluate_film(self, bot, job: SubmissionJob) -> tuple:
+        # Lokales Ranking gegen die Referenzbilder (ohne API-Kosten)
+        ranking = await asyncio.to_thread(reference_index.rank_films, job.media_path)
+        # Hinweis und niedrige Auflösung nur auf Wunsch - das Ranking kennt nur Farben
+        reference_match = (
+            config.REFERENCE_MATCH_SHORTCUT and reference_index.matches_film(ranking, job.film_title)
+        )
+        if ranking:
+            logger.info(f"Reference ranking for '{job.film_title}': {ranking}")
+        if reference_match and job.status_message_id:
+            await bot.edit_message_text(
+                chat_id=job.chat_id,
+                message_id=job.status_message_id,
+                text=acknowledgement_text(job) + "\n\n🔎 Erster Eindruck: Passt zu den Referenzbildern!"
+            )
+
+        # Easter Egg kommt aus der Prompt-Registry
+        return await ai_evaluator.evaluate_film_reference_async(
+            photo_path=job.media_path,
+            film_title=job.film_title,
+            # Eindeutiger Referenz-Treffer: niedrige Bildauflösung reicht
+            image_detail="low" if reference_match else "auto",
+            submission_id=job.submission_id
+        )
+
+    async def _send(self, bot, job: SubmissionJob, text: str):
+        """Ersetzt die Bestätigung bzw. schickt eine neue Nachricht."""
+        if job.status_message_id:
+            await bot.edit_message_text(chat_id=job.chat_id, message_id=job.status_message_id, text=text)
+        else:
+            await bot.send_message(chat_id=job.chat_id, text=text)
+
+    async def _fail(self, bot, job: SubmissionJob, stage: str, error: Exception):
+        self.failed += 1
+        logger.error(
+            f"Error processing {job.submission_type.value} submission {job.submission_id} ({stage}): {error}",
+            exc_info=True
+        )
+        abandon_submission(job.submission_id, error)
+        try:
+            await self._send(bot, job, ERROR_TEXTS[job.submission_type])
+        except Exception as e:
+            logger.error(f"Could not notify user {job.telegram_id} about failed submission: {e}")
+
+    def _load_unfinished(self) -> List[Tuple[str, SubmissionJob]]:
+        """Unfertige Submissions samt Wiedereinstiegs-Stufe (älteste zuerst)."""
+        jobs = []
+        with db.get_session() as session:
+            rows = session.query(Submission, User).join(User, Submission.user_id == User.id).filter(
+                Submission.pipeline_stage.isnot(None)
+            ).order_by(Submission.id).all()
+            for submission, user in rows:
+                film_title = submission.film_title
+                if submission.submission_type == SubmissionType.PUZZLE:
+                    team = get_team_by_id(session, user.team_id)
+                    film_title = team.film_title if team else None
+                job = SubmissionJob(
+                    submission_id=submission.id,
+                    submission_type=submission.submission_type,
+                    file_id=submission.photo_file_id,
+                    media_type=submission.media_type or 'photo',
+                    chat_id=submission.chat_id or user.telegram_id,
+                    telegram_id=user.telegram_id,
+                    first_name=user.first_name,
+                    film_title=film_title,
+                    status_message_id=submission.status_message_id,
+                    background=True,
+                    media_path=submission.photo_path
+                )
+                stage = submission.pipeline_stage
+                if stage == 'notify':
+                    approved = submission.status == SubmissionStatus.APPROVED
+                    job.finalized = FinalizedSubmission(approved=approved, total_points=user.total_points)
+                    job.verdict = _verdict_from_evaluation(submission.ai_evaluation, approved)
+                elif stage not in STAGES or stage == 'persist' or not job.media_path:
+                    # Heruntergeladene Bytes gibt es nach dem Neustart nicht mehr
+                    stage = 'download'
+                jobs.append((stage, job))
+        return jobs
+
+    async def _resume(self, jobs: List[Tuple[str, SubmissionJob]]):
+        if jobs:
+            logger.info(f"Submission-Pipeline nimmt {len(jobs)} unfertige Submissions wieder auf")
+        for stage, job in jobs:
+            self.resumed += 1
+            await self._queues[stage].put(job)
+
+
+# Globale Instanz (wird beim ersten Zugriff erzeugt)
+submission_pipeline = container.register('submission_pipeline', lambda: SubmissionPipeline(
+    workers=parse_workers(config.PIPELINE_WORKERS),
+    queue_size=config.PIPELINE_QUEUE_SIZE
+))
@@ -3,23 +3,40 @@ Template-Manager für Bot-Nachrichten.
 Verwendet Jinja2 für dynamische Texte.
 """
 
+from collections import OrderedDict
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, Template
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, Template
 from typing import Dict, Any
 import logging
 
+from config import config
+from utils.service_container import container
+
 logger = logging.getLogger('bot.services.template')
 
+# Standardgröße des Render-Caches (Anzahl gecachter Texte)
+DEFAULT_RENDER_CACHE_SIZE = 512
+
 
 class TemplateManager:
     """Verwaltet alle Bot-Nachrichten-Templates."""
     
-    def __init__(self, templates_path: str = "./templates"):
+    def __init__(
+        self,
+        templates_path: str = "./templates",
+        auto_reload: bool = True,
+        bytecode_cache_path: str = None,
+        render_cache_size: int = DEFAULT_RENDER_CACHE_SIZE
+    ):
         """
         Initialisiert den Template-Manager.
         
         Args:
             templates_path: Pfad zum Templates-Verzeichnis
+            auto_reload: Templates bei Änderung neu laden (Development).
+                In Production aus - Templates werden einmal kompiliert.
+            bytecode_cache_path: Verzeichnis für kompilierte Templates (optional)
+            render_cache_size: Max. Anzahl gecachter Renders (0 = aus)
         """
         # Wenn relativer Pfad, dann relativ zum Script-Verzeichnis
         if not Path(templates_path).is_absolute():
@@ -31,12 +48,72 @@ class TemplateManager:
         
         self.templates_path.mkdir(parents=True, exist_ok=True)
         
+        # Kompilierte Templates auf Platte - spart das Parsen beim Start
+        bytecode_cache = None
+        if bytecode_cache_path:
+            Path(bytecode_cache_path).mkdir(parents=True, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(str(bytecode_cache_path))
+        
         # Jinja2 Environment erstellen
+        self.auto_reload = auto_reload
         self.env = Environment(
             loader=FileSystemLoader(str(self.templates_path)),
             trim_blocks=True,
-            lstrip_blocks=True
+            lstrip_blocks=True,
+            auto_reload=auto_reload,
+            bytecode_cache=bytecode_cache
         )
+        
+        # Ohne auto_reload: Template-Objekte direkt halten (kein get_template pro Request)
+        self._templates: Dict[str, Template] = {}
+        
+        # Memoisierte Renders: (Template, Kontext) -> (Template-Objekt, Text)
+        self.render_cache_size = render_cache_size
+        self._render_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.render_cache_hits = 0
+    
+    def _get_template(self, template_name: str) -> Template:
+        """Holt ein kompiliertes Template (ohne Stat-Check wenn auto_reload aus)."""
+        if self.auto_reload:
+            return self.env.get_template(template_name)
+        
+        template = self._templates.get(template_name)
+        if template is None:
+            template = self.env.get_template(template_name)
+            self._templates[template_name] = template
+        return template
+    
+    def precompile(self) -> int:
+        """
+        Kompiliert alle Templates vorab (z.B. beim Bot-Start).
+        
+        Returns:
+            int: Anzahl kompilierter Templates
+        """
+        count = 0
+        for template_name in self.env.list_templates(extensions=['txt']):
+            try:
+                self._get_template(template_name)
+                count += 1
+            except Exception as e:
+                logger.error(f"Template '{template_name}' konnte nicht kompiliert werden: {e}")
+        logger.info(f"{count} Templates vorkompiliert")
+        return count
+    
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Größe der Template-Caches und Render-Treffer."""
+        return {
+            'templates': len(self._templates),
+            'renders': len(self._render_cache),
+            'render_hits': self.render_cache_hits
+        }
+    
+    def clear_cache(self):
+        """Verwirft kompilierte Templates und gecachte Renders."""
+        self._templates.clear()
+        self._render_cache.clear()
+        if self.env.cache is not None:
+            self.env.cache.clear()
     
     def render(self, template_name: str, **context: Any) -> str:
         """
@@ -50,8 +127,7 @@ class TemplateManager:
             str: Gerenderter Text
         """
         try:
-            template = self.env.get_template(template_name)
-            logger.debug(f"Template '{template_name}' erfolgreich geladen")
+            template = self._get_template(template_name)
             return template.render(**context)
         except Exception as e:
             error_msg = f"❌ Fehler beim Laden des Templates '{template_name}': {e}"
@@ -59,13 +135,49 @@ class TemplateManager:
             logger.error(f"Exception: {e}", exc_info=True)
             return error_msg
     
+    def render_cached(self, template_name: str, **context: Any) -> str:
+        """
+        Rendert ein Template und merkt sich das Ergebnis.
+        
+        Nur für kontextfreie Templates oder Templates mit wenigen
+        Varianten (z.B. nur Vorname) gedacht. Der Cache ist LRU-begrenzt und
+        wird ungültig, sobald Jinja das Template neu lädt.
+        """
+        if self.render_cache_size <= 0:
+            return self.render(template_name, **context)
+        
+        try:
+            key = (template_name, tuple(sorted(context.items())))
+            hash(key)
+        except TypeError:
+            # Nicht-hashbarer Kontext (Listen etc.) - normal rendern
+            return self.render(template_name, **context)
+        
+        try:
+            template = self._get_template(template_name)
+        except Exception:
+            return self.render(template_name, **context)
+        
+        cached = self._render_cache.get(key)
+        if cached is not None and cached[0] is template:
+            self._render_cache.move_to_end(key)
+            self.render_cache_hits += 1
+            return cached[1]
+        
+        text = self.render(template_name, **context)
+        self._render_cache[key] = (template, text)
+        self._render_cache.move_to_end(key)
+        while len(self._render_cache) > self.render_cache_size:
+            self._render_cache.popitem(last=False)
+        return text
+    
     def render_welcome(self, first_name: str) -> str:
         """Rendert Begrüßungstext."""
-        return self.render('welcome.txt', first_name=first_name)
+        return self.render_cached('welcome.txt', first_name=first_name)
     
     def render_help(self, first_name: str) -> str:
         """Rendert Hilfetext."""
-        return self.render('help.txt', first_name=first_name)
+        return self.render_cached('help.txt', first_name=first_name)
     
     def render_points(
         self,
@@ -219,5 +331,9 @@ Die Rebellion ist stolz auf dich! 💪"""
         return messages.get(error_type, messages['unknown'])
 
 
-# Globale Template-Manager-Instanz
-template_manager = TemplateManager()
+# Globale Template-Manager-Instanz (wird beim ersten Zugriff erzeugt)
+template_manager = container.register('template_manager', lambda: TemplateManager(
+    auto_reload=config.TEMPLATE_AUTO_RELOAD,
+    bytecode_cache_path=config.TEMPLATE_CACHE_PATH,
+    render_cache_size=config.TEMPLATE_RENDER_CACHE_SIZE
+))
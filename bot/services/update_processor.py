@@ -0,0 +1,92 @@
+"""
+Update-Processor für parallele Verarbeitung von Telegram-Updates.
+Updates verschiedener Chats laufen parallel, Updates desselben Chats
+bleiben in einer seriellen "Lane" in Eingangsreihenfolge.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Hashable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger('bot.services.update_processor')
+
+# Max. Anzahl angenommener, noch nicht fertiger Updates (wartend + laufend)
+DEFAULT_MAX_PENDING_UPDATES = 4096
+
+
+class _Lane:
+    """Serielle Warteschlange eines Chats."""
+    __slots__ = ('lock', 'users')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Verarbeitet Updates parallel mit globalem Limit und Reihenfolge pro Chat.
+
+    Die Semaphore der Basisklasse begrenzt nur die Anzahl angenommener Updates.
+    Das eigentliche Parallelitäts-Limit wird erst NACH dem Betreten der Lane
+    geholt - wartende Updates eines einzelnen Chats blockieren so keine Slots
+    für andere User.
+    """
+
+    def __init__(self, max_concurrent_updates: int, max_pending_updates: int = DEFAULT_MAX_PENDING_UPDATES):
+        """
+        Args:
+            max_concurrent_updates: Max. Anzahl gleichzeitig laufender Handler
+            max_pending_updates: Max. Anzahl angenommener Updates insgesamt
+        """
+        super().__init__(max(max_pending_updates, max_concurrent_updates))
+        if max_concurrent_updates < 1:
+            raise ValueError("max_concurrent_updates muss positiv sein")
+        self.concurrency_limit = max_concurrent_updates
+        self._running = asyncio.BoundedSemaphore(max_concurrent_updates)
+        self._lanes: Dict[Hashable, _Lane] = {}
+
+    @staticmethod
+    def lane_key(update: object) -> Optional[Hashable]:
+        """Lane eines Updates: Chat-ID, sonst User-ID (None = keine Lane)."""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        if update.effective_user is not None:
+            return ('user', update.effective_user.id)
+        return None
+
+    @property
+    def active_lanes(self) -> int:
+        """Anzahl Chats mit laufenden oder wartenden Updates."""
+        return len(self._lanes)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self.lane_key(update)
+        if key is None:
+            async with self._running:
+                await coroutine
+            return
+
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane()
+        lane.users += 1
+        try:
+            async with lane.lock:
+                async with self._running:
+                    await coroutine
+        finally:
+            lane.users -= 1
+            if lane.users == 0:
+                del self._lanes[key]
+
+    async def initialize(self) -> None:
+        logger.info(f"Update-Processor: max. {self.concurrency_limit} parallele Updates, seriell pro Chat")
+
+    async def shutdown(self) -> None:
+        pass
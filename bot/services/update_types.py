@@ -0,0 +1,102 @@
+"""
+Ermittelt die benötigten Update-Typen (allowed_updates) aus den registrierten
+Handlern. Telegram liefert dann nur noch Updates, auf die der Bot reagiert -
+im Polling- wie im Webhook-Modus.
+"""
+
+import logging
+from typing import Iterable, List, Set
+
+from telegram import Update
+from telegram.ext import (
+    BaseHandler,
+    CallbackQueryHandler,
+    ChatJoinRequestHandler,
+    ChatMemberHandler,
+    ChosenInlineResultHandler,
+    CommandHandler,
+    ConversationHandler,
+    InlineQueryHandler,
+    MessageHandler,
+    MessageReactionHandler,
+    PollAnswerHandler,
+    PollHandler,
+    PreCheckoutQueryHandler,
+    PrefixHandler,
+    ShippingQueryHandler,
+)
+
+logger = logging.getLogger('bot.services.update_types')
+
+# Update-Typen pro Handler-Klasse. Nachrichten-Handler fordern bewusst nur
+# neue Nachrichten an - bearbeitete Nachrichten (edited_message) oder
+# Kanal-Posts würden sonst z.B. als neue Foto-Einreichung gewertet.
+HANDLER_UPDATE_TYPES = (
+    (CommandHandler, (Update.MESSAGE,)),
+    (PrefixHandler, (Update.MESSAGE,)),
+    (MessageHandler, (Update.MESSAGE,)),
+    (CallbackQueryHandler, (Update.CALLBACK_QUERY,)),
+    (InlineQueryHandler, (Update.INLINE_QUERY,)),
+    (ChosenInlineResultHandler, (Update.CHOSEN_INLINE_RESULT,)),
+    (ShippingQueryHandler, (Update.SHIPPING_QUERY,)),
+    (PreCheckoutQueryHandler, (Update.PRE_CHECKOUT_QUERY,)),
+    (PollHandler, (Update.POLL,)),
+    (PollAnswerHandler, (Update.POLL_ANSWER,)),
+    (ChatJoinRequestHandler, (Update.CHAT_JOIN_REQUEST,)),
+    (MessageReactionHandler, (Update.MESSAGE_REACTION, Update.MESSAGE_REACTION_COUNT)),
+)
+
+
+def _chat_member_types(handler: ChatMemberHandler) -> Set[str]:
+    """chat_member und/oder my_chat_member je nach Handler-Einstellung."""
+    if handler.chat_member_types == ChatMemberHandler.MY_CHAT_MEMBER:
+        return {Update.MY_CHAT_MEMBER}
+    if handler.chat_member_types == ChatMemberHandler.CHAT_MEMBER:
+        return {Update.CHAT_MEMBER}
+    return {Update.MY_CHAT_MEMBER, Update.CHAT_MEMBER}
+
+
+def update_types_for_handler(handler: BaseHandler) -> Set[str]:
+    """
+    Update-Typen, die ein einzelner Handler verarbeiten kann.
+
+    Unbekannte Handler (z.B. TypeHandler) können jedes Update betreffen -
+    dann werden alle Typen angefordert.
+    """
+    if isinstance(handler, ConversationHandler):
+        nested = list(handler.entry_points) + list(handler.fallbacks)
+        for state_handlers in handler.states.values():
+            nested.extend(state_handlers)
+        return collect_update_types(nested)
+
+    if isinstance(handler, ChatMemberHandler):
+        return _chat_member_types(handler)
+
+    for handler_class, update_types in HANDLER_UPDATE_TYPES:
+        if isinstance(handler, handler_class):
+            return set(update_types)
+
+    logger.warning(f"Unbekannter Handler-Typ {type(handler).__name__} - fordere alle Update-Typen an")
+    return set(Update.ALL_TYPES)
+
+
+def collect_update_types(handlers: Iterable[BaseHandler]) -> Set[str]:
+    """Vereinigung der Update-Typen mehrerer Handler."""
+    result: Set[str] = set()
+    for handler in handlers:
+        result |= update_types_for_handler(handler)
+    return result
+
+
+def derive_allowed_updates(application) -> List[str]:
+    """
+    allowed_updates für getUpdates/setWebhook aus den Handlern einer Application.
+
+    Returns:
+        List[str]: Sortierte Liste der Update-Typen (Reihenfolge wie Update.ALL_TYPES)
+    """
+    handlers = [handler for group in application.handlers.values() for handler in group]
+    update_types = collect_update_types(handlers)
+    allowed = [update_type for update_type in Update.ALL_TYPES if update_type in update_types]
+    logger.info(f"allowed_updates: {', '.join(allowed) or '-'}")
+    return allowed
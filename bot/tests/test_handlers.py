@@ -1,6 +1,7 @@
 """
 Unit Tests für handlers
 """
+import asyncio
 import pytest
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from telegram import Update, User as TelegramUser, Message, Chat, PhotoSize, ReplyKeyboardMarkup
@@ -57,6 +58,7 @@ def mock_update():
     update.message.reply_text = AsyncMock()
     update.message.chat = Mock(spec=Chat)
     update.message.chat.id = 123456789
+    update.effective_chat = update.message.chat
     
     return update
 
@@ -228,8 +230,8 @@ class TestPhotoHandler:
     @pytest.mark.asyncio
     async def test_party_photo_no_caption(self, mock_photo_update, mock_context, mock_db_session):
         """Test: Party Photo ohne Caption (1 Punkt)"""
-        with patch('handlers.photo.db') as mock_db, \
-             patch('handlers.photo.photo_manager') as mock_photo_mgr:
+        with patch('services.submission_phases.db') as mock_db, \
+             patch('services.submission_phases.photo_manager') as mock_photo_mgr:
             
             mock_db.get_session.return_value.__enter__.return_value = mock_db_session
             mock_photo_mgr.save_photo.return_value = ("/path/photo.jpg", "/path/thumb.jpg")
@@ -250,12 +252,50 @@ class TestPhotoHandler:
             assert "1" in message_text
             assert "Punkt" in message_text or "Partyfoto" in message_text
     
+    @pytest.mark.asyncio
+    async def test_throttled_upload_skips_download(self, mock_photo_update, mock_context):
+        """Test: Gedrosselter Upload wird vor Download und DB abgewiesen"""
+        from services.rate_limiter import RateLimitDecision
+        mock_photo_update.message.caption = "Film: Matrix"
+        
+        with patch('handlers.photo.rate_limiter') as mock_limiter, \
+             patch('services.submission_phases.db') as mock_db:
+            mock_limiter.check.return_value = RateLimitDecision(False, retry_after=12.3, notify=True)
+            
+            mock_bot = AsyncMock()
+            mock_context.bot = mock_bot
+            
+            await photo_handler(mock_photo_update, mock_context)
+            
+            assert not mock_bot.get_file.called
+            assert not mock_db.get_session.called
+            assert "12 Sekunden" in mock_bot.send_message.call_args[1]['text']
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('caption', ["Puzzle", "Film: Matrix", "Film:"])
+    async def test_refused_upload_costs_no_token(self, mock_photo_update, mock_context, caption):
+        """Test: Video als Puzzle/Film-Referenz und fehlender Titel werden vor dem Rate-Limiter abgewiesen"""
+        if caption != "Film:":
+            mock_photo_update.message.photo = []
+            mock_photo_update.message.video = Mock(file_id="video_file_123")
+        mock_photo_update.message.caption = caption
+        
+        with patch('handlers.photo.rate_limiter') as mock_limiter, \
+             patch('services.submission_phases.db') as mock_db:
+            mock_context.bot = AsyncMock()
+            
+            await photo_handler(mock_photo_update, mock_context)
+            
+            assert not mock_limiter.check.called
+            assert not mock_db.get_session.called
+            assert mock_context.bot.send_message.call_args[1]['text'].startswith("❌")
+    
     @pytest.mark.asyncio
     async def test_photo_with_command_caption_ignored(self, mock_photo_update, mock_context, mock_db_session):
         """Test: Foto mit /film Caption wird ignoriert (von film_command behandelt)"""
         mock_photo_update.message.caption = "/film Matrix"
         
-        with patch('handlers.photo.db') as mock_db:
+        with patch('services.submission_phases.db') as mock_db:
             mock_db.get_session.return_value.__enter__.return_value = mock_db_session
             
             mock_bot = AsyncMock()
@@ -354,7 +394,7 @@ class TestPuzzleCommand:
     @pytest.mark.asyncio
     async def test_puzzle_without_team(self, mock_puzzle_update, mock_context, mock_db_session):
         """Test: /puzzle ohne Team-Mitgliedschaft"""
-        with patch('handlers.puzzle.db') as mock_db:
+        with patch('services.submission_phases.db') as mock_db:
             mock_db.get_session.return_value.__enter__.return_value = mock_db_session
             
             mock_bot = AsyncMock()
@@ -368,3 +408,391 @@ class TestPuzzleCommand:
             
             # Fehlermeldung prüfen
             assert "Team" in message_text
+
+
+class TestSubmissionPhases:
+    """Tests für die Phasen record → download → evaluate → finalize"""
+    
+    @pytest.fixture
+    def tracked_db(self, mock_db_session):
+        """DB-Mock, der mitzählt, wie viele Sessions gerade offen sind"""
+        from contextlib import contextmanager
+        
+        class TrackedDB:
+            open_sessions = 0
+            
+            @contextmanager
+            def get_session(self):
+                TrackedDB.open_sessions += 1
+                try:
+                    yield mock_db_session
+                    mock_db_session.commit()
+                finally:
+                    TrackedDB.open_sessions -= 1
+        
+        with patch('services.submission_phases.db', TrackedDB()):
+            yield TrackedDB
+    
+    @pytest.fixture
+    def film_update(self, mock_update):
+        """Foto mit Caption 'Film: Matrix'"""
+        photo = Mock(spec=PhotoSize)
+        photo.file_id = "film_photo_1"
+        mock_update.message.photo = [photo]
+        mock_update.message.video = None
+        mock_update.message.caption = "Film: Matrix"
+        return mock_update
+    
+    @staticmethod
+    def _bot(tracked_db, download=None):
+        """Bot-Mock, dessen Download prüft, dass keine Session offen ist"""
+        async def download_as_bytearray():
+            assert tracked_db.open_sessions == 0
+            if download:
+                raise download
+            return bytearray(b"fake_image_data")
+        
+        bot = AsyncMock()
+        bot.get_file.return_value.download_as_bytearray = download_as_bytearray
+        bot.send_message.return_value.message_id = 42
+        return bot
+    
+    @pytest.mark.asyncio
+    async def test_network_awaits_hold_no_session(self, film_update, mock_context, mock_db_session, tracked_db):
+        """Test: Download und KI-Bewertung laufen ohne offene Session, Finalize vergibt Punkte"""
+        from database.models import Submission, SubmissionStatus, EasterEgg
+        
+        async def evaluate(**kwargs):
+            assert tracked_db.open_sessions == 0
+            return True, 90, "Eindeutig", {'reference_type': 'scene'}
+        
+        mock_context.bot = self._bot(tracked_db)
+        with patch('services.submission_phases.photo_manager') as mock_photo_mgr, \
+             patch('services.submission_pipeline.ai_evaluator') as mock_ai, \
+             patch('services.submission_pipeline.reference_index') as mock_reference, \
+             patch('handlers.photo.rate_limiter'), \
+             patch('handlers.photo.config.is_admin', return_value=True):
+            mock_photo_mgr.save_photo.return_value = ("/path/photo.jpg", "/path/thumb.jpg")
+            mock_reference.rank_films.return_value = []
+            mock_reference.matches_film.return_value = False
+            mock_ai.evaluate_film_reference_async = evaluate
+            
+            await photo_handler(film_update, mock_context)
+        
+        submission = mock_db_session.query(Submission).one()
+        assert submission.status == SubmissionStatus.APPROVED
+        assert submission.photo_path == "/path/photo.jpg"
+        assert mock_db_session.query(EasterEgg).count() == 1
+        assert str(submission.points_awarded) in mock_context.bot.edit_message_text.call_args[1]['text']
+    
+    @pytest.mark.asyncio
+    async def test_failed_download_rejects_submission(self, film_update, mock_context, mock_db_session, tracked_db):
+        """Test: Fehlgeschlagener Download hinterlässt eine REJECTED-Submission ohne Punkte"""
+        from database.models import Submission, SubmissionStatus, User
+        
+        mock_context.bot = self._bot(tracked_db, download=TimeoutError("Telegram timeout"))
+        with patch('handlers.photo.rate_limiter'), \
+             patch('handlers.photo.config.is_admin', return_value=True):
+            await photo_handler(film_update, mock_context)
+        
+        submission = mock_db_session.query(Submission).one()
+        assert submission.status == SubmissionStatus.REJECTED
+        assert "Telegram timeout" in submission.ai_evaluation
+        assert mock_db_session.query(User).one().total_points == 0
+        assert "Fehler" in mock_context.bot.edit_message_text.call_args[1]['text']
+    
+    def test_parallel_duplicate_awarded_once(self, mock_update, mock_db_session, tracked_db):
+        """Test: Zwei parallel erfasste Fotos zum selben Film bringen nur einmal Punkte"""
+        from config import config
+        from database.models import SubmissionType
+        from services.submission_phases import record_submission, finalize_submission
+        
+        first, second = (
+            record_submission(mock_update.effective_user, SubmissionType.FILM_REFERENCE, file_id, film_title="Matrix")
+            for file_id in ("a", "b")
+        )
+        assert first.refusal is None and second.refusal is None
+        
+        won = finalize_submission(first.submission_id, approved=True, points=config.POINTS_FILM_REFERENCE)
+        lost = finalize_submission(second.submission_id, approved=True, points=config.POINTS_FILM_REFERENCE)
+        
+        assert won.approved and not won.duplicate
+        assert lost.duplicate and not lost.approved
+        assert lost.total_points == won.total_points == config.POINTS_FILM_REFERENCE
+        assert tracked_db.open_sessions == 0
+    
+    def test_finalize_after_reset_returns_none(self, mock_update, mock_db_session, tracked_db):
+        """Test: Zwischenzeitlich gelöschte Submission (/reset) wird nicht finalisiert"""
+        from database.models import Submission, SubmissionType
+        from services.submission_phases import record_submission, finalize_submission, RESET_TEXT
+        from services.submission_pipeline import SubmissionJob, result_text
+        
+        recorded = record_submission(mock_update.effective_user, SubmissionType.PARTY_PHOTO, "a")
+        mock_db_session.query(Submission).delete()
+        mock_db_session.commit()
+        
+        assert finalize_submission(recorded.submission_id, approved=True, points=1) is None
+        job = SubmissionJob(
+            submission_id=recorded.submission_id, submission_type=SubmissionType.PARTY_PHOTO,
+            file_id="a", media_type='photo', chat_id=1, telegram_id=1, first_name="Neo"
+        )
+        assert result_text(job) == RESET_TEXT
+    
+    def test_finalize_is_one_unit_in_sqlite_autocommit(self, mock_update, tmp_path):
+        """Test: Fehler beim Easter Egg lässt weder Freigabe noch Punkte zurück (Bot-Engine)"""
+        from config import config
+        from database.db import Database
+        from database.models import Submission, SubmissionStatus, SubmissionType, User, PointEvent
+        from services.submission_phases import record_submission, finalize_submission
+        
+        database = Database(f"sqlite:///{tmp_path / 'bot.db'}")
+        database.create_tables()
+        with patch('services.submission_phases.db', database):
+            recorded = record_submission(
+                mock_update.effective_user, SubmissionType.FILM_REFERENCE, "a", film_title="Matrix"
+            )
+            with patch('services.submission_phases.add_easter_egg', side_effect=RuntimeError("crash")):
+                with pytest.raises(RuntimeError):
+                    finalize_submission(recorded.submission_id, approved=True, points=config.POINTS_FILM_REFERENCE)
+            
+            with database.get_session() as session:
+                assert session.get(Submission, recorded.submission_id).status == SubmissionStatus.PENDING
+                assert session.query(User).one().total_points == 0
+                assert session.query(PointEvent).count() == 0
+            
+            finalized = finalize_submission(recorded.submission_id, approved=True, points=config.POINTS_FILM_REFERENCE)
+            assert finalized.approved and finalized.total_points == config.POINTS_FILM_REFERENCE
+        database.engine.dispose()
+
+
+class TestSubmissionPipeline:
+    """Tests für die Hintergrund-Pipeline (download → persist → thumbnail → evaluate → notify)"""
+    
+    @pytest.fixture
+    def pipeline_db(self, mock_db_session):
+        """Gemeinsame In-Memory-Session für Handler und Worker"""
+        with patch('services.submission_phases.db') as phases_db, \
+             patch('services.submission_pipeline.db') as pipeline_db:
+            for mock_db in (phases_db, pipeline_db):
+                mock_db.get_session.return_value.__enter__.return_value = mock_db_session
+            yield mock_db_session
+    
+    @pytest.fixture
+    def services(self):
+        """Foto-Speicher, Referenz-Index und KI als Mocks"""
+        with patch('services.submission_phases.photo_manager') as mock_photo_mgr, \
+             patch('services.submission_pipeline.reference_index') as mock_reference, \
+             patch('services.submission_pipeline.ai_evaluator') as mock_ai:
+            mock_photo_mgr.save_photo.return_value = ("/path/photo.jpg", "/path/thumb.jpg")
+            mock_photo_mgr.create_thumbnail.return_value = "/path/thumb.jpg"
+            mock_reference.rank_films.return_value = []
+            mock_reference.matches_film.return_value = False
+            yield mock_ai
+    
+    @staticmethod
+    def _bot():
+        bot = AsyncMock()
+        bot.get_file.return_value.download_as_bytearray.return_value = bytearray(b"fake_image_data")
+        bot.send_message.return_value.message_id = 42
+        return bot
+    
+    @staticmethod
+    def _job(recorded, user, film_title="Matrix"):
+        from database.models import SubmissionType
+        from services.submission_pipeline import SubmissionJob
+        return SubmissionJob(
+            submission_id=recorded.submission_id, submission_type=SubmissionType.FILM_REFERENCE,
+            file_id="film_photo", media_type='photo', chat_id=user.id,
+            telegram_id=user.id, first_name=user.first_name, film_title=film_title
+        )
+    
+    def test_parse_workers(self):
+        """Test: Worker-Angabe pro Stufe, fehlende Stufen mit einem Worker"""
+        from services.submission_pipeline import parse_workers
+        
+        assert parse_workers("download=8, evaluate=4") == {
+            'download': 8, 'persist': 1, 'thumbnail': 1, 'evaluate': 4, 'notify': 1
+        }
+        with pytest.raises(ValueError):
+            parse_workers("upload=2")
+        with pytest.raises(ValueError):
+            parse_workers("notify=0")
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('shortcut,detail,hint', [(False, "auto", False), (True, "low", True)])
+    async def test_reference_match_shortcut(self, mock_update, services, shortcut, detail, hint):
+        """Test: Referenz-Treffer ändert Auflösung und Hinweis nur mit REFERENCE_MATCH_SHORTCUT"""
+        from types import SimpleNamespace
+        from services.submission_pipeline import SubmissionPipeline, parse_workers, reference_index
+        
+        reference_index.rank_films.return_value = [("Matrix", 93)]
+        reference_index.matches_film.return_value = True
+        services.evaluate_film_reference_async = AsyncMock(return_value=(True, 90, "Ok", {}))
+        bot = self._bot()
+        job = self._job(SimpleNamespace(submission_id=1), mock_update.effective_user)
+        job.status_message_id = 42
+        
+        with patch('services.submission_pipeline.config.REFERENCE_MATCH_SHORTCUT', shortcut):
+            await SubmissionPipeline(parse_workers(""))._evaluate_film(bot, job)
+        
+        assert services.evaluate_film_reference_async.call_args[1]['image_detail'] == detail
+        assert bot.edit_message_text.called == hint
+    
+    @pytest.mark.asyncio
+    async def test_handler_acknowledges_before_evaluation(self, mock_update, pipeline_db, services):
+        """Test: dispatch kehrt nach der Bestätigung zurück, das Ergebnis kommt aus der notify-Stufe"""
+        from database.models import Submission, SubmissionStatus, SubmissionType
+        from services.submission_phases import record_submission
+        from services.submission_pipeline import SubmissionPipeline, parse_workers
+        
+        release = asyncio.Event()
+        
+        async def evaluate(**kwargs):
+            await release.wait()
+            return True, 95, "Eindeutig", {'reference_type': 'poster'}
+        
+        services.evaluate_film_reference_async = evaluate
+        bot = self._bot()
+        pipeline = SubmissionPipeline(parse_workers(""), queue_size=8)
+        await pipeline.start(bot)
+        try:
+            user = mock_update.effective_user
+            recorded = record_submission(user, SubmissionType.FILM_REFERENCE, "film_photo", film_title="Matrix")
+            await asyncio.wait_for(pipeline.dispatch(bot, self._job(recorded, user)), 0.5)
+            
+            assert "Analysiere" in bot.send_message.call_args[1]['text']
+            await asyncio.sleep(0.05)
+            submission = pipeline_db.get(Submission, recorded.submission_id)
+            assert submission.status == SubmissionStatus.PENDING
+            assert submission.pipeline_stage == 'evaluate'
+            assert submission.status_message_id == 42
+            
+            release.set()
+            await asyncio.wait_for(pipeline.join(), 2)
+            pipeline_db.expire_all()
+            assert submission.status == SubmissionStatus.APPROVED
+            assert submission.pipeline_stage is None
+            assert submission.thumbnail_path == "/path/thumb.jpg"
+            assert bot.edit_message_text.call_args[1]['message_id'] == 42
+            assert "Matrix" in bot.edit_message_text.call_args[1]['text']
+            assert pipeline.get_stats()['completed'] == 1
+        finally:
+            await pipeline.stop()
+    
+    @pytest.mark.asyncio
+    async def test_unfinished_submissions_resume_after_restart(self, mock_update, pipeline_db, services):
+        """Test: Submissions mit gesetzter Stufe laufen nach dem Start an dieser Stufe weiter"""
+        from database.models import Submission, SubmissionStatus, SubmissionType
+        from services.submission_phases import record_submission, set_pipeline_stage
+        from services.submission_pipeline import SubmissionPipeline, parse_workers
+        
+        services.evaluate_film_reference_async = AsyncMock(return_value=(False, 30, "Unklar", {}))
+        user = mock_update.effective_user
+        evaluating = record_submission(user, SubmissionType.FILM_REFERENCE, "a", film_title="Matrix")
+        set_pipeline_stage(evaluating.submission_id, 'evaluate', photo_path="/path/a.jpg", chat_id=user.id)
+        downloading = record_submission(user, SubmissionType.PARTY_PHOTO, "b")
+        set_pipeline_stage(downloading.submission_id, 'download', media_type='photo', chat_id=user.id)
+        
+        bot = self._bot()
+        pipeline = SubmissionPipeline(parse_workers(""), queue_size=8)
+        await pipeline.start(bot)
+        try:
+            await asyncio.sleep(0.05)
+            await asyncio.wait_for(pipeline.join(), 2)
+        finally:
+            await pipeline.stop()
+        
+        pipeline_db.expire_all()
+        rejected = pipeline_db.get(Submission, evaluating.submission_id)
+        party = pipeline_db.get(Submission, downloading.submission_id)
+        assert rejected.status == SubmissionStatus.REJECTED and rejected.pipeline_stage is None
+        assert party.status == SubmissionStatus.APPROVED and party.pipeline_stage is None
+        assert bot.get_file.call_count == 1  # nur der Job ohne gespeichertes Foto lädt neu
+        assert pipeline.get_stats()['resumed'] == 2
+    
+    @pytest.mark.asyncio
+    async def test_crash_before_acknowledgement_resumes(self, mock_update, mock_context, pipeline_db, services):
+        """Test: Absturz zwischen Anlegen und Bestätigung - die Submission läuft nach dem Neustart weiter"""
+        from database.models import Submission, SubmissionStatus
+        from handlers.photo import handle_party_photo
+        from services.submission_pipeline import SubmissionPipeline, parse_workers
+        
+        acknowledging = asyncio.Event()
+        
+        async def hang(**kwargs):
+            acknowledging.set()
+            await asyncio.Event().wait()
+        
+        bot = self._bot()
+        bot.send_message.side_effect = hang
+        mock_context.bot = bot
+        mock_update.effective_chat = Mock(id=555)
+        pipeline = SubmissionPipeline(parse_workers(""), queue_size=8)
+        with patch('handlers.photo.submission_pipeline', pipeline):
+            await pipeline.start(bot)
+            handler = asyncio.create_task(
+                handle_party_photo(mock_update, mock_context, Mock(file_id="party"), 'photo')
+            )
+            await asyncio.wait_for(acknowledging.wait(), 1)
+            handler.cancel()  # Prozess endet, bevor der Job eingereiht ist
+            await asyncio.gather(handler, return_exceptions=True)
+            await pipeline.stop()
+        
+        submission = pipeline_db.query(Submission).one()
+        assert submission.status == SubmissionStatus.PENDING
+        assert submission.pipeline_stage == 'download'
+        assert submission.media_type == 'photo' and submission.chat_id == 555
+        
+        restarted = self._bot()
+        pipeline = SubmissionPipeline(parse_workers(""), queue_size=8)
+        await pipeline.start(restarted)
+        try:
+            await asyncio.sleep(0.05)
+            await asyncio.wait_for(pipeline.join(), 2)
+        finally:
+            await pipeline.stop()
+        
+        pipeline_db.expire_all()
+        assert submission.status == SubmissionStatus.APPROVED and submission.pipeline_stage is None
+        assert restarted.send_message.call_args[1]['chat_id'] == 555
+        assert pipeline.get_stats()['resumed'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_full_queue_applies_backpressure(self, mock_update, pipeline_db, services):
+        """Test: Volle download-Queue lässt dispatch warten statt unbegrenzt zu puffern"""
+        from database.models import SubmissionType
+        from services.submission_phases import record_submission
+        from services.submission_pipeline import SubmissionPipeline, parse_workers
+        
+        release = asyncio.Event()
+        
+        async def slow_download():
+            await release.wait()
+            return bytearray(b"fake_image_data")
+        
+        bot = self._bot()
+        bot.get_file.return_value.download_as_bytearray = slow_download
+        pipeline = SubmissionPipeline(parse_workers("download=1"), queue_size=1)
+        await pipeline.start(bot)
+        try:
+            user = mock_update.effective_user
+            jobs = [
+                self._job(record_submission(user, SubmissionType.PARTY_PHOTO, f"p{n}"), user)
+                for n in range(3)
+            ]
+            for job in jobs:
+                job.submission_type = SubmissionType.PARTY_PHOTO
+            
+            await pipeline.dispatch(bot, jobs[0])  # Worker hängt im Download
+            await asyncio.sleep(0.01)
+            await pipeline.dispatch(bot, jobs[1])  # füllt die Queue
+            blocked = asyncio.create_task(pipeline.dispatch(bot, jobs[2]))
+            await asyncio.sleep(0.05)
+            assert not blocked.done()
+            
+            release.set()
+            await asyncio.wait_for(blocked, 1)
+            await asyncio.wait_for(pipeline.join(), 2)
+            assert pipeline.get_stats()['completed'] == 3
+        finally:
+            await pipeline.stop()
@@ -1,15 +1,40 @@
 """
 Unit Tests für Services (photo_manager, template_manager, yaml_loader)
 """
+import logging
+import os
+import queue
 import pytest
 from pathlib import Path
 from unittest.mock import Mock, patch, mock_open
 from PIL import Image
+import asyncio
 import io
+import json
 
 from services.photo_manager import PhotoManager
 from services.template_manager import TemplateManager
-from utils.yaml_loader import UniverseLoader
+from services.reference_index import ReferenceIndex
+from services.prompt_registry import PromptRegistry, REGISTRY_VERSION
+from services.ai_evaluator import AIEvaluator
+from services.logger import BotLogger, DroppingQueueHandler
+from services.ai_event_log import (
+    SizeTimeRotatingFileHandler, compact_event_files, summarize, EVENT_LOGGER_NAME
+)
+from services.metrics import (
+    LatencyHistogram, MetricsRegistry, HandlerTiming, current_timing, instrument, instrument_engine, timed
+)
+from services.http_server import HTTPServer, Response, StreamResponse
+from services.update_processor import PerChatUpdateProcessor
+from services.update_types import derive_allowed_updates, collect_update_types
+from services.rate_limiter import RateLimiter, parse_limit
+from services.leaderboard_stream import LeaderboardBroadcaster, diff_ranking
+from services.db_snapshot import SnapshotManager, sqlite_path
+from services.memory_profiler import MemoryProfiler, rss_bytes
+from database.models import SubmissionType
+from utils.yaml_loader import UniverseLoader, normalize_title
+from utils.title_index import TitleIndex
+from utils.service_container import ServiceContainer
 
 
 class TestPhotoManager:
@@ -155,6 +180,58 @@ class TestTemplateManager:
         assert "https://puzzle.com" in result
 
 
+class TestTemplateCache:
+    """Tests für kompilierte Templates und memoisierte Renders"""
+    
+    @pytest.fixture
+    def templates_dir(self, tmp_path):
+        """Templates-Verzeichnis mit Welcome-Template"""
+        templates_dir = tmp_path / "templates"
+        templates_dir.mkdir()
+        (templates_dir / "welcome.txt").write_text("Willkommen {{ first_name }}!")
+        return templates_dir
+    
+    def test_render_cached_memoizes(self, templates_dir):
+        """Test: Gleicher Kontext → gecachter Text"""
+        manager = TemplateManager(templates_path=templates_dir, auto_reload=False)
+        
+        assert manager.render_welcome("Max") == "Willkommen Max!"
+        assert manager.render_welcome("Max") == "Willkommen Max!"
+        assert manager.render_welcome("Eva") == "Willkommen Eva!"
+        assert manager.render_cache_hits == 1
+    
+    def test_render_cache_is_bounded(self, templates_dir):
+        """Test: Render-Cache wird LRU-begrenzt"""
+        manager = TemplateManager(templates_path=templates_dir, render_cache_size=2)
+        
+        for name in ("A", "B", "C"):
+            manager.render_welcome(name)
+        
+        assert len(manager._render_cache) == 2
+    
+    def test_auto_reload_invalidates_memo(self, templates_dir):
+        """Test: Mit auto_reload wird ein geändertes Template neu gerendert"""
+        manager = TemplateManager(templates_path=templates_dir, auto_reload=True)
+        manager.render_welcome("Max")
+        
+        template_file = templates_dir / "welcome.txt"
+        template_file.write_text("Hallo {{ first_name }}!")
+        stat = template_file.stat()
+        os.utime(template_file, (stat.st_atime, stat.st_mtime + 10))
+        
+        assert manager.render_welcome("Max") == "Hallo Max!"
+    
+    def test_bytecode_cache_written(self, templates_dir, tmp_path):
+        """Test: precompile() legt kompilierte Templates im Bytecode-Cache ab"""
+        cache_dir = tmp_path / "bytecode"
+        manager = TemplateManager(
+            templates_path=templates_dir, auto_reload=False, bytecode_cache_path=cache_dir
+        )
+        
+        assert manager.precompile() == 1
+        assert any(cache_dir.iterdir())
+
+
 class TestUniverseLoader:
     """Tests für UniverseLoader (YAML)"""
     
@@ -224,6 +301,80 @@ Universen:
         assert "Terminator" in films
 
 
+class TestUniverseSnapshot:
+    """Tests für indizierte Snapshots und Hot-Reload des UniverseLoaders"""
+    
+    @pytest.fixture
+    def loader(self, tmp_path):
+        """UniverseLoader mit einem Team"""
+        yaml_file = tmp_path / "universen.yaml"
+        yaml_file.write_text(UNIVERSE_YAML.format(description="Pille"), encoding="utf-8")
+        return UniverseLoader(yaml_path=yaml_file)
+    
+    def test_indexed_lookups(self, loader):
+        """Test: Lookups per Titel, team_id und Charakter-ID"""
+        assert loader.get_team('480514')['film_title'] == "Matrix"
+        assert loader.get_team(480514)['character_2'] == "Neo"
+        assert loader.get_team_by_character_id('233579')['team_id'] == '480514'
+        assert loader.get_universe("  matrix ")['title'] == "Matrix"
+        assert loader.get_team('999999') is None
+    
+    def test_snapshot_is_immutable(self, loader):
+        """Test: Snapshot-Daten können nicht verändert werden"""
+        team = loader.get_teams()[0]
+        
+        with pytest.raises(TypeError):
+            team['film_title'] = "Terminator"
+        assert isinstance(team['posters'], tuple)
+    
+    def test_check_for_changes_swaps_snapshot(self, loader):
+        """Test: Geänderte Datei → neuer Snapshot, alter bleibt unverändert"""
+        old_snapshot = loader.snapshot
+        assert loader.check_for_changes() is False
+        
+        loader.yaml_path.write_text(
+            UNIVERSE_YAML.format(description="Pille") + "  - title: Gattaca\n",
+            encoding="utf-8"
+        )
+        
+        assert loader.check_for_changes() is True
+        assert loader.get_universe("Gattaca") is not None
+        assert old_snapshot.by_title.get("gattaca") is None
+    
+    def test_broken_yaml_keeps_snapshot(self, loader):
+        """Test: Fehlerhafte YAML lässt den alten Snapshot aktiv"""
+        reloads = []
+        loader.add_reload_listener(lambda: reloads.append(True))
+        
+        loader.yaml_path.write_text("universes: [unclosed", encoding="utf-8")
+        loader.check_for_changes()
+        
+        assert loader.get_team('480514') is not None
+        assert reloads == []
+    
+    def test_failed_load_is_retried(self, loader, monkeypatch):
+        """Test: Fehlgeschlagenes Laden wird beim nächsten Check wiederholt (Datei unverändert)"""
+        import utils.yaml_loader as yaml_loader
+        
+        loader.yaml_path.write_text(
+            UNIVERSE_YAML.format(description="Pille") + "  - title: Gattaca\n",
+            encoding="utf-8"
+        )
+        safe_load = yaml_loader.yaml.safe_load
+        
+        def half_written(stream):
+            monkeypatch.setattr(yaml_loader.yaml, 'safe_load', safe_load)
+            raise yaml_loader.yaml.YAMLError("unexpected end of stream")
+        
+        monkeypatch.setattr(yaml_loader.yaml, 'safe_load', half_written)
+        assert loader.check_for_changes() is False
+        assert loader.get_universe("Gattaca") is None
+        
+        assert loader.check_for_changes() is True
+        assert loader.get_universe("Gattaca") is not None
+        assert loader.check_for_changes() is False
+
+
 class TestIntegration:
     """Integration Tests für komplette Workflows"""
     
@@ -238,3 +389,1084 @@ class TestIntegration:
         # 
         # Wird hier nur als Beispiel beschrieben, da es komplexe Mocks erfordert
         pass
+
+
+class TestReferenceIndex:
+    """Tests für ReferenceIndex (Referenzbild-Embeddings)"""
+    
+    @pytest.fixture
+    def reference_images(self, tmp_path):
+        """Lokale Referenzbilder für zwei Filme"""
+        red = tmp_path / "red.jpg"
+        blue = tmp_path / "blue.jpg"
+        Image.new('RGB', (120, 80), color=(220, 20, 20)).save(red)
+        Image.new('RGB', (120, 80), color=(20, 20, 220)).save(blue)
+        return red, blue
+    
+    @pytest.fixture
+    def teams(self, reference_images):
+        """Team-Daten im Format von UniverseLoader.get_teams()"""
+        red, blue = reference_images
+        return [
+            {'film_title': 'Matrix', 'easter_egg': {'example_image': str(red)}, 'posters': [str(red)]},
+            {'film_title': 'Terminator', 'easter_egg': {'example_image': None}, 'posters': [str(blue)]},
+        ]
+    
+    def test_collect_sources_deduplicates(self, teams):
+        """Test: Gleiche Quelle wird pro Film nur einmal indexiert"""
+        sources = ReferenceIndex.collect_sources(teams)
+        
+        assert [film for film, _ in sources] == ['Matrix', 'Terminator']
+    
+    def test_build_and_rank(self, teams, tmp_path):
+        """Test: Index bauen und ähnlichsten Film finden"""
+        index = ReferenceIndex(tmp_path / "index")
+        assert index.build(teams) == 2
+        
+        photo = tmp_path / "photo.jpg"
+        Image.new('RGB', (300, 200), color=(200, 30, 30)).save(photo)
+        
+        ranking = index.rank_films(str(photo))
+        
+        assert ranking[0][0] == 'Matrix'
+        assert ranking[0][1] > ranking[1][1]
+        assert index.matches_film(ranking, 'matrix')
+        assert not index.matches_film(ranking, 'Terminator')
+    
+    def test_rank_without_index(self, tmp_path):
+        """Test: Ohne gebauten Index gibt es kein Ranking"""
+        index = ReferenceIndex(tmp_path / "missing")
+        
+        assert index.is_available() is False
+        assert index.rank_films(str(tmp_path / "photo.jpg")) == []
+
+
+UNIVERSE_YAML = """
+universes:
+  - title: Matrix
+    team_id: '480514'
+    characters:
+      - name: Trinity
+        id: '246935'
+      - name: Neo
+        id: '233579'
+    easter_egg:
+      name: Blaue und Rote Pille
+      description: {description}
+    posters:
+      - https://example.com/matrix.jpg
+"""
+
+
+class TestPromptRegistry:
+    """Tests für PromptRegistry (vorkompilierte Prompts)"""
+    
+    @pytest.fixture
+    def loader(self, tmp_path):
+        """UniverseLoader mit einem Film"""
+        yaml_file = tmp_path / "universen.yaml"
+        yaml_file.write_text(UNIVERSE_YAML.format(description="Rote und blaue Pille"), encoding="utf-8")
+        return UniverseLoader(yaml_path=yaml_file)
+    
+    def test_film_prompt_precompiled(self, loader):
+        """Test: Prompt enthält Easter Egg und ist über normalisierten Titel erreichbar"""
+        registry = PromptRegistry(loader)
+        
+        prompt = registry.film_prompt("  MATRIX ")
+        
+        assert "Rote und blaue Pille" in prompt.text
+        assert prompt is registry.film_prompt("Matrix")
+        assert registry.version == REGISTRY_VERSION
+    
+    def test_puzzle_prompt_uses_yaml_posters(self, loader):
+        """Test: Puzzle-Prompt enthält Poster-URLs aus der YAML"""
+        registry = PromptRegistry(loader)
+        
+        assert "https://example.com/matrix.jpg" in registry.puzzle_prompt("Matrix").text
+    
+    def test_unknown_film_rendered_on_demand(self, loader):
+        """Test: Unbekannte Filme bekommen einen Prompt ohne Easter Egg"""
+        registry = PromptRegistry(loader)
+        
+        prompt = registry.film_prompt("Gattaca")
+        
+        assert '"Gattaca"' in prompt.text
+        assert "BESONDERS WICHTIG" not in prompt.text
+    
+    def test_reload_invalidates_fingerprint(self, loader):
+        """Test: YAML-Reload kompiliert neu und benachrichtigt Listener"""
+        registry = PromptRegistry(loader)
+        invalidations = []
+        registry.add_invalidation_listener(lambda: invalidations.append(True))
+        old_fingerprint = registry.film_prompt("Matrix").fingerprint
+        
+        loader.yaml_path.write_text(UNIVERSE_YAML.format(description="Nur die rote Pille"), encoding="utf-8")
+        loader.load()
+        
+        new_prompt = registry.film_prompt("Matrix")
+        assert "Nur die rote Pille" in new_prompt.text
+        assert new_prompt.fingerprint != old_fingerprint
+        assert invalidations == [True]
+
+
+class TestVerdictCache:
+    """Tests für den Verdict-Cache im AIEvaluator"""
+    
+    def test_cache_key_depends_on_prompt_and_image(self):
+        """Test: Anderer Prompt oder anderes Bild → anderer Key"""
+        key = AIEvaluator._verdict_key('film', 'abc', b'image')
+        
+        assert key == AIEvaluator._verdict_key('film', 'abc', b'image')
+        assert key != AIEvaluator._verdict_key('film', 'def', b'image')
+        assert key != AIEvaluator._verdict_key('film', 'abc', b'other')
+    
+    def test_cache_is_bounded_lru(self):
+        """Test: Älteste Einträge werden verdrängt"""
+        evaluator = AIEvaluator()
+        evaluator.verdict_cache_size = 2
+        verdict = (True, 90, "ok", {})
+        
+        evaluator._store_verdict(('a',), verdict)
+        evaluator._store_verdict(('b',), verdict)
+        evaluator._get_cached_verdict(('a',))
+        evaluator._store_verdict(('c',), verdict)
+        
+        assert evaluator._get_cached_verdict(('b',)) is None
+        assert evaluator._get_cached_verdict(('a',)) == verdict
+        assert evaluator.get_usage_stats()['verdict_cache_hits'] == 2
+        
+        evaluator.clear_verdict_cache()
+        assert evaluator.get_usage_stats()['verdict_cache_size'] == 0
+
+
+TITLES_YAML = """
+universes:
+  - title: Matrix
+    aliases:
+      - Die Matrix
+  - title: The Fifth Element
+    aliases:
+      - Das fünfte Element
+  - title: Blade Runner
+"""
+
+
+class TestTitleIndex:
+    """Tests für TitleIndex (Fuzzy-Auflösung von Film-Titeln)"""
+    
+    @pytest.fixture
+    def loader(self, tmp_path):
+        """UniverseLoader mit Titeln und Aliasen"""
+        yaml_file = tmp_path / "universen.yaml"
+        yaml_file.write_text(TITLES_YAML, encoding="utf-8")
+        return UniverseLoader(yaml_path=yaml_file)
+    
+    def test_normalize_title(self):
+        """Test: Groß-/Kleinschreibung, Akzente, ß und Satzzeichen werden normalisiert"""
+        assert normalize_title("  Das FÜNFTE   Element! ") == "das funfte element"
+        assert normalize_title("Straße") == "strasse"
+    
+    def test_exact_and_article(self, loader):
+        """Test: Exakter Titel und Titel ohne/mit Artikel"""
+        index = TitleIndex(loader)
+        
+        assert index.match("matrix").method == 'exact'
+        assert index.resolve("Fifth Element") == "The Fifth Element"
+        assert index.resolve("The Matrix") == "Matrix"
+    
+    def test_alias(self, loader):
+        """Test: Aliase aus der YAML werden aufgelöst"""
+        index = TitleIndex(loader)
+        
+        result = index.match("das funfte element")
+        
+        assert result.film_title == "The Fifth Element"
+        assert result.method == 'alias'
+    
+    def test_typo(self, loader):
+        """Test: Tippfehler werden per Levenshtein aufgelöst"""
+        index = TitleIndex(loader)
+        
+        result = index.match("Blade Runer")
+        
+        assert result.film_title == "Blade Runner"
+        assert result.method == 'fuzzy'
+        assert index.resolve("Matrx") == "Matrix"
+    
+    def test_unknown_title(self, loader):
+        """Test: Unähnliche Titel liefern None"""
+        index = TitleIndex(loader)
+        
+        assert index.resolve("Gattaca") is None
+        assert index.resolve("   ") is None
+    
+    def test_rebuild_on_reload(self, loader):
+        """Test: YAML-Reload baut den Index neu"""
+        index = TitleIndex(loader)
+        
+        loader.yaml_path.write_text(TITLES_YAML + "  - title: Gattaca\n", encoding="utf-8")
+        loader.load()
+        
+        assert index.resolve("gattacca") == "Gattaca"
+
+
+class TestQueueLogging:
+    """Tests für das Queue-basierte Logging"""
+    
+    @pytest.fixture
+    def bot_logger(self, tmp_path):
+        """BotLogger in temp directory (wird danach wieder abgebaut)"""
+        root_level = logging.getLogger().level
+        bot_logger = BotLogger(logs_base_path=tmp_path, log_level="INFO")
+        yield bot_logger
+        bot_logger.stop()
+        logging.getLogger().setLevel(root_level)
+    
+    def test_routing_to_files(self, bot_logger, tmp_path):
+        """Test: Writer-Thread verteilt Einträge auf die Log-Dateien wie bisher"""
+        logging.getLogger('bot.services.ai').info("KI-Bewertung")
+        logging.getLogger('bot.handlers.test').error("Kaputt")
+        logging.getLogger(EVENT_LOGGER_NAME).info('{"kind": "film"}')
+        bot_logger.stop()
+        
+        assert '"kind"' in (tmp_path / "ai_events.jsonl").read_text(encoding="utf-8")
+        assert '"kind"' not in (tmp_path / "bot.log").read_text(encoding="utf-8")
+        
+        assert "KI-Bewertung" in (tmp_path / "ai_evaluations.log").read_text(encoding="utf-8")
+        assert "Kaputt" not in (tmp_path / "ai_evaluations.log").read_text(encoding="utf-8")
+        assert "Kaputt" in (tmp_path / "errors.log").read_text(encoding="utf-8")
+        assert "KI-Bewertung" in (tmp_path / "bot.log").read_text(encoding="utf-8")
+    
+    def test_full_queue_drops_and_counts(self):
+        """Test: Volle Queue blockiert nicht, sondern zählt verworfene Einträge"""
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        record = logging.LogRecord('bot.test', logging.INFO, __file__, 1, "msg", None, None)
+        
+        handler.handle(record)
+        handler.handle(record)
+        handler.handle(record)
+        
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == {'INFO': 2}
+        assert handler.dropped_total == 2
+
+
+class TestAIEventLog:
+    """Tests für den strukturierten KI-Event-Log"""
+    
+    def _write_events(self, handler, events):
+        for event in events:
+            record = logging.LogRecord(EVENT_LOGGER_NAME, logging.INFO, __file__, 1, json.dumps(event), None, None)
+            handler.emit(record)
+    
+    def test_size_rotation_keeps_timestamped_files(self, tmp_path):
+        """Test: Rotation nach Größe erzeugt Dateien mit Zeitstempel"""
+        handler = SizeTimeRotatingFileHandler(str(tmp_path / "ai_events.jsonl"), max_bytes=200, max_age_seconds=0)
+        self._write_events(handler, [{'kind': 'film', 'confidence': i, 'film_title': 'Matrix' * 3} for i in range(10)])
+        handler.close()
+        
+        assert len(list(tmp_path.glob("ai_events.*.jsonl"))) >= 2
+        assert (tmp_path / "ai_events.jsonl").exists()
+    
+    def test_compaction_to_sqlite(self, tmp_path):
+        """Test: Rotierte Dateien landen in SQLite und werden gelöscht"""
+        (tmp_path / "ai_events.20251031-200000.jsonl").write_text(
+            json.dumps({'ts': 't1', 'kind': 'film', 'film_title': 'Matrix', 'status': 'ok',
+                        'approved': True, 'confidence': 90, 'cache': 'miss', 'total_tokens': 800}) + "\n" +
+            json.dumps({'ts': 't2', 'kind': 'film', 'film_title': 'Matrix', 'status': 'cached',
+                        'approved': True, 'confidence': 90, 'cache': 'hit'}) + "\n" +
+            "kaputt\n",
+            encoding="utf-8"
+        )
+        (tmp_path / "ai_events.jsonl").write_text("{}\n", encoding="utf-8")
+        db_path = tmp_path / "analytics" / "ai_events.sqlite"
+        
+        assert compact_event_files(tmp_path, db_path) == (1, 2)
+        assert not list(tmp_path.glob("ai_events.*.jsonl"))
+        assert (tmp_path / "ai_events.jsonl").exists()
+        
+        summary = summarize(db_path)
+        assert summary[0]['film_title'] == 'Matrix'
+        assert summary[0]['events'] == 2
+        assert summary[0]['cache_hits'] == 1
+        assert summary[0]['total_tokens'] == 800
+    
+    @pytest.mark.asyncio
+    async def test_evaluator_emits_event(self, caplog):
+        """Test: Jede Bewertung schreibt ein JSON-Event inkl. Submission-ID"""
+        evaluator = AIEvaluator()
+        evaluator.async_client = None
+        
+        with caplog.at_level(logging.INFO, logger=EVENT_LOGGER_NAME):
+            await evaluator.evaluate_film_reference_async(
+                photo_path="x.jpg", film_title="Matrix", image_detail="low", submission_id=42
+            )
+        
+        events = [json.loads(r.getMessage()) for r in caplog.records if r.name == EVENT_LOGGER_NAME]
+        assert events[0]['submission_id'] == 42
+        assert events[0]['film_title'] == "Matrix"
+        assert events[0]['status'] == "disabled"
+        assert events[0]['image_detail'] == "low"
+        assert 'latency_ms' in events[0]
+
+
+class TestMetrics:
+    """Tests für Handler-Metriken und Prometheus-Endpoint"""
+    
+    def test_histogram_percentiles(self):
+        """Test: Perzentile mit begrenztem relativem Fehler"""
+        histogram = LatencyHistogram()
+        for ms in range(1, 1001):
+            histogram.record(ms / 1000)
+        
+        assert histogram.count == 1000
+        assert 0.5 <= histogram.percentile(50) <= 0.5 * 1.13
+        assert 0.99 <= histogram.percentile(99) <= 1.0
+        assert histogram.cumulative((0.1,)) == [pytest.approx(100, abs=13)]
+    
+    @pytest.mark.asyncio
+    async def test_instrument_records_phases(self):
+        """Test: Handler-Zeit wird nach Phasen aufgeschlüsselt (auch in Threads)"""
+        registry = MetricsRegistry()
+        
+        async def fake_handler(update, context):
+            with timed('telegram'):
+                await asyncio.sleep(0.01)
+            
+            def write_file():
+                with timed('disk'):
+                    pass
+            await asyncio.to_thread(write_file)
+        
+        await instrument(fake_handler, registry=registry)(None, None)
+        
+        row = registry.snapshot()[0]
+        assert row['handler'] == 'fake_handler'
+        assert row['count'] == 1
+        assert row['phases']['telegram'] >= 10
+        assert 'disk' in row['phases']
+    
+    @pytest.mark.asyncio
+    async def test_instrument_counts_errors(self):
+        """Test: Exceptions werden gezählt und weitergereicht"""
+        registry = MetricsRegistry()
+        
+        async def broken_handler(update, context):
+            raise ValueError("kaputt")
+        
+        with pytest.raises(ValueError):
+            await instrument(broken_handler, registry=registry)(None, None)
+        
+        assert registry.snapshot()[0]['errors'] == 1
+        assert 'bot_handler_errors_total{handler="broken_handler"} 1' in registry.render_prometheus()
+    
+    def test_instrument_engine_survives_failed_statements(self):
+        """Test: Fehlgeschlagene Statements hinterlassen keine Startzeiten an der geteilten Verbindung"""
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.exc import OperationalError
+        from sqlalchemy.pool import StaticPool
+        
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        instrument_engine(engine)
+        timing = HandlerTiming()
+        token = current_timing.set(timing)
+        try:
+            with engine.connect() as connection:
+                for _ in range(3):
+                    with pytest.raises(OperationalError):
+                        connection.execute(text("SELECT * FROM missing_table"))
+                connection.execute(text("SELECT 1"))
+                assert not any(key.startswith('metrics') for key in connection.info)
+        finally:
+            current_timing.reset(token)
+            engine.dispose()
+        
+        assert timing.phases['db'] > 0
+    
+    def test_instrument_engine_is_idempotent(self):
+        """Test: Mehrfaches Instrumentieren zählt jedes Statement nur einmal"""
+        from sqlalchemy import create_engine, text
+        
+        engine = create_engine("sqlite://")
+        instrument_engine(engine)
+        instrument_engine(engine)
+        timing = Mock()
+        token = current_timing.set(timing)
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        finally:
+            current_timing.reset(token)
+            engine.dispose()
+        
+        assert timing.add.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_http_endpoint(self):
+        """Test: Lokaler HTTP-Server liefert Prometheus-Text"""
+        registry = MetricsRegistry()
+        registry.observe('points_command', 0.02, {'db': 0.005})
+        server = HTTPServer('127.0.0.1', 0)
+        
+        async def prometheus_metrics(request):
+            return Response(registry.render_prometheus())
+        
+        server.route('/metrics', prometheus_metrics)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            raw = (await reader.read()).decode('utf-8')
+            writer.close()
+        finally:
+            await server.stop()
+        
+        assert raw.startswith("HTTP/1.1 200 OK")
+        assert 'bot_handler_duration_seconds_count{handler="points_command",phase="db"} 1' in raw
+
+
+class TestPerChatUpdateProcessor:
+    """Tests für parallele Update-Verarbeitung mit Lanes pro Chat"""
+    
+    @staticmethod
+    def _update(chat_id):
+        """Minimales Telegram-Update für einen Chat"""
+        from telegram import Chat, Message, Update
+        from datetime import datetime
+        message = Message(message_id=1, date=datetime.now(), chat=Chat(id=chat_id, type='private'))
+        return Update(update_id=chat_id, message=message)
+    
+    @pytest.mark.asyncio
+    async def test_independent_users_run_in_parallel(self):
+        """Test: Ein langsamer Handler (KI) blockiert andere User nicht"""
+        processor = PerChatUpdateProcessor(max_concurrent_updates=8)
+        finished = []
+        
+        async def slow_film_submission():
+            await asyncio.sleep(0.3)
+            finished.append('film')
+        
+        async def points_command():
+            await asyncio.sleep(0.01)
+            finished.append('punkte')
+        
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.gather(
+            processor.process_update(self._update(1), slow_film_submission()),
+            processor.process_update(self._update(2), points_command()),
+        )
+        
+        assert finished == ['punkte', 'film']
+        assert loop.time() - started < 0.45
+    
+    @pytest.mark.asyncio
+    async def test_same_chat_stays_ordered(self):
+        """Test: Updates eines Chats laufen nacheinander in Eingangsreihenfolge"""
+        processor = PerChatUpdateProcessor(max_concurrent_updates=8)
+        events = []
+        
+        async def handler(name, delay):
+            events.append(f"start {name}")
+            await asyncio.sleep(delay)
+            events.append(f"end {name}")
+        
+        await asyncio.gather(
+            processor.process_update(self._update(1), handler('a', 0.05)),
+            processor.process_update(self._update(1), handler('b', 0.0)),
+        )
+        
+        assert events == ['start a', 'end a', 'start b', 'end b']
+        assert processor.active_lanes == 0
+    
+    @pytest.mark.asyncio
+    async def test_global_concurrency_cap(self):
+        """Test: Nie mehr als max_concurrent_updates Handler gleichzeitig"""
+        processor = PerChatUpdateProcessor(max_concurrent_updates=2)
+        running = 0
+        peak = 0
+        
+        async def handler():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+        
+        await asyncio.gather(*[
+            processor.process_update(self._update(chat_id), handler()) for chat_id in range(6)
+        ])
+        
+        assert peak == 2
+
+
+class TestUpdateTypes:
+    """Tests für allowed_updates aus registrierten Handlern"""
+    
+    @staticmethod
+    async def _noop(update, context):
+        pass
+    
+    def test_bot_handlers_need_only_messages(self):
+        """Test: Command- und Message-Handler des Bots → nur 'message'"""
+        from telegram.ext import Application, CommandHandler, MessageHandler, filters
+        application = Application.builder().token('123:TEST').build()
+        application.add_handler(CommandHandler("punkte", self._noop))
+        application.add_handler(MessageHandler(filters.PHOTO, self._noop))
+        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self._noop))
+        
+        assert derive_allowed_updates(application) == ['message']
+    
+    def test_nested_and_special_handlers(self):
+        """Test: ConversationHandler wird aufgelöst, ChatMember je nach Typ"""
+        from telegram.ext import (
+            CallbackQueryHandler, ChatMemberHandler, CommandHandler, ConversationHandler, PollAnswerHandler
+        )
+        conversation = ConversationHandler(
+            entry_points=[CallbackQueryHandler(self._noop)],
+            states={1: [PollAnswerHandler(self._noop)]},
+            fallbacks=[CommandHandler("abbrechen", self._noop)],
+            per_chat=False
+        )
+        
+        types = collect_update_types([conversation, ChatMemberHandler(self._noop)])
+        
+        assert types == {'message', 'callback_query', 'poll_answer', 'my_chat_member'}
+    
+    def test_unknown_handler_requests_everything(self):
+        """Test: TypeHandler kann jedes Update betreffen → alle Typen"""
+        from telegram import Update
+        from telegram.ext import TypeHandler
+        
+        assert collect_update_types([TypeHandler(Update, self._noop)]) == set(Update.ALL_TYPES)
+    
+    @pytest.mark.asyncio
+    async def test_http_server_post_body(self):
+        """Test: HTTP-Server liest POST-Bodys nur für freigegebene Routen"""
+        server = HTTPServer('127.0.0.1', 0)
+        
+        async def webhook(request):
+            return Response(json.loads(request.body)['text'])
+        
+        server.route('/webhook', webhook, methods=('POST',))
+        await server.start()
+        
+        async def send(raw: bytes) -> str:
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+            writer.write(raw)
+            await writer.drain()
+            response = (await reader.read()).decode('utf-8')
+            writer.close()
+            return response
+        
+        try:
+            body = json.dumps({'text': 'Matrix'}).encode('utf-8')
+            posted = await send(
+                b"POST /webhook HTTP/1.1\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+            )
+            fetched = await send(b"GET /webhook HTTP/1.1\r\n\r\n")
+        finally:
+            await server.stop()
+        
+        assert posted.startswith("HTTP/1.1 200 OK") and posted.endswith("Matrix")
+        assert fetched.startswith("HTTP/1.1 405")
+
+
+class TestServiceContainer:
+    """Tests für lazy initialisierte Dienste"""
+    
+    def test_service_created_on_first_access(self):
+        """Test: Registrieren erzeugt nichts, erster Zugriff genau einmal"""
+        container = ServiceContainer()
+        created = []
+        
+        class Counter:
+            def __init__(self):
+                created.append(self)
+                self.value = 1
+        
+        counter = container.register('counter', Counter)
+        assert created == [] and container.status() == {'counter': None}
+        
+        counter.value += 1
+        assert counter.value == 2
+        assert len(created) == 1 and container.is_initialized('counter')
+    
+    def test_warm_up_in_parallel_threads(self):
+        """Test: warm_up erzeugt Dienste parallel, Abhängigkeiten nur einmal"""
+        import threading
+        import time
+        container = ServiceContainer()
+        created = []
+        lock = threading.Lock()
+        
+        def slow_service(name, dependency=None):
+            def factory():
+                if dependency is not None:
+                    container.get(dependency)
+                time.sleep(0.2)
+                with lock:
+                    created.append(name)
+                return Mock(name=name)
+            return factory
+        
+        container.register('db', slow_service('db'))
+        container.register('ai', slow_service('ai'))
+        container.register('prompts', slow_service('prompts', dependency='db'))
+        
+        started = time.perf_counter()
+        result = container.warm_up()
+        
+        assert sorted(created) == ['ai', 'db', 'prompts']
+        assert set(result) == {'ai', 'db', 'prompts'}
+        assert time.perf_counter() - started < 0.55
+    
+    def test_failed_factory_is_retried(self):
+        """Test: Fehler beim Erzeugen → warm_up loggt, nächster Zugriff versucht erneut"""
+        container = ServiceContainer()
+        attempts = []
+        
+        def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OSError("Datenträger nicht bereit")
+            return Mock(ready=True)
+        
+        service = container.register('flaky', flaky)
+        
+        assert container.warm_up() == {}
+        assert service.ready is True
+        assert len(attempts) == 2
+
+
+@pytest.mark.slow
+class TestStartupBudget:
+    """Import- und Start-Zeit des Bots (in frischen Subprozessen gemessen)"""
+    
+    # Großzügig gewählt (gemessen: ~0,8 s Import, ~1,3 s bis zum ersten getUpdates)
+    IMPORT_BUDGET_SECONDS = 3.0
+    FIRST_POLL_BUDGET_SECONDS = 6.0
+    
+    @staticmethod
+    def _env(tmp_path, **extra):
+        """Isolierte Umgebung: eigene Daten/DB, keine Hintergrund-Dienste"""
+        env = dict(
+            os.environ,
+            TELEGRAM_BOT_TOKEN='123456:TEST',
+            DATA_BASE_PATH=str(tmp_path),
+            DATABASE_URL=f"sqlite:///{tmp_path / 'bot.db'}",
+            METRICS_PORT='0',
+            UNIVERSE_RELOAD_INTERVAL='0',
+            OPENAI_API_KEY='',
+            BOT_MODE='polling',
+        )
+        env.update(extra)
+        return env
+    
+    def test_import_creates_no_services(self, tmp_path, bot_root_dir):
+        """Test: import main + handlers erzeugt keine Dienste und bleibt im Budget"""
+        import subprocess
+        import sys
+        script = (
+            "import json, time\n"
+            "started = time.perf_counter()\n"
+            "import main, handlers\n"
+            "elapsed = time.perf_counter() - started\n"
+            "from utils.service_container import container\n"
+            "print(json.dumps({'seconds': elapsed, 'status': container.status()}))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=bot_root_dir, env=self._env(tmp_path),
+            capture_output=True, text=True, timeout=60
+        )
+        assert result.returncode == 0, result.stderr
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        
+        assert all(ms is None for ms in report['status'].values()), report['status']
+        assert report['seconds'] < self.IMPORT_BUDGET_SECONDS
+    
+    @pytest.mark.asyncio
+    async def test_main_reaches_first_poll_within_budget(self, tmp_path, bot_root_dir):
+        """Test: python main.py bis zum ersten getUpdates (Fake-Telegram-Endpoint)"""
+        import sys
+        import time
+        from tools.benchmark_update_latency import FakeTelegramAPI, TOKEN
+        api = FakeTelegramAPI(rtt_seconds=0)
+        await api.server.start()
+        
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, 'main.py', cwd=bot_root_dir,
+            env=self._env(tmp_path, TELEGRAM_BOT_TOKEN=TOKEN, TELEGRAM_BASE_URL=api.base_url),
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+        )
+        try:
+            await asyncio.wait_for(api.first_poll.wait(), timeout=30)
+            elapsed = time.perf_counter() - started
+        finally:
+            if process.returncode is None:
+                process.terminate()
+                try:
+                    await asyncio.wait_for(process.wait(), timeout=10)
+                except asyncio.TimeoutError:
+                    process.kill()
+            api.new_update.set()
+            await asyncio.sleep(0.05)
+            await api.server.stop()
+        
+        assert elapsed < self.FIRST_POLL_BUDGET_SECONDS
+
+
+class TestRateLimiter:
+    """Tests für Token-Bucket-Limits pro User und Submission-Typ"""
+    
+    def test_burst_then_throttle_with_single_notice(self):
+        """Test: Burst erlaubt, danach gedrosselt - nur die erste Ablehnung informiert"""
+        limiter = RateLimiter({SubmissionType.FILM_REFERENCE: (3, 60)})
+        
+        decisions = [limiter.check(42, SubmissionType.FILM_REFERENCE) for _ in range(5)]
+        
+        assert [d.allowed for d in decisions] == [True, True, True, False, False]
+        assert [d.notify for d in decisions[3:]] == [True, False]
+        assert 0 < decisions[3].retry_after <= 20
+        stats = limiter.get_stats()
+        assert stats['throttled'] == {'film_reference': 2}
+        assert stats['top_users'] == [(42, 2)]
+    
+    def test_types_and_users_are_independent(self):
+        """Test: Eigener Bucket pro User und Typ, ohne Limit unbegrenzt"""
+        limiter = RateLimiter({SubmissionType.FILM_REFERENCE: (1, 60), SubmissionType.PUZZLE: None})
+        
+        assert limiter.check(1, SubmissionType.FILM_REFERENCE).allowed
+        assert not limiter.check(1, SubmissionType.FILM_REFERENCE).allowed
+        assert limiter.check(2, SubmissionType.FILM_REFERENCE).allowed
+        assert all(limiter.check(1, SubmissionType.PUZZLE).allowed for _ in range(50))
+        assert all(limiter.check(1, SubmissionType.PARTY_PHOTO).allowed for _ in range(50))
+    
+    def test_refill_over_time(self):
+        """Test: Tokens füllen sich mit der konfigurierten Rate wieder auf"""
+        import time
+        limiter = RateLimiter({SubmissionType.PARTY_PHOTO: (2, 0.2)})
+        
+        assert limiter.check(7, SubmissionType.PARTY_PHOTO).allowed
+        assert limiter.check(7, SubmissionType.PARTY_PHOTO).allowed
+        assert not limiter.check(7, SubmissionType.PARTY_PHOTO).allowed
+        time.sleep(0.15)
+        assert limiter.check(7, SubmissionType.PARTY_PHOTO).allowed
+    
+    def test_throttled_user_stats_are_capped(self):
+        """Test: Die Statistik gedrosselter User wächst nicht unbegrenzt"""
+        from services.rate_limiter import MAX_TRACKED_USERS, TRACKED_USERS_KEEP
+        limiter = RateLimiter({SubmissionType.PUZZLE: (1, 3600)})
+        for _ in range(3):
+            limiter.check(7, SubmissionType.PUZZLE)
+        
+        for telegram_id in range(1000, 1000 + MAX_TRACKED_USERS + 1):
+            limiter.check(telegram_id, SubmissionType.PUZZLE)
+            limiter.check(telegram_id, SubmissionType.PUZZLE)
+        
+        assert len(limiter.throttled_users) <= MAX_TRACKED_USERS
+        assert len(limiter.throttled_users) >= TRACKED_USERS_KEEP
+        assert limiter.get_stats(1)['top_users'] == [(7, 2)]
+    
+    def test_buckets_survive_restart(self, tmp_path):
+        """Test: Mit SQLite-Persistenz bleibt ein leerer Bucket nach Neustart leer"""
+        db_path = tmp_path / 'rate_limits.sqlite'
+        limits = {SubmissionType.FILM_REFERENCE: (2, 3600)}
+        limiter = RateLimiter(limits, db_path=db_path)
+        limiter.check(42, SubmissionType.FILM_REFERENCE)
+        limiter.check(42, SubmissionType.FILM_REFERENCE)
+        assert limiter.flush() == 1
+        
+        restarted = RateLimiter(limits, db_path=db_path)
+        
+        assert not restarted.check(42, SubmissionType.FILM_REFERENCE).allowed
+        assert restarted.check(43, SubmissionType.FILM_REFERENCE).allowed
+    
+    def test_parse_limit(self):
+        """Test: Format Anzahl/Sekunden, 0 bzw. leer = unbegrenzt"""
+        assert parse_limit("5/60") == (5, 60.0)
+        assert parse_limit("0") is None
+        assert parse_limit("") is None
+        with pytest.raises(ValueError):
+            parse_limit("fünf pro Minute")
+
+
+class TestLeaderboardStream:
+    """Tests für die Live-Rangliste per Server-Sent Events"""
+    
+    @staticmethod
+    def _loader(board):
+        calls = []
+        
+        def load():
+            calls.append(1)
+            return {'players': [dict(entry) for entry in board], 'teams': []}
+        return load, calls
+    
+    def test_diff_ranking(self):
+        """Test: Nur neue, veränderte oder verschobene Einträge sind Änderungen"""
+        old = [{'id': 1, 'name': 'Neo', 'points': 10}, {'id': 2, 'name': 'Trinity', 'points': 5}]
+        new = [
+            {'id': 2, 'name': 'Trinity', 'points': 25}, {'id': 1, 'name': 'Neo', 'points': 10},
+            {'id': 3, 'name': 'Morpheus', 'points': 1}
+        ]
+        
+        changes = {change['name']: change for change in diff_ranking(old, new)}
+        
+        assert changes['Trinity'] == {
+            'id': 2, 'name': 'Trinity', 'rank': 1, 'points': 25, 'delta': 20, 'previous_rank': 2
+        }
+        assert changes['Neo']['delta'] == 0 and changes['Neo']['rank'] == 2
+        assert changes['Morpheus']['previous_rank'] is None
+        assert diff_ranking(new, new) == []
+    
+    def test_diff_ranking_keeps_players_with_same_name_apart(self):
+        """Test: Gleichnamige Spieler werden über ihre ID unterschieden"""
+        old = [{'id': 1, 'name': 'Max', 'points': 10}, {'id': 2, 'name': 'Max', 'points': 5}]
+        new = [{'id': 2, 'name': 'Max', 'points': 12}, {'id': 1, 'name': 'Max', 'points': 10}]
+        
+        changes = {change['id']: change for change in diff_ranking(old, new)}
+        
+        assert changes[2]['delta'] == 7 and changes[2]['previous_rank'] == 2 and changes[2]['rank'] == 1
+        assert changes[1]['delta'] == 0 and changes[1]['previous_rank'] == 1 and changes[1]['rank'] == 2
+    
+    async def test_bursts_are_coalesced(self):
+        """Test: Viele Änderungen in kurzer Zeit ergeben nur wenige Pushes"""
+        board = [{'id': 1, 'name': 'Neo', 'points': 0}]
+        load, calls = self._loader(board)
+        broadcaster = LeaderboardBroadcaster(load, min_interval=0.2)
+        task = asyncio.create_task(broadcaster.run())
+        stream = broadcaster.stream()
+        try:
+            await asyncio.sleep(0.05)
+            assert await stream.__anext__() == "retry: 3000\n\n"
+            assert '"points":0' in await stream.__anext__()
+            
+            for _ in range(100):
+                board[0]['points'] += 1
+                broadcaster.notify()
+                await asyncio.sleep(0.002)
+            await asyncio.sleep(0.5)
+            
+            assert broadcaster.notifications == 100
+            assert len(calls) <= 4  # Start + max. ein Push pro 0,2 s
+            pending = next(iter(broadcaster._subscribers)).qsize()
+            messages = [await stream.__anext__() for _ in range(pending)]
+            assert '"points":100' in messages[-1]
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await stream.aclose()
+    
+    async def test_refresh_during_award_points_keeps_ledger_consistent(self, tmp_path):
+        """Test: Ranglisten-Refresh mitten in award_points bricht dessen Savepoint nicht auf (StaticPool)"""
+        import threading
+        import time
+        from database import crud
+        from database.db import Database
+        from database.models import User
+        from services.leaderboard_stream import load_leaderboard
+        
+        database = Database(f"sqlite:///{tmp_path / 'leaderboard.db'}")
+        database.create_tables()
+        with database.get_session() as session:
+            user_id = crud.get_or_create_user(session, telegram_id=1, first_name="Neo").id
+        
+        in_savepoint = threading.Event()
+        
+        def load():
+            in_savepoint.wait(0.5)  # Im Worker-Thread: erst laden, wenn award_points im Savepoint steckt
+            return load_leaderboard(10)
+        
+        increment_score = crud._increment_score
+        
+        def slow_increment(*args, **kwargs):
+            increment_score(*args, **kwargs)
+            in_savepoint.set()
+            time.sleep(0.2)  # Zeit für einen parallelen Leser, zu committen
+        
+        broadcaster = LeaderboardBroadcaster(load)
+        with patch('services.leaderboard_stream.db', database), \
+                patch('database.crud._increment_score', slow_increment):
+            refresh = asyncio.create_task(broadcaster._refresh())
+            await asyncio.sleep(0)
+            with database.get_session() as session:
+                crud.award_points(session, user_id, 5, reason='admin')
+            await refresh
+            
+            with database.get_session() as session:
+                assert session.get(User, user_id).total_points == 5
+                assert crud.get_point_discrepancies(session) == []
+        database.engine.dispose()
+    
+    async def test_http_stream_and_shutdown(self):
+        """Test: SSE über den HTTP-Server, Server-Stop beendet offene Streams"""
+        board = [{'id': 1, 'name': 'Neo', 'points': 1}]
+        load, _ = self._loader(board)
+        broadcaster = LeaderboardBroadcaster(load, min_interval=0.01)
+        task = asyncio.create_task(broadcaster.run())
+        server = HTTPServer('127.0.0.1', 0)
+        
+        async def stream(request):
+            return StreamResponse(broadcaster.stream())
+        
+        server.route('/leaderboard/stream', stream)
+        await server.start()
+        try:
+            await asyncio.sleep(0.05)
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+            writer.write(b"GET /leaderboard/stream HTTP/1.1\r\nHost: x\r\n\r\n")
+            await writer.drain()
+            
+            head = (await reader.readuntil(b"\r\n\r\n")).decode()
+            assert "text/event-stream" in head and "Content-Length" not in head
+            await reader.readuntil(b"\n\n")  # retry
+            assert b'"points":1' in await reader.readuntil(b"\n\n")
+            
+            board[0]['points'] = 21
+            broadcaster.notify()
+            event = json.loads((await asyncio.wait_for(reader.readuntil(b"\n\n"), 2)).decode().split("data: ", 1)[1])
+            assert event['changes']['players'][0]['delta'] == 20
+            
+            await asyncio.wait_for(server.stop(), 2)
+            assert await asyncio.wait_for(reader.read(), 2) == b""
+            writer.close()
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await server.stop()
+
+
+class TestDBSnapshot:
+    """Tests für DB-Snapshots per SQLite-Online-Backup"""
+    
+    def test_snapshot_while_writing(self, tmp_path):
+        """Test: Snapshot ist konsistent, Writer laufen währenddessen weiter"""
+        import sqlite3
+        import threading
+        source = tmp_path / 'bot.db'
+        connection = sqlite3.connect(source, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, payload TEXT)")
+        connection.executemany("INSERT INTO events (payload) VALUES (?)", [("x" * 200,)] * 5000)
+        
+        stop = threading.Event()
+        commits = []
+        
+        def writer():
+            while not stop.is_set():
+                connection.execute("INSERT INTO events (payload) VALUES ('live')")
+                commits.append(1)
+        
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            manager = SnapshotManager(f"sqlite:///{source}", tmp_path / 'snapshots')
+            result = manager.take()
+        finally:
+            stop.set()
+            thread.join()
+        
+        assert result.integrity_ok
+        assert commits  # Writer wurde nicht blockiert
+        copied = sqlite3.connect(result.path).execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        assert 5000 <= copied <= 5000 + len(commits)
+        assert not list((tmp_path / 'snapshots').glob('*.partial'))
+        connection.close()
+    
+    def test_retention_keeps_last_and_daily(self, tmp_path):
+        """Test: Die letzten N plus der neueste Snapshot pro Tag bleiben erhalten"""
+        target = tmp_path / 'snapshots'
+        target.mkdir()
+        names = [
+            'bot-20261017-090000-000.db', 'bot-20261017-210000-000.db',
+            'bot-20261018-100000-000.db', 'bot-20261018-200000-000.db',
+            'bot-20261019-080000-000.db', 'bot-20261019-090000-000.db', 'bot-20261019-100000-000.db',
+        ]
+        for name in names:
+            (target / name).write_bytes(b'')
+        
+        manager = SnapshotManager("sqlite:///unused.db", target, keep_last=2, keep_daily=2)
+        deleted = manager.apply_retention()
+        
+        assert [path.name for path in manager.list_snapshots()] == [
+            'bot-20261018-200000-000.db', 'bot-20261019-090000-000.db', 'bot-20261019-100000-000.db'
+        ]
+        assert len(deleted) == 4
+    
+    def test_only_sqlite_files(self, tmp_path):
+        """Test: Snapshots nur für SQLite-Dateien"""
+        assert sqlite_path("sqlite:///data/bot.db") == Path("data/bot.db")
+        assert sqlite_path("sqlite://") is None
+        assert sqlite_path("postgresql://bot@localhost/bot") is None
+        with pytest.raises(RuntimeError):
+            SnapshotManager("postgresql://bot@localhost/bot", tmp_path).take()
+
+
+class TestLoadTest:
+    """Smoke-Test für tools.load_test (echte Handler, Fake-Telegram/-OpenAI)"""
+    
+    def test_small_run_is_consistent(self, tmp_path, bot_root_dir):
+        """Test: Kleiner Lastlauf ohne Fehler-Antworten und mit stimmigem Ledger"""
+        import subprocess
+        import sys
+        result = subprocess.run(
+            [sys.executable, '-m', 'tools.load_test', '--users', '5', '--actions', '3',
+             '--ai-latency-ms', '0', '--think-ms', '0', '--ramp-up', '0', '--rtt-ms', '0',
+             '--download-ms', '0', '--data-dir', str(tmp_path), '--json'],
+            cwd=bot_root_dir, capture_output=True, text=True, timeout=120
+        )
+        assert result.returncode == 0, result.stderr
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        
+        assert report['actions'] > 0
+        assert report['ai_requests'] > 0
+        assert report['error_replies'] == 0
+        assert report['ledger_discrepancies'] == 0
+
+
+class TestMemoryProfiler:
+    """Tests für Speicher-Berichte (RSS, Caches, tracemalloc)"""
+    
+    def test_report_without_tracing(self):
+        """Test: Ohne tracemalloc nur RSS, Objekte und Caches - keine Dienste erzeugt"""
+        import tracemalloc
+        from utils.service_container import container
+        if tracemalloc.is_tracing():
+            pytest.skip("tracemalloc läuft bereits (z.B. python -X tracemalloc)")
+        initialized = container.status()
+        
+        report = MemoryProfiler().report()
+        
+        assert report['tracing'] is False
+        assert 'top' not in report
+        assert report['objects'] > 0
+        assert report['caches'][0]['name'] == 'User-Cache'
+        assert container.status() == initialized
+        if rss_bytes() is not None:
+            assert report['peak_rss_bytes'] >= report['rss_bytes'] > 0
+        assert "Speicher: RSS" in MemoryProfiler.format_summary(report)
+    
+    def test_growth_between_reports(self):
+        """Test: Zweiter Bericht zeigt die Allokationen seit dem ersten als Wachstum"""
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            pytest.skip("tracemalloc läuft bereits (z.B. python -X tracemalloc)")
+        profiler = MemoryProfiler(trace_frames=1)
+        assert profiler.start()
+        try:
+            first = profiler.report()
+            retained = [bytearray(64 * 1024) for _ in range(32)]
+            second = profiler.report()
+        finally:
+            profiler.stop()
+        
+        assert first['growth'] == []
+        assert first['traced_bytes'] > 0
+        top_growth = second['growth'][0]
+        assert top_growth['location'].startswith('tests/test_services.py:')
+        assert top_growth['size_bytes'] >= 32 * 64 * 1024
+        assert len(retained) == 32
+        assert not tracemalloc.is_tracing()
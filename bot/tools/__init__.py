@@ -0,0 +1,4 @@
+"""
+Kommandozeilen-Werkzeuge für den Halloween Bot.
+Aufruf aus dem bot-Verzeichnis: python -m tools.<name>
+"""
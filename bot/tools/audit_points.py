@@ -0,0 +1,46 @@
+"""
+Prüft users.total_points gegen die Summe des Punkte-Ledgers (point_events)
+und korrigiert Abweichungen auf Wunsch.
+
+Aufruf: python -m tools.audit_points [--fix]
+"""
+import argparse
+import logging
+
+from database.db import db
+from database.crud import backfill_point_ledger, get_point_discrepancies, recompute_user_points
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Gleicht Punktestände mit dem Punkte-Ledger ab'
+    )
+    parser.add_argument('--fix', action='store_true', help='Punktestände auf die Ledger-Summe setzen')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+
+    db.create_tables()
+    with db.get_session() as session:
+        backfill_point_ledger(session)
+        discrepancies = get_point_discrepancies(session)
+
+        if not discrepancies:
+            print("✅ Alle Punktestände stimmen mit dem Ledger überein")
+            return
+
+        print(f"⚠️  {len(discrepancies)} Abweichungen:")
+        print(f"{'Telegram-ID':>14} {'Punkte':>8} {'Ledger':>8} {'Differenz':>10}")
+        for row in discrepancies:
+            print(
+                f"{row['telegram_id']:>14} {row['total_points']:>8} {row['ledger_points']:>8} "
+                f"{row['total_points'] - row['ledger_points']:>+10d}"
+            )
+
+        if args.fix:
+            fixed = recompute_user_points(session)
+            print(f"🔧 {fixed} Punktestände aus dem Ledger neu berechnet")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Microbenchmark für das Template-Rendering.
+Vergleicht den bisherigen Modus (auto_reload, kein Render-Cache) mit dem
+Production-Modus (vorkompiliert, Bytecode-Cache, memoisierte Renders).
+
+Aufruf: python -m tools.benchmark_templates [-n 5000]
+"""
+import argparse
+import tempfile
+import timeit
+
+from services.template_manager import TemplateManager
+
+
+POINTS_CONTEXT = dict(
+    first_name="Neo",
+    total_points=77,
+    party_photos_count=12,
+    party_points=12,
+    film_count=2,
+    film_points=40,
+    team_points=25,
+    puzzle_points=0,
+    team_name="Matrix",
+    recognized_films=["Matrix", "Terminator"],
+    ranking=3,
+    total_users=42,
+    film_submitted=3,
+    film_approved=2,
+    top_players=[{'name': 'Trinity', 'points': 120}, {'name': 'Neo', 'points': 77}],
+    top_teams=[{'film_title': 'Matrix', 'points': 310, 'members': 2}]
+)
+
+
+def _measure(label: str, func, number: int) -> float:
+    """Führt func number-mal aus und gibt µs pro Aufruf aus."""
+    func()  # Warm-up (Kompilieren)
+    seconds = timeit.timeit(func, number=number)
+    per_call = seconds / number * 1_000_000
+    print(f"  {label:<28} {per_call:8.1f} µs/Aufruf")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmark für render_points und render_welcome')
+    parser.add_argument('-n', '--number', type=int, default=5000, help='Aufrufe pro Messung')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        modes = {
+            'development': TemplateManager(auto_reload=True, render_cache_size=0),
+            'production': TemplateManager(auto_reload=False, bytecode_cache_path=cache_dir),
+        }
+        modes['production'].precompile()
+
+        results = {}
+        for mode, manager in modes.items():
+            print(f"⏱️  {mode}")
+            results[mode] = (
+                _measure('render_points', lambda: manager.render_points(**POINTS_CONTEXT), args.number),
+                _measure('render_welcome', lambda: manager.render_welcome("Neo"), args.number),
+            )
+
+    for index, name in enumerate(('render_points', 'render_welcome')):
+        speedup = results['development'][index] / max(results['production'][index], 1e-9)
+        print(f"✅ {name}: {speedup:.1f}x schneller im Production-Modus")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark für die Team-Rangliste (get_top_teams).
+Vergleicht die bisherige Abfrage (GROUP BY über alle User + ein Team-Lookup
+pro Ergebniszeile) mit dem Aggregat team_scores auf einer SQLite-Datei mit
+synthetischen Spielern.
+
+Aufruf: python -m tools.benchmark_top_teams [--users 10000] [--teams 200] [-n 200]
+"""
+import argparse
+import random
+import tempfile
+import timeit
+from pathlib import Path
+
+from sqlalchemy import func
+
+from database import crud
+from database.db import Database
+from database.models import Team, User
+
+
+def legacy_get_top_teams(session, limit: int = 3):
+    """Bisherige Implementierung (vor team_scores) als Vergleich."""
+    results = session.query(
+        User.team_id,
+        func.sum(User.total_points).label('total_points'),
+        func.count(User.id).label('member_count')
+    ).filter(
+        User.team_id.isnot(None)
+    ).group_by(
+        User.team_id
+    ).order_by(
+        func.sum(User.total_points).desc()
+    ).limit(limit).all()
+
+    team_list = []
+    for team_id, total_points, member_count in results:
+        team = crud.get_team_by_id(session, team_id)
+        if team:
+            team_list.append({
+                'team_name': team.film_title,
+                'total_points': int(total_points) if total_points else 0,
+                'member_count': member_count
+            })
+    return team_list
+
+
+def seed(database: Database, users: int, teams: int, seed_value: int):
+    """Legt Teams und Spieler mit zufälligen Punkten an (90 % im Team)."""
+    rng = random.Random(seed_value)
+    with database.get_session() as session:
+        session.add_all(
+            Team(
+                team_id=f"{100000 + index}", film_title=f"Film {index}",
+                character_1="A", character_2="B", character_1_id="1", character_2_id="2"
+            )
+            for index in range(teams)
+        )
+        session.add_all(
+            User(
+                telegram_id=10_000_000 + index,
+                first_name=f"Spieler {index}",
+                total_points=rng.randint(0, 300),
+                team_id=f"{100000 + rng.randrange(teams)}" if rng.random() < 0.9 else None
+            )
+            for index in range(users)
+        )
+        session.commit()
+        crud.rebuild_team_scores(session)
+
+
+def _measure(label: str, func, number: int) -> float:
+    """Führt func number-mal aus und gibt µs pro Aufruf aus."""
+    func()  # Warm-up
+    seconds = timeit.timeit(func, number=number)
+    per_call = seconds / number * 1_000_000
+    print(f"  {label:<24} {per_call:10.1f} µs/Aufruf")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark get_top_teams: GROUP BY vs. team_scores-Aggregat')
+    parser.add_argument('--users', type=int, default=10000, help='Anzahl synthetischer Spieler')
+    parser.add_argument('--teams', type=int, default=200, help='Anzahl Teams')
+    parser.add_argument('--limit', type=int, default=3, help='Top-N')
+    parser.add_argument('-n', '--number', type=int, default=200, help='Aufrufe pro Messung')
+    parser.add_argument('--seed', type=int, default=2025, help='Zufalls-Seed')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(f"sqlite:///{Path(tmp) / 'benchmark.db'}")
+        database.create_tables()
+        seed(database, args.users, args.teams, args.seed)
+        print(f"⏱️  {args.users} Spieler, {args.teams} Teams, Top {args.limit}")
+
+        with database.get_session() as session:
+            legacy = legacy_get_top_teams(session, args.limit)
+            current = crud.get_top_teams(session, args.limit)
+            if legacy != current:
+                raise SystemExit(f"❌ Ergebnisse weichen ab:\n{legacy}\n{current}")
+
+            before = _measure('GROUP BY + Lookups', lambda: legacy_get_top_teams(session, args.limit), args.number)
+            after = _measure('team_scores', lambda: crud.get_top_teams(session, args.limit), args.number)
+
+        database.engine.dispose()
+
+    print(f"📊 Faktor: {before / after:.1f}x schneller")
+
+
+if __name__ == '__main__':
+    main()
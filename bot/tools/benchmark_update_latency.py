@@ -0,0 +1,267 @@
+"""
+End-to-End-Latenz von Updates: Polling vs. Webhook.
+Startet einen lokalen Fake-Telegram-Endpoint (Bot-API mit getUpdates,
+setWebhook, sendMessage), lässt einen Echo-Bot dagegen laufen und misst die
+Zeit vom Eintreffen eines Updates "bei Telegram" bis zur Antwort des Bots.
+
+Die Netzwerk-Latenz zu Telegram wird über --rtt-ms simuliert (je halbe RTT
+pro Richtung), die Handler selbst tun nichts außer zu antworten - gemessen
+wird also nur der Transportweg.
+
+Aufruf: python -m tools.benchmark_update_latency [-n 300] [--rate 50] [--rtt-ms 40]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import socket
+import statistics
+import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl
+
+import httpx
+from telegram.ext import Application, ContextTypes, MessageHandler, filters
+
+from services.http_server import HTTPServer, Request, Response
+from services.update_processor import PerChatUpdateProcessor
+from services.update_types import derive_allowed_updates
+
+TOKEN = '123456:FAKE-BENCHMARK-TOKEN'
+WEBHOOK_PATH = 'telegram'
+WEBHOOK_SECRET = 'benchmark-secret'
+
+API_METHODS = (
+    'getMe', 'getUpdates', 'deleteWebhook', 'setWebhook', 'getWebhookInfo',
+    'sendMessage', 'close', 'logOut'
+)
+
+
+class FakeTelegramAPI:
+    """Minimaler Bot-API-Server mit simulierter Netzwerk-Latenz."""
+
+    def __init__(self, rtt_seconds: float):
+        self.one_way = rtt_seconds / 2
+        self.server = HTTPServer('127.0.0.1', 0)
+        self.pending: List[dict] = []
+        self.new_update = asyncio.Event()
+        self.first_poll = asyncio.Event()
+        self.injected_at: Dict[int, float] = {}
+        self.answered_at: Dict[int, float] = {}
+        self.all_answered = asyncio.Event()
+        self.expected = 0
+        self.webhook_url: Optional[str] = None
+        self.api_calls: Dict[str, int] = {}
+        for method in API_METHODS:
+            self.server.route(f'/bot{TOKEN}/{method}', self._handler(method), methods=('GET', 'POST'))
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.server.port}/bot'
+
+    @staticmethod
+    def _params(request: Request) -> dict:
+        """Parameter aus JSON- oder Form-Body (PTB kodiert Werte als JSON-Strings)."""
+        if not request.body:
+            return {}
+        if request.headers.get('content-type', '').startswith('application/json'):
+            return json.loads(request.body)
+        params = {}
+        for key, value in parse_qsl(request.body.decode('utf-8')):
+            try:
+                params[key] = json.loads(value)
+            except json.JSONDecodeError:
+                params[key] = value
+        return params
+
+    def _handler(self, method: str):
+        async def handle(request: Request) -> Response:
+            await asyncio.sleep(self.one_way)  # Request unterwegs zu Telegram
+            self.api_calls[method] = self.api_calls.get(method, 0) + 1
+            result = await getattr(self, f'_{method}', self._ok)(self._params(request))
+            await asyncio.sleep(self.one_way)  # Antwort unterwegs zum Bot
+            return Response(
+                json.dumps({'ok': True, 'result': result}),
+                content_type='application/json'
+            )
+        return handle
+
+    async def _ok(self, params: dict):
+        return True
+
+    async def _getMe(self, params: dict):
+        return {'id': 123456, 'is_bot': True, 'first_name': 'Fake', 'username': 'fake_bot'}
+
+    async def _setWebhook(self, params: dict):
+        self.webhook_url = params.get('url')
+        return True
+
+    async def _deleteWebhook(self, params: dict):
+        self.webhook_url = None
+        return True
+
+    async def _getUpdates(self, params: dict):
+        self.first_poll.set()
+        offset = int(params.get('offset') or 0)
+        self.pending = [update for update in self.pending if update['update_id'] >= offset]
+        if not self.pending and float(params.get('timeout') or 0) > 0:
+            self.new_update.clear()
+            try:
+                await asyncio.wait_for(self.new_update.wait(), float(params['timeout']))
+            except asyncio.TimeoutError:
+                pass
+        return list(self.pending)
+
+    async def _sendMessage(self, params: dict):
+        sequence = int(params['text'])
+        self.answered_at[sequence] = time.perf_counter()
+        if len(self.answered_at) >= self.expected:
+            self.all_answered.set()
+        return {
+            'message_id': sequence,
+            'date': int(time.time()),
+            'chat': {'id': int(params['chat_id']), 'type': 'private'},
+            'text': params['text'],
+        }
+
+    async def inject(self, update: dict, client: Optional[httpx.AsyncClient]):
+        """Ein Update trifft bei Telegram ein und wird per getUpdates oder Webhook zugestellt."""
+        self.injected_at[update['update_id']] = time.perf_counter()
+        if self.webhook_url is None:
+            self.pending.append(update)
+            self.new_update.set()
+            return
+
+        await asyncio.sleep(self.one_way)  # Telegram → Reverse-Proxy
+        await client.post(
+            self.webhook_url,
+            json=update,
+            headers={'X-Telegram-Bot-Api-Secret-Token': WEBHOOK_SECRET}
+        )
+
+
+def _update(sequence: int) -> dict:
+    """Textnachricht eines von 50 Spielern."""
+    user_id = 1000 + sequence % 50
+    return {
+        'update_id': sequence,
+        'message': {
+            'message_id': sequence,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Spieler'},
+            'text': str(sequence),
+        }
+    }
+
+
+def _free_port() -> int:
+    """Freier lokaler TCP-Port für den Webhook-Listener."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def echo(update, context: ContextTypes.DEFAULT_TYPE):
+    await context.bot.send_message(chat_id=update.effective_chat.id, text=update.message.text)
+
+
+async def run_mode(mode: str, count: int, rate: float, rtt_seconds: float) -> List[float]:
+    """Führt einen Durchlauf aus und liefert die Latenzen in Millisekunden."""
+    api = FakeTelegramAPI(rtt_seconds)
+    api.expected = count
+    await api.server.start()
+
+    application = (
+        Application.builder()
+        .token(TOKEN)
+        .base_url(api.base_url)
+        .concurrent_updates(PerChatUpdateProcessor(16))
+        .build()
+    )
+    application.add_handler(MessageHandler(filters.TEXT, echo))
+    allowed_updates = derive_allowed_updates(application)
+
+    client = None
+    try:
+        async with application:
+            if mode == 'webhook':
+                webhook_port = _free_port()
+                await application.updater.start_webhook(
+                    listen='127.0.0.1',
+                    port=webhook_port,
+                    url_path=WEBHOOK_PATH,
+                    webhook_url=f'http://127.0.0.1:{webhook_port}/{WEBHOOK_PATH}',
+                    secret_token=WEBHOOK_SECRET,
+                    allowed_updates=allowed_updates
+                )
+                client = httpx.AsyncClient(limits=httpx.Limits(max_connections=40))
+            else:
+                await application.updater.start_polling(poll_interval=0.0, timeout=10, allowed_updates=allowed_updates)
+            await application.start()
+
+            deliveries = []
+            for sequence in range(1, count + 1):
+                deliveries.append(asyncio.create_task(api.inject(_update(sequence), client)))
+                await asyncio.sleep(random.expovariate(rate))
+            await asyncio.gather(*deliveries)
+            await asyncio.wait_for(api.all_answered.wait(), timeout=60)
+
+            await application.updater.stop()
+            await application.stop()
+    finally:
+        if client is not None:
+            await client.aclose()
+        # Offenen Long-Poll beenden, bevor der Server schließt
+        api.new_update.set()
+        await asyncio.sleep(rtt_seconds + 0.05)
+        await api.server.stop()
+
+    calls = ', '.join(f"{name}={calls}" for name, calls in sorted(api.api_calls.items()))
+    print(f"   API-Aufrufe: {calls}")
+    return [
+        (api.answered_at[sequence] - api.injected_at[sequence]) * 1000
+        for sequence in range(1, count + 1)
+    ]
+
+
+def _report(mode: str, latencies: List[float]):
+    """Gibt p50/p95/p99/max aus."""
+    ordered = sorted(latencies)
+
+    def percentile(percent: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    print(
+        f"  {mode:<8} p50 {percentile(50):7.1f} ms   p95 {percentile(95):7.1f} ms   "
+        f"p99 {percentile(99):7.1f} ms   max {ordered[-1]:7.1f} ms   Ø {statistics.mean(ordered):7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Update-Latenz Polling vs. Webhook gegen einen Fake-Telegram-Endpoint')
+    parser.add_argument('-n', '--count', type=int, default=300, help='Anzahl Updates pro Modus')
+    parser.add_argument('--rate', type=float, default=50, help='Ø Updates pro Sekunde (Poisson-verteilt)')
+    parser.add_argument('--rtt-ms', type=float, default=40, help='Simulierte Round-Trip-Zeit zu Telegram (ms)')
+    parser.add_argument('--mode', choices=('polling', 'webhook', 'both'), default='both')
+    parser.add_argument('--seed', type=int, default=2025, help='Zufalls-Seed für die Ankunftszeiten')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    modes = ('polling', 'webhook') if args.mode == 'both' else (args.mode,)
+
+    print(f"⏱️  {args.count} Updates, Ø {args.rate:g}/s, RTT {args.rtt_ms:g} ms")
+    results = {}
+    for mode in modes:
+        random.seed(args.seed)
+        print(f"▶️  {mode}")
+        results[mode] = asyncio.run(run_mode(mode, args.count, args.rate, args.rtt_ms / 1000))
+
+    print("📊 Ende-zu-Ende (Update bei Telegram → sendMessage bei Telegram):")
+    for mode, latencies in results.items():
+        _report(mode, latencies)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Build-Schritt für den Referenzbild-Index.
+Lädt Beispielbilder und Poster aus universen.yaml einmalig herunter und
+berechnet die Embeddings für die Nearest-Film-Suche.
+
+Aufruf: python -m tools.build_reference_index
+"""
+import argparse
+import logging
+import sys
+
+from services.reference_index import ReferenceIndex
+from utils.yaml_loader import UniverseLoader
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Baut den Referenzbild-Index für die Film-Erkennung'
+    )
+    parser.add_argument('--yaml', help='Pfad zur universen.yaml (default: notes/universen.yaml)')
+    parser.add_argument('--output', help='Zielverzeichnis des Index (default: data/reference_index)')
+    parser.add_argument('--timeout', type=float, default=15.0, help='HTTP-Timeout pro Bild in Sekunden')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+
+    loader = UniverseLoader(args.yaml)
+    teams = loader.get_teams()
+    if not teams:
+        print("❌ Keine Teams in der YAML-Datei gefunden")
+        sys.exit(1)
+
+    index = ReferenceIndex(args.output)
+    count = index.build(teams, base_dir=loader.yaml_path.parent, timeout=args.timeout)
+
+    print(f"✅ {count} Referenzbilder indexiert → {index.index_path}")
+
+
+if __name__ == '__main__':
+    main()
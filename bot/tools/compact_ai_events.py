@@ -0,0 +1,45 @@
+"""
+Verdichtet rotierte KI-Event-Logs (logs/ai_events.*.jsonl) in die
+SQLite-Analysedatenbank und zeigt eine Auswertung pro Film.
+
+Aufruf: python -m tools.compact_ai_events [--keep] [--summary]
+"""
+import argparse
+import logging
+from pathlib import Path
+
+from config import config
+from services.ai_event_log import compact_event_files, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Verdichtet KI-Event-Logs in eine SQLite-Datenbank für Auswertungen'
+    )
+    parser.add_argument('--logs', help='Log-Verzeichnis (default: data/logs)')
+    parser.add_argument('--db', help='Analyse-Datenbank (default: data/analytics/ai_events.sqlite)')
+    parser.add_argument('--keep', action='store_true', help='Verdichtete Dateien nicht löschen')
+    parser.add_argument('--summary', action='store_true', help='Auswertung pro Film ausgeben')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+
+    logs_path = Path(args.logs) if args.logs else config.LOGS_BASE_PATH
+    db_path = Path(args.db) if args.db else config.ANALYTICS_DB_PATH
+
+    files, events = compact_event_files(logs_path, db_path, delete=not args.keep)
+    print(f"✅ {files} Dateien verdichtet, {events} Events → {db_path}")
+
+    if args.summary and db_path.exists():
+        print()
+        print(f"{'Film':<28} {'Art':<7} {'Events':>6} {'OK':>4} {'Ø Conf':>7} {'Cache':>6} {'Fehler':>6} {'Tokens':>8} {'USD':>8} {'Ø ms':>7}")
+        for row in summarize(db_path):
+            print(
+                f"{(row['film_title'] or '-')[:28]:<28} {row['kind']:<7} {row['events']:>6} "
+                f"{row['approved'] or 0:>4} {row['avg_confidence'] or 0:>7} {row['cache_hits'] or 0:>6} "
+                f"{row['errors'] or 0:>6} {row['total_tokens']:>8} {row['cost_usd']:>8} {row['avg_latency_ms'] or 0:>7}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Erzeugt synthetische Spieler und Submissions für Lasttests.
+
+Die Spieler bekommen Telegram-IDs ab SYNTHETIC_TELEGRAM_ID_START und lassen sich
+mit --purge wieder restlos entfernen. Punkte laufen über das Ledger; danach
+werden user_scores, total_points und team_scores daraus neu aufgebaut.
+Fehlen Teams, werden sie vorher aus universen.yaml angelegt.
+
+Aufruf: python -m tools.generate_load_data [--users 5000] [--photos 4] [--database-url sqlite:///load.db]
+        python -m tools.generate_load_data --purge
+"""
+import argparse
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import delete, insert, select
+
+from config import config
+from database import crud
+from database.db import Database
+from database.models import EasterEgg, PointEvent, Submission, SubmissionStatus, SubmissionType, Team, User, UserScore
+from utils.yaml_loader import UniverseLoader
+
+# Weit oberhalb echter Telegram-User-IDs, damit --purge nur Testdaten trifft
+SYNTHETIC_TELEGRAM_ID_START = 9_000_000_000
+
+PARTY_DURATION = timedelta(hours=6)
+
+
+def _synthetic_users():
+    return select(User.id).where(User.telegram_id >= SYNTHETIC_TELEGRAM_ID_START)
+
+
+def purge_synthetic_data(session) -> int:
+    """
+    Löscht alle synthetischen Spieler samt Submissions, Easter Eggs und Ledger.
+
+    Returns:
+        int: Anzahl gelöschter Spieler
+    """
+    users = _synthetic_users()
+    for model in (PointEvent, UserScore, EasterEgg, Submission):
+        session.execute(delete(model).where(model.user_id.in_(users)))
+    deleted = session.execute(
+        delete(User).where(User.telegram_id >= SYNTHETIC_TELEGRAM_ID_START)
+    ).rowcount
+    session.commit()
+    crud.rebuild_team_scores(session)
+    return deleted
+
+
+def _submission_rows(team_id, film_titles: List[str], photos: int, rng: random.Random,
+                     start: datetime) -> List[dict]:
+    """Submissions eines Spielers: Partyfotos, Film-Referenzen, Team-Beitritt und Puzzle."""
+    def row(submission_type, status, points, film_title=None):
+        return {
+            'submission_type': submission_type,
+            'status': status,
+            'points_awarded': points,
+            'film_title': film_title,
+            'caption': None,
+            'created_at': start + timedelta(seconds=rng.randrange(int(PARTY_DURATION.total_seconds()))),
+        }
+
+    rows = [
+        row(SubmissionType.PARTY_PHOTO, SubmissionStatus.APPROVED, config.POINTS_PARTY_PHOTO)
+        for _ in range(rng.randint(0, photos * 2))
+    ]
+    for film_title in rng.sample(film_titles, min(len(film_titles), rng.randint(0, 3))):
+        outcome = rng.random()
+        if outcome < 0.6:
+            rows.append(row(SubmissionType.FILM_REFERENCE, SubmissionStatus.APPROVED,
+                            config.POINTS_FILM_REFERENCE, film_title))
+        elif outcome < 0.9:
+            rows.append(row(SubmissionType.FILM_REFERENCE, SubmissionStatus.REJECTED, 0, film_title))
+        else:
+            rows.append(row(SubmissionType.FILM_REFERENCE, SubmissionStatus.PENDING, 0, film_title))
+    if team_id is not None:
+        rows.append(row(SubmissionType.TEAM_JOIN, SubmissionStatus.APPROVED, config.POINTS_TEAM_JOIN))
+        if rng.random() < 0.3:
+            rows.append(row(SubmissionType.PUZZLE, SubmissionStatus.APPROVED, config.POINTS_PUZZLE))
+    return rows
+
+
+def generate_load_data(
+    session,
+    users: int,
+    photos: int = 4,
+    team_ratio: float = 0.8,
+    seed: int = 2025,
+    start: datetime = None
+) -> Dict[str, int]:
+    """
+    Legt synthetische Spieler, Submissions und Ledger-Einträge per Bulk-Insert an.
+    
+    Eingefügt wird über die Tabellen (Core-executemany) statt über das ORM -
+    ohne Objekt-Verwaltung und ohne Rückgabe der Primärschlüssel.
+
+    Args:
+        session: DB-Session (Teams müssen bereits existieren)
+        users: Anzahl neuer Spieler
+        photos: Mittlere Anzahl Partyfotos pro Spieler
+        team_ratio: Anteil der Spieler in einem Team
+        seed: Zufalls-Seed (gleicher Seed = gleiche Daten)
+        start: Beginn der simulierten Party (default: jetzt minus Partydauer)
+
+    Returns:
+        Dict[str, int]: users, submissions, point_events
+    """
+    rng = random.Random(seed)
+    start = start or datetime.utcnow() - PARTY_DURATION
+    teams = session.execute(select(Team.team_id, Team.film_title)).all()
+    team_ids = [team_id for team_id, _ in teams]
+    film_titles = [film_title for _, film_title in teams]
+
+    first_id = max(
+        session.scalar(select(User.telegram_id).order_by(User.telegram_id.desc()).limit(1)) or 0,
+        SYNTHETIC_TELEGRAM_ID_START - 1
+    ) + 1
+    user_rows, submissions_by_user = [], []
+    for index in range(users):
+        number = first_id + index - SYNTHETIC_TELEGRAM_ID_START
+        team_id = rng.choice(team_ids) if team_ids and rng.random() < team_ratio else None
+        submissions = _submission_rows(team_id, film_titles, photos, rng, start)
+        user_rows.append({
+            'telegram_id': first_id + index,
+            'username': f"loadtest_{number}",
+            'first_name': f"Testspieler {number}",
+            'team_id': team_id,
+            # Entspricht der Ledger-Summe, der Neuaufbau muss nichts korrigieren
+            'total_points': sum(
+                row['points_awarded'] for row in submissions if row['status'] == SubmissionStatus.APPROVED
+            ),
+            'created_at': start,
+        })
+        submissions_by_user.append(submissions)
+    if not user_rows:
+        return {'users': 0, 'submissions': 0, 'point_events': 0}
+    session.execute(insert(User.__table__), user_rows)
+
+    user_ids = dict(session.execute(
+        select(User.telegram_id, User.id).where(User.telegram_id >= first_id)
+    ).all())
+    submission_rows = [
+        {**row, 'user_id': user_ids[user_row['telegram_id']]}
+        for user_row, submissions in zip(user_rows, submissions_by_user)
+        for row in submissions
+    ]
+    if submission_rows:
+        session.execute(insert(Submission.__table__), submission_rows)
+
+    # Genehmigte Submissions ins Ledger buchen - wie update_submission_status es täte
+    approved = session.execute(
+        select(Submission.id, Submission.user_id, Submission.submission_type, Submission.points_awarded, Submission.created_at)
+        .where(
+            Submission.user_id.in_(list(user_ids.values())),
+            Submission.status == SubmissionStatus.APPROVED,
+            Submission.points_awarded != 0
+        )
+    ).all()
+    event_rows = [
+        {
+            'user_id': user_id,
+            'delta': points,
+            'reason': 'submission',
+            'category': submission_type.value,
+            'submission_id': submission_id,
+            'created_at': created_at,
+        }
+        for submission_id, user_id, submission_type, points, created_at in approved
+    ]
+    if event_rows:
+        session.execute(insert(PointEvent.__table__), event_rows)
+    session.commit()
+
+    crud.rebuild_score_aggregates(session)
+    return {'users': len(user_rows), 'submissions': len(submission_rows), 'point_events': len(event_rows)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetische Spieler und Submissions für Lasttests erzeugen')
+    parser.add_argument('--users', type=int, default=5000, help='Anzahl neuer Spieler')
+    parser.add_argument('--photos', type=int, default=4, help='Mittlere Anzahl Partyfotos pro Spieler')
+    parser.add_argument('--team-ratio', type=float, default=0.8, help='Anteil der Spieler in einem Team')
+    parser.add_argument('--seed', type=int, default=2025, help='Zufalls-Seed')
+    parser.add_argument('--database-url', default=config.DATABASE_URL, help='Ziel-Datenbank (default: DATABASE_URL)')
+    parser.add_argument('--purge', action='store_true', help='Nur alle synthetischen Daten löschen')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(message)s')
+
+    database = Database(args.database_url)
+    database.create_tables()
+    with database.get_session() as session:
+        if args.purge:
+            print(f"🧹 {purge_synthetic_data(session)} synthetische Spieler gelöscht")
+            return
+
+        if session.query(Team.id).first() is None:
+            result = crud.upsert_teams(session, UniverseLoader().get_teams())
+            print(f"🌱 {result['created']} Teams aus universen.yaml angelegt")
+
+        started = time.perf_counter()
+        result = generate_load_data(session, args.users, args.photos, args.team_ratio, args.seed)
+        elapsed = time.perf_counter() - started
+
+    database.engine.dispose()
+    print(
+        f"🧪 {result['users']} Spieler, {result['submissions']} Submissions, "
+        f"{result['point_events']} Buchungen in {elapsed:.2f} s"
+    )
+
+
+if __name__ == '__main__':
+    main()
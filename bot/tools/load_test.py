@@ -0,0 +1,451 @@
+"""
+Lasttest für die komplette Bot-Pipeline.
+
+Startet eine isolierte Bot-Instanz (eigene SQLite-Datei und Foto-Verzeichnisse
+in einem Temp-Ordner) mit den echten Handlern aus main.register_handlers und
+lässt Hunderte simulierte Spieler gleichzeitig Partyfotos, Film-Referenzen,
+Puzzles, Team-Beitritte und /punkte schicken. Telegram (Bot-API und
+Datei-Downloads) und OpenAI werden durch einen lokalen Fake-Server mit
+einstellbarer Latenz ersetzt.
+
+Gemessen wird pro Aktion die Zeit vom Eintreffen des Updates bis zum Ende der
+Verarbeitung (inkl. Warten auf freie Slots), dazu Durchsatz, die Phasen der
+Handler-Metriken und Lock-Fehler/Retries der Datenbank.
+
+Aufruf: python -m tools.load_test [--users 200] [--actions 10] [--ai-latency-ms 1500] [--json]
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+TOKEN = '123456:FAKE-LOADTEST-TOKEN'
+FIRST_USER_ID = 700_000_000
+
+# Aktionen nach den ersten Schritten (/start, Team-Beitritt) mit Gewichtung
+ACTION_WEIGHTS = {
+    'party_photo': 50,
+    'film_reference': 25,
+    'points': 20,
+    'puzzle': 5,
+}
+
+# Text-Felder eines Multipart-Uploads (sendPhoto mit Datei)
+MULTIPART_FIELD = re.compile(rb'name="([a-z_]+)"\r\n\r\n([^\r]*)\r\n')
+
+# Antworten der Handler, die auf einen Verarbeitungsfehler hinweisen
+ERROR_MARKERS = ('Fehler beim', 'unerwarteter Fehler')
+
+
+def configure_environment(data_dir: Path, rate_limits: bool):
+    """
+    Isolierte Umgebung für die Bot-Instanz.
+
+    Muss vor dem ersten Import von config passieren - config liest die
+    Umgebung beim Import.
+    """
+    os.environ.update({
+        'TELEGRAM_BOT_TOKEN': TOKEN,
+        'DATABASE_URL': f"sqlite:///{data_dir / 'load_test.db'}",
+        'DATA_BASE_PATH': str(data_dir),
+        'OPENAI_API_KEY': 'sk-load-test',
+        'ADMIN_USER_IDS': '',
+        'LEADERBOARD_PORT': '0',
+        'SNAPSHOT_INTERVAL_MINUTES': '0',
+    })
+    if not rate_limits:
+        for name in ('RATE_LIMIT_PARTY_PHOTO', 'RATE_LIMIT_FILM_REFERENCE', 'RATE_LIMIT_PUZZLE'):
+            os.environ[name] = '0'
+
+
+def _fake_photo(seed: int) -> bytes:
+    """Eindeutiges JPEG (640x480) - gleiche Bilder würden den KI-Verdict-Cache treffen."""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    image = Image.new('RGB', (640, 480), tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(600), rng.randrange(440)
+        draw.rectangle((x, y, x + rng.randrange(20, 200), y + rng.randrange(20, 200)),
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=80)
+    return buffer.getvalue()
+
+
+class FakeBackend:
+    """Fake für Telegram-Bot-API, Telegram-Dateidownloads und OpenAI Chat Completions."""
+
+    BOT_METHODS = (
+        'getMe', 'sendMessage', 'editMessageText', 'getFile', 'sendPhoto',
+        'deleteMessage', 'sendChatAction', 'deleteWebhook', 'close',
+    )
+
+    def __init__(self, rtt_seconds: float, download_seconds: float, ai_seconds: float, approve_rate: float, seed: int):
+        from services.http_server import HTTPServer
+
+        self.one_way = rtt_seconds / 2
+        self.download_seconds = download_seconds
+        self.ai_seconds = ai_seconds
+        self.approve_rate = approve_rate
+        self.rng = random.Random(seed)
+        self.server = HTTPServer('127.0.0.1', 0)
+        self.files: Dict[str, bytes] = {}
+        self.api_calls: Dict[str, int] = {}
+        self.error_replies = 0
+        self.ai_requests = 0
+        self._message_id = 0
+        for method in self.BOT_METHODS:
+            self.server.route(f'/bot{TOKEN}/{method}', self._bot_handler(method), methods=('GET', 'POST'))
+        self.server.route('/v1/chat/completions', self._chat_completion, methods=('POST',))
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.server.port}'
+
+    def add_file(self, file_id: str, content: bytes):
+        """Stellt eine Datei bereit, die der Bot per getFile + Download abholt."""
+        self.files[file_id] = content
+        self.server.route(f'/file/bot{TOKEN}/photos/{file_id}.jpg', self._download(file_id))
+
+    def _download(self, file_id: str):
+        from services.http_server import Response
+
+        async def handle(request):
+            await asyncio.sleep(self.one_way + self.download_seconds)
+            return Response(self.files[file_id], content_type='image/jpeg')
+        return handle
+
+    @staticmethod
+    def _params(request) -> dict:
+        """Parameter aus JSON/Form oder - bei Datei-Uploads - einfachen Multipart-Feldern."""
+        from tools.benchmark_update_latency import FakeTelegramAPI
+
+        if not request.headers.get('content-type', '').startswith('multipart/form-data'):
+            return FakeTelegramAPI._params(request)
+        return {
+            name.decode(): value.decode('utf-8', 'replace')
+            for name, value in MULTIPART_FIELD.findall(request.body)
+        }
+
+    def _bot_handler(self, method: str):
+        from services.http_server import Response
+
+        async def handle(request):
+            await asyncio.sleep(self.one_way)
+            self.api_calls[method] = self.api_calls.get(method, 0) + 1
+            result = self._result(method, self._params(request))
+            await asyncio.sleep(self.one_way)
+            return Response(json.dumps({'ok': True, 'result': result}), content_type='application/json')
+        return handle
+
+    def _result(self, method: str, params: dict):
+        if method == 'getMe':
+            return {'id': 123456, 'is_bot': True, 'first_name': 'LoadTest', 'username': 'load_test_bot'}
+        if method == 'getFile':
+            file_id = params['file_id']
+            return {
+                'file_id': file_id, 'file_unique_id': file_id,
+                'file_size': len(self.files[file_id]), 'file_path': f'photos/{file_id}.jpg',
+            }
+        if method in ('sendMessage', 'editMessageText', 'sendPhoto'):
+            text = str(params.get('text') or params.get('caption') or '')
+            if any(marker in text for marker in ERROR_MARKERS):
+                self.error_replies += 1
+            self._message_id += 1
+            return {
+                'message_id': int(params.get('message_id') or self._message_id),
+                'date': int(time.time()),
+                'chat': {'id': int(params['chat_id']), 'type': 'private'},
+                'text': text,
+            }
+        return True
+
+    async def _chat_completion(self, request):
+        """Antwortet wie gpt-4o mit einem JSON-Verdict (Film-Referenz und Puzzle)."""
+        from services.http_server import Response
+
+        self.ai_requests += 1
+        # ±50 % Streuung um die mittlere Antwortzeit
+        await asyncio.sleep(self.ai_seconds * self.rng.uniform(0.5, 1.5))
+        approved = self.rng.random() < self.approve_rate
+        verdict = {
+            'is_reference': approved,
+            'is_valid_puzzle': approved,
+            'confidence': 90 if approved else 30,
+            'reasoning': 'Lasttest-Bewertung',
+            'detected_elements': [],
+            'reference_type': 'scene',
+        }
+        return Response(json.dumps({
+            'id': f'chatcmpl-{self.ai_requests}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': 'gpt-4o',
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': json.dumps(verdict)},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 850, 'completion_tokens': 60, 'total_tokens': 910},
+        }), content_type='application/json')
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+async def run_load_test(args, data_dir: Path) -> dict:
+    """Führt den Lasttest aus und liefert den Bericht."""
+    # Bot-Module erst jetzt importieren (config liest die Umgebung beim Import)
+    from telegram import Update
+    from telegram.ext import Application
+
+    from config import config
+    from database.crud import get_point_discrepancies
+    from database.db import db, lock_stats
+    from main import init_database, register_handlers
+    from services.metrics import metrics, InstrumentedRequest
+    from services.submission_pipeline import submission_pipeline
+    from services.update_processor import PerChatUpdateProcessor
+    from utils.yaml_loader import universe_loader
+
+    class TrackingProcessor(PerChatUpdateProcessor):
+        """Meldet das Ende jeder Update-Verarbeitung an den wartenden Spieler."""
+
+        def __init__(self, *processor_args):
+            super().__init__(*processor_args)
+            self.waiters: Dict[int, asyncio.Future] = {}
+
+        async def do_process_update(self, update, coroutine):
+            try:
+                await super().do_process_update(update, coroutine)
+            finally:
+                waiter = self.waiters.pop(getattr(update, 'update_id', None), None)
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(time.perf_counter())
+
+    backend = FakeBackend(
+        rtt_seconds=args.rtt_ms / 1000,
+        download_seconds=args.download_ms / 1000,
+        ai_seconds=args.ai_latency_ms / 1000,
+        approve_rate=args.approve_rate,
+        seed=args.seed
+    )
+    await backend.server.start()
+    os.environ['OPENAI_BASE_URL'] = f'{backend.base_url}/v1'
+
+    init_database()
+    teams = [team['team_id'] for team in universe_loader.get_teams()]
+    films = [team['film_title'] for team in universe_loader.get_teams()]
+    if not teams:
+        raise SystemExit("❌ Keine Teams in universen.yaml - Team-Beitritte und Puzzles nicht möglich")
+
+    processor = TrackingProcessor(args.concurrency)
+    application = (
+        Application.builder()
+        .token(TOKEN)
+        .base_url(f'{backend.base_url}/bot')
+        .base_file_url(f'{backend.base_url}/file/bot')
+        .request(InstrumentedRequest(connection_pool_size=256))
+        .concurrent_updates(processor)
+        .build()
+    )
+    register_handlers(application)
+    metrics.reset()
+    lock_stats.reset()
+
+    latencies: Dict[str, List[float]] = {}
+    counter = {'update_id': 0, 'file': 0}
+
+    async def send(kind: str, user_id: int, message: dict):
+        """Stellt ein Update zu und wartet, bis der Bot es fertig verarbeitet hat."""
+        counter['update_id'] += 1
+        update_id = counter['update_id']
+        message.update({
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': f'Spieler{user_id - FIRST_USER_ID}'},
+        })
+        update = Update.de_json({'update_id': update_id, 'message': message}, application.bot)
+        waiter = asyncio.get_running_loop().create_future()
+        processor.waiters[update_id] = waiter
+        started = time.perf_counter()
+        await application.update_queue.put(update)
+        finished = await waiter
+        latencies.setdefault(kind, []).append((finished - started) * 1000)
+
+    def command(text: str) -> dict:
+        return {'text': text, 'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]}
+
+    async def photo(caption: str = None) -> dict:
+        counter['file'] += 1
+        file_id = f'load{counter["file"]}'
+        # Bild im Thread erzeugen - der Event-Loop gehört dem Bot
+        content = await asyncio.to_thread(_fake_photo, args.seed * 1_000_003 + counter['file'])
+        backend.add_file(file_id, content)
+        message = {'photo': [{
+            'file_id': file_id, 'file_unique_id': file_id,
+            'width': 640, 'height': 480, 'file_size': len(content),
+        }]}
+        if caption:
+            message['caption'] = caption
+        return message
+
+    async def simulate_user(index: int, rng: random.Random):
+        user_id = FIRST_USER_ID + index
+        await asyncio.sleep(rng.uniform(0, args.ramp_up))
+        await send('start', user_id, command('/start'))
+        if rng.random() < args.team_ratio:
+            await send('team_join', user_id, command(f'/team {rng.choice(teams)}'))
+        kinds, weights = zip(*ACTION_WEIGHTS.items())
+        for _ in range(args.actions):
+            await asyncio.sleep(rng.expovariate(1000 / args.think_ms) if args.think_ms > 0 else 0)
+            kind = rng.choices(kinds, weights)[0]
+            if kind == 'party_photo':
+                await send(kind, user_id, await photo())
+            elif kind == 'film_reference':
+                await send(kind, user_id, await photo(f'Film: {rng.choice(films)}'))
+            elif kind == 'puzzle':
+                await send(kind, user_id, await photo('Puzzle'))
+            else:
+                await send(kind, user_id, command('/punkte'))
+
+    try:
+        async with application:
+            await application.start()
+            if args.pipeline:
+                await submission_pipeline.start(application.bot)
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                simulate_user(index, random.Random(args.seed + index)) for index in range(args.users)
+            ))
+            elapsed = time.perf_counter() - started
+            if args.pipeline:
+                # Gemessen wird bis zur Bestätigung - Ergebnisse trotzdem abwarten (Ledger-Prüfung)
+                await submission_pipeline.join()
+                drained = time.perf_counter() - started
+                await submission_pipeline.stop()
+            await application.stop()
+    finally:
+        await backend.server.stop()
+
+    with db.get_session() as session:
+        discrepancies = len(get_point_discrepancies(session))
+
+    actions = sum(len(values) for values in latencies.values())
+    report = {
+        'users': args.users,
+        'concurrency': args.concurrency,
+        'actions': actions,
+        'seconds': round(elapsed, 2),
+        'throughput_per_s': round(actions / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': {
+            kind: {
+                'count': len(values),
+                'p50': round(_percentile(sorted(values), 50), 1),
+                'p95': round(_percentile(sorted(values), 95), 1),
+                'p99': round(_percentile(sorted(values), 99), 1),
+                'max': round(max(values), 1),
+            }
+            for kind, values in sorted(latencies.items())
+        },
+        'handlers': [
+            {key: row[key] for key in ('handler', 'count', 'errors', 'p95_ms', 'phases')}
+            for row in metrics.snapshot()
+        ],
+        'db_lock_errors': lock_stats.errors,
+        'db_lock_retries': lock_stats.retries,
+        'ai_requests': backend.ai_requests,
+        'error_replies': backend.error_replies,
+        'ledger_discrepancies': discrepancies,
+        'api_calls': dict(sorted(backend.api_calls.items())),
+        'database': config.DATABASE_URL,
+    }
+    if args.pipeline:
+        report['pipeline'] = {
+            key: value for key, value in submission_pipeline.get_stats().items()
+            if key in ('workers', 'submitted', 'completed', 'failed')
+        }
+        report['pipeline']['drained_seconds'] = round(drained, 2)
+    return report
+
+
+def _print_report(report: dict):
+    print(
+        f"📊 {report['actions']} Aktionen von {report['users']} Spielern in {report['seconds']:.1f} s "
+        f"→ {report['throughput_per_s']:.1f}/s (max. {report['concurrency']} parallel)"
+    )
+    print(f"  {'Aktion':<16} {'Anzahl':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for kind, row in report['latency_ms'].items():
+        print(
+            f"  {kind:<16} {row['count']:>7} {row['p50']:>7.0f}ms {row['p95']:>7.0f}ms "
+            f"{row['p99']:>7.0f}ms {row['max']:>7.0f}ms"
+        )
+    print("⏱️  Handler (Ø ms pro Phase):")
+    for row in report['handlers']:
+        phases = " | ".join(f"{phase} {ms:.0f}" for phase, ms in row['phases'].items())
+        print(f"  {row['handler']:<20} {row['count']:>6}x  p95 {row['p95_ms']:>6.0f} ms  Fehler {row['errors']:<3} {phases}")
+    print(
+        f"🔒 DB-Locks: {report['db_lock_errors']} Fehler, {report['db_lock_retries']} Retries   "
+        f"🤖 KI-Requests: {report['ai_requests']}   ❌ Fehler-Antworten: {report['error_replies']}   "
+        f"📒 Ledger-Abweichungen: {report['ledger_discrepancies']}"
+    )
+    if 'pipeline' in report:
+        pipeline = report['pipeline']
+        workers = ", ".join(f"{stage} {count}" for stage, count in pipeline['workers'].items())
+        print(
+            f"📬 Pipeline ({workers}): {pipeline['completed']}/{pipeline['submitted']} fertig, "
+            f"{pipeline['failed']} Fehler, leer nach {pipeline['drained_seconds']:.1f} s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lasttest der Bot-Pipeline mit simulierten Spielern')
+    parser.add_argument('--users', type=int, default=200, help='Anzahl gleichzeitiger Spieler')
+    parser.add_argument('--actions', type=int, default=10, help='Aktionen pro Spieler nach /start und Team-Beitritt')
+    parser.add_argument('--concurrency', type=int, default=16, help='Max. parallel verarbeitete Updates (CONCURRENT_UPDATES)')
+    parser.add_argument('--think-ms', type=float, default=500, help='Ø Pause eines Spielers zwischen zwei Aktionen')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Spieler starten verteilt über so viele Sekunden')
+    parser.add_argument('--team-ratio', type=float, default=0.8, help='Anteil der Spieler, die einem Team beitreten')
+    parser.add_argument('--rtt-ms', type=float, default=40, help='Simulierte Round-Trip-Zeit zu Telegram')
+    parser.add_argument('--download-ms', type=float, default=50, help='Zusätzliche Dauer eines Foto-Downloads')
+    parser.add_argument('--ai-latency-ms', type=float, default=1500, help='Ø Antwortzeit der (Fake-)KI')
+    parser.add_argument('--approve-rate', type=float, default=0.7, help='Anteil positiver KI-Bewertungen')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Hintergrund-Pipeline starten (Latenz = bis zur Bestätigung)')
+    parser.add_argument('--rate-limits', action='store_true', help='RATE_LIMIT_* aus der Umgebung beibehalten')
+    parser.add_argument('--data-dir', default=None, help='Daten hier ablegen und behalten (default: Temp-Ordner)')
+    parser.add_argument('--seed', type=int, default=2025, help='Zufalls-Seed')
+    parser.add_argument('--json', action='store_true', help='Bericht zusätzlich als JSON-Zeile ausgeben')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR, format='%(levelname)s %(name)s: %(message)s')
+
+    with tempfile.TemporaryDirectory(prefix='load_test_') as tmp:
+        data_dir = Path(args.data_dir or tmp).resolve()
+        data_dir.mkdir(parents=True, exist_ok=True)
+        configure_environment(data_dir, args.rate_limits)
+        print(
+            f"🧪 {args.users} Spieler × {args.actions} Aktionen, KI Ø {args.ai_latency_ms:g} ms, "
+            f"RTT {args.rtt_ms:g} ms, Daten: {data_dir}"
+        )
+        report = asyncio.run(run_load_test(args, data_dir))
+
+    _print_report(report)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
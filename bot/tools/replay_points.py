@@ -0,0 +1,59 @@
+"""
+Spielt das Punkte-Ledger neu ab.
+
+Ohne Argumente werden genehmigte Submissions gegen die aktuellen Punkte-Regeln
+(POINTS_* in .env) geprüft und Differenzen angezeigt. Mit --apply werden sie
+als Korrekturbuchungen angehängt, mit --rebuild die Aggregate (user_scores,
+total_points) komplett aus dem Ledger neu aufgebaut.
+
+Aufruf: python -m tools.replay_points [--apply] [--rebuild]
+"""
+import argparse
+import logging
+
+from config import config
+from database.db import db
+from database.crud import backfill_point_ledger, rebuild_score_aggregates, replay_submission_points
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Gleicht Punkte mit den aktuellen Regeln ab und baut Aggregate aus dem Ledger neu auf'
+    )
+    parser.add_argument('--apply', action='store_true', help='Differenzen als Korrekturbuchungen speichern')
+    parser.add_argument('--rebuild', action='store_true', help='user_scores und total_points aus dem Ledger neu aufbauen')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+
+    db.create_tables()
+    with db.get_session() as session:
+        backfill_point_ledger(session)
+
+        if args.rebuild:
+            rows = rebuild_score_aggregates(session)
+            print(f"🔁 Aggregate aus dem Ledger neu aufgebaut ({rows} Zeilen)")
+
+        rules = config.point_rules()
+        print("📏 Regeln: " + ", ".join(f"{category}={points}" for category, points in rules.items()))
+
+        adjustments = replay_submission_points(session, rules, apply=args.apply)
+        if not adjustments:
+            print("✅ Alle genehmigten Submissions entsprechen den Regeln")
+            return
+
+        print(f"{'Submission':>10} {'User':>6} {'Kategorie':<16} {'Gebucht':>8} {'Soll':>6}")
+        for row in adjustments:
+            print(
+                f"{row['submission_id']:>10} {row['user_id']:>6} {row['category']:<16} "
+                f"{row['booked']:>8} {row['expected']:>6}"
+            )
+        delta = sum(row['expected'] - row['booked'] for row in adjustments)
+        if args.apply:
+            print(f"🔧 {len(adjustments)} Korrekturbuchungen angelegt ({delta:+d} Punkte)")
+        else:
+            print(f"ℹ️  {len(adjustments)} Abweichungen ({delta:+d} Punkte) - mit --apply übernehmen")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Legt alle Teams aus universen.yaml in einer Transaktion an bzw. aktualisiert sie.
+Unveränderte Teams werden nicht angefasst - mehrfaches Ausführen ist unbedenklich.
+
+Aufruf: python -m tools.seed_teams [--yaml ../notes/universen.yaml] [--database-url sqlite:///load.db]
+"""
+import argparse
+import logging
+import time
+
+from config import config
+from database.crud import upsert_teams
+from database.db import Database
+from utils.yaml_loader import UniverseLoader
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teams aus universen.yaml in die Datenbank übernehmen')
+    parser.add_argument('--yaml', default=None, help='Pfad zur universen.yaml (default: ../notes/universen.yaml)')
+    parser.add_argument('--database-url', default=config.DATABASE_URL, help='Ziel-Datenbank (default: DATABASE_URL)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(message)s')
+
+    loader = UniverseLoader(args.yaml)
+    teams = loader.get_teams()
+    if not teams:
+        raise SystemExit(f"❌ Keine Teams in {loader.yaml_path}")
+
+    database = Database(args.database_url)
+    database.create_tables()
+    started = time.perf_counter()
+    with database.get_session() as session:
+        result = upsert_teams(session, teams)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    database.engine.dispose()
+
+    print(
+        f"🌱 {len(teams)} Teams aus {loader.yaml_path.name}: "
+        f"{result['created']} neu, {result['updated']} aktualisiert, "
+        f"{result['unchanged']} unverändert ({elapsed_ms:.1f} ms)"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Lazy Service-Container für die globalen Dienste (DB, KI, Templates, ...).
+Die Modul-Singletons sind Platzhalter, die den eigentlichen Dienst erst beim
+ersten Zugriff erzeugen. Ein Import von handlers/ oder main.py legt so keine
+Clients, Verzeichnisse oder Datenbank-Engines an - beim Start werden die Dienste
+stattdessen parallel in Threads initialisiert.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, TypeVar, cast
+
+logger = logging.getLogger('bot.utils.service_container')
+
+T = TypeVar('T')
+
+
+class LazyService:
+    """
+    Platzhalter, der einen Dienst beim ersten Attribut-Zugriff erzeugt.
+
+    Attribute werden an den Dienst durchgereicht (lesen, setzen, löschen).
+    Die Erzeugung ist thread-safe und passiert genau einmal; schlägt sie fehl,
+    wird es beim nächsten Zugriff erneut versucht.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        object.__setattr__(self, '_lazy_name', name)
+        object.__setattr__(self, '_lazy_factory', factory)
+        object.__setattr__(self, '_lazy_instance', None)
+        object.__setattr__(self, '_lazy_seconds', None)
+        # RLock: Factories dürfen andere Dienste (auch indirekt) anfordern
+        object.__setattr__(self, '_lazy_lock', threading.RLock())
+
+    def _lazy_get(self) -> Any:
+        """Gibt den Dienst zurück und erzeugt ihn bei Bedarf."""
+        instance = self._lazy_instance
+        if instance is not None:
+            return instance
+
+        with self._lazy_lock:
+            if self._lazy_instance is None:
+                started = time.perf_counter()
+                instance = self._lazy_factory()
+                object.__setattr__(self, '_lazy_seconds', time.perf_counter() - started)
+                object.__setattr__(self, '_lazy_instance', instance)
+                logger.debug(f"Dienst '{self._lazy_name}' initialisiert ({self._lazy_seconds * 1000:.0f} ms)")
+            return self._lazy_instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._lazy_get(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._lazy_get(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self._lazy_get(), name)
+
+    def __repr__(self) -> str:
+        if self._lazy_instance is None:
+            return f"<LazyService {self._lazy_name} (nicht initialisiert)>"
+        return repr(self._lazy_instance)
+
+
+class ServiceContainer:
+    """Registry aller lazy Dienste."""
+
+    def __init__(self):
+        self._services: Dict[str, LazyService] = {}
+
+    def register(self, name: str, factory: Callable[[], T]) -> T:
+        """
+        Registriert einen Dienst und gibt seinen Platzhalter zurück.
+
+        Usage:
+            photo_manager = container.register('photo_manager', PhotoManager)
+
+        Args:
+            name: Eindeutiger Name (für warm_up/status)
+            factory: Erzeugt den Dienst (ohne Argumente)
+        """
+        if name in self._services:
+            raise ValueError(f"Dienst '{name}' ist bereits registriert")
+        service = LazyService(name, factory)
+        self._services[name] = service
+        return cast(T, service)
+
+    def get(self, name: str) -> Any:
+        """Gibt den (ggf. frisch erzeugten) Dienst zurück."""
+        return self._services[name]._lazy_get()
+
+    def is_initialized(self, name: str) -> bool:
+        """Prüft, ob ein Dienst bereits erzeugt wurde."""
+        return self._services[name]._lazy_instance is not None
+
+    def status(self) -> Dict[str, Optional[float]]:
+        """
+        Initialisierungsdauer pro Dienst.
+
+        Returns:
+            Dict[str, Optional[float]]: Name → Millisekunden (None = noch nicht erzeugt)
+        """
+        return {
+            name: None if service._lazy_seconds is None else round(service._lazy_seconds * 1000, 1)
+            for name, service in self._services.items()
+        }
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, max_workers: int = 8) -> Dict[str, float]:
+        """
+        Erzeugt noch nicht initialisierte Dienste parallel in Worker-Threads.
+
+        Fehler werden geloggt, aber nicht geworfen - der Dienst wird dann beim
+        ersten echten Zugriff erneut erzeugt (und wirft dort).
+
+        Args:
+            names: Dienste (default: alle registrierten)
+            max_workers: Max. Anzahl Threads
+
+        Returns:
+            Dict[str, float]: Name → Millisekunden der in diesem Aufruf erzeugten Dienste
+        """
+        pending = [
+            name for name in (names if names is not None else list(self._services))
+            if not self.is_initialized(name)
+        ]
+        if not pending:
+            return {}
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending)), thread_name_prefix='warm-up') as pool:
+            futures = {name: pool.submit(self.get, name) for name in pending}
+
+        result = {}
+        for name, future in futures.items():
+            error = future.exception()
+            if error is not None:
+                logger.error(f"Dienst '{name}' konnte nicht initialisiert werden: {error}")
+            elif self._services[name]._lazy_seconds is not None:
+                result[name] = round(self._services[name]._lazy_seconds * 1000, 1)
+
+        logger.info(
+            f"{len(result)} Dienste in {(time.perf_counter() - started) * 1000:.0f} ms initialisiert "
+            f"({', '.join(f'{name} {ms:.0f} ms' for name, ms in result.items())})"
+        )
+        return result
+
+
+# Globale Instanz
+container = ServiceContainer()
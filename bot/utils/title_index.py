@@ -0,0 +1,148 @@
+"""
+Film-Titel-Index für "Film:"-Captions.
+Löst Tippfehler, Akzente und Aliase aus universen.yaml auf den kanonischen Titel auf.
+"""
+
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
+
+from utils.service_container import container
+from utils.yaml_loader import universe_loader, normalize_title
+
+logger = logging.getLogger('bot.utils.title_index')
+
+# Artikel, die beim Vergleich ignoriert werden ("The Matrix" == "Matrix")
+LEADING_ARTICLES = ('the ', 'der ', 'die ', 'das ')
+
+# Mindest-Ähnlichkeit (0-1) für einen Fuzzy-Treffer
+MIN_SIMILARITY = 0.75
+
+# Anzahl Trigramm-Kandidaten, die mit Levenshtein geprüft werden
+MAX_CANDIDATES = 5
+
+
+def trigrams(text: str) -> Set[str]:
+    """Zerlegt Text in Zeichen-Trigramme (mit Rand-Padding)."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Berechnet die Edit-Distanz zwischen zwei Strings."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,                       # Löschen
+                current[j - 1] + 1,                    # Einfügen
+                previous[j - 1] + (char_a != char_b)   # Ersetzen
+            ))
+        previous = current
+    return previous[-1]
+
+
+def _strip_article(key: str) -> str:
+    """Entfernt führenden Artikel aus normalisiertem Titel."""
+    for article in LEADING_ARTICLES:
+        if key.startswith(article) and len(key) > len(article):
+            return key[len(article):]
+    return key
+
+
+@dataclass(frozen=True)
+class TitleMatch:
+    """Ergebnis einer Titel-Auflösung."""
+    film_title: str   # Kanonischer Titel aus der YAML
+    score: float      # 1.0 = exakt / Alias, sonst Levenshtein-Ähnlichkeit
+    method: str       # 'exact', 'alias' oder 'fuzzy'
+
+
+class TitleIndex:
+    """Normalisierter Index aller Film-Titel und Aliase."""
+
+    def __init__(self, loader=None):
+        """
+        Baut den Index aus dem UniverseLoader.
+
+        Args:
+            loader: UniverseLoader (default: globale Instanz)
+        """
+        self.loader = loader or universe_loader
+        self._keys: Dict[str, TitleMatch] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+
+        self.rebuild()
+        # YAML-Reload → Index neu bauen
+        self.loader.add_reload_listener(self.rebuild)
+
+    def rebuild(self):
+        """Baut Lookup-Tabelle und Trigramm-Index neu auf."""
+        keys: Dict[str, TitleMatch] = {}
+        for film_title, aliases in self.loader.get_title_aliases():
+            for name, method in [(film_title, 'exact')] + [(alias, 'alias') for alias in aliases]:
+                key = normalize_title(name)
+                if not key:
+                    continue
+                for variant in {key, _strip_article(key)}:
+                    keys.setdefault(variant, TitleMatch(film_title, 1.0, method))
+
+        index: Dict[str, Set[str]] = {}
+        for key in keys:
+            for gram in trigrams(key):
+                index.setdefault(gram, set()).add(key)
+
+        # Atomarer Austausch
+        self._keys, self._trigrams = keys, index
+        self._match_cached.cache_clear()
+        logger.info(f"Title index built: {len(keys)} keys")
+
+    def match(self, raw_title: str) -> Optional[TitleMatch]:
+        """
+        Löst einen eingegebenen Titel auf.
+
+        Args:
+            raw_title: Titel aus der Caption (z.B. "matrx")
+
+        Returns:
+            TitleMatch oder None wenn kein Film ähnlich genug ist
+        """
+        key = _strip_article(normalize_title(raw_title))
+        if not key:
+            return None
+        return self._match_cached(key)
+
+    def resolve(self, raw_title: str) -> Optional[str]:
+        """Gibt den kanonischen Titel zurück (oder None)."""
+        result = self.match(raw_title)
+        return result.film_title if result else None
+
+    @lru_cache(maxsize=512)
+    def _match_cached(self, key: str) -> Optional[TitleMatch]:
+        """Exakter Lookup, sonst Trigramm-Kandidaten + Levenshtein (gecached)."""
+        exact = self._keys.get(key)
+        if exact:
+            return exact
+
+        # Kandidaten nach Anzahl gemeinsamer Trigramme
+        counts: Dict[str, int] = {}
+        for gram in trigrams(key):
+            for candidate in self._trigrams.get(gram, ()):
+                counts[candidate] = counts.get(candidate, 0) + 1
+        candidates: List[str] = sorted(counts, key=counts.get, reverse=True)[:MAX_CANDIDATES]
+
+        best: Optional[TitleMatch] = None
+        for candidate in candidates:
+            distance = levenshtein(key, candidate)
+            similarity = 1.0 - distance / max(len(key), len(candidate))
+            if similarity >= MIN_SIMILARITY and (best is None or similarity > best.score):
+                best = TitleMatch(self._keys[candidate].film_title, round(similarity, 2), 'fuzzy')
+        return best
+
+
+# Globale Instanz (wird beim ersten Zugriff erzeugt)
+title_index = container.register('title_index', TitleIndex)
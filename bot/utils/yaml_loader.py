@@ -2,16 +2,115 @@
 YAML-Loader für universen.yaml - lädt Film/Team-Daten.
 """
 
+import asyncio
+import unicodedata
 import yaml
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Dict, Any
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 import logging
 
+from utils.service_container import container
+
 logger = logging.getLogger('bot.utils.yaml_loader')
 
 
+def normalize_title(title: str) -> str:
+    """
+    Normalisiert einen Film-Titel für Lookups.
+    
+    Groß-/Kleinschreibung, Akzente (é → e, ü → u), Satzzeichen und
+    mehrfache Leerzeichen werden vereinheitlicht.
+    
+    Args:
+        title: Film-Titel
+    
+    Returns:
+        str: Normalisierter Schlüssel
+    """
+    folded = unicodedata.normalize('NFKD', (title or "").casefold().replace('ß', 'ss'))
+    without_accents = "".join(c for c in folded if not unicodedata.combining(c))
+    cleaned = "".join(c if c.isalnum() else " " for c in without_accents)
+    return " ".join(cleaned.split())
+
+
+def _freeze(value: Any) -> Any:
+    """Wandelt YAML-Daten rekursiv in unveränderliche Strukturen um."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _build_team(universe: Mapping[str, Any]) -> Optional[Mapping[str, Any]]:
+    """Extrahiert die Team-Daten eines Universums (None wenn unvollständig)."""
+    # Nur Universen mit vollständigen Team-Daten
+    if not universe.get('team_id') or not universe.get('characters'):
+        return None
+    
+    characters = universe.get('characters', ())
+    if len(characters) < 2:
+        return None
+    
+    return MappingProxyType({
+        'team_id': universe['team_id'],
+        'film_title': universe.get('title', 'Unknown'),
+        'character_1': characters[0].get('name', ''),
+        'character_2': characters[1].get('name', ''),
+        'character_1_id': characters[0].get('id', ''),
+        'character_2_id': characters[1].get('id', ''),
+        'puzzle_link': universe.get('puzzle_link', ''),
+        'easter_egg': universe.get('easter_egg') or MappingProxyType({}),
+        'film_clip': universe.get('film_clip', ''),
+        'posters': universe.get('posters') or ()
+    })
+
+
+@dataclass(frozen=True)
+class UniverseSnapshot:
+    """Unveränderlicher, indizierter Stand von universen.yaml."""
+    universes: Tuple[Mapping[str, Any], ...] = ()
+    teams: Tuple[Mapping[str, Any], ...] = ()
+    by_title: Mapping[str, Mapping[str, Any]] = field(default_factory=lambda: MappingProxyType({}))
+    by_team_id: Mapping[str, Mapping[str, Any]] = field(default_factory=lambda: MappingProxyType({}))
+    by_character_id: Mapping[str, Mapping[str, Any]] = field(default_factory=lambda: MappingProxyType({}))
+    
+    @classmethod
+    def from_universes(cls, universes: List[Dict[str, Any]]) -> 'UniverseSnapshot':
+        """Baut Snapshot inkl. Lookup-Indizes aus den rohen YAML-Universen."""
+        frozen = tuple(_freeze(u) for u in universes if isinstance(u, dict))
+        
+        by_title = {}
+        teams = []
+        by_team_id = {}
+        by_character_id = {}
+        
+        for universe in frozen:
+            if universe.get('title'):
+                by_title.setdefault(normalize_title(universe['title']), universe)
+            
+            team = _build_team(universe)
+            if team is None:
+                continue
+            teams.append(team)
+            by_team_id[str(team['team_id'])] = team
+            for character_id in (team['character_1_id'], team['character_2_id']):
+                if character_id:
+                    by_character_id[str(character_id)] = team
+        
+        return cls(
+            universes=frozen,
+            teams=tuple(teams),
+            by_title=MappingProxyType(by_title),
+            by_team_id=MappingProxyType(by_team_id),
+            by_character_id=MappingProxyType(by_character_id)
+        )
+
+
 class UniverseLoader:
-    """Lädt und verarbeitet universen.yaml."""
+    """Lädt universen.yaml und hält einen atomar austauschbaren Snapshot."""
     
     def __init__(self, yaml_path: str = None):
         """
@@ -26,65 +125,150 @@ class UniverseLoader:
             yaml_path = script_dir.parent / "notes" / "universen.yaml"
         
         self.yaml_path = Path(yaml_path)
-        self.universes = []
+        self.snapshot = UniverseSnapshot()
+        self._file_signature = None
+        self._failed_signature = None
+        self._reload_listeners = []
         
         if self.yaml_path.exists():
             self.load()
         else:
             logger.error(f"YAML file not found: {self.yaml_path}")
     
-    def load(self) -> List[Dict[str, Any]]:
+    @property
+    def universes(self) -> Tuple[Mapping[str, Any], ...]:
+        """Universen des aktuellen Snapshots."""
+        return self.snapshot.universes
+    
+    def load(self) -> Tuple[Mapping[str, Any], ...]:
         """
-        Lädt die YAML-Datei.
+        Lädt die YAML-Datei und tauscht den Snapshot atomar aus.
+        
+        Bei Fehlern (z.B. halb gespeicherte Datei) bleibt der alte Snapshot aktiv.
+        Die Datei-Signatur wird erst nach erfolgreichem Laden übernommen - der
+        Watcher versucht es also beim nächsten Intervall erneut.
         
         Returns:
-            List[Dict]: Liste von Universe-Dictionaries
+            Tuple[Mapping]: Universen des neuen Snapshots (leer bei Fehler)
         """
+        # Signatur vor dem Lesen: Schreibt jemand währenddessen, sieht der Watcher die Änderung
+        signature = self._stat_signature()
         try:
             with open(self.yaml_path, 'r', encoding='utf-8') as f:
                 data = yaml.safe_load(f)
-                self.universes = data.get('universes', [])
-                logger.info(f"Loaded {len(self.universes)} universes from YAML")
-                return self.universes
+            snapshot = UniverseSnapshot.from_universes(data.get('universes') or [])
         except Exception as e:
-            logger.error(f"Error loading YAML: {e}", exc_info=True)
-            return []
+            # Pro Dateistand nur einmal mit Traceback loggen, Wiederholungen nur als Debug
+            if signature != self._failed_signature:
+                logger.error(f"Error loading YAML: {e}", exc_info=True)
+            else:
+                logger.debug(f"YAML still invalid: {e}")
+            self._failed_signature = signature
+            return ()
+        
+        # Atomarer Austausch - Leser sehen immer einen vollständigen Stand
+        self.snapshot = snapshot
+        self._file_signature = signature
+        self._failed_signature = None
+        logger.info(
+            f"Loaded {len(snapshot.universes)} universes from YAML "
+            f"({len(snapshot.teams)} teams)"
+        )
+        
+        self._notify_reload()
+        return snapshot.universes
     
-    def get_teams(self) -> List[Dict[str, Any]]:
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        """mtime + Größe der YAML-Datei (None wenn nicht vorhanden)."""
+        try:
+            stat = self.yaml_path.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def check_for_changes(self) -> bool:
         """
-        Extrahiert Team-Daten aus Universes.
+        Lädt die YAML neu, falls sich die Datei seit dem letzten Laden geändert hat.
         
         Returns:
-            List[Dict]: Team-Informationen
+            bool: True wenn neu geladen wurde
         """
-        teams = []
+        signature = self._stat_signature()
+        if signature is None or signature == self._file_signature:
+            return False
         
-        for universe in self.universes:
-            # Nur Universen mit vollständigen Team-Daten
-            if not universe.get('team_id') or not universe.get('characters'):
-                continue
-            
-            characters = universe.get('characters', [])
-            if len(characters) < 2:
-                continue
-            
-            team = {
-                'team_id': universe['team_id'],
-                'film_title': universe.get('title', 'Unknown'),
-                'character_1': characters[0].get('name', ''),
-                'character_2': characters[1].get('name', ''),
-                'character_1_id': characters[0].get('id', ''),
-                'character_2_id': characters[1].get('id', ''),
-                'puzzle_link': universe.get('puzzle_link', ''),
-                'easter_egg': universe.get('easter_egg', {}),
-                'film_clip': universe.get('film_clip', ''),
-                'posters': universe.get('posters', [])
-            }
-            
-            teams.append(team)
+        if signature != self._failed_signature:
+            logger.info(f"YAML changed on disk, reloading: {self.yaml_path}")
+        self.load()
+        return self._failed_signature is None
+    
+    async def watch(self, interval: float = 5.0):
+        """
+        Überwacht die YAML-Datei per mtime-Polling (läuft bis zum Abbruch).
+        
+        Läuft im Event-Loop, damit Reload-Listener (z.B. DB-Sync) im selben
+        Thread wie die Handler laufen.
         
-        logger.info(f"Extracted {len(teams)} teams from universes")
-        return teams
+        Args:
+            interval: Prüfintervall in Sekunden
+        """
+        logger.info(f"Watching {self.yaml_path} for changes (every {interval}s)")
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                logger.error(f"Error while checking YAML for changes: {e}", exc_info=True)
+    
+    def add_reload_listener(self, callback):
+        """
+        Registriert Callback, der nach jedem erfolgreichen Laden aufgerufen wird.
+        
+        Args:
+            callback: Funktion ohne Argumente (z.B. Cache-Invalidierung)
+        """
+        self._reload_listeners.append(callback)
+    
+    def _notify_reload(self):
+        """Benachrichtigt alle Reload-Listener."""
+        for callback in list(self._reload_listeners):
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in YAML reload listener: {e}", exc_info=True)
+    
+    def get_teams(self) -> List[Mapping[str, Any]]:
+        """
+        Gibt die Team-Daten des aktuellen Snapshots zurück.
+        
+        Returns:
+            List[Mapping]: Team-Informationen (unveränderlich)
+        """
+        return list(self.snapshot.teams)
+    
+    def get_team(self, team_id) -> Optional[Mapping[str, Any]]:
+        """Team-Daten per team_id (O(1))."""
+        return self.snapshot.by_team_id.get(str(team_id))
+    
+    def get_team_by_character_id(self, character_id) -> Optional[Mapping[str, Any]]:
+        """Team-Daten per Charakter-ID (O(1))."""
+        return self.snapshot.by_character_id.get(str(character_id))
+    
+    def get_universe(self, title: str) -> Optional[Mapping[str, Any]]:
+        """Universum per (normalisiertem) Film-Titel (O(1))."""
+        return self.snapshot.by_title.get(normalize_title(title))
+    
+    def get_title_aliases(self) -> List[Tuple[str, List[str]]]:
+        """
+        Gibt alle Film-Titel mit ihren Aliasen zurück.
+        
+        Returns:
+            List[Tuple[str, List[str]]]: (Titel, Aliase) aus dem Feld 'aliases'
+        """
+        return [
+            (u['title'], list(u.get('aliases') or []))
+            for u in self.universes if u.get('title')
+        ]
     
     def get_films(self) -> List[str]:
         """
@@ -96,5 +280,5 @@ class UniverseLoader:
         return [u.get('title') for u in self.universes if u.get('title')]
 
 
-# Globale Instanz
-universe_loader = UniverseLoader()
+# Globale Instanz (YAML wird beim ersten Zugriff geladen)
+universe_loader = container.register('universe_loader', UniverseLoader)